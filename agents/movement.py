@@ -0,0 +1,153 @@
+"""
+Modelo de desplazamiento de los agentes nocturnos.
+
+El tiempo de viaje hasta una tarea sale de la distancia real (``calculate_distance``)
+y de la velocidad configurada, en lugar de una espera aleatoria, de modo que la
+calidad de la asignación (elegir al agente más cercano) se refleja en el tiempo de
+respuesta. Durante el viaje la posición se interpola en línea recta entre el origen y
+el destino (a escala de una ciudad, interpolar latitud y longitud es suficiente).
+
+``FleetMovement`` guarda los viajes en curso de todo un host en arrays de NumPy y
+avanza las posiciones de todos los agentes en camino con una sola operación por tick.
+NumPy se importa al crear el primero, de modo que un ``NightAgent`` suelto, que solo
+usa ``travel_time`` e ``interpolate_position``, no lo carga.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import config
+from common.geo import calculate_distance
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Position = Tuple[float, float]
+
+
+def travel_time(origin: Position, destination: Position, speed_kmh: Optional[float] = None,
+                time_scale: Optional[float] = None) -> float:
+    """
+    Segundos que tarda un agente en ir de ``origin`` a ``destination``.
+
+    Args:
+        origin: Posición de partida.
+        destination: Posición de la tarea.
+        speed_kmh: Velocidad media; por defecto ``config.AGENT_SPEED_KMH``.
+        time_scale: Factor aplicado al tiempo de viaje; por defecto
+            ``config.AGENT_TRAVEL_TIME_SCALE``.
+    """
+    speed_kmh = speed_kmh or config.AGENT_SPEED_KMH
+    time_scale = config.AGENT_TRAVEL_TIME_SCALE if time_scale is None else time_scale
+    return calculate_distance(origin, destination) / speed_kmh * 3600.0 * time_scale
+
+
+def interpolate_position(origin: Position, destination: Position, fraction: float) -> Position:
+    """Posición tras recorrer ``fraction`` (0-1) del camino entre dos puntos."""
+    fraction = min(max(fraction, 0.0), 1.0)
+    return (origin[0] + (destination[0] - origin[0]) * fraction,
+            origin[1] + (destination[1] - origin[1]) * fraction)
+
+
+class FleetMovement:
+    """
+    Viajes en curso de un grupo de agentes, en arrays contiguos.
+
+    Cada viaje ocupa una fila (origen, desplazamiento total, hora de salida y
+    duración); al llegar, la última fila ocupa su hueco para mantener los arrays
+    compactos.
+    """
+
+    def __init__(self, speed_kmh: Optional[float] = None, time_scale: Optional[float] = None,
+                 capacity: int = 64):
+        """
+        Args:
+            speed_kmh: Velocidad media; por defecto ``config.AGENT_SPEED_KMH``.
+            time_scale: Factor del tiempo de viaje; por defecto ``config.AGENT_TRAVEL_TIME_SCALE``.
+            capacity: Filas reservadas inicialmente (crecen al doble si hacen falta).
+        """
+        import numpy as np
+
+        self.speed_kmh = speed_kmh
+        self.time_scale = time_scale
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._origin = np.empty((capacity, 2))
+        self._delta = np.empty((capacity, 2))
+        self._start = np.empty(capacity)
+        self._duration = np.empty(capacity)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._rows
+
+    def _grow(self) -> None:
+        import numpy as np
+
+        capacity = 2 * len(self._start)
+        for name in ('_origin', '_delta', '_start', '_duration'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:])
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def depart(self, agent_id: str, origin: Position, destination: Position, now: float) -> float:
+        """
+        Inicia (o redirige) el viaje de un agente.
+
+        Args:
+            agent_id: Agente que sale.
+            origin: Posición actual del agente.
+            destination: Posición de la tarea.
+            now: Hora de salida (reloj monótono).
+
+        Returns:
+            float: Duración del viaje en segundos.
+        """
+        duration = travel_time(origin, destination, self.speed_kmh, self.time_scale)
+        row = self._rows.get(agent_id)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._start):
+                self._grow()
+            self._ids.append(agent_id)
+            self._rows[agent_id] = row
+        self._origin[row] = origin
+        self._delta[row] = (destination[0] - origin[0], destination[1] - origin[1])
+        self._start[row] = now
+        self._duration[row] = duration
+        return duration
+
+    def arrive(self, agent_id: str) -> None:
+        """Retira el viaje de un agente (ha llegado o se ha cancelado)."""
+        row = self._rows.pop(agent_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+            for array in (self._origin, self._delta, self._start, self._duration):
+                array[row] = array[last]
+        self._ids.pop()
+
+    def positions(self, now: float) -> Tuple[List[str], "np.ndarray"]:
+        """
+        Posiciones de todos los agentes en camino en ``now``.
+
+        Returns:
+            tuple: (ids, array de forma (n, 2) con latitud y longitud), en el mismo orden.
+        """
+        import numpy as np
+
+        n = len(self._ids)
+        if not n:
+            return [], np.empty((0, 2))
+        duration = self._duration[:n]
+        elapsed = now - self._start[:n]
+        # Un viaje de duración 0 ya ha llegado
+        fraction = np.divide(elapsed, duration, out=np.ones(n), where=duration > 0)
+        np.clip(fraction, 0.0, 1.0, out=fraction)
+        return list(self._ids), self._origin[:n] + self._delta[:n] * fraction[:, None]
@@ -10,16 +10,17 @@ import threading
 import random
 
 import config
-from common.message import Message, StatusMessage, create_message_from_json
+from agents.movement import interpolate_position, travel_time
+from common.message import Message, StatusMessage, TaskMessage, create_message_from_json
 from common.utils import safe_sleep, get_random_sleep_time, setup_logger
 from common.geo import format_position, generate_random_position
-from communication.rabbitmq.publisher import RabbitMQPublisher
-from communication.rabbitmq.consumer import RabbitMQConsumer
-
-if config.COMMUNICATION_MODE == "sockets":
-    from communication.sockets.socket_client import SocketClient as CommunicationClient
-else:
-    from communication.rabbitmq.consumer import RabbitMQConsumer as CommunicationClient
+from common.constants import AgentStatus, CommunicationMode
+from communication.compression import compression_options
+from communication.factory import create_direct_client, get_consumer_class, get_publisher_class
+from communication.rabbitmq.topology import (
+    EXCHANGE, EXCHANGE_TYPE, agent_task_queue, completion_routing_key,
+    queue_arguments, status_routing_key, task_routing_key
+)
 
 def validate_config():
     required_keys = [
@@ -47,37 +48,45 @@ class NightAgent:
 
     def connect(self):
         try:
-            if config.COMMUNICATION_MODE == "rabbitmq":
-                self.comm_client = RabbitMQConsumer(
+            if config.COMMUNICATION_MODE in CommunicationMode.BROKER_MODES:
+                # Consumidor y publicador comparten la conexión del pool del proceso
+                pool = None
+                if config.COMMUNICATION_MODE == CommunicationMode.RABBITMQ and config.RABBITMQ_USE_CONNECTION_POOL:
+                    from communication.rabbitmq.connection_pool import get_connection_pool
+                    pool = get_connection_pool()
+                self.comm_client = get_consumer_class()(
                     host=config.RABBITMQ_HOST,
                     port=config.RABBITMQ_PORT,
                     username=config.RABBITMQ_USER,
                     password=config.RABBITMQ_PASSWORD,
-                    queue_name='tasks_shared_queue',
-                    exchange='night_tasks',
-                    exchange_type='topic',
-                    binding_keys=['task.broadcast']
+                    # Cola propia: solo llegan las tareas dirigidas a este agente
+                    queue_name=agent_task_queue(self.agent_id),
+                    exchange=EXCHANGE,
+                    exchange_type=EXCHANGE_TYPE,
+                    binding_keys=[task_routing_key(self.agent_id)],
+                    queue_arguments=queue_arguments(priority=True),
+                    max_redeliveries=config.RABBITMQ_MAX_REDELIVERIES,
+                    connection_pool=pool
                 )
                 self.comm_client.connect()
                 self.comm_client.start_consuming(callback=self._rabbitmq_dispatch)
 
                 # Inicializar publisher
-                self.publisher = RabbitMQPublisher(
+                self.publisher = get_publisher_class()(
                     host=config.RABBITMQ_HOST,
                     port=config.RABBITMQ_PORT,
                     username=config.RABBITMQ_USER,
                     password=config.RABBITMQ_PASSWORD,
-                    exchange='night_status',
-                    exchange_type='topic'
+                    exchange=EXCHANGE,
+                    exchange_type=EXCHANGE_TYPE,
+                    connection_pool=pool,
+                    **compression_options()
                 )
                 self.publisher.connect()
 
             else:
-                self.comm_client = CommunicationClient(
-                    host=config.SOCKET_HOST,
-                    port=config.SOCKET_PORT,
-                    message_handler=self.handle_task
-                )
+                self.comm_client = create_direct_client(message_handler=self.handle_task)
+                self.comm_client.connect()
                 self.publisher = self.comm_client
 
             self.logger.info(f"Conectado al servidor usando {config.COMMUNICATION_MODE}")
@@ -102,19 +111,20 @@ class NightAgent:
             self.logger.info("Cerrada conexión del publisher")
 
 
-    def send_status_update(self, is_busy):
-        status = "BUSY" if is_busy else "AVAILABLE"
+    def send_status_update(self, is_busy, task=None):
+        status = AgentStatus.BUSY if is_busy else AgentStatus.AVAILABLE
         message = StatusMessage(
             sender_id=self.agent_id,
             position=self.position,
-            status=status
+            status=status,
+            current_task_id=task.alert_id if task else None
         )
         message.to_json()
         try:
-            if config.COMMUNICATION_MODE == "rabbitmq":
+            if config.COMMUNICATION_MODE in CommunicationMode.BROKER_MODES:
                 self.publisher.publish_message(
                     message,
-                    routing_key='task.broadcast'
+                    routing_key=status_routing_key(self.agent_id)
                 )
             elif hasattr(self.publisher, 'send_message'):
                 self.publisher.send_message(message)
@@ -128,6 +138,24 @@ class NightAgent:
         try:
             task = create_message_from_json(task_json)
             self.logger.info(f"Tarea recibida: {task}")
+            if not isinstance(task, TaskMessage):
+                return True
+            if task.target_agent_id and task.target_agent_id != self.agent_id:
+                self.logger.warning(f"Tarea #{task.alert_id} dirigida a {task.target_agent_id}, se ignora")
+                return False
+            if self.busy:
+                self.logger.warning(f"Tarea #{task.alert_id} recibida mientras el agente está ocupado")
+                return False
+
+            self.busy = True
+            self.send_status_update(True, task)
+            self.task_thread = threading.Thread(
+                target=self.process_task,
+                args=(task,),
+                daemon=True,
+                name=f"Task-{self.agent_id}"
+            )
+            self.task_thread.start()
             return True
         except Exception as e:
             self.logger.exception(f"Error procesando tarea: {e}")
@@ -135,7 +163,7 @@ class NightAgent:
 
     def requeue_task(self, task_json):
         try:
-            if config.COMMUNICATION_MODE == "sockets":
+            if config.COMMUNICATION_MODE in CommunicationMode.DIRECT_MODES:
                 if hasattr(self.comm_client, 'send_message'):
                     self.comm_client.send_message(task_json)
                     self.logger.info("Tarea reenviada al servidor para análisis posterior")
@@ -150,26 +178,25 @@ class NightAgent:
     def send_task_completion(self, task):
         """Envía confirmación de que una tarea ha sido completada"""
         try:
-            completion_message = {
-                "message_type": "TASK_COMPLETION",
-                "alert_id": task.alert_id,
-                "agent_id": self.agent_id,
-                "completion_time": time.time(),
-                "position": self.position
-            }
-
-            if config.COMMUNICATION_MODE == "rabbitmq":
+            completion_message = StatusMessage(
+                sender_id=self.agent_id,
+                position=task.position,
+                status=AgentStatus.AVAILABLE,
+                current_task_id=task.alert_id
+            )
+
+            if config.COMMUNICATION_MODE in CommunicationMode.BROKER_MODES:
                 self.publisher.publish_message(
-                    Message.to_json(completion_message),
-                    routing_key="tasks.completed"
+                    completion_message,
+                    routing_key=completion_routing_key(self.agent_id)
                 )
             elif hasattr(self.publisher, 'send_message'):
-                self.publisher.send_message(Message.to_json(completion_message))
+                self.publisher.send_message(completion_message)
 
             self.logger.info(f"Enviada confirmación de finalización de tarea #{task.alert_id}")
 
             # Ahora confirmar el mensaje original en RabbitMQ si aplica
-            if config.COMMUNICATION_MODE == "rabbitmq" and self.current_delivery_tag and self.current_channel:
+            if config.COMMUNICATION_MODE == CommunicationMode.RABBITMQ and self.current_delivery_tag and self.current_channel:
                 self.current_channel.basic_ack(delivery_tag=self.current_delivery_tag)
                 self.logger.info(f"Mensaje con delivery_tag {self.current_delivery_tag} confirmado (ACK)")
                 self.current_delivery_tag = None
@@ -178,18 +205,34 @@ class NightAgent:
         except Exception as e:
             self.logger.exception(f"Error al enviar confirmación de finalización: {e}")
 
+    def travel_to(self, task, move_time):
+        """
+        Se desplaza hasta la tarea en ``move_time`` segundos, informando de la posición
+        intermedia cada ``AGENT_POSITION_UPDATE_INTERVAL`` segundos.
+        """
+        origin = self.position
+        interval = config.AGENT_POSITION_UPDATE_INTERVAL
+        elapsed = 0.0
+        while elapsed < move_time and not self.stop_event.is_set():
+            step = min(interval, move_time - elapsed) if interval > 0 else move_time - elapsed
+            safe_sleep(step)
+            elapsed += step
+            if elapsed < move_time:
+                self.position = interpolate_position(origin, task.position, elapsed / move_time)
+                self.send_status_update(True, task)
+        self.position = task.position
+
     def process_task(self, task):
         try:
             self.logger.info(f"Procesando tarea #{task.alert_id}: {task.emergency_level} - {task.emergency_type} en {format_position(task.position)}")
-            self.logger.info(f"Dirigiéndose a la ubicación del incidente...")
-            move_time = max(0, get_random_sleep_time(2, 5))
-            safe_sleep(move_time)
+            move_time = travel_time(self.position, task.position)
+            self.logger.info(f"Dirigiéndose a la ubicación del incidente ({move_time:.1f} s)...")
+            self.travel_to(task, move_time)
             self.logger.info(f"Llegó a la ubicación. Atendiendo emergencia...")
             task_duration = max(0, get_random_sleep_time(config.MIN_TASK_DURATION, config.MAX_TASK_DURATION))
             if task.emergency_level == "CRÍTICA":
                 task_duration *= 1.5
             safe_sleep(task_duration)
-            self.position = task.position
             self.logger.info(f"Tarea #{task.alert_id} completada después de {task_duration:.2f} segundos")
 
             # Enviar confirmación de finalización de tarea
@@ -200,7 +243,7 @@ class NightAgent:
         except Exception as e:
             self.logger.exception(f"Error durante el procesamiento de la tarea: {e}")
             # En caso de error, rechazar el mensaje si estamos usando RabbitMQ
-            if config.COMMUNICATION_MODE == "rabbitmq" and self.current_delivery_tag and self.current_channel:
+            if config.COMMUNICATION_MODE == CommunicationMode.RABBITMQ and self.current_delivery_tag and self.current_channel:
                 self.current_channel.basic_reject(delivery_tag=self.current_delivery_tag, requeue=True)
                 self.logger.info(f"Mensaje con delivery_tag {self.current_delivery_tag} rechazado por error")
                 self.current_delivery_tag = None
@@ -208,12 +251,16 @@ class NightAgent:
             self.busy = False
             self.send_status_update(False)
 
-    def run(self):
+    def run(self, on_ready=None, beat=None):
         try:
             validate_config()
             self.connect()
             self.send_status_update(False)
+            if on_ready:
+                on_ready()
             while not self.stop_event.is_set():
+                if beat:
+                    beat()
                 safe_sleep(1)
         except KeyboardInterrupt:
             self.logger.info("Interrupción de teclado recibida")
@@ -0,0 +1,417 @@
+"""
+Ejecución de muchos agentes nocturnos en un solo proceso.
+
+Un NightAgentHost modela cada agente como una máquina de estados explícita
+(INACTIVO → EN_CAMINO → TRABAJANDO → INFORMANDO → INACTIVO) en lugar de un hilo
+que duerme mientras se desplaza y trabaja. Las transiciones programadas se guardan
+en un único montículo de temporizadores que atiende un solo hilo, y todas las tareas
+llegan por una sola conexión: en los modos con broker, una cola ``tasks.host.<id>``
+enlazada con la clave de tareas de cada agente alojado; en los modos directos, un
+único cliente que el servidor asocia a todos los ``sender_id`` del host. Las tareas
+se reparten entre los agentes por su ``target_agent_id``.
+
+El viaje hasta cada tarea dura lo que marca la distancia (``agents.movement``); mientras
+haya agentes en camino, un tick periódico avanza a la vez las posiciones de todos ellos
+y las publica.
+"""
+
+import heapq
+import itertools
+import logging
+from collections import deque
+from threading import Event, Lock
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import config
+from agents.movement import FleetMovement
+from common.clock import get_clock
+from common.constants import AgentPhase, AgentStatus, CommunicationMode
+from common.geo import format_position, generate_random_position
+from common.message import StatusMessage, TaskMessage, create_message_from_json
+from common.utils import get_random_sleep_time, setup_logger
+from communication.compression import compression_options
+from communication.factory import create_direct_client, get_consumer_class, get_publisher_class
+from communication.rabbitmq.topology import (
+    EXCHANGE, EXCHANGE_TYPE, completion_routing_key, host_task_queue,
+    queue_arguments, status_routing_key, task_routing_key
+)
+
+Position = Tuple[float, float]
+
+_TICK = "TICK"  # Entrada del montículo que actualiza las posiciones de los agentes en camino
+
+
+class HostedAgent:
+    """Estado de un agente nocturno alojado en un NightAgentHost."""
+
+    __slots__ = ('agent_id', 'position', 'phase', 'task', 'phase_started')
+
+    def __init__(self, agent_id: str, position: Optional[Position] = None):
+        self.agent_id = agent_id
+        self.position = position or generate_random_position()
+        self.phase = AgentPhase.IDLE
+        self.task: Optional[TaskMessage] = None
+        self.phase_started = 0.0
+
+    @property
+    def busy(self) -> bool:
+        return self.phase != AgentPhase.IDLE
+
+
+class NightAgentHost:
+    """Agentes nocturnos como máquinas de estados sobre un montículo de temporizadores."""
+
+    def __init__(self, host_id: str, agents: Iterable[Tuple[str, Optional[Position]]], clock=None):
+        """
+        Args:
+            host_id: Identificador del host (nombre de su log y de su cola de tareas).
+            agents: Pares (id, posición) de los agentes a alojar; con posición None
+                se genera una aleatoria.
+            clock: Reloj de la planificación; por defecto, el del proceso
+                (``common.clock``).
+        """
+        self.host_id = host_id
+        self.logger = setup_logger(f"night_agent_host.{host_id}", f"night_agent_host_{host_id}.log")
+        self.agents: Dict[str, HostedAgent] = {
+            agent_id: HostedAgent(agent_id, position) for agent_id, position in agents
+        }
+        self.comm_client = None
+        self.publisher = None
+        self.clock = clock or get_clock()
+        self.stop_event = Event()
+
+        # Las tareas llegan por el hilo del consumidor y las atiende el del host
+        self._inbox: Deque[TaskMessage] = deque()
+        self._wakeup = Event()
+        self._heap: List[Tuple[float, int, Optional[HostedAgent], str]] = []
+        self._sequence = itertools.count()  # Desempate estable entre horas iguales
+        self._publish_lock = Lock()
+        self.movement = FleetMovement()
+        self._tick_pending = False
+
+        # Métricas
+        self.tasks_started = 0
+        self.tasks_completed = 0
+        self.tasks_rejected = 0
+        self.max_lag = 0.0  # Máximo retraso de una transición respecto a su hora (s)
+        self.arrivals = 0
+        self.max_response_time = 0.0  # Desde que se envió la tarea hasta la llegada (s)
+        self._response_total = 0.0
+
+        self.logger.info(f"Host {host_id} con {len(self.agents)} agentes nocturnos")
+
+    # ===== Conexión =====
+
+    def connect(self) -> None:
+        """
+        Abre la conexión de tareas y la de estados, compartidas por todos los agentes.
+
+        Raises:
+            RuntimeError: Si no se pudo conectar.
+        """
+        if config.COMMUNICATION_MODE in CommunicationMode.BROKER_MODES:
+            pool = None
+            if config.COMMUNICATION_MODE == CommunicationMode.RABBITMQ and config.RABBITMQ_USE_CONNECTION_POOL:
+                from communication.rabbitmq.connection_pool import get_connection_pool
+                pool = get_connection_pool()
+            self.comm_client = get_consumer_class()(
+                host=config.RABBITMQ_HOST,
+                port=config.RABBITMQ_PORT,
+                username=config.RABBITMQ_USER,
+                password=config.RABBITMQ_PASSWORD,
+                queue_name=host_task_queue(self.host_id),
+                exchange=EXCHANGE,
+                exchange_type=EXCHANGE_TYPE,
+                binding_keys=[task_routing_key(agent_id) for agent_id in self.agents],
+                queue_arguments=queue_arguments(priority=True),
+                max_redeliveries=config.RABBITMQ_MAX_REDELIVERIES,
+                connection_pool=pool
+            )
+            self.publisher = get_publisher_class()(
+                host=config.RABBITMQ_HOST,
+                port=config.RABBITMQ_PORT,
+                username=config.RABBITMQ_USER,
+                password=config.RABBITMQ_PASSWORD,
+                exchange=EXCHANGE,
+                exchange_type=EXCHANGE_TYPE,
+                connection_pool=pool,
+                **compression_options()
+            )
+            if not (self.comm_client.connect() and self.publisher.connect()):
+                raise RuntimeError(f"Fallo en la conexión con el broker ({config.COMMUNICATION_MODE})")
+            self.comm_client.start_consuming(callback=lambda message, routing_key: self.submit(message))
+        else:
+            self.comm_client = create_direct_client(message_handler=self.submit)
+            if not self.comm_client.connect():
+                raise RuntimeError(f"Fallo en la conexión con el servidor ({config.COMMUNICATION_MODE})")
+            self.publisher = self.comm_client
+        self.logger.info(f"Conectado al servidor usando {config.COMMUNICATION_MODE}")
+
+    def disconnect(self) -> None:
+        if self.comm_client:
+            self.comm_client.close()
+            self.logger.info("Desconectado del servidor")
+        if self.publisher and self.publisher is not self.comm_client:
+            self.publisher.close()
+        self.comm_client = self.publisher = None
+
+    def _publish(self, message: StatusMessage, routing_key: str) -> None:
+        try:
+            # Los clientes directos también ofrecen publish_message (ignoran la clave)
+            with self._publish_lock:
+                self.publisher.publish_message(message, routing_key=routing_key)
+        except Exception as e:
+            self.logger.exception(f"Error al enviar el estado de {message.sender_id}: {e}")
+
+    def send_status_update(self, agent: HostedAgent) -> None:
+        status = AgentStatus.BUSY if agent.busy else AgentStatus.AVAILABLE
+        message = StatusMessage(
+            sender_id=agent.agent_id,
+            position=agent.position,
+            status=status,
+            current_task_id=agent.task.alert_id if agent.task else None
+        )
+        self._publish(message, status_routing_key(agent.agent_id))
+
+    def send_task_completion(self, agent: HostedAgent, task: TaskMessage) -> None:
+        message = StatusMessage(
+            sender_id=agent.agent_id,
+            position=task.position,
+            status=AgentStatus.AVAILABLE,
+            current_task_id=task.alert_id
+        )
+        self._publish(message, completion_routing_key(agent.agent_id))
+
+    # ===== Entrada de tareas (hilo del consumidor) =====
+
+    def submit(self, message) -> bool:
+        """
+        Encola una tarea recibida para que la atienda el hilo del host.
+
+        Args:
+            message: TaskMessage o su JSON (los clientes directos entregan JSON).
+
+        Returns:
+            bool: True si el mensaje era una tarea.
+        """
+        if isinstance(message, str):
+            try:
+                message = create_message_from_json(message)
+            except Exception as e:
+                self.logger.error(f"Mensaje recibido no válido: {e}")
+                return False
+        if not isinstance(message, TaskMessage):
+            return False
+        self._inbox.append(message)
+        self._wakeup.set()
+        return True
+
+    # ===== Máquina de estados (hilo del host) =====
+
+    def _schedule(self, agent: HostedAgent, delay: float, now: float) -> None:
+        heapq.heappush(self._heap, (now + delay, next(self._sequence), agent, agent.phase))
+
+    def _enter(self, agent: HostedAgent, phase: str, now: float) -> None:
+        agent.phase = phase
+        agent.phase_started = now
+
+    def _start_task(self, task: TaskMessage, now: float) -> None:
+        agent = self.agents.get(task.target_agent_id)
+        if agent is None:
+            self.logger.warning(f"Tarea #{task.alert_id} dirigida a {task.target_agent_id}, que no está en este host")
+            self.tasks_rejected += 1
+            return
+        if agent.busy:
+            self.logger.warning(f"Tarea #{task.alert_id} recibida mientras {agent.agent_id} está ocupado")
+            self.tasks_rejected += 1
+            return
+
+        agent.task = task
+        self._enter(agent, AgentPhase.TRAVELLING, now)
+        self.tasks_started += 1
+        self.send_status_update(agent)
+        travel = self.movement.depart(agent.agent_id, agent.position, task.position, now)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"{agent.agent_id} se dirige a la tarea #{task.alert_id}: {task.emergency_level} - "
+                             f"{task.emergency_type} en {format_position(task.position)} ({travel:.1f} s)")
+        self._schedule(agent, travel, now)
+        self._schedule_tick(now)
+
+    def _schedule_tick(self, now: float) -> None:
+        interval = config.AGENT_POSITION_UPDATE_INTERVAL
+        if interval > 0 and not self._tick_pending:
+            heapq.heappush(self._heap, (now + interval, next(self._sequence), None, _TICK))
+            self._tick_pending = True
+
+    def _update_positions(self, now: float) -> None:
+        """Avanza y publica la posición de todos los agentes en camino."""
+        self._tick_pending = False
+        agent_ids, positions = self.movement.positions(now)
+        for agent_id, position in zip(agent_ids, positions.tolist()):
+            agent = self.agents[agent_id]
+            agent.position = tuple(position)
+            self.send_status_update(agent)
+        if len(self.movement):
+            self._schedule_tick(now)
+
+    def _arrive(self, agent: HostedAgent) -> None:
+        task = agent.task
+        self.movement.arrive(agent.agent_id)
+        agent.position = task.position
+        response_time = self.clock.time() - task.timestamp
+        self.arrivals += 1
+        self._response_total += response_time
+        self.max_response_time = max(self.max_response_time, response_time)
+
+    def _advance(self, agent: HostedAgent, now: float) -> None:
+        """Ejecuta la transición que vence para ``agent`` según su fase actual."""
+        task = agent.task
+        if agent.phase == AgentPhase.TRAVELLING:
+            self._arrive(agent)
+            self._enter(agent, AgentPhase.WORKING, now)
+            duration = max(0, get_random_sleep_time(config.MIN_TASK_DURATION, config.MAX_TASK_DURATION))
+            if task.emergency_level == "CRÍTICA":
+                duration *= 1.5
+            self._schedule(agent, duration, now)
+        elif agent.phase == AgentPhase.WORKING:
+            self._enter(agent, AgentPhase.REPORTING, now)
+            self.send_task_completion(agent, task)
+            agent.task = None
+            self._enter(agent, AgentPhase.IDLE, now)
+            self.send_status_update(agent)
+            self.tasks_completed += 1
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(f"{agent.agent_id} completó la tarea #{task.alert_id}")
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """
+        Reparte las tareas recibidas y ejecuta las transiciones vencidas.
+
+        Returns:
+            int: Número de tareas y transiciones atendidas.
+        """
+        now = self.clock.monotonic() if now is None else now
+        handled = 0
+        while self._inbox:
+            self._start_task(self._inbox.popleft(), now)
+            handled += 1
+
+        heap = self._heap
+        while heap and heap[0][0] <= now and not self.stop_event.is_set():
+            due, _, agent, phase = heapq.heappop(heap)
+            if agent is None:
+                self._update_positions(now)
+                continue
+            if agent.phase != phase:
+                continue  # Transición obsoleta
+            self.max_lag = max(self.max_lag, now - due)
+            try:
+                self._advance(agent, now)
+            except Exception as e:
+                self.logger.exception(f"Error en la tarea de {agent.agent_id}: {e}")
+                self.movement.arrive(agent.agent_id)
+                agent.task = None
+                self._enter(agent, AgentPhase.IDLE, now)
+                self.send_status_update(agent)
+            handled += 1
+        return handled
+
+    def next_due(self) -> Optional[float]:
+        """
+        Hora (del reloj monótono) en la que el host tendrá trabajo: ahora si hay
+        tareas recibidas, la de la próxima transición si no, o None.
+        """
+        if self._inbox:
+            return self.clock.monotonic()
+        return self._heap[0][0] if self._heap else None
+
+    def announce(self) -> None:
+        """Publica el estado inicial de todos los agentes para que el servidor los registre."""
+        for agent in self.agents.values():
+            self.send_status_update(agent)
+
+    def run_loop(self, beat: Optional[Callable[[], None]] = None) -> None:
+        """
+        Atiende tareas y temporizadores hasta que se detiene el host.
+
+        Args:
+            beat: Función a llamar en cada vuelta (latido del lanzador); las esperas
+                no superan ``config.HEARTBEAT_INTERVAL``.
+        """
+        self.announce()
+        self.logger.info(f"Host {self.host_id} esperando tareas")
+        while not self.stop_event.is_set():
+            if beat:
+                beat()
+            timeout = config.HEARTBEAT_INTERVAL
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - self.clock.monotonic())
+            if timeout > 0 and not self._inbox:
+                self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            self.run_pending()
+        self.logger.info(f"Host {self.host_id} detenido tras {self.tasks_completed} tareas completadas "
+                         f"({self.tasks_rejected} rechazadas, retraso máximo {self.max_lag * 1000:.1f} ms)")
+
+    @property
+    def mean_response_time(self) -> float:
+        """Tiempo medio desde el envío de una tarea hasta la llegada del agente (s)."""
+        return self._response_total / self.arrivals if self.arrivals else 0.0
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            "agents": len(self.agents),
+            "busy_agents": sum(agent.busy for agent in self.agents.values()),
+            "tasks_started": self.tasks_started,
+            "tasks_completed": self.tasks_completed,
+            "tasks_rejected": self.tasks_rejected,
+            "agents_travelling": len(self.movement),
+            "mean_response_time": self.mean_response_time,
+            "max_response_time": self.max_response_time,
+            "max_lag": self.max_lag
+        }
+
+    def run(self, on_ready: Optional[Callable[[], None]] = None,
+            beat: Optional[Callable[[], None]] = None) -> None:
+        """
+        Conecta y atiende a sus agentes hasta que se detenga.
+
+        Args:
+            on_ready: Función a llamar una vez conectado (barrera de arranque del lanzador).
+            beat: Función a llamar en cada vuelta del bucle (latido del lanzador).
+        """
+        try:
+            self.connect()
+            if on_ready:
+                on_ready()
+            self.run_loop(beat)
+        except KeyboardInterrupt:
+            self.logger.info("Interrupción de teclado recibida")
+        except Exception as e:
+            self.logger.exception(f"Error en el host {self.host_id}: {e}")
+        finally:
+            self.disconnect()
+
+    def stop(self) -> None:
+        self.logger.info(f"Deteniendo host {self.host_id}")
+        self.stop_event.set()
+        self._wakeup.set()
+
+
+def partition_agents(num_agents: int, num_hosts: int) -> List[List[Tuple[str, Position]]]:
+    """
+    Reparte ``num_agents`` agentes (con id y posición aleatoria) entre ``num_hosts`` hosts.
+
+    Returns:
+        list: Una lista de pares (id, posición) por host, de tamaños que difieren en uno como mucho.
+    """
+    agents = [(f"AGENT{i + 1:03d}", generate_random_position()) for i in range(num_agents)]
+    num_hosts = max(1, min(num_hosts, num_agents))
+    return [agents[i::num_hosts] for i in range(num_hosts)]
+
+
+def launch_night_agent_host(host_id: str, agents: List[Tuple[str, Position]],
+                            on_ready: Optional[Callable[[], None]] = None,
+                            beat: Optional[Callable[[], None]] = None) -> None:
+    """Punto de entrada de un proceso host (para ``multiprocessing``)."""
+    NightAgentHost(host_id, agents).run(on_ready, beat)
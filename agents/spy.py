@@ -3,6 +3,7 @@ Implementación de la clase Spy (Espía).
 Los espías son agentes encubiertos que generan alertas aleatorias.
 """
 
+import os
 import random
 import time
 import logging
@@ -12,13 +13,10 @@ import config
 from common.message import Message, AlertMessage
 from common.utils import generate_emergency, get_random_sleep_time, safe_sleep, setup_logger
 from common.geo import generate_random_position, format_position
-from communication.rabbitmq import RabbitMQPublisher
-
-# Determinar el tipo de comunicación según configuración
-if config.COMMUNICATION_MODE == "sockets":
-    from communication.sockets.socket_client import SocketClient as CommunicationClient
-else:  # "rabbitmq"
-    from communication.rabbitmq.publisher import RabbitMQPublisher as CommunicationClient
+from common.constants import CommunicationMode
+from communication.compression import compression_options
+from communication.factory import create_direct_client, get_publisher_class
+from communication.rabbitmq.topology import EXCHANGE, EXCHANGE_TYPE, alert_routing_key
 
 # Validar configuraciones críticas al inicio del programa
 def validate_config():
@@ -43,31 +41,75 @@ def validate_config():
         if not hasattr(config, key):
             raise ValueError(f"Falta la configuración requerida: {key}")
 
+def create_alert_client(client_id, logger):
+    """
+    Crea y conecta el cliente con el que se publican las alertas.
+
+    Lo usan tanto un espía suelto como un SpyHost, que comparte un único cliente
+    entre todos sus espías.
+
+    Args:
+        client_id: Identificador del propietario (da nombre a su spool en disco).
+        logger: Logger en el que informar de la conexión.
+
+    Raises:
+        RuntimeError: Si no se pudo conectar.
+    """
+    if config.COMMUNICATION_MODE in CommunicationMode.DIRECT_MODES:
+        comm_client = create_direct_client()
+        if config.COMMUNICATION_MODE == CommunicationMode.SHM and not comm_client.connect():
+            # SocketClient se conecta (y reconecta) solo al enviar; el de memoria
+            # compartida necesita que el servidor ya esté activo
+            raise RuntimeError(f"Fallo en la conexi\u00f3n con el servidor ({config.COMMUNICATION_MODE})")
+    else:
+        options = {}
+        if config.COMMUNICATION_MODE == CommunicationMode.RABBITMQ:
+            # Solo el modo RabbitMQ carga pika (pool de conexiones) y el spool en disco
+            from communication.rabbitmq.connection_pool import get_connection_pool
+            from communication.spool import MessageSpool
+            # El modo publisher confirms necesita una conexión propia
+            use_pool = config.RABBITMQ_USE_CONNECTION_POOL and not config.RABBITMQ_PUBLISHER_CONFIRMS
+            spool = None
+            if config.SPOOL_ENABLED:
+                spool = MessageSpool(
+                    os.path.join(config.SPOOL_DIR, client_id),
+                    max_bytes=config.SPOOL_MAX_BYTES
+                )
+            options = dict(
+                publisher_confirms=config.RABBITMQ_PUBLISHER_CONFIRMS,
+                max_in_flight=config.RABBITMQ_MAX_IN_FLIGHT,
+                connection_pool=get_connection_pool() if use_pool else None,
+                spool=spool,
+                spool_drain_rate=config.SPOOL_DRAIN_RATE
+            )
+        comm_client = get_publisher_class()(
+            host=config.RABBITMQ_HOST,
+            port=config.RABBITMQ_PORT,
+            username=config.RABBITMQ_USER,
+            password=config.RABBITMQ_PASSWORD,
+            exchange=EXCHANGE,
+            exchange_type=EXCHANGE_TYPE,
+            **options,
+            **compression_options()
+        )
+        if not comm_client.connect():
+            logger.error(f"No se pudo establecer conexi\u00f3n con el broker ({config.COMMUNICATION_MODE})")
+            raise RuntimeError(f"Fallo en la conexi\u00f3n con el broker ({config.COMMUNICATION_MODE})")
+    logger.info(f"Conectado al servidor usando {config.COMMUNICATION_MODE}")
+    return comm_client
+
 class Spy:
-    def __init__(self, spy_id, position=None):
+    def __init__(self, spy_id, position=None, logger=None):
         self.spy_id = spy_id
         self.position = position or generate_random_position()
-        self.logger = setup_logger(f"spy.{spy_id}", f"spy_{spy_id}.log")
+        # Un SpyHost pasa su logger para no abrir un fichero por espía
+        self.logger = logger or setup_logger(f"spy.{spy_id}", f"spy_{spy_id}.log")
         self.stop_event = Event()
         self.comm_client = None
         self.logger.info(f"Esp\u00eda {spy_id} inicializado en posici\u00f3n {format_position(self.position)}")
 
     def connect(self):
-        if config.COMMUNICATION_MODE == "sockets":
-            self.comm_client = CommunicationClient(config.SOCKET_HOST, config.SOCKET_PORT)
-        else:
-            self.comm_client = RabbitMQPublisher(
-                host=config.RABBITMQ_HOST,
-                port=config.RABBITMQ_PORT,
-                username=config.RABBITMQ_USER,
-                password=config.RABBITMQ_PASSWORD,
-                exchange='night_tasks',
-                exchange_type='topic'
-            )
-            if not self.comm_client.connect():
-                self.logger.error("No se pudo establecer conexi\u00f3n con RabbitMQ")
-                raise RuntimeError("Fallo en la conexi\u00f3n con RabbitMQ")
-        self.logger.info(f"Conectado al servidor usando {config.COMMUNICATION_MODE}")
+        self.comm_client = create_alert_client(self.spy_id, self.logger)
 
     def disconnect(self):
         if self.comm_client:
@@ -82,7 +124,8 @@ class Spy:
             new_lat = max(min(lat + lat_delta, config.MAP_MAX_LAT), config.MAP_MIN_LAT)
             new_lon = max(min(lon + lon_delta, config.MAP_MAX_LON), config.MAP_MIN_LON)
             self.position = (new_lat, new_lon)
-            self.logger.debug(f"Nueva posici\u00f3n: {format_position(self.position)}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Nueva posici\u00f3n: {format_position(self.position)}")
             if new_lat in [config.MAP_MIN_LAT, config.MAP_MAX_LAT]:
                 self.logger.warning("El esp\u00eda alcanz\u00f3 el l\u00edmite de latitud")
             if new_lon in [config.MAP_MIN_LON, config.MAP_MAX_LON]:
@@ -106,20 +149,39 @@ class Spy:
             emergency_type=emerg_type
         )
 
-        json_message = message.to_json().encode("utf-8")
-        self.logger.info(f"Enviando alerta: {level} - {emerg_type} desde {format_position(self.position)}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Enviando alerta: {level} - {emerg_type} desde {format_position(self.position)}")
 
+        # Clave por celda geográfica: alert.<geohash>
+        routing_key = alert_routing_key(self.position)
         try:
             if hasattr(self.comm_client, "publish_message"):
-                self.comm_client.publish_message(message, routing_key='task.broadcast')
+                self.comm_client.publish_message(message, routing_key=routing_key)
             elif hasattr(self.comm_client, "publish"):
-                self.comm_client.publish(message, routing_key='task.broadcast')
+                self.comm_client.publish(message, routing_key=routing_key)
             else:
                 self.logger.error("Cliente de comunicaci\u00f3n no soporta publicaci\u00f3n de mensajes")
         except Exception as e:
             self.logger.exception(f"Error al enviar la alerta: {e}")
 
-    def alert_loop(self):
+    def next_alert_delay(self):
+        """Segundos hasta la próxima alerta."""
+        min_interval = max(0, config.MIN_ALERT_INTERVAL)
+        max_interval = max(min_interval, config.MAX_ALERT_INTERVAL)
+        return get_random_sleep_time(min_interval, max_interval)
+
+    def step(self):
+        """
+        Genera una alerta y se desplaza.
+
+        Returns:
+            float: Segundos hasta la próxima alerta.
+        """
+        self.generate_alert()
+        self.move_randomly()
+        return self.next_alert_delay()
+
+    def alert_loop(self, beat=None):
         if not self.comm_client:
             self.logger.error("No hay conexi\u00f3n activa con el servidor.")
             return
@@ -128,22 +190,26 @@ class Spy:
 
         while not self.stop_event.is_set():
             try:
-                self.generate_alert()
-                self.move_randomly()
-                min_interval = max(0, config.MIN_ALERT_INTERVAL)
-                max_interval = max(min_interval, config.MAX_ALERT_INTERVAL)
-                wait_time = get_random_sleep_time(min_interval, max_interval)
+                wait_time = self.step()
                 self.logger.debug(f"[{self.spy_id}] Esperando {wait_time:.2f}s para la pr\u00f3xima alerta")
-                safe_sleep(wait_time)
+                # Espera a tramos para latir al menos cada HEARTBEAT_INTERVAL
+                while wait_time > 0 and not self.stop_event.is_set():
+                    if beat:
+                        beat()
+                    pause = min(wait_time, config.HEARTBEAT_INTERVAL)
+                    safe_sleep(pause)
+                    wait_time -= pause
             except Exception as e:
                 self.logger.exception(f"Error en el bucle de alertas: {e}")
 
         self.logger.info("Bucle de alertas detenido")
 
-    def run(self):
+    def run(self, on_ready=None, beat=None):
         try:
             self.connect()
-            self.alert_loop()
+            if on_ready:
+                on_ready()
+            self.alert_loop(beat)
         except KeyboardInterrupt:
             self.logger.info("Interrupci\u00f3n de teclado recibida")
         except Exception as e:
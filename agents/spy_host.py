@@ -0,0 +1,191 @@
+"""
+Ejecución de muchos espías en un solo proceso.
+
+Un SpyHost mantiene a sus espías en un montículo ordenado por la hora de su próxima
+alerta y los atiende desde un único hilo: espera hasta la primera hora pendiente,
+ejecuta ``Spy.step`` de todos los espías que ya tocan y los vuelve a programar.
+Todos comparten un único cliente de comunicación, así que miles de espías cuestan
+un proceso y una conexión en lugar de un intérprete y una conexión cada uno.
+"""
+
+import heapq
+import itertools
+import logging
+import random
+from threading import Event
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+from agents.spy import Spy, create_alert_client
+from common.clock import get_clock
+from common.geo import generate_random_position
+from common.utils import setup_logger
+
+Position = Tuple[float, float]
+
+
+class SpyHost:
+    """Planificador de espías basado en un montículo de temporizadores."""
+
+    def __init__(self, host_id: str, spies: Iterable[Tuple[str, Optional[Position]]],
+                 log_alerts: bool = False, clock=None):
+        """
+        Args:
+            host_id: Identificador del host (nombre de su log y de su spool).
+            spies: Pares (id, posición) de los espías a ejecutar; con posición None
+                se genera una aleatoria.
+            log_alerts: Registrar cada alerta a nivel INFO. Con miles de espías el
+                log pasaría a dominar el tiempo de CPU, así que por defecto solo se
+                registran avisos y errores de los espías.
+            clock: Reloj de la planificación; por defecto, el del proceso
+                (``common.clock``).
+        """
+        self.host_id = host_id
+        self.logger = setup_logger(f"spy_host.{host_id}", f"spy_host_{host_id}.log")
+        self.spy_logger = logging.getLogger(f"spy_host.{host_id}.spies")
+        if not log_alerts:
+            self.spy_logger.setLevel(max(self.logger.getEffectiveLevel(), logging.WARNING))
+
+        self.spies: List[Spy] = [Spy(spy_id, position, logger=self.spy_logger) for spy_id, position in spies]
+        self.comm_client = None
+        self.clock = clock or get_clock()
+        self.stop_event = Event()
+        self._heap: List[Tuple[float, int, Spy]] = []
+        self._sequence = itertools.count()  # Desempate estable entre horas iguales
+
+        # Métricas
+        self.alerts_sent = 0
+        self.max_lag = 0.0  # Máximo retraso de una alerta respecto a su hora (s)
+        self._lag_total = 0.0
+
+        self.logger.info(f"Host {host_id} con {len(self.spies)} espías")
+
+    def connect(self) -> None:
+        """Crea el cliente compartido por todos los espías del host."""
+        self.comm_client = create_alert_client(self.host_id, self.logger)
+        for spy in self.spies:
+            spy.comm_client = self.comm_client
+
+    def disconnect(self) -> None:
+        if self.comm_client:
+            self.comm_client.close()
+            self.comm_client = None
+            self.logger.info("Desconectado del servidor")
+
+    def schedule_all(self) -> None:
+        """Programa la primera alerta de cada espía."""
+        # La primera alerta de cada espía se reparte por todo su intervalo para
+        # que no coincidan todas al arrancar
+        now = self.clock.monotonic()
+        self._heap = [(now + random.uniform(0, spy.next_alert_delay()), next(self._sequence), spy)
+                      for spy in self.spies]
+        heapq.heapify(self._heap)
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """
+        Ejecuta los espías cuya próxima alerta ya ha vencido y los reprograma.
+
+        Returns:
+            int: Número de alertas generadas.
+        """
+        now = self.clock.monotonic() if now is None else now
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= now and not self.stop_event.is_set():
+            due, _, spy = heapq.heappop(heap)
+            lag = now - due
+            self._lag_total += lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            try:
+                delay = spy.step()
+            except Exception as e:
+                self.logger.exception(f"Error en el espía {spy.spy_id}: {e}")
+                delay = spy.next_alert_delay()
+            heapq.heappush(heap, (now + delay, next(self._sequence), spy))
+            fired += 1
+        self.alerts_sent += fired
+        return fired
+
+    def next_due(self) -> Optional[float]:
+        """Hora (del reloj monótono) de la próxima alerta, o None si no hay espías."""
+        return self._heap[0][0] if self._heap else None
+
+    def run_loop(self, beat: Optional[Callable[[], None]] = None) -> None:
+        """
+        Atiende los temporizadores hasta que se detiene el host.
+
+        Args:
+            beat: Función a llamar en cada vuelta (latido del lanzador); las esperas
+                no superan ``config.HEARTBEAT_INTERVAL``.
+        """
+        self.schedule_all()
+        self.logger.info(f"Host {self.host_id} comenzando a enviar alertas")
+        while not self.stop_event.is_set():
+            if beat:
+                beat()
+            timeout = config.HEARTBEAT_INTERVAL
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - self.clock.monotonic())
+            if timeout > 0 and self.stop_event.wait(timeout):
+                break
+            self.run_pending()
+        self.logger.info(f"Host {self.host_id} detenido tras {self.alerts_sent} alertas "
+                         f"(retraso medio {self.mean_lag * 1000:.1f} ms, máximo {self.max_lag * 1000:.1f} ms)")
+
+    @property
+    def mean_lag(self) -> float:
+        """Retraso medio de las alertas respecto a su hora (s); si crece, el host está saturado."""
+        return self._lag_total / self.alerts_sent if self.alerts_sent else 0.0
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            "spies": len(self.spies),
+            "alerts_sent": self.alerts_sent,
+            "mean_lag": self.mean_lag,
+            "max_lag": self.max_lag
+        }
+
+    def run(self, on_ready: Optional[Callable[[], None]] = None,
+            beat: Optional[Callable[[], None]] = None) -> None:
+        """
+        Conecta y atiende a sus espías hasta que se detenga.
+
+        Args:
+            on_ready: Función a llamar una vez conectado (barrera de arranque del lanzador).
+            beat: Función a llamar en cada vuelta del bucle (latido del lanzador).
+        """
+        try:
+            self.connect()
+            if on_ready:
+                on_ready()
+            self.run_loop(beat)
+        except KeyboardInterrupt:
+            self.logger.info("Interrupción de teclado recibida")
+        except Exception as e:
+            self.logger.exception(f"Error en el host {self.host_id}: {e}")
+        finally:
+            self.disconnect()
+
+    def stop(self) -> None:
+        self.logger.info(f"Deteniendo host {self.host_id}")
+        self.stop_event.set()
+
+
+def partition_spies(num_spies: int, num_hosts: int) -> List[List[Tuple[str, Position]]]:
+    """
+    Reparte ``num_spies`` espías (con id y posición aleatoria) entre ``num_hosts`` hosts.
+
+    Returns:
+        list: Una lista de pares (id, posición) por host, de tamaños que difieren en uno como mucho.
+    """
+    spies = [(f"SPY{i + 1:03d}", generate_random_position()) for i in range(num_spies)]
+    num_hosts = max(1, min(num_hosts, num_spies))
+    return [spies[i::num_hosts] for i in range(num_hosts)]
+
+
+def launch_spy_host(host_id: str, spies: List[Tuple[str, Position]],
+                    on_ready: Optional[Callable[[], None]] = None,
+                    beat: Optional[Callable[[], None]] = None) -> None:
+    """Punto de entrada de un proceso host (para ``multiprocessing``)."""
+    SpyHost(host_id, spies, log_alerts=config.SPY_HOST_LOG_ALERTS).run(on_ready, beat)
@@ -0,0 +1,313 @@
+"""
+Modelo de población de espías vectorizado.
+
+En lugar de un objeto ``Spy`` por espía, ``SpyPopulation`` guarda las posiciones de
+todos en arrays de NumPy y en cada tick:
+
+- avanza el paseo aleatorio de toda la población con una sola operación;
+- sortea cuántas alertas emite cada espía como un proceso de Poisson (el número de
+  alertas en un tick de ``dt`` segundos sigue una Poisson de media ``tasa * dt``), con
+  una tasa base por espía multiplicada por el factor de la zona en la que se encuentra;
+- devuelve las alertas del tick como un lote (``AlertBatch``), con nivel y tipo ya
+  sorteados para todo el lote.
+
+``SpyPopulationHost`` publica esos lotes con un único cliente, de modo que generar la
+carga de decenas de miles de espías cuesta unas pocas operaciones por tick más la
+construcción de cada mensaje.
+"""
+
+from threading import Event
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from agents.spy import create_alert_client
+from common.clock import get_clock
+from common.geo import _GEOHASH_BASE32, generate_random_position
+from common.message import AlertMessage
+from common.utils import EMERGENCY_LEVEL_CHOICES, EMERGENCY_TYPE_CHOICES, setup_logger
+from communication.rabbitmq.topology import alert_cell_routing_key
+
+Position = Tuple[float, float]
+# Zona: rectángulo (lat_min, lon_min, lat_max, lon_max) y factor sobre la tasa base
+Zone = Tuple[Tuple[float, float, float, float], float]
+
+_GEOHASH_CHARS = np.frombuffer(_GEOHASH_BASE32.encode('ascii'), dtype=np.uint8)
+
+
+def base_alert_rate() -> float:
+    """Alertas por segundo de un espía: la inversa del intervalo medio entre alertas."""
+    min_interval = max(0, config.MIN_ALERT_INTERVAL)
+    mean_interval = (min_interval + max(min_interval, config.MAX_ALERT_INTERVAL)) / 2
+    return 1.0 / mean_interval if mean_interval > 0 else 0.0
+
+
+def encode_geohashes(positions: np.ndarray, precision: int) -> List[str]:
+    """
+    Versión vectorizada de ``common.geo.encode_geohash`` para un array de posiciones.
+
+    Hace la misma bisección bit a bit, pero sobre todas las posiciones a la vez.
+
+    Args:
+        positions: Array (n, 2) de latitud y longitud.
+        precision: Número de caracteres de cada geohash.
+    """
+    n = len(positions)
+    if not n:
+        return []
+    lat, lon = positions[:, 0], positions[:, 1]
+    ranges = {0: (np.full(n, -180.0), np.full(n, 180.0), lon),  # Bits pares: longitud
+              1: (np.full(n, -90.0), np.full(n, 90.0), lat)}
+    codes = np.zeros((n, precision), dtype=np.uint8)
+    for bit in range(5 * precision):
+        low, high, value = ranges[bit % 2]
+        mid = (low + high) / 2
+        upper = value >= mid
+        np.copyto(low, mid, where=upper)
+        np.copyto(high, mid, where=~upper)
+        column = codes[:, bit // 5]
+        column <<= 1
+        column |= upper
+    chars = _GEOHASH_CHARS[codes]
+    return chars.view(f"S{precision}").ravel().astype(f"U{precision}").tolist()
+
+
+class AlertBatch:
+    """Alertas emitidas en un tick, como arrays paralelos."""
+
+    __slots__ = ('spy_indices', 'positions', 'levels', 'types')
+
+    def __init__(self, spy_indices: np.ndarray, positions: np.ndarray, levels: np.ndarray, types: np.ndarray):
+        self.spy_indices = spy_indices  # Índice del espía de cada alerta
+        self.positions = positions      # (n, 2): latitud y longitud
+        self.levels = levels            # Índices en EMERGENCY_LEVEL_CHOICES
+        self.types = types              # Índices en EMERGENCY_TYPE_CHOICES
+
+    def __len__(self) -> int:
+        return len(self.spy_indices)
+
+    def routing_keys(self, precision: Optional[int] = None) -> List[str]:
+        """Clave ``alert.<geohash>`` de cada alerta, calculadas para todo el lote a la vez."""
+        cells = encode_geohashes(self.positions, precision or config.ALERT_CELL_PRECISION)
+        return [alert_cell_routing_key(cell) for cell in cells]
+
+    def to_messages(self, spy_ids: Sequence[str]) -> List[AlertMessage]:
+        """Construye un AlertMessage por alerta del lote."""
+        return [
+            AlertMessage(
+                sender_id=spy_ids[index],
+                position=(lat, lon),
+                emergency_level=EMERGENCY_LEVEL_CHOICES[level],
+                emergency_type=EMERGENCY_TYPE_CHOICES[type_]
+            )
+            for index, (lat, lon), level, type_ in zip(self.spy_indices.tolist(), self.positions.tolist(),
+                                                         self.levels.tolist(), self.types.tolist())
+        ]
+
+
+class SpyPopulation:
+    """Posiciones y llegadas de alertas de toda una población de espías."""
+
+    def __init__(self, spy_ids: Sequence[str], positions: Optional[Iterable[Position]] = None,
+                 alert_rate: Optional[float] = None, zones: Optional[Sequence[Zone]] = None,
+                 walk_sigma: Optional[float] = None, seed: Optional[int] = None):
+        """
+        Args:
+            spy_ids: Identificadores de los espías.
+            positions: Posiciones iniciales; por defecto, aleatorias dentro del mapa.
+            alert_rate: Alertas por segundo de cada espía; por defecto ``base_alert_rate()``.
+            zones: Zonas con su factor de tasa (por defecto ``config.SPY_ZONE_RATES``);
+                si varias contienen a un espía, se aplica la última.
+            walk_sigma: Desviación del paseo aleatorio en grados por raíz de segundo
+                (por defecto ``config.SPY_WALK_SIGMA``).
+            seed: Semilla del generador de NumPy.
+        """
+        self.spy_ids = list(spy_ids)
+        self.rng = np.random.default_rng(seed)
+        n = len(self.spy_ids)
+        self._low = np.array([config.MAP_MIN_LAT, config.MAP_MIN_LON])
+        self._high = np.array([config.MAP_MAX_LAT, config.MAP_MAX_LON])
+        if positions is None:
+            self.positions = self.rng.uniform(self._low, self._high, size=(n, 2))
+        else:
+            self.positions = np.array(list(positions), dtype=float).reshape(n, 2)
+        self.alert_rate = base_alert_rate() if alert_rate is None else alert_rate
+        self.zones = list(config.SPY_ZONE_RATES if zones is None else zones)
+        self.walk_sigma = config.SPY_WALK_SIGMA if walk_sigma is None else walk_sigma
+
+    def __len__(self) -> int:
+        return len(self.spy_ids)
+
+    def rates(self) -> np.ndarray:
+        """Tasa de alertas de cada espía según la zona en la que está."""
+        rates = np.full(len(self.spy_ids), self.alert_rate)
+        lat, lon = self.positions[:, 0], self.positions[:, 1]
+        for (min_lat, min_lon, max_lat, max_lon), factor in self.zones:
+            inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+            rates[inside] = self.alert_rate * factor
+        return rates
+
+    def move(self, dt: float) -> None:
+        """Avanza ``dt`` segundos el paseo aleatorio de todos los espías."""
+        if self.walk_sigma <= 0 or dt <= 0:
+            return
+        self.positions += self.rng.normal(0.0, self.walk_sigma * np.sqrt(dt), size=self.positions.shape)
+        np.clip(self.positions, self._low, self._high, out=self.positions)
+
+    def draw_alerts(self, dt: float) -> AlertBatch:
+        """
+        Sortea las alertas de un intervalo de ``dt`` segundos.
+
+        Returns:
+            AlertBatch: Una entrada por alerta (un espía puede emitir varias).
+        """
+        counts = self.rng.poisson(self.rates() * dt)
+        spy_indices = np.repeat(np.arange(len(self.spy_ids)), counts)
+        n = len(spy_indices)
+        return AlertBatch(
+            spy_indices,
+            self.positions[spy_indices],
+            self.rng.integers(len(EMERGENCY_LEVEL_CHOICES), size=n),
+            self.rng.integers(len(EMERGENCY_TYPE_CHOICES), size=n)
+        )
+
+    def step(self, dt: float) -> AlertBatch:
+        """Mueve a la población y sortea las alertas del intervalo."""
+        self.move(dt)
+        return self.draw_alerts(dt)
+
+
+class SpyPopulationHost:
+    """Publica las alertas de una SpyPopulation con un tick periódico."""
+
+    def __init__(self, host_id: str, spies: Iterable[Tuple[str, Optional[Position]]],
+                 tick: Optional[float] = None, seed: Optional[int] = None, clock=None):
+        """
+        Args:
+            host_id: Identificador del host (nombre de su log y de su spool).
+            spies: Pares (id, posición) de los espías; con posición None se genera una aleatoria.
+            tick: Segundos entre ticks; por defecto ``config.SPY_POPULATION_TICK``.
+            seed: Semilla del generador de NumPy.
+            clock: Reloj de la planificación; por defecto, el del proceso (``common.clock``).
+        """
+        spies = list(spies)
+        self.host_id = host_id
+        self.logger = setup_logger(f"spy_population.{host_id}", f"spy_population_{host_id}.log")
+        positions = [position or generate_random_position() for _, position in spies]
+        self.population = SpyPopulation([spy_id for spy_id, _ in spies], positions, seed=seed)
+        self.tick = config.SPY_POPULATION_TICK if tick is None else tick
+        self.clock = clock or get_clock()
+        self.comm_client = None
+        self.stop_event = Event()
+        self._due: Optional[float] = None
+        self.alerts_sent = 0
+        self.ticks = 0
+        self.logger.info(f"Host {host_id} con una población de {len(self.population)} espías")
+
+    def connect(self) -> None:
+        self.comm_client = create_alert_client(self.host_id, self.logger)
+
+    def disconnect(self) -> None:
+        if self.comm_client:
+            self.comm_client.close()
+            self.comm_client = None
+            self.logger.info("Desconectado del servidor")
+
+    def schedule_all(self) -> None:
+        """Programa el primer tick."""
+        self._due = self.clock.monotonic() + self.tick
+
+    def publish(self, batch: AlertBatch) -> int:
+        """
+        Publica las alertas de un lote.
+
+        Returns:
+            int: Alertas publicadas.
+        """
+        sent = 0
+        messages = batch.to_messages(self.population.spy_ids)
+        for message, routing_key in zip(messages, batch.routing_keys()):
+            try:
+                self.comm_client.publish_message(message, routing_key=routing_key)
+                sent += 1
+            except Exception as e:
+                self.logger.exception(f"Error al enviar la alerta de {message.sender_id}: {e}")
+        return sent
+
+    def next_due(self) -> Optional[float]:
+        return self._due
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """
+        Ejecuta los ticks vencidos (cada uno cubre ``tick`` segundos).
+
+        Returns:
+            int: Alertas publicadas.
+        """
+        now = self.clock.monotonic() if now is None else now
+        sent = 0
+        while self._due is not None and self._due <= now and not self.stop_event.is_set():
+            sent += self.publish(self.population.step(self.tick))
+            self._due += self.tick
+            self.ticks += 1
+        self.alerts_sent += sent
+        return sent
+
+    def run_loop(self, beat: Optional[Callable[[], None]] = None) -> None:
+        """
+        Ejecuta los ticks hasta que se detiene el host.
+
+        Args:
+            beat: Función a llamar en cada vuelta (latido del lanzador); las esperas
+                no superan ``config.HEARTBEAT_INTERVAL``.
+        """
+        self.schedule_all()
+        self.logger.info(f"Host {self.host_id} comenzando a enviar alertas")
+        while not self.stop_event.is_set():
+            if beat:
+                beat()
+            timeout = min(self._due - self.clock.monotonic(), config.HEARTBEAT_INTERVAL)
+            if timeout > 0 and self.stop_event.wait(timeout):
+                break
+            self.run_pending()
+        self.logger.info(f"Host {self.host_id} detenido tras {self.alerts_sent} alertas en {self.ticks} ticks")
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            "spies": len(self.population),
+            "alerts_sent": self.alerts_sent,
+            "ticks": self.ticks
+        }
+
+    def run(self, on_ready: Optional[Callable[[], None]] = None,
+            beat: Optional[Callable[[], None]] = None) -> None:
+        """
+        Conecta y atiende a su población hasta que se detenga.
+
+        Args:
+            on_ready: Función a llamar una vez conectado (barrera de arranque del lanzador).
+            beat: Función a llamar en cada vuelta del bucle (latido del lanzador).
+        """
+        try:
+            self.connect()
+            if on_ready:
+                on_ready()
+            self.run_loop(beat)
+        except KeyboardInterrupt:
+            self.logger.info("Interrupción de teclado recibida")
+        except Exception as e:
+            self.logger.exception(f"Error en el host {self.host_id}: {e}")
+        finally:
+            self.disconnect()
+
+    def stop(self) -> None:
+        self.logger.info(f"Deteniendo host {self.host_id}")
+        self.stop_event.set()
+
+
+def launch_spy_population_host(host_id: str, spies: List[Tuple[str, Position]],
+                               on_ready: Optional[Callable[[], None]] = None,
+                               beat: Optional[Callable[[], None]] = None) -> None:
+    """Punto de entrada de un proceso host (para ``multiprocessing``)."""
+    SpyPopulationHost(host_id, spies).run(on_ready, beat)
@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento del sistema de agentes encubiertos.
+
+Cada módulo se ejecuta como script (``python -m benchmarks.<nombre>``) e imprime
+una tabla de resultados por consola.
+"""
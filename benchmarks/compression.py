@@ -0,0 +1,92 @@
+"""
+Benchmark de compresión de cuerpos: CPU frente a bytes enviados.
+
+Serializa mensajes representativos (una alerta, una alerta con descripción larga y
+un lote de alertas) y mide para cada algoritmo y nivel el tamaño resultante, el
+tiempo de compresión y descompresión por mensaje y el tiempo total estimado
+(CPU + transmisión) en un enlace del ancho de banda indicado. Sirve para decidir
+``RABBITMQ_COMPRESSION`` y su umbral en enlaces entre centros de datos.
+
+Uso:
+    python -m benchmarks.compression --levels 1 6 9 --link-mbps 100
+"""
+
+import argparse
+import json
+import random
+import time
+
+from common.constants import EmergencyLevel, EmergencyType
+from common.message import AlertMessage
+from communication.compression import ENCODINGS, compress, decode_body
+
+WORDS = ("agente", "alerta", "sospechoso", "vehículo", "puerta", "norte", "sur", "edificio",
+         "movimiento", "patrulla", "zona", "contacto", "señal", "perímetro", "acceso")
+LEVELS = (EmergencyLevel.LOW, EmergencyLevel.MEDIUM, EmergencyLevel.HIGH, EmergencyLevel.CRITICAL)
+
+
+def _alert(i: int, description_words: int = 0) -> AlertMessage:
+    rng = random.Random(i)
+    return AlertMessage(
+        sender_id=f"SPY{i % 20 + 1:03d}",
+        position=(40.70 + rng.random() * 0.1, -74.05 + rng.random() * 0.1),
+        emergency_level=rng.choice(LEVELS),
+        emergency_type=EmergencyType.SURVEILLANCE,
+        description=" ".join(rng.choice(WORDS) for _ in range(description_words))
+    )
+
+
+def sample_bodies() -> dict:
+    """Cuerpos serializados de prueba, por nombre de caso."""
+    batch = [json.loads(_alert(i).to_json()) for i in range(200)]
+    return {
+        "alerta": _alert(0).to_json().encode("utf-8"),
+        "descripción": _alert(1, description_words=400).to_json().encode("utf-8"),
+        "lote x200": json.dumps(batch).encode("utf-8"),
+    }
+
+
+def measure(body: bytes, encoding: str, level: int, repeat: int) -> tuple:
+    """
+    Returns:
+        tuple: (bytes comprimidos, µs de compresión, µs de descompresión) por mensaje.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compress(body, encoding, level)
+    compress_us = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode_body(compressed, encoding)
+    decompress_us = (time.perf_counter() - start) / repeat * 1e6
+    return len(compressed), compress_us, decompress_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de compresión de mensajes (CPU frente a bytes)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9], help="Niveles de compresión (0-9)")
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=list(ENCODINGS))
+    parser.add_argument("--repeat", type=int, default=50, help="Repeticiones por medida")
+    parser.add_argument("--link-mbps", type=float, default=100.0,
+                        help="Ancho de banda del enlace para estimar el tiempo total (Mbit/s)")
+    args = parser.parse_args()
+
+    us_per_byte = 8.0 / args.link_mbps  # µs por byte a link-mbps Mbit/s
+
+    print(f"{'caso':>12} {'algoritmo':>9} {'nivel':>5} {'bytes':>9} {'ratio':>6} "
+          f"{'comp µs':>9} {'desc µs':>9} {'total µs':>9}")
+    for name, body in sample_bodies().items():
+        plain_total = len(body) * us_per_byte
+        print(f"{name:>12} {'-':>9} {'-':>5} {len(body):>9} {1.0:>6.2f} "
+              f"{0.0:>9.1f} {0.0:>9.1f} {plain_total:>9.1f}")
+        for encoding in args.encodings:
+            for level in args.levels:
+                size, compress_us, decompress_us = measure(body, encoding, level, args.repeat)
+                total = compress_us + decompress_us + size * us_per_byte
+                print(f"{name:>12} {encoding:>9} {level:>5} {size:>9} {len(body) / size:>6.2f} "
+                      f"{compress_us:>9.1f} {decompress_us:>9.1f} {total:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
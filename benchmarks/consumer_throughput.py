@@ -0,0 +1,109 @@
+"""
+Benchmark de rendimiento del consumidor RabbitMQ.
+
+Mide mensajes/segundo procesados por el consumidor para distintas combinaciones de
+prefetch y número de trabajadores, simulando un callback lento (E/S) por mensaje.
+Con ``--mode inmemory`` se ejecuta contra el broker en memoria, sin RabbitMQ.
+
+Uso:
+    python -m benchmarks.consumer_throughput --messages 2000 --work-ms 5 --mode inmemory
+"""
+
+import argparse
+import itertools
+import threading
+import time
+
+import config
+from common.constants import CommunicationMode
+from common.message import AlertMessage
+from communication.factory import get_consumer_class, get_publisher_class
+
+BENCH_EXCHANGE = "bench_exchange"
+BENCH_QUEUE = "bench_consumer_queue"
+BENCH_ROUTING_KEY = "bench.consumer"
+
+
+def publish_batch(count: int, mode: str) -> None:
+    """Publica ``count`` alertas en la cola del benchmark."""
+    publisher = get_publisher_class(mode)(
+        host=config.RABBITMQ_HOST,
+        port=config.RABBITMQ_PORT,
+        exchange=BENCH_EXCHANGE,
+        exchange_type='topic'
+    )
+    if not publisher.connect():
+        raise RuntimeError("No se pudo conectar con el broker")
+    try:
+        for i in range(count):
+            publisher.publish_message(
+                AlertMessage(sender_id=f"BENCH{i:05d}", position=(40.75, -74.0)),
+                routing_key=BENCH_ROUTING_KEY
+            )
+    finally:
+        publisher.close()
+
+
+def run_case(messages: int, prefetch: int, workers: int, work_ms: float, mode: str) -> float:
+    """
+    Ejecuta un caso del benchmark.
+
+    Returns:
+        float: Mensajes procesados por segundo.
+    """
+    done = threading.Event()
+    processed = [0]
+    lock = threading.Lock()
+
+    def callback(message, routing_key):
+        time.sleep(work_ms / 1000.0)
+        with lock:
+            processed[0] += 1
+            if processed[0] >= messages:
+                done.set()
+
+    consumer = get_consumer_class(mode)(
+        host=config.RABBITMQ_HOST,
+        port=config.RABBITMQ_PORT,
+        exchange=BENCH_EXCHANGE,
+        exchange_type='topic',
+        queue_name=BENCH_QUEUE,
+        binding_keys=[BENCH_ROUTING_KEY],
+        prefetch_count=prefetch,
+        worker_count=workers,
+        auto_reconnect=False
+    )
+    if not consumer.connect():
+        raise RuntimeError("No se pudo conectar con el broker")
+    if mode == CommunicationMode.INMEMORY:
+        consumer.broker.purge_queue(BENCH_QUEUE)
+    else:
+        consumer.channel.queue_purge(BENCH_QUEUE)
+
+    publish_batch(messages, mode)
+
+    start = time.perf_counter()
+    consumer.start_consuming(callback)
+    done.wait(timeout=600)
+    elapsed = time.perf_counter() - start
+    consumer.close()
+    return processed[0] / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de prefetch y trabajadores del consumidor")
+    parser.add_argument("--messages", type=int, default=2000, help="Mensajes por caso")
+    parser.add_argument("--work-ms", type=float, default=5.0, help="Trabajo simulado por mensaje (ms)")
+    parser.add_argument("--prefetch", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4, 16])
+    parser.add_argument("--mode", choices=CommunicationMode.BROKER_MODES, default=config.COMMUNICATION_MODE)
+    args = parser.parse_args()
+
+    print(f"{'prefetch':>9} {'workers':>8} {'msg/s':>10}")
+    for prefetch, workers in itertools.product(args.prefetch, args.workers):
+        rate = run_case(args.messages, prefetch, workers, args.work_ms, args.mode)
+        print(f"{prefetch:>9} {workers:>8} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
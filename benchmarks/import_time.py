@@ -0,0 +1,128 @@
+"""
+Informe del coste de importación de cada punto de entrada.
+
+Los procesos de trabajo de la simulación son cortos y numerosos, así que lo que
+importan al arrancar se paga en cada uno. Este script importa cada módulo de entrada
+en un intérprete nuevo con ``python -X importtime``, en cada modo de comunicación (más
+los módulos que el transporte de ese modo carga al conectar, ver
+``communication.factory.transport_modules``), y muestra:
+
+- el tiempo total de importación, sin contar lo que carga el propio intérprete;
+- los módulos más caros por tiempo propio;
+- qué dependencias pesadas (pika, numpy, Flask, Folium) se han cargado.
+
+Con ``--budget`` el código de salida es 1 si algún punto de entrada supera el
+presupuesto, para vigilar que una importación nueva no dispare el arranque.
+
+Uso:
+    python -m benchmarks.import_time --modes sockets rabbitmq --top 10
+    python -m benchmarks.import_time --entries agents.spy --budget 80
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict
+
+ENTRIES = (
+    "agents.spy", "agents.spy_host", "agents.spy_population",
+    "agents.night_agent", "agents.night_agent_host", "server.central_server",
+    "simulation.launcher", "run_simulation",
+)
+MODES = ("rabbitmq", "inmemory", "sockets", "unix", "shm")
+HEAVY = ("pika", "numpy", "flask", "folium")
+
+# import time:       536 |     140347 |   agents.spy
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)")
+
+# El modo se fija antes de importar los módulos que lo consultan
+PROGRAM = """
+import config
+config.COMMUNICATION_MODE = {mode!r}
+import importlib
+importlib.import_module({entry!r})
+from communication.factory import transport_modules
+for module in transport_modules():
+    importlib.import_module(module)
+"""
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """
+    Ejecuta ``code`` en un intérprete nuevo con ``-X importtime``.
+
+    Returns:
+        dict: Tiempo propio de importación (µs) de cada módulo importado.
+    """
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            times[match.group(3)] = int(match.group(1))
+    return times
+
+
+def measure(entry: str, mode: str, baseline: Dict[str, int], repeat: int) -> Dict:
+    """
+    Coste de importación de un punto de entrada en un modo de comunicación.
+
+    Args:
+        entry: Módulo de entrada.
+        mode: Modo de comunicación.
+        baseline: Módulos que el intérprete ya importa sin hacer nada (se descuentan).
+        repeat: Ejecuciones; se toma la mediana de cada módulo.
+    """
+    runs = [import_times(PROGRAM.format(mode=mode, entry=entry)) for _ in range(repeat)]
+    modules = {name: statistics.median(run.get(name, 0) for run in runs)
+               for name in runs[0] if name not in baseline}
+    return {
+        "entry": entry,
+        "mode": mode,
+        "total_ms": sum(modules.values()) / 1000,
+        "modules": len(modules),
+        "heavy": sorted({name.split(".")[0] for name in modules} & set(HEAVY)),
+        "top": sorted(((name, us / 1000) for name, us in modules.items()),
+                      key=lambda item: item[1], reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe del coste de importación por módulo")
+    parser.add_argument("--entries", nargs="+", default=list(ENTRIES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["sockets", "rabbitmq"])
+    parser.add_argument("--top", type=int, default=8, help="Módulos más caros a mostrar por entrada")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, help="Presupuesto de importación por entrada (ms)")
+    parser.add_argument("--output", help="Fichero JSON en el que guardar los resultados")
+    args = parser.parse_args()
+
+    baseline = import_times("pass")
+    results = []
+    for mode in args.modes:
+        for entry in args.entries:
+            result = measure(entry, mode, baseline, args.repeat)
+            results.append(result)
+            print(f"\n{entry} ({mode}): {result['total_ms']:.1f} ms, {result['modules']} módulos"
+                  f"; pesados: {', '.join(result['heavy']) or 'ninguno'}")
+            for name, ms in result["top"][:args.top]:
+                print(f"  {ms:>8.2f} ms  {name}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget is not None:
+        over = [r for r in results if r["total_ms"] > args.budget]
+        print(f"\n{len(over)} entradas superan {args.budget:.0f} ms")
+        for r in over:
+            print(f"  {r['entry']} ({r['mode']}): {r['total_ms']:.1f} ms")
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
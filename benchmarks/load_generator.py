@@ -0,0 +1,261 @@
+"""
+Generador de carga de alertas a ritmo controlado.
+
+Publica ``AlertMessage`` sintéticas (o leídas de un fichero) hacia el servidor
+central por el modo de comunicación configurado, a una o varias tasas objetivo
+(``--rates 100 1000 10000 50000``), para encontrar el límite del servidor.
+
+La planificación es de bucle abierto: el mensaje ``i`` de un escalón tiene su hora
+prevista ``inicio + i / tasa`` y su latencia se mide desde esa hora, no desde que el
+generador consigue enviarlo. Si el envío se atasca, los mensajes siguientes se envían
+con retraso y ese retraso cuenta en su latencia (sin *coordinated omission*): la cola
+que se acumula en el cliente o el broker aparece en los percentiles.
+
+Mezclas configurables:
+
+- Niveles y tipos: ``--levels BAJA:4 MEDIA:3 ALTA:2 CRÍTICA:1`` (pesos; por defecto uniformes).
+- Geografía: uniforme en el mapa más focos gaussianos ``--hotspot LAT LON SIGMA_KM PESO``
+  (``--uniform-weight`` es el peso de la parte uniforme).
+- ``--replay grabacion``: en lugar de sintetizar, reenvía en bucle las alertas de una
+  grabación (``communication.recording``, JSONL o binaria; también vale un JSONL con
+  una alerta por línea) con identificadores nuevos, al ritmo objetivo.
+- ``--record grabacion``: graba lo que se publica, para reproducirlo después contra el
+  servidor con ``python -m simulation.replay``.
+
+Uso:
+    python -m benchmarks.load_generator --rates 100 1000 10000 --duration 10 \\
+        --levels BAJA:4 MEDIA:3 ALTA:2 CRÍTICA:1 --hotspot 40.75 -74.0 1.5 3
+"""
+
+import argparse
+import dataclasses
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from agents.spy import create_alert_client
+from agents.spy_population import encode_geohashes
+from common.message import AlertMessage
+from common.utils import EMERGENCY_LEVEL_CHOICES, EMERGENCY_TYPE_CHOICES
+from communication.rabbitmq.topology import alert_cell_routing_key
+from communication.recording import RecordingPublisher, TrafficRecorder, read_recording
+
+logger = logging.getLogger("load_generator")
+
+CHUNK_SIZE = 1024  # Alertas que se generan de una vez
+SPIN_THRESHOLD = 0.0002  # Por debajo de este adelanto se espera activamente en lugar de dormir
+KM_PER_DEGREE = 111.0
+
+# Foco: (latitud, longitud, desviación en km, peso)
+Hotspot = Tuple[float, float, float, float]
+
+
+def parse_weights(entries: Optional[Sequence[str]], choices: Sequence[str]) -> np.ndarray:
+    """
+    Convierte ``["BAJA:4", "MEDIA:1"]`` en probabilidades alineadas con ``choices``.
+
+    Raises:
+        ValueError: Si un nombre no está entre ``choices`` o los pesos no suman más de 0.
+    """
+    weights = np.ones(len(choices)) if not entries else np.zeros(len(choices))
+    for entry in entries or ():
+        name, _, weight = entry.rpartition(":")
+        if name not in choices:
+            raise ValueError(f"'{name}' no es uno de {', '.join(choices)}")
+        weights[choices.index(name)] = float(weight)
+    if weights.sum() <= 0:
+        raise ValueError("Los pesos deben sumar más de 0")
+    return weights / weights.sum()
+
+
+class SyntheticAlerts:
+    """Alertas sintéticas con mezcla de niveles, tipos y geografía configurable."""
+
+    def __init__(self, level_weights: np.ndarray, type_weights: np.ndarray,
+                 hotspots: Sequence[Hotspot] = (), uniform_weight: float = 1.0,
+                 senders: int = 100, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+        self.level_weights = level_weights
+        self.type_weights = type_weights
+        self.hotspots = list(hotspots)
+        components = [uniform_weight] + [weight for *_, weight in self.hotspots]
+        self.component_weights = np.array(components, dtype=float) / sum(components)
+        self.sender_ids = [f"LOAD{i + 1:05d}" for i in range(max(1, senders))]
+        self._low = np.array([config.MAP_MIN_LAT, config.MAP_MIN_LON])
+        self._high = np.array([config.MAP_MAX_LAT, config.MAP_MAX_LON])
+
+    def _positions(self, n: int) -> np.ndarray:
+        positions = self.rng.uniform(self._low, self._high, size=(n, 2))
+        if self.hotspots:
+            component = self.rng.choice(len(self.component_weights), size=n, p=self.component_weights)
+            for index, (lat, lon, sigma_km, _) in enumerate(self.hotspots, start=1):
+                selected = component == index
+                count = int(selected.sum())
+                if count:
+                    sigma = sigma_km / KM_PER_DEGREE
+                    positions[selected] = self.rng.normal((lat, lon), sigma, size=(count, 2))
+            np.clip(positions, self._low, self._high, out=positions)
+        return positions
+
+    def chunk(self, n: int) -> List[Tuple[AlertMessage, str]]:
+        """
+        Returns:
+            list: ``n`` pares (alerta, clave de enrutamiento).
+        """
+        positions = self._positions(n)
+        levels = self.rng.choice(len(EMERGENCY_LEVEL_CHOICES), size=n, p=self.level_weights)
+        types = self.rng.choice(len(EMERGENCY_TYPE_CHOICES), size=n, p=self.type_weights)
+        senders = self.rng.integers(len(self.sender_ids), size=n)
+        keys = encode_geohashes(positions, config.ALERT_CELL_PRECISION)
+        return [
+            (AlertMessage(sender_id=self.sender_ids[sender], position=(lat, lon),
+                          emergency_level=EMERGENCY_LEVEL_CHOICES[level],
+                          emergency_type=EMERGENCY_TYPE_CHOICES[type_]),
+             alert_cell_routing_key(cell))
+            for (lat, lon), level, type_, sender, cell in zip(positions.tolist(), levels.tolist(),
+                                                              types.tolist(), senders.tolist(), keys)
+        ]
+
+
+class ReplayedAlerts:
+    """Alertas de una grabación, reenviadas en bucle con identificadores nuevos."""
+
+    def __init__(self, path: str):
+        self.alerts: List[Tuple[AlertMessage, str]] = [
+            (message, routing_key) for _, message, routing_key in read_recording(path)
+            if isinstance(message, AlertMessage)
+        ]
+        if not self.alerts:
+            raise ValueError(f"{path} no contiene alertas")
+        self._next = 0
+
+    def chunk(self, n: int) -> List[Tuple[AlertMessage, str]]:
+        result = []
+        for _ in range(n):
+            alert, routing_key = self.alerts[self._next]
+            self._next = (self._next + 1) % len(self.alerts)
+            # Identificador nuevo: el servidor ignora las alertas que ya conoce; la marca
+            # de tiempo la pone run_step al enviarla
+            copy = dataclasses.replace(alert, message_id=str(uuid.uuid4()))
+            result.append((copy, routing_key))
+        return result
+
+
+def _drain(client, timeout: float) -> bool:
+    """Espera a que el cliente entregue lo encolado (si el cliente lo permite)."""
+    if hasattr(client, "flush"):
+        return client.flush(timeout)
+    if getattr(client, "publisher_confirms", False):
+        return client.wait_for_confirms(timeout)
+    return True
+
+
+def run_step(client, source, rate: float, duration: float) -> Dict[str, float]:
+    """
+    Publica a ``rate`` alertas/s durante ``duration`` segundos.
+
+    Returns:
+        dict: Enviadas, errores, tasa conseguida y latencias de envío (s).
+    """
+    total = max(1, int(rate * duration))
+    interval = 1.0 / rate
+    latencies = np.empty(total)
+    errors = 0
+    pending: List[Tuple[AlertMessage, str]] = []
+    perf_counter = time.perf_counter
+    wall_time = time.time
+
+    start = perf_counter()
+    for i in range(total):
+        if not pending:
+            pending = source.chunk(min(CHUNK_SIZE, total - i))
+            pending.reverse()
+        message, routing_key = pending.pop()
+
+        intended = start + i * interval
+        ahead = intended - perf_counter()
+        if ahead > SPIN_THRESHOLD:
+            time.sleep(ahead - SPIN_THRESHOLD)
+        while perf_counter() < intended:
+            pass
+
+        # Las alertas se crean por bloques: la marca de tiempo es la del envío
+        message.timestamp = wall_time()
+        try:
+            if not client.publish_message(message, routing_key=routing_key):
+                errors += 1
+        except Exception as e:
+            errors += 1
+            logger.debug(f"Error al publicar: {e}")
+        latencies[i] = perf_counter() - intended
+    sent_elapsed = perf_counter() - start
+
+    drained = _drain(client, timeout=max(10.0, duration))
+    elapsed = perf_counter() - start
+    return {
+        "target": rate,
+        "sent": total,
+        "errors": errors,
+        "achieved": total / sent_elapsed,
+        "delivered": total / elapsed if drained else 0.0,
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "p999": float(np.percentile(latencies, 99.9)),
+        "max": float(latencies.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga de alertas a ritmo controlado")
+    parser.add_argument("--rates", type=float, nargs="+", default=[100, 1000, 10000],
+                        help="Tasas objetivo (alertas/s), una por escalón")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por escalón")
+    parser.add_argument("--levels", nargs="*", help="Pesos de nivel, p. ej. BAJA:4 CRÍTICA:1")
+    parser.add_argument("--types", nargs="*", help="Pesos de tipo, p. ej. ROBO:3 VIGILANCIA:1")
+    parser.add_argument("--hotspot", nargs=4, type=float, action="append", default=[],
+                        metavar=("LAT", "LON", "SIGMA_KM", "PESO"), help="Foco gaussiano de alertas")
+    parser.add_argument("--uniform-weight", type=float, default=1.0,
+                        help="Peso de la parte uniforme frente a los focos")
+    parser.add_argument("--senders", type=int, default=100, help="Número de sender_id distintos")
+    parser.add_argument("--replay", help="Grabación (JSONL o binaria) con alertas a reenviar en bucle")
+    parser.add_argument("--record", help="Grabar lo publicado en este fichero (.jsonl o binario)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format=config.LOG_FORMAT)
+    if args.replay:
+        source = ReplayedAlerts(args.replay)
+    else:
+        source = SyntheticAlerts(
+            parse_weights(args.levels, EMERGENCY_LEVEL_CHOICES),
+            parse_weights(args.types, EMERGENCY_TYPE_CHOICES),
+            hotspots=[tuple(h) for h in args.hotspot],
+            uniform_weight=args.uniform_weight,
+            senders=args.senders,
+            seed=args.seed
+        )
+
+    client = create_alert_client("LOADGEN", logger)
+    if args.record:
+        client = RecordingPublisher(client, TrafficRecorder(args.record))
+    print(f"Modo {config.COMMUNICATION_MODE}; latencia de envío medida desde la hora prevista")
+    print(f"{'objetivo':>9} {'enviadas':>9} {'errores':>8} {'conseguida':>11} {'entregada':>10} "
+          f"{'p50 µs':>9} {'p99 µs':>9} {'p99.9 µs':>9} {'máx ms':>8}")
+    try:
+        for rate in args.rates:
+            r = run_step(client, source, rate, args.duration)
+            print(f"{r['target']:>9.0f} {r['sent']:>9} {r['errors']:>8} {r['achieved']:>11.0f} "
+                  f"{r['delivered']:>10.0f} {r['p50'] * 1e6:>9.0f} {r['p99'] * 1e6:>9.0f} "
+                  f"{r['p999'] * 1e6:>9.0f} {r['max'] * 1e3:>8.1f}")
+    finally:
+        client.close()
+        if args.record:
+            client.recorder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark de latencia de alertas CRÍTICA con la cola saturada.
+
+Llena una cola con alertas BAJA, publica después unas pocas alertas CRÍTICA y mide
+cuánto tarda cada nivel en ser procesado por un consumidor lento, con una cola FIFO y
+con una cola con prioridad (``x-max-priority``). Con prioridad, las CRÍTICA adelantan
+en el broker a todo el atasco.
+
+Uso:
+    python -m benchmarks.priority_latency --backlog 500 --critical 10 --work-ms 2 --mode inmemory
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import config
+from common.constants import CommunicationMode, EmergencyLevel
+from common.message import AlertMessage
+from communication.factory import get_consumer_class, get_publisher_class
+from communication.rabbitmq.topology import priority_queue_arguments
+
+BENCH_EXCHANGE = "bench_exchange"
+BENCH_ROUTING_KEY = "bench.priority"
+
+
+def run_case(backlog: int, critical: int, work_ms: float, prioritized: bool, mode: str) -> dict:
+    """
+    Ejecuta un caso del benchmark.
+
+    Returns:
+        dict: Latencias (segundos) por nivel de emergencia.
+    """
+    total = backlog + critical
+    latencies = {EmergencyLevel.LOW: [], EmergencyLevel.CRITICAL: []}
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def callback(message, routing_key):
+        time.sleep(work_ms / 1000.0)
+        with lock:
+            latencies[message.emergency_level].append(time.time() - message.timestamp)
+            if sum(len(v) for v in latencies.values()) >= total:
+                done.set()
+
+    # Colas distintas: RabbitMQ no permite redeclarar una cola con otros argumentos
+    queue_name = "bench_priority_queue" if prioritized else "bench_fifo_queue"
+    consumer = get_consumer_class(mode)(
+        host=config.RABBITMQ_HOST,
+        port=config.RABBITMQ_PORT,
+        exchange=BENCH_EXCHANGE,
+        exchange_type='topic',
+        queue_name=queue_name,
+        binding_keys=[BENCH_ROUTING_KEY],
+        queue_arguments=priority_queue_arguments() if prioritized else None,
+        auto_reconnect=False
+    )
+    if not consumer.connect():
+        raise RuntimeError("No se pudo conectar con el broker")
+    if mode == CommunicationMode.INMEMORY:
+        consumer.broker.purge_queue(queue_name)
+    else:
+        consumer.channel.queue_purge(queue_name)
+
+    publisher = get_publisher_class(mode)(
+        host=config.RABBITMQ_HOST,
+        port=config.RABBITMQ_PORT,
+        exchange=BENCH_EXCHANGE,
+        exchange_type='topic'
+    )
+    if not publisher.connect():
+        raise RuntimeError("No se pudo conectar con el broker")
+    try:
+        # Primero el atasco de alertas BAJA y después las CRÍTICA
+        for i in range(backlog):
+            publisher.publish_message(
+                AlertMessage(sender_id=f"BENCH{i:05d}", position=(40.75, -74.0),
+                             emergency_level=EmergencyLevel.LOW),
+                routing_key=BENCH_ROUTING_KEY
+            )
+        for i in range(critical):
+            publisher.publish_message(
+                AlertMessage(sender_id=f"CRIT{i:05d}", position=(40.75, -74.0),
+                             emergency_level=EmergencyLevel.CRITICAL),
+                routing_key=BENCH_ROUTING_KEY
+            )
+    finally:
+        publisher.close()
+
+    consumer.start_consuming(callback)
+    done.wait(timeout=600)
+    consumer.close()
+    return latencies
+
+
+def _summary(values) -> str:
+    if not values:
+        return f"{'-':>9} {'-':>9}"
+    return f"{statistics.median(values) * 1000:>9.1f} {max(values) * 1000:>9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia de alertas CRÍTICA con cola saturada")
+    parser.add_argument("--backlog", type=int, default=500, help="Alertas BAJA en cola antes de las CRÍTICA")
+    parser.add_argument("--critical", type=int, default=10, help="Alertas CRÍTICA publicadas tras el atasco")
+    parser.add_argument("--work-ms", type=float, default=2.0, help="Trabajo simulado por mensaje (ms)")
+    parser.add_argument("--mode", choices=CommunicationMode.BROKER_MODES, default=config.COMMUNICATION_MODE)
+    args = parser.parse_args()
+
+    if not config.RABBITMQ_MAX_PRIORITY:
+        raise SystemExit("RABBITMQ_MAX_PRIORITY = 0: la prioridad está desactivada en config.py")
+
+    print(f"{'cola':>10} {'nivel':>8} {'p50 ms':>9} {'max ms':>9}")
+    for prioritized in (False, True):
+        latencies = run_case(args.backlog, args.critical, args.work_ms, prioritized, args.mode)
+        name = "prioridad" if prioritized else "FIFO"
+        for level in (EmergencyLevel.CRITICAL, EmergencyLevel.LOW):
+            print(f"{name:>10} {level:>8} {_summary(latencies[level])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Suite de escalabilidad: barrido de tamaño de flota y ritmo de alertas.
+
+Cada caso es una ``VirtualSimulation`` (servidor, agentes y espías en proceso, con
+publicadores en proceso y reloj virtual) de ``--duration`` segundos simulados, con
+la misma semilla en todos, y se ejecuta en un proceso nuevo para que la memoria de
+un caso no contamine al siguiente. Se barren:
+
+- ``--spies`` y ``--agents``: tamaño de la flota (``NUM_SPIES``, ``NUM_NIGHT_AGENTS``);
+- ``--rates``: alertas por segundo de cada espía (ajusta ``MIN/MAX_ALERT_INTERVAL``);
+- ``--spy-models``: generación de alertas con objetos ``Spy`` o con la población
+  vectorizada.
+
+Para cada caso se mide:
+
+- Rendimiento: alertas generadas y atendidas por segundo real.
+- Latencia de despacho: desde que el espía crea la alerta hasta que su tarea llega
+  al agente, en segundos simulados (cola, reintentos sin agentes libres y latencia
+  de la red simulada); p50, p99 y p99.9.
+- CPU de cada componente (servidor, agentes, espías): tiempo de CPU exclusivo de sus
+  llamadas, descontando las anidadas (p. ej. la entrega al servidor dentro de la
+  publicación de un espía cuenta para el servidor).
+- Pico de RSS del proceso del caso (los componentes comparten proceso, así que la
+  memoria se mide por caso).
+
+Los resultados se escriben en JSON (``--output``); con ``--compare`` se comparan con
+los de una ejecución anterior y se señalan las métricas que empeoran más de
+``--threshold`` (el código de salida es 1 si hay regresiones).
+
+Uso:
+    python -m benchmarks.scalability --spies 100 1000 10000 --agents 10 100 --rates 0.1 \\
+        --duration 600 --output escalabilidad.json
+    python -m benchmarks.scalability --load escalabilidad.json --compare anterior.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import platform
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # No disponible en Windows
+    resource = None
+
+COMPONENTS = ("server", "agents", "spies")
+SPY_MODELS = ("objetos", "población")
+PARAMETERS = ("spies", "agents", "rate", "spy_model")
+# Métricas que se comparan entre ejecuciones: True si un valor mayor es mejor
+METRICS = {
+    "alerts_per_second": True,
+    "dispatch_p50": False,
+    "dispatch_p99": False,
+    "dispatch_p999": False,
+    "cpu_server": False,
+    "cpu_agents": False,
+    "cpu_spies": False,
+    "peak_rss_mb": False,
+}
+
+
+class ComponentTimer:
+    """
+    Tiempo de CPU exclusivo por componente.
+
+    Envuelve funciones de cada componente; cuando una llama a otra envuelta (un espía
+    que publica y el servidor que recibe), el tiempo de la anidada se descuenta de la
+    que la llama.
+    """
+
+    def __init__(self):
+        self.cpu = dict.fromkeys(COMPONENTS, 0.0)
+        self._stack: List[str] = []
+        self._mark = 0.0
+
+    def wrap(self, component: str, function):
+        def timed(*args, **kwargs):
+            now = time.process_time()
+            if self._stack:
+                self.cpu[self._stack[-1]] += now - self._mark
+            self._stack.append(component)
+            self._mark = now
+            try:
+                return function(*args, **kwargs)
+            finally:
+                now = time.process_time()
+                self.cpu[self._stack.pop()] += now - self._mark
+                self._mark = now
+        return timed
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KiB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case: Dict[str, Any], duration: float, seed: int, latency: float) -> Dict[str, Any]:
+    """
+    Ejecuta un caso (en el proceso actual) y devuelve sus parámetros y métricas.
+
+    Args:
+        case: Valores de ``PARAMETERS``.
+        duration: Segundos simulados.
+        seed: Semilla de la simulación.
+        latency: Latencia simulada de cada mensaje (s).
+    """
+    import config
+    from simulation.virtual import VirtualSimulation
+
+    logging.disable(logging.ERROR)
+    # Intervalo medio 1 / rate, con la misma dispersión relativa que los valores por defecto
+    config.MIN_ALERT_INTERVAL = 0.5 / case["rate"]
+    config.MAX_ALERT_INTERVAL = 1.5 / case["rate"]
+
+    sim = VirtualSimulation(num_spies=case["spies"], num_agents=case["agents"], seed=seed,
+                            latency=latency, spy_population=case["spy_model"] == "población")
+    timer = ComponentTimer()
+    sim.server.run_pending = timer.wrap("server", sim.server.run_pending)
+    for host in sim.agent_hosts:
+        host.run_pending = timer.wrap("agents", host.run_pending)
+    for host in sim.spy_hosts:
+        host.run_pending = timer.wrap("spies", host.run_pending)
+    to_server = sim.spy_hosts[0].comm_client  # Publicador compartido de espías y agentes
+    to_server.deliver = timer.wrap("server", to_server.deliver)
+
+    # Latencia de despacho: de la creación de la alerta a la entrega de su tarea
+    dispatch_times = []
+    to_agents = sim.server.task_publisher
+    deliver_task = timer.wrap("agents", to_agents.deliver)
+
+    def deliver_and_measure(message):
+        info = sim.server.active_alerts.get(message.alert_id)
+        if info is not None:
+            dispatch_times.append(sim.clock.time() - info['alert'].timestamp)
+        return deliver_task(message)
+    to_agents.deliver = deliver_and_measure
+
+    metrics = sim.run(duration)
+    dispatch = np.array(dispatch_times) if dispatch_times else np.zeros(1)
+    return {
+        **case,
+        "alerts_sent": metrics["alerts_sent"],
+        "tasks_dispatched": len(dispatch_times),
+        "tasks_completed": metrics["tasks_completed"],
+        "wall_time": metrics["wall_time"],
+        "alerts_per_second": metrics["alerts_sent"] / metrics["wall_time"] if metrics["wall_time"] else 0.0,
+        "dispatch_p50": float(np.percentile(dispatch, 50)),
+        "dispatch_p99": float(np.percentile(dispatch, 99)),
+        "dispatch_p999": float(np.percentile(dispatch, 99.9)),
+        **{f"cpu_{component}": cpu for component, cpu in timer.cpu.items()},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def case_key(case: Dict[str, Any]) -> tuple:
+    return tuple(case[name] for name in PARAMETERS)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compara dos ejecuciones caso a caso.
+
+    Returns:
+        list: Descripción de cada métrica que empeora más de ``threshold`` (fracción).
+    """
+    previous = {case_key(case): case for case in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        old = previous.get(case_key(case))
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            new_value, old_value = case.get(metric), old.get(metric)
+            if new_value is None or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{case_key(case)} {metric}: {old_value:.4g} -> {new_value:.4g} "
+                                   f"({change:+.0%})")
+    return regressions
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(f"{'espías':>7} {'agentes':>7} {'tasa':>6} {'modelo':>10} {'alertas':>8} {'alertas/s':>10} "
+          f"{'desp p50':>9} {'desp p99':>9} {'CPU serv':>9} {'CPU agen':>9} {'CPU espí':>9} {'RSS MB':>7}")
+    for c in results["cases"]:
+        print(f"{c['spies']:>7} {c['agents']:>7} {c['rate']:>6.3g} {c['spy_model']:>10} {c['alerts_sent']:>8} "
+              f"{c['alerts_per_second']:>10.0f} {c['dispatch_p50']:>9.2f} {c['dispatch_p99']:>9.2f} "
+              f"{c['cpu_server']:>9.2f} {c['cpu_agents']:>9.2f} {c['cpu_spies']:>9.2f} {c['peak_rss_mb']:>7.0f}")
+
+
+def run_suite(spies: List[int], agents: List[int], rates: List[float], spy_models: List[str],
+              duration: float, seed: int, latency: float) -> Dict[str, Any]:
+    """Ejecuta todos los casos del barrido, cada uno en un proceso nuevo."""
+    context = mp.get_context("spawn")
+    cases = []
+    for num_spies, num_agents, rate, model in itertools.product(spies, agents, rates, spy_models):
+        case = {"spies": num_spies, "agents": num_agents, "rate": rate, "spy_model": model}
+        with context.Pool(1) as pool:
+            cases.append(pool.apply(run_case, (case, duration, seed, latency)))
+        print(f"  {case_key(case)}: {cases[-1]['wall_time']:.2f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "duration": duration,
+            "seed": seed,
+            "latency": latency,
+        },
+        "cases": cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de escalabilidad (tamaño de flota y ritmo de alertas)")
+    parser.add_argument("--spies", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--agents", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.1],
+                        help="Alertas por segundo de cada espía")
+    parser.add_argument("--spy-models", nargs="+", choices=SPY_MODELS, default=["población"])
+    parser.add_argument("--duration", type=float, default=600.0, help="Segundos simulados por caso")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada de cada mensaje (s)")
+    parser.add_argument("--output", help="Fichero JSON en el que guardar los resultados")
+    parser.add_argument("--load", help="No ejecutar: usar los resultados de este fichero")
+    parser.add_argument("--compare", help="Resultados anteriores con los que comparar")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Empeoramiento relativo a partir del cual se señala una regresión")
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load, encoding="utf-8") as f:
+            results = json.load(f)
+    else:
+        results = run_suite(args.spies, args.agents, args.rates, args.spy_models,
+                            args.duration, args.seed, args.latency)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for name in ("duration", "seed", "latency"):
+            if baseline["meta"].get(name) != results["meta"].get(name):
+                print(f"Aviso: {name} distinto en la ejecución anterior "
+                      f"({baseline['meta'].get(name)} frente a {results['meta'].get(name)})")
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n{len(regressions)} regresiones (umbral {args.threshold:.0%}) frente a {args.compare}")
+        for regression in regressions:
+            print(f"  {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark del codec de tramas del modo sockets.
+
+Envía ``--messages`` mensajes por TCP local desde un hilo y los recibe y reconstruye
+en el hilo principal, combinando:
+
+- E/S ``legacy``: la de SocketClient antes de este cambio (dos ``sendall`` por
+  mensaje y recepción en una lista de fragmentos que después se concatena).
+- E/S ``framed``: la actual (``sendmsg`` de cabecera y cuerpo y ``recv_into`` sobre
+  un buffer reutilizable).
+- Codec ``pickle`` (el anterior, inseguro con datos de la red) o ``json`` (el de los
+  mensajes del proyecto, el que usa SocketClient ahora).
+
+Así se ve por separado la ganancia de la capa de tramas y el coste del codec.
+
+Uso:
+    python -m benchmarks.socket_codec --messages 20000 --sizes 0 1000 16000
+"""
+
+import argparse
+import pickle
+import socket
+import threading
+import time
+
+from common.message import AlertMessage
+from communication.sockets.framing import HEADER, FrameBuffer, decode_payload, encode_payload, send_frame
+
+
+CODECS = {
+    "pickle": (pickle.dumps, pickle.loads),
+    "json": (encode_payload, decode_payload),
+}
+
+
+def _legacy_send(sock: socket.socket, serialized_message: bytes) -> None:
+    sock.sendall(len(serialized_message).to_bytes(4, byteorder='big'))
+    sock.sendall(serialized_message)
+
+
+def _legacy_receive(sock: socket.socket, buffer_size: int = 4096):
+    size_bytes = sock.recv(4)
+    if not size_bytes:
+        return None
+    message_size = int.from_bytes(size_bytes, byteorder='big')
+    chunks = []
+    bytes_received = 0
+    while bytes_received < message_size:
+        chunk = sock.recv(min(buffer_size, message_size - bytes_received))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        bytes_received += len(chunk)
+    return b''.join(chunks)
+
+
+def _connected_pair():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    sender = socket.create_connection(listener.getsockname())
+    receiver, _ = listener.accept()
+    listener.close()
+    for sock in (sender, receiver):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sender, receiver
+
+
+def run_case(io: str, codec: str, messages: int, description_size: int) -> float:
+    """
+    Ejecuta un caso del benchmark.
+
+    Returns:
+        float: Segundos en enviar y recibir todos los mensajes.
+    """
+    message = AlertMessage(sender_id="BENCH", position=(40.75, -74.0), description="x" * description_size)
+    encode, decode = CODECS[codec]
+    sender, receiver = _connected_pair()
+
+    if io == "legacy":
+        send = lambda: _legacy_send(sender, encode(message))
+        receive = lambda: _legacy_receive(receiver)
+    else:
+        frames = FrameBuffer()
+
+        def send():
+            payload = encode(message)
+            send_frame(sender, HEADER.pack(len(payload)), payload)
+
+        def receive():
+            payload = frames.next_frame()
+            while payload is None:
+                if not frames.recv_into(receiver):
+                    return None
+                payload = frames.next_frame()
+            return payload
+
+    def produce():
+        for _ in range(messages):
+            send()
+
+    start = time.perf_counter()
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    for _ in range(messages):
+        payload = receive()
+        if payload is None:
+            raise RuntimeError("Conexión cerrada durante el benchmark")
+        decode(payload)
+    elapsed = time.perf_counter() - start
+    producer.join()
+    sender.close()
+    receiver.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del codec de tramas de SocketClient")
+    parser.add_argument("--messages", type=int, default=20000, help="Mensajes por caso")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 16000],
+                        help="Tamaños de la descripción de la alerta (caracteres)")
+    args = parser.parse_args()
+
+    print(f"{'desc':>6} {'E/S':>7} {'codec':>7} {'msg/s':>10}")
+    for size in args.sizes:
+        for codec in CODECS:
+            for io in ("legacy", "framed"):
+                elapsed = run_case(io, codec, args.messages, size)
+                print(f"{size:>6} {io:>7} {codec:>7} {args.messages / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
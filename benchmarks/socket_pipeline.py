@@ -0,0 +1,70 @@
+"""
+Benchmark del envío en tubería de SocketClient.
+
+Levanta un SocketServer local que confirma cada mensaje y envía ``--messages``
+estados desde un SocketClient de dos formas:
+
+- ``secuencial``: espera la confirmación de cada mensaje antes de enviar el
+  siguiente (un viaje de ida y vuelta por mensaje, como el cliente anterior).
+- ``tubería``: encola todos los envíos y espera al final a sus confirmaciones
+  (hasta ``--in-flight`` mensajes sin confirmar a la vez).
+
+Uso:
+    python -m benchmarks.socket_pipeline --messages 20000 --in-flight 64 1024
+"""
+
+import argparse
+import time
+
+from common.message import StatusMessage
+from communication.sockets.socket_client import SocketClient
+from communication.sockets.socket_server import SocketServer
+
+
+def run_case(port: int, messages: int, in_flight: int, pipelined: bool) -> float:
+    """
+    Returns:
+        float: Segundos hasta tener confirmados todos los mensajes.
+    """
+    client = SocketClient('127.0.0.1', port, max_in_flight=in_flight)
+    if not client.connect():
+        raise RuntimeError("No se pudo conectar con el servidor del benchmark")
+    start = time.perf_counter()
+    if pipelined:
+        futures = [client.send_message_async(StatusMessage(sender_id="BENCH", status="ok"))
+                   for _ in range(messages)]
+        for future in futures:
+            future.result()
+    else:
+        for _ in range(messages):
+            client.send_message_async(StatusMessage(sender_id="BENCH", status="ok")).result()
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del envío en tubería de SocketClient")
+    parser.add_argument("--messages", type=int, default=20000, help="Mensajes por caso")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[64, 1024],
+                        help="Máximo de mensajes sin confirmar en los casos en tubería")
+    args = parser.parse_args()
+
+    server = SocketServer('127.0.0.1', 0)
+    if not server.start():
+        raise RuntimeError("No se pudo iniciar el servidor del benchmark")
+    port = server.server_socket.getsockname()[1]
+
+    print(f"{'modo':>10} {'en vuelo':>8} {'msg/s':>10}")
+    try:
+        elapsed = run_case(port, args.messages, 1, pipelined=False)
+        print(f"{'secuencial':>10} {1:>8} {args.messages / elapsed:>10.0f}")
+        for in_flight in args.in_flight:
+            elapsed = run_case(port, args.messages, in_flight, pipelined=True)
+            print(f"{'tubería':>10} {in_flight:>8} {args.messages / elapsed:>10.0f}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark de generación de alertas: espías como objetos frente al modelo de población.
+
+Simula ``--duration`` segundos de ``--spies`` espías en tiempo virtual con un
+publicador que solo cuenta los mensajes, de modo que se mide únicamente el coste de
+generar la carga:
+
+- ``objetos``: un ``SpyHost`` con un ``Spy`` por espía (llamadas a ``random`` y un
+  temporizador por alerta).
+- ``población``: un ``SpyPopulationHost`` (paseo aleatorio y llegadas de Poisson
+  vectorizados, un tick por segundo).
+
+Uso:
+    python -m benchmarks.spy_generation --spies 1000 10000 100000 --duration 60
+"""
+
+import argparse
+import logging
+import time
+
+from agents.spy_host import SpyHost, partition_spies
+from agents.spy_population import SpyPopulationHost
+from common.clock import VirtualClock, set_clock
+from simulation.engine import SimulationEngine
+from simulation.virtual import LoopbackPublisher
+
+
+def run_case(model: str, spies: int, duration: float) -> tuple:
+    """
+    Returns:
+        tuple: (alertas generadas, segundos reales).
+    """
+    clock = VirtualClock()
+    previous_clock = set_clock(clock)
+    try:
+        group = partition_spies(spies, 1)[0]
+        if model == "objetos":
+            host = SpyHost("BENCH", group, clock=clock)
+        else:
+            host = SpyPopulationHost("BENCH", group, clock=clock, seed=1)
+        host.comm_client = LoopbackPublisher(lambda message: True)
+        for spy in getattr(host, 'spies', ()):
+            spy.comm_client = host.comm_client
+        engine = SimulationEngine(clock)
+        engine.add_source(host)
+        start = time.perf_counter()
+        host.schedule_all()
+        engine.run(until=duration)
+        return host.alerts_sent, time.perf_counter() - start
+    finally:
+        set_clock(previous_clock)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de generación de alertas de los espías")
+    parser.add_argument("--spies", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos simulados")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'espías':>8} {'modelo':>10} {'alertas':>9} {'s reales':>9} {'alertas/s':>10}")
+    for spies in args.spies:
+        for model in ("objetos", "población"):
+            alerts, elapsed = run_case(model, spies, args.duration)
+            print(f"{spies:>8} {model:>10} {alerts:>9} {elapsed:>9.2f} {alerts / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark del arranque de componentes.
+
+Lanza ``--components`` procesos con ``simulation.launcher.ComponentLauncher`` y mide
+cuánto tardan en estar todos listos. Cada proceso hace lo que cuesta arrancar un
+componente real (importar los módulos de agentes, espías y servidor), avisa por la
+barrera de arranque y termina, para que el benchmark no necesite memoria para mil
+procesos vivos a la vez.
+
+Variantes (cada una en un intérprete nuevo, porque un proceso solo tiene un forkserver):
+
+- ``forkserver``: forkserver con ``config.FORKSERVER_PRELOAD`` precargado;
+- ``forkserver-sin-precarga``: forkserver sin precarga (cada hijo importa todo);
+- ``spawn``: intérprete nuevo por hijo (el método por defecto en Windows y macOS);
+- ``fork``: copia del proceso principal (rápido, pero hereda sus hilos y conexiones).
+
+Uso:
+    python -m benchmarks.startup --components 1000 --variants forkserver fork
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+VARIANTS = ("forkserver", "forkserver-sin-precarga", "spawn", "fork")
+
+
+def probe_component(on_ready=None, beat=None):
+    """Componente de prueba: importa lo mismo que uno real, avisa y termina."""
+    import agents.night_agent_host  # noqa: F401
+    import agents.spy_host  # noqa: F401
+    import agents.spy_population  # noqa: F401
+    import server.central_server  # noqa: F401
+    if on_ready:
+        on_ready()
+
+
+def run_variant(variant: str, components: int) -> dict:
+    """
+    Lanza ``components`` procesos con una variante de arranque (en este proceso).
+
+    Returns:
+        dict: Tiempo hasta que todos están listos, del bucle de arranque y por componente.
+    """
+    from simulation.launcher import ComponentLauncher
+
+    method = variant.split("-")[0]
+    launcher = ComponentLauncher(method, preload=[] if variant.endswith("sin-precarga") else None)
+    started = time.perf_counter()
+    launcher.start_many((f"PROBE{i:05d}", probe_component, ()) for i in range(components))
+    launched = time.perf_counter() - started
+    ready = launcher.wait_ready(timeout=max(60.0, components * 2.0))
+    elapsed = time.perf_counter() - started
+    launcher.join()
+    times = np.array(list(launcher.startup_times.values()) or [0.0])
+    return {
+        "variant": variant,
+        "components": components,
+        "ready": len(launcher.startup_times),
+        "all_ready": ready,
+        "launch_time": launched,
+        "total_time": elapsed,
+        "startup_p50": float(np.percentile(times, 50)),
+        "startup_p99": float(np.percentile(times, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de componentes")
+    parser.add_argument("--components", type=int, default=1000)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=["forkserver", "fork"])
+    parser.add_argument("--single", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.single:
+        print(json.dumps(run_variant(args.single, args.components)))
+        return
+
+    print(f"{'variante':>24} {'listos':>9} {'arranque s':>11} {'total s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for variant in args.variants:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--single", variant,
+             "--components", str(args.components)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{r['variant']:>24} {r['ready']:>4}/{r['components']:<4} {r['launch_time']:>11.2f} "
+              f"{r['total_time']:>8.2f} {r['startup_p50'] * 1e3:>8.0f} {r['startup_p99'] * 1e3:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
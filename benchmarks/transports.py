@@ -0,0 +1,234 @@
+"""
+Benchmark de latencia y rendimiento de todos los modos de comunicación.
+
+El lado servidor corre en este proceso y el cliente en un proceso hijo, como en
+``run_simulation.py``. Para cada modo se mide:
+
+- Latencia: ``--pings`` viajes de ida y vuelta (el cliente envía un estado y
+  espera la respuesta del servidor antes de enviar el siguiente); p50 y p99.
+- Rendimiento: el cliente envía ``--messages`` estados seguidos y el servidor
+  responde al recibir el último; mensajes por segundo.
+
+Modos: ``sockets`` (TCP local), ``unix``, ``shm``, ``inmemory`` (broker en un
+proceso gestor) y ``rabbitmq`` (se omite si no hay un broker accesible).
+
+Uso:
+    python -m benchmarks.transports --messages 20000 --pings 2000 --modes sockets unix shm inmemory
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import statistics
+import tempfile
+import time
+
+import config
+from common.constants import CommunicationMode
+from common.message import StatusMessage
+from communication.factory import get_consumer_class, get_publisher_class
+
+BENCH_EXCHANGE = "bench_transports"
+UP_QUEUE, UP_KEY = "bench_transports_up", "bench.up"
+DOWN_QUEUE, DOWN_KEY = "bench_transports_down", "bench.down"
+SHM_NAME = "agente_nocturno_bench"
+ALL_MODES = (CommunicationMode.SOCKETS, CommunicationMode.UNIX, CommunicationMode.SHM,
+             CommunicationMode.INMEMORY, CommunicationMode.RABBITMQ)
+
+PING, DATA, END = "ping", "data", "end"
+
+
+def _broker_consumer(mode: str, queue_name: str, routing_key: str):
+    return get_consumer_class(mode)(
+        host=config.RABBITMQ_HOST,
+        port=config.RABBITMQ_PORT,
+        username=config.RABBITMQ_USER,
+        password=config.RABBITMQ_PASSWORD,
+        exchange=BENCH_EXCHANGE,
+        exchange_type='topic',
+        queue_name=queue_name,
+        binding_keys=[routing_key],
+        prefetch_count=256,
+        auto_reconnect=False
+    )
+
+
+def _broker_publisher(mode: str):
+    return get_publisher_class(mode)(
+        host=config.RABBITMQ_HOST,
+        port=config.RABBITMQ_PORT,
+        username=config.RABBITMQ_USER,
+        password=config.RABBITMQ_PASSWORD,
+        exchange=BENCH_EXCHANGE,
+        exchange_type='topic'
+    )
+
+
+# ===== Lado servidor (este proceso) =====
+
+class _Server:
+    """Recibe los estados del cliente y responde a los ``ping`` y al ``end``."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.endpoint = {}
+        self.received = 0
+        self._server = self._publisher = self._consumer = None
+
+    def _reply_to(self, message, address=None):
+        self.received += 1
+        if message.status == DATA:
+            return
+        reply = StatusMessage(sender_id="SERVER", status=message.status)
+        if self._server is not None:
+            self._server.send_message_to(address, reply)
+        else:
+            self._publisher.publish_message(reply, routing_key=DOWN_KEY)
+
+    def start(self) -> bool:
+        if self.mode in CommunicationMode.DIRECT_MODES:
+            if self.mode == CommunicationMode.SHM:
+                from communication.shm.shm_server import ShmServer
+                self._server = ShmServer(SHM_NAME, message_callback=self._reply_to,
+                                         poll_interval=config.SHM_POLL_INTERVAL)
+                self.endpoint = {"name": SHM_NAME}
+            else:
+                from communication.sockets.socket_server import SocketServer
+                unix_path = None
+                if self.mode == CommunicationMode.UNIX:
+                    unix_path = os.path.join(tempfile.gettempdir(), "agente_nocturno_bench.sock")
+                self._server = SocketServer('127.0.0.1', 0, message_callback=self._reply_to, unix_path=unix_path)
+            if not self._server.start():
+                return False
+            if self.mode != CommunicationMode.SHM:
+                self.endpoint = {"port": self._server.port, "unix_path": self._server.unix_path}
+            return True
+
+        self._consumer = _broker_consumer(self.mode, UP_QUEUE, UP_KEY)
+        self._publisher = _broker_publisher(self.mode)
+        if not (self._consumer.connect() and self._publisher.connect()):
+            return False
+        return self._consumer.start_consuming(lambda message, routing_key: self._reply_to(message))
+
+    def stop(self) -> None:
+        for component in (self._server,):
+            if component is not None:
+                component.stop()
+        for component in (self._consumer, self._publisher):
+            if component is not None:
+                component.close()
+
+
+# ===== Lado cliente (proceso hijo) =====
+
+def _open_client(mode: str, endpoint: dict):
+    """
+    Returns:
+        tuple: (enviar(mensaje), recibir(timeout), cerrar()).
+    """
+    if mode == CommunicationMode.SHM:
+        from communication.shm.shm_client import ShmClient
+        client = ShmClient(endpoint["name"], poll_interval=config.SHM_POLL_INTERVAL)
+    elif mode in CommunicationMode.DIRECT_MODES:
+        from communication.sockets.socket_client import SocketClient
+        client = SocketClient('127.0.0.1', endpoint["port"], unix_path=endpoint["unix_path"])
+    else:
+        publisher = _broker_publisher(mode)
+        consumer = _broker_consumer(mode, DOWN_QUEUE, DOWN_KEY)
+        inbox = queue.Queue()
+        if not (publisher.connect() and consumer.connect()):
+            raise RuntimeError(f"No se pudo conectar con el broker ({mode})")
+        consumer.start_consuming(lambda message, routing_key: inbox.put(message))
+
+        def close():
+            consumer.close()
+            publisher.close()
+        return (lambda message: publisher.publish_message(message, routing_key=UP_KEY),
+                lambda timeout: inbox.get(timeout=timeout), close)
+
+    if not client.connect():
+        raise RuntimeError(f"No se pudo conectar con el servidor ({mode})")
+    return client.send_message, client.receive_message, client.close
+
+
+def _client_main(mode: str, endpoint: dict, messages: int, pings: int, results) -> None:
+    try:
+        send, receive, close = _open_client(mode, endpoint)
+        rtts = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            send(StatusMessage(sender_id="BENCH", status=PING))
+            if receive(10.0) is None:
+                raise RuntimeError("Sin respuesta al ping")
+            rtts.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(messages):
+            send(StatusMessage(sender_id="BENCH", status=DATA))
+        send(StatusMessage(sender_id="BENCH", status=END))
+        if receive(120.0) is None:
+            raise RuntimeError("Sin respuesta al final del envío")
+        elapsed = time.perf_counter() - start
+        close()
+        results.put((rtts, elapsed))
+    except Exception as e:
+        results.put(e)
+
+
+def run_mode(mode: str, messages: int, pings: int):
+    """
+    Returns:
+        tuple: (p50 µs, p99 µs, msg/s) o None si el modo no está disponible.
+    """
+    server = _Server(mode)
+    if not server.start():
+        server.stop()
+        return None
+    results = mp.Queue()
+    client = mp.Process(target=_client_main, args=(mode, server.endpoint, messages, pings, results))
+    client.start()
+    try:
+        outcome = results.get(timeout=600)
+    finally:
+        client.join(timeout=10)
+        server.stop()
+    if isinstance(outcome, Exception):
+        raise outcome
+    rtts, elapsed = outcome
+    rtts.sort()
+    p99 = rtts[min(len(rtts) - 1, int(len(rtts) * 0.99))]
+    return statistics.median(rtts) * 1e6, p99 * 1e6, (messages + 1) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia y rendimiento por modo de comunicación")
+    parser.add_argument("--messages", type=int, default=20000, help="Mensajes del caso de rendimiento")
+    parser.add_argument("--pings", type=int, default=2000, help="Viajes de ida y vuelta del caso de latencia")
+    parser.add_argument("--modes", nargs="+", choices=ALL_MODES, default=list(ALL_MODES))
+    args = parser.parse_args()
+
+    broker_manager = None
+    if CommunicationMode.INMEMORY in args.modes and not config.INMEMORY_BROKER_ADDRESS:
+        # Broker compartido entre este proceso y el del cliente
+        from communication.inmemory.broker import start_broker_server
+        broker_manager = start_broker_server()
+        host, port = broker_manager.address
+        os.environ["INMEMORY_BROKER_ADDRESS"] = f"{host}:{port}"
+
+    print(f"{'modo':>9} {'p50 µs':>9} {'p99 µs':>9} {'msg/s':>10}")
+    try:
+        for mode in args.modes:
+            result = run_mode(mode, args.messages, args.pings)
+            if result is None:
+                print(f"{mode:>9} {'no disponible':>30}")
+                continue
+            p50, p99, rate = result
+            print(f"{mode:>9} {p50:>9.0f} {p99:>9.0f} {rate:>10.0f}")
+    finally:
+        if broker_manager is not None:
+            broker_manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
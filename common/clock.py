@@ -0,0 +1,87 @@
+"""
+Reloj del sistema, inyectable.
+
+Los componentes que miden o esperan tiempo lo hacen a través de un reloj en lugar de
+llamar directamente a ``time``: en ejecución normal es ``WallClock`` (el reloj real) y
+en una simulación de eventos discretos es un ``VirtualClock``, cuyo tiempo solo avanza
+cuando lo adelanta el motor (``simulation.engine``). Así la misma lógica puede simular
+horas de operación en segundos y de forma reproducible.
+"""
+
+import time
+from typing import Optional
+
+
+class WallClock:
+    """Reloj real: delega en el módulo ``time``."""
+
+    virtual = False
+
+    def time(self) -> float:
+        """Segundos desde la época (marcas de tiempo de mensajes y estados)."""
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Segundos de un reloj que no retrocede (planificación de temporizadores)."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Reloj simulado: el tiempo está detenido hasta que alguien lo adelanta.
+
+    ``sleep`` adelanta el reloj en lugar de esperar, de modo que el código secuencial
+    que duerme (reintentos, pausas) avanza el tiempo simulado sin bloquear.
+    """
+
+    virtual = True
+
+    def __init__(self, epoch: Optional[float] = None):
+        """
+        Args:
+            epoch: Hora de época correspondiente al instante 0 de la simulación;
+                por defecto, la hora real al crear el reloj.
+        """
+        self.epoch = time.time() if epoch is None else epoch
+        self._now = 0.0
+
+    def time(self) -> float:
+        return self.epoch + self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        if seconds > 0:
+            self._now += seconds
+
+    def advance_to(self, instant: float) -> None:
+        """Adelanta el reloj hasta ``instant`` (nunca lo retrasa)."""
+        if instant > self._now:
+            self._now = instant
+
+
+_clock = WallClock()
+
+
+def get_clock():
+    """Reloj activo en el proceso."""
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Sustituye el reloj activo del proceso.
+
+    Returns:
+        El reloj anterior, para restaurarlo al terminar.
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
@@ -16,6 +16,13 @@ class AgentStatus:
     BUSY = "OCUPADO"
     OFFLINE = "DESCONECTADO"
 
+class AgentPhase:
+    """Fases de la máquina de estados de un agente en un NightAgentHost"""
+    IDLE = "INACTIVO"          # Disponible, esperando tarea
+    TRAVELLING = "EN_CAMINO"   # Desplazándose al lugar del incidente
+    WORKING = "TRABAJANDO"     # Atendiendo la emergencia
+    REPORTING = "INFORMANDO"   # Enviando la finalización y su nuevo estado
+
 class EmergencyLevel:
     """Niveles de emergencia posibles"""
     LOW = "BAJA"
@@ -35,6 +42,14 @@ class CommunicationMode:
     """Modos de comunicación disponibles"""
     SOCKETS = "sockets"
     RABBITMQ = "rabbitmq"
+    INMEMORY = "inmemory"  # Broker en memoria, sin servicios externos
+    UNIX = "unix"  # Sockets de dominio Unix (misma máquina)
+    SHM = "shm"  # Buffers circulares en memoria compartida (misma máquina)
+
+    # Modos basados en un broker con exchanges y colas (publicador/consumidor)
+    BROKER_MODES = (RABBITMQ, INMEMORY)
+    # Modos en los que los agentes se conectan directamente al servidor central
+    DIRECT_MODES = (SOCKETS, UNIX, SHM)
 
 class LoggingTags:
     """Tags para categorizar los logs"""
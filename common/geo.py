@@ -176,4 +176,47 @@ def format_position(position: Tuple[float, float]) -> str:
     lat_dir = 'N' if lat >= 0 else 'S'
     lon_dir = 'E' if lon >= 0 else 'W'
 
-    return f"{abs(lat):.6f}°{lat_dir}, {abs(lon):.6f}°{lon_dir}"
\ No newline at end of file
+    return f"{abs(lat):.6f}°{lat_dir}, {abs(lon):.6f}°{lon_dir}"
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(position: Tuple[float, float], precision: int = 5) -> str:
+    """
+    Codifica una posición como geohash (celdas rectangulares jerárquicas).
+
+    Posiciones cercanas comparten prefijo, por lo que el geohash sirve como
+    identificador de celda en las claves de enrutamiento.
+
+    Args:
+        position: Par de coordenadas (latitud, longitud)
+        precision: Número de caracteres del geohash (5 ≈ celdas de 4.9 km)
+
+    Returns:
+        str: Geohash de la posición
+    """
+    lat, lon = position
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Los bits pares corresponden a la longitud
+
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
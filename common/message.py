@@ -3,23 +3,25 @@ Define la estructura de mensajes intercambiados entre agentes, espías y servido
 """
 
 import json
-import time
 import uuid
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from typing import Dict, Any, Tuple, Optional
 
+from common.clock import get_clock
 from common.constants import MessageType
 
 
 @dataclass
 class Message:
     message_id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    timestamp: float = field(default_factory=time.time)
+    timestamp: float = field(default_factory=lambda: get_clock().time())
     message_type: str = field(default=MessageType.GENERIC)
     sender_id: str = ""
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        # Los campos son valores simples: el __dict__ de la instancia equivale a
+        # asdict() sin su copia profunda recursiva
+        return json.dumps(self.__dict__)
 
     @classmethod
     def from_json(cls, json_str: str) -> 'Message':
@@ -117,16 +119,23 @@ def create_message_from_json(json_str: str) -> Message:
     """
     Crea el tipo correcto de mensaje basado en el JSON recibido
     """
-    data = json.loads(json_str)
-    message_type = data.get('message_type', MessageType.GENERIC)
-
-    if message_type == MessageType.ALERT:
-        return AlertMessage.from_json(json_str)
-    elif message_type == MessageType.TASK:
-        return TaskMessage.from_json(json_str)
-    elif message_type == MessageType.STATUS:
-        return StatusMessage.from_json(json_str)
-    elif message_type == MessageType.ACK:
-        return AcknowledgementMessage.from_json(json_str)
-    else:
-        return Message.from_json(json_str)
\ No newline at end of file
+    # Se decodifica una sola vez y se construye la clase correspondiente
+    return create_message_from_dict(json.loads(json_str))
+
+
+def create_message_from_dict(data: Dict[str, Any]) -> Message:
+    """
+    Crea el tipo correcto de mensaje a partir de sus campos ya decodificados
+    """
+    message_class = _MESSAGE_CLASSES.get(data.get('message_type', MessageType.GENERIC), Message)
+    if 'position' in data and message_class is not Message:
+        data['position'] = tuple(data['position'])
+    return message_class(**data)
+
+
+_MESSAGE_CLASSES = {
+    MessageType.ALERT: AlertMessage,
+    MessageType.TASK: TaskMessage,
+    MessageType.STATUS: StatusMessage,
+    MessageType.ACK: AcknowledgementMessage,
+}
\ No newline at end of file
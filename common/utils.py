@@ -6,14 +6,19 @@ import os
 import json
 import logging
 import random
-import time
+import threading
 from datetime import datetime
 
 import config
+from common.clock import get_clock
 from common.constants import EmergencyLevel, EmergencyType
 
 logger = logging.getLogger(__name__)
 
+# Fichero de mensajes fallidos, abierto una sola vez por proceso
+_failed_messages_file = None
+_failed_messages_lock = threading.Lock()
+
 def setup_logger(name, log_file=None):
     """
     Configura y devuelve un logger personalizado.
@@ -51,6 +56,15 @@ def setup_logger(name, log_file=None):
 
     return logger
 
+def _class_values(cls):
+    """Valores de las constantes declaradas en una clase de ``common.constants``."""
+    return tuple(value for name, value in vars(cls).items()
+                 if not name.startswith('__') and not callable(value))
+
+# Se calculan una sola vez: generate_emergency se llama por cada alerta
+EMERGENCY_LEVEL_CHOICES = _class_values(EmergencyLevel)
+EMERGENCY_TYPE_CHOICES = _class_values(EmergencyType)
+
 def generate_emergency():
     """
     Genera datos aleatorios para una emergencia.
@@ -58,15 +72,7 @@ def generate_emergency():
     Returns:
         tuple: (nivel, tipo) de emergencia
     """
-    level = random.choice([
-        value for name, value in vars(EmergencyLevel).items()
-        if not name.startswith('__') and not callable(value)
-    ])
-    emerg_type = random.choice([
-        value for name, value in vars(EmergencyType).items()
-        if not name.startswith('__') and not callable(value)
-    ])
-    return level, emerg_type
+    return random.choice(EMERGENCY_LEVEL_CHOICES), random.choice(EMERGENCY_TYPE_CHOICES)
 
 def get_timestamp():
     """
@@ -129,26 +135,30 @@ def json_to_dict(json_str):
 
 def safe_sleep(seconds):
     """
-    Versión segura de time.sleep que maneja interrupciones.
+    Versión de time.sleep que usa el reloj activo del proceso.
+
+    No captura KeyboardInterrupt: la interrupción llega al ``run`` del componente.
 
     Args:
         seconds (float): Segundos a esperar
     """
-    try:
-        time.sleep(seconds)
-    except KeyboardInterrupt:
-        pass
+    get_clock().sleep(seconds)
 
 def save_failed_message(message):
     """
     Guarda un mensaje fallido en un archivo para análisis posterior.
 
+    El archivo se abre una única vez y se mantiene con buffer de línea.
+
     Args:
         message (Message): El mensaje que no se pudo enviar.
     """
+    global _failed_messages_file
     try:
-        with open("failed_alerts.log", "a") as file:
-            file.write(message.to_json() + "\n")
+        with _failed_messages_lock:
+            if _failed_messages_file is None:
+                _failed_messages_file = open("failed_alerts.log", "a", buffering=1)
+            _failed_messages_file.write(message.to_json() + "\n")
     except Exception as e:
         logger = setup_logger("failed_message_logger", "failed_messages.log")
-        logger.error(f"Error al guardar el mensaje fallido: {e}")
\ No newline at end of file
+        logger.error(f"Error al guardar el mensaje fallido: {e}")
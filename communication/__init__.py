@@ -1,2 +1,7 @@
-from communication.sockets import socket_client, socket_server
-from communication.rabbitmq import publisher, consumer
\ No newline at end of file
+"""
+Capa de comunicación entre el servidor central, los agentes nocturnos y los espías.
+
+Los transportes (``rabbitmq``, ``inmemory``, ``sockets``, ``shm``) no se importan aquí:
+``communication.factory`` carga solo el del modo configurado, para que un proceso en
+modo sockets no pague la importación de pika ni un agente la del servidor.
+"""
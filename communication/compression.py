@@ -0,0 +1,89 @@
+"""
+Compresión transparente del cuerpo de los mensajes.
+
+Los publicadores comprimen los cuerpos que superan un umbral de tamaño y lo indican
+en la propiedad ``content_encoding`` del mensaje; los consumidores la leen y
+descomprimen antes de decodificar el JSON. Los mensajes sin ``content_encoding``
+se procesan como siempre, así que publicadores con y sin compresión conviven.
+Solo se usan módulos de la biblioteca estándar (zlib y lzma).
+"""
+
+import lzma
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import config
+
+ZLIB = 'zlib'
+LZMA = 'lzma'
+ENCODINGS = (ZLIB, LZMA)
+
+
+def validate_encoding(encoding: Optional[str]) -> None:
+    """
+    Comprueba que un algoritmo de compresión está soportado.
+
+    Raises:
+        ValueError: Si ``encoding`` no es None ni uno de ``ENCODINGS``.
+    """
+    if encoding is not None and encoding not in ENCODINGS:
+        raise ValueError(f"Compresión no soportada: {encoding}. Use {', '.join(ENCODINGS)} o None.")
+
+
+def compression_options() -> Dict[str, Any]:
+    """Opciones de compresión de los publicadores según ``config.py``."""
+    return dict(
+        compression=config.RABBITMQ_COMPRESSION,
+        compression_threshold=config.RABBITMQ_COMPRESSION_THRESHOLD,
+        compression_level=config.RABBITMQ_COMPRESSION_LEVEL
+    )
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """Comprime ``body`` con el algoritmo indicado (nivel 0-9)."""
+    if encoding == ZLIB:
+        return zlib.compress(body, level)
+    if encoding == LZMA:
+        return lzma.compress(body, preset=level)
+    raise ValueError(f"Compresión no soportada: {encoding}")
+
+
+def encode_body(body: bytes, encoding: Optional[str], threshold: int = 1024,
+                level: int = 6) -> Tuple[bytes, Optional[str]]:
+    """
+    Comprime un cuerpo si supera el umbral y la compresión reduce su tamaño.
+
+    Args:
+        body: Cuerpo serializado del mensaje.
+        encoding: Algoritmo (``'zlib'`` o ``'lzma'``); None desactiva la compresión.
+        threshold: Tamaño mínimo en bytes para intentar comprimir.
+        level: Nivel de compresión (0-9).
+
+    Returns:
+        tuple: (cuerpo a enviar, content_encoding o None si se envía sin comprimir).
+    """
+    if encoding is None or len(body) < threshold:
+        return body, None
+    compressed = compress(body, encoding, level)
+    if len(compressed) >= len(body):
+        return body, None
+    return compressed, encoding
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Descomprime un cuerpo según su ``content_encoding``.
+
+    Raises:
+        ValueError: Si el algoritmo no está soportado o el cuerpo está corrupto.
+    """
+    if not encoding:
+        return body
+    try:
+        if encoding == ZLIB:
+            return zlib.decompress(body)
+        if encoding == LZMA:
+            return lzma.decompress(body)
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Cuerpo {encoding} corrupto: {e}") from None
+    raise ValueError(f"Compresión no soportada: {encoding}")
@@ -0,0 +1,119 @@
+"""
+Procesamiento de las entregas común a los consumidores de RabbitMQ y del broker en memoria.
+
+Decodificación de cada entrega, recuento de fallos por mensaje y decisión de
+reencolar o desviar a dead letters. No depende de pika, de modo que el consumidor
+en memoria no carga el cliente de RabbitMQ.
+"""
+
+import logging
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from common.message import Message, create_message_from_json
+from communication.compression import decode_body
+
+logger = logging.getLogger(__name__)
+
+
+class PoisonMessageError(Exception):
+    """Mensaje imposible de decodificar: reintentarlo nunca tendrá éxito."""
+
+
+def process_delivery(callback: Callable[[Message, str], None], body: bytes, routing_key: str,
+                     content_encoding: Optional[str] = None) -> None:
+    """
+    Decodifica una entrega y la pasa al callback del usuario.
+
+    Es una función de módulo para que pueda ejecutarse en un pool de procesos
+    (en ese caso el callback también debe poder serializarse con pickle, y la
+    descompresión del cuerpo también se hace en el trabajador).
+
+    Raises:
+        PoisonMessageError: Si el cuerpo no se puede descomprimir, no es UTF-8 o no
+            es un mensaje válido.
+    """
+    try:
+        body = decode_body(body, content_encoding)
+        message = create_message_from_json(body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+        raise PoisonMessageError(f"{type(e).__name__}: {e}") from None
+    logger.debug(f"Mensaje recibido: {message}, Routing Key: {routing_key}")
+    callback(message, routing_key)
+
+
+def ensure_picklable(callback: Callable[[Message, str], None]) -> None:
+    """
+    Comprueba que un callback puede enviarse a un pool de procesos.
+
+    Raises:
+        ValueError: Si no se puede serializar con pickle (lambdas, funciones locales o
+            métodos de objetos con conexiones, hilos o cerrojos).
+    """
+    try:
+        pickle.dumps(callback)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise ValueError(f"Con trabajadores de tipo 'process' el callback debe poder "
+                         f"serializarse con pickle: {e}") from None
+
+
+class RedeliveryCounter:
+    """
+    Cuenta los fallos de procesamiento de cada mensaje en este consumidor.
+
+    RabbitMQ no cuenta las reentregas de un nack con requeue en colas clásicas, así
+    que el recuento es local (por cuerpo del mensaje) y acotado en memoria. Solo se
+    consulta cuando hay fallos, de modo que el camino de éxito no paga nada mientras
+    no haya mensajes fallando.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._counts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(body: bytes):
+        return len(body), zlib.crc32(body)
+
+    def failed(self, body: bytes) -> int:
+        """Registra un fallo y devuelve el número de fallos acumulados."""
+        key = self._key(body)
+        with self._lock:
+            count = self._counts.pop(key, 0) + 1
+            self._counts[key] = count
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+            return count
+
+    def forget(self, body: bytes) -> None:
+        """Olvida un mensaje (procesado con éxito o desviado a dead letters)."""
+        if not self._counts:
+            return
+        with self._lock:
+            self._counts.pop(self._key(body), None)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+def should_requeue(counter: RedeliveryCounter, max_redeliveries: int, body: bytes,
+                   error: BaseException) -> bool:
+    """
+    Decide si una entrega fallida vuelve a la cola o se rechaza definitivamente.
+
+    Los mensajes irrecuperables y los que superan ``max_redeliveries`` fallos se
+    rechazan sin requeue; si la cola tiene exchange de dead letters, acaban allí.
+    """
+    if isinstance(error, PoisonMessageError):
+        logger.error(f"Mensaje irrecuperable, se desvía a dead letters: {error}")
+        return False
+    logger.error(f"Error al procesar mensaje: {error}")
+    if max_redeliveries and counter.failed(body) >= max_redeliveries:
+        logger.error(f"Mensaje desviado a dead letters tras {max_redeliveries} fallos")
+        counter.forget(body)
+        return False
+    return True
@@ -0,0 +1,123 @@
+"""
+Selección de las clases de publicador y consumidor según el modo de comunicación,
+y creación del servidor y los clientes de los modos de conexión directa.
+
+Cada transporte se importa solo cuando se pide su clase, así que un proceso carga
+únicamente el del modo configurado (pika solo en modo RabbitMQ).
+"""
+
+from typing import List, Optional
+
+import config
+from common.constants import CommunicationMode
+
+
+def transport_modules(mode: Optional[str] = None) -> List[str]:
+    """
+    Módulos que importa el transporte de un modo al crear sus clientes.
+
+    El forkserver de ``simulation.launcher`` los precarga para que los hijos no los
+    importen uno a uno.
+
+    Args:
+        mode: Modo de comunicación; por defecto ``config.COMMUNICATION_MODE``.
+    """
+    mode = mode or config.COMMUNICATION_MODE
+    if mode == CommunicationMode.RABBITMQ:
+        return ["communication.rabbitmq.publisher", "communication.rabbitmq.consumer",
+                "communication.rabbitmq.connection_pool", "communication.spool"]
+    if mode == CommunicationMode.INMEMORY:
+        return ["communication.inmemory.publisher", "communication.inmemory.consumer"]
+    if mode == CommunicationMode.SHM:
+        return ["communication.shm.shm_server", "communication.shm.shm_client"]
+    return ["communication.sockets.socket_server", "communication.sockets.socket_client"]
+
+
+def get_publisher_class(mode: Optional[str] = None):
+    """
+    Devuelve la clase de publicador para el modo indicado (o el configurado).
+
+    Args:
+        mode: Modo de comunicación; por defecto ``config.COMMUNICATION_MODE``.
+    """
+    mode = mode or config.COMMUNICATION_MODE
+    if mode == CommunicationMode.INMEMORY:
+        from communication.inmemory.publisher import InMemoryPublisher
+        return InMemoryPublisher
+    from communication.rabbitmq.publisher import RabbitMQPublisher
+    return RabbitMQPublisher
+
+
+def get_consumer_class(mode: Optional[str] = None):
+    """
+    Devuelve la clase de consumidor para el modo indicado (o el configurado).
+
+    Args:
+        mode: Modo de comunicación; por defecto ``config.COMMUNICATION_MODE``.
+    """
+    mode = mode or config.COMMUNICATION_MODE
+    if mode == CommunicationMode.INMEMORY:
+        from communication.inmemory.consumer import InMemoryConsumer
+        return InMemoryConsumer
+    from communication.rabbitmq.consumer import RabbitMQConsumer
+    return RabbitMQConsumer
+
+
+def create_direct_server(message_callback, mode: Optional[str] = None):
+    """
+    Crea el servidor de un modo de conexión directa (sockets, unix o shm).
+
+    Args:
+        message_callback: Función a llamar con cada mensaje recibido y su dirección.
+        mode: Modo de comunicación; por defecto ``config.COMMUNICATION_MODE``.
+    """
+    mode = mode or config.COMMUNICATION_MODE
+    if mode == CommunicationMode.SHM:
+        from communication.shm.shm_server import ShmServer
+        return ShmServer(
+            name=config.SHM_NAME,
+            message_callback=message_callback,
+            max_clients=config.SHM_MAX_CLIENTS,
+            ring_size=config.SHM_RING_SIZE,
+            max_message_size=config.SOCKET_MAX_MESSAGE_SIZE,
+            poll_interval=config.SHM_POLL_INTERVAL
+        )
+    from communication.sockets.socket_server import SocketServer
+    return SocketServer(
+        host=config.SOCKET_HOST,
+        port=config.SOCKET_PORT,
+        message_callback=message_callback,
+        max_message_size=config.SOCKET_MAX_MESSAGE_SIZE,
+        max_write_buffer=config.SOCKET_MAX_WRITE_BUFFER,
+        ack_messages=config.SOCKET_ACKS,
+        unix_path=config.SOCKET_UNIX_PATH if mode == CommunicationMode.UNIX else None
+    )
+
+
+def create_direct_client(message_handler=None, mode: Optional[str] = None):
+    """
+    Crea el cliente de un modo de conexión directa (sockets, unix o shm).
+
+    Args:
+        message_handler: Función que recibe el JSON de cada mensaje del servidor.
+        mode: Modo de comunicación; por defecto ``config.COMMUNICATION_MODE``.
+    """
+    mode = mode or config.COMMUNICATION_MODE
+    if mode == CommunicationMode.SHM:
+        from communication.shm.shm_client import ShmClient
+        return ShmClient(
+            name=config.SHM_NAME,
+            message_handler=message_handler,
+            max_message_size=config.SOCKET_MAX_MESSAGE_SIZE,
+            poll_interval=config.SHM_POLL_INTERVAL
+        )
+    from communication.sockets.socket_client import SocketClient
+    return SocketClient(
+        host=config.SOCKET_HOST,
+        port=config.SOCKET_PORT,
+        message_handler=message_handler,
+        max_message_size=config.SOCKET_MAX_MESSAGE_SIZE,
+        expect_acks=config.SOCKET_ACKS,
+        max_in_flight=config.SOCKET_MAX_IN_FLIGHT,
+        unix_path=config.SOCKET_UNIX_PATH if mode == CommunicationMode.UNIX else None
+    )
@@ -0,0 +1,24 @@
+"""
+Submódulo de comunicación basado en un broker en memoria.
+
+Este submódulo proporciona un broker con semántica de exchanges topic, colas,
+prefetch y ack/nack, junto con publicador y consumidor compatibles con los de
+RabbitMQ, para ejecutar la simulación y los benchmarks sin servicios externos.
+"""
+
+import importlib
+
+# Importación diferida: el proceso del broker solo necesita ``broker``
+_LAZY = {
+    "InMemoryBroker": "communication.inmemory.broker",
+    "get_broker": "communication.inmemory.broker",
+    "start_broker_server": "communication.inmemory.broker",
+    "InMemoryPublisher": "communication.inmemory.publisher",
+    "InMemoryConsumer": "communication.inmemory.consumer",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,407 @@
+"""
+Broker de mensajes en memoria para el sistema de agentes encubiertos.
+
+Reproduce la semántica de RabbitMQ que usa el proyecto (exchanges topic/direct/fanout,
+colas con bindings y prioridad, prefetch, ack/nack y dead letters) sin servicios externos, de modo que la
+simulación y sus benchmarks puedan ejecutarse en una sola máquina. El broker puede
+usarse dentro del proceso o compartirse entre procesos mediante un servidor de
+``multiprocessing.managers``.
+"""
+
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from multiprocessing.managers import BaseManager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Entrega: (delivery_tag, routing_key, body, properties, redelivered)
+Delivery = Tuple[int, str, bytes, Dict[str, Any], bool]
+
+
+@lru_cache(maxsize=1024)
+def _split_key(key: str) -> Tuple[str, ...]:
+    return tuple(key.split('.')) if key else ()
+
+
+def _match_words(pattern: Tuple[str, ...], i: int, words: Tuple[str, ...], j: int) -> bool:
+    while i < len(pattern):
+        token = pattern[i]
+        if token == '#':
+            if i == len(pattern) - 1:
+                return True
+            return any(_match_words(pattern, i + 1, words, k) for k in range(j, len(words) + 1))
+        if j >= len(words) or (token != '*' and token != words[j]):
+            return False
+        i += 1
+        j += 1
+    return j == len(words)
+
+
+def topic_matches(binding_key: str, routing_key: str) -> bool:
+    """
+    Indica si una routing key coincide con una clave de binding de tipo topic.
+
+    ``*`` sustituye exactamente una palabra y ``#`` cero o más palabras.
+    """
+    return _match_words(_split_key(binding_key), 0, _split_key(routing_key), 0)
+
+
+class _PriorityReady:
+    """
+    Mensajes listos de una cola con prioridad (``x-max-priority``).
+
+    Mantiene una deque por nivel con la misma interfaz que la deque de una cola
+    normal; se extrae primero del nivel más alto y, dentro de un nivel, en orden FIFO.
+    """
+
+    def __init__(self, max_priority: int):
+        self.max_priority = max_priority
+        self._levels = [deque() for _ in range(max_priority + 1)]
+        self._size = 0
+
+    def _level(self, item) -> Deque:
+        priority = item[2].get('priority') or 0
+        return self._levels[max(0, min(int(priority), self.max_priority))]
+
+    def append(self, item) -> None:
+        self._level(item).append(item)
+        self._size += 1
+
+    def appendleft(self, item) -> None:
+        self._level(item).appendleft(item)
+        self._size += 1
+
+    def popleft(self):
+        for level in reversed(self._levels):
+            if level:
+                self._size -= 1
+                return level.popleft()
+        raise IndexError("pop from an empty queue")
+
+    def clear(self) -> None:
+        for level in self._levels:
+            level.clear()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _Queue:
+    """Cola del broker con sus mensajes listos y sus consumidores."""
+
+    def __init__(self, name: str, durable: bool, arguments: Dict[str, Any], lock: threading.Lock):
+        self.name = name
+        self.durable = durable
+        self.arguments = arguments
+        max_priority = int(arguments.get('x-max-priority') or 0)
+        self.ready = _PriorityReady(max_priority) if max_priority > 0 else deque()
+        self.consumers: List[str] = []
+        # Condición propia por cola (sobre el cerrojo del broker) para no despertar
+        # a los consumidores de otras colas en cada publicación
+        self.condition = threading.Condition(lock)
+
+
+class _Consumer:
+    """Consumidor registrado en una cola con su límite de prefetch."""
+
+    def __init__(self, tag: str, queue: str, prefetch_count: int):
+        self.tag = tag
+        self.queue = queue
+        self.prefetch_count = prefetch_count
+        self.unacked: Dict[int, Tuple[str, bytes, Dict[str, Any]]] = {}
+
+
+class InMemoryBroker:
+    """
+    Broker en memoria, seguro entre hilos.
+
+    Las colas viven mientras viva el proceso que aloja el broker; los mensajes
+    sin confirmar de un consumidor cancelado vuelven a su cola.
+    """
+
+    def __init__(self):
+        self._exchanges: Dict[str, str] = {}
+        self._bindings: Dict[str, List[Tuple[str, str]]] = {}
+        self._queues: Dict[str, _Queue] = {}
+        self._consumers: Dict[str, _Consumer] = {}
+        self._delivery_owner: Dict[int, str] = {}
+        self._delivery_tags = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # ===== Topología =====
+
+    def declare_exchange(self, exchange: str, exchange_type: str = 'topic') -> None:
+        """Declara un exchange (idempotente)."""
+        with self._lock:
+            self._exchanges.setdefault(exchange, exchange_type)
+            self._bindings.setdefault(exchange, [])
+
+    def declare_queue(self, queue: str = '', durable: bool = False,
+                      arguments: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Declara una cola (idempotente).
+
+        Returns:
+            str: Nombre de la cola (generado si se pasó una cadena vacía).
+        """
+        with self._lock:
+            if not queue:
+                queue = f"amq.gen-{uuid.uuid4().hex[:12]}"
+            if queue not in self._queues:
+                self._queues[queue] = _Queue(queue, durable, dict(arguments or {}), self._lock)
+            return queue
+
+    def bind_queue(self, queue: str, exchange: str, binding_key: str) -> None:
+        """Vincula una cola a un exchange con una clave de binding."""
+        with self._lock:
+            bindings = self._bindings.setdefault(exchange, [])
+            if (queue, binding_key) not in bindings:
+                bindings.append((queue, binding_key))
+
+    def purge_queue(self, queue: str) -> int:
+        """Vacía los mensajes listos de una cola y devuelve cuántos había."""
+        with self._lock:
+            q = self._queues.get(queue)
+            if not q:
+                return 0
+            count = len(q.ready)
+            q.ready.clear()
+            return count
+
+    def queue_size(self, queue: str) -> int:
+        """Número de mensajes listos (no entregados) en una cola."""
+        with self._lock:
+            q = self._queues.get(queue)
+            return len(q.ready) if q else 0
+
+    # ===== Publicación =====
+
+    def _route(self, exchange: str, routing_key: str) -> List[str]:
+        if not exchange:
+            # Exchange por defecto: enruta directamente a la cola con ese nombre
+            return [routing_key] if routing_key in self._queues else []
+        exchange_type = self._exchanges.get(exchange)
+        if exchange_type is None:
+            return []
+        queues = []
+        for queue, binding_key in self._bindings.get(exchange, []):
+            if exchange_type == 'fanout':
+                matched = True
+            elif exchange_type == 'direct':
+                matched = binding_key == routing_key
+            else:
+                matched = topic_matches(binding_key, routing_key)
+            if matched and queue not in queues:
+                queues.append(queue)
+        return queues
+
+    def publish(self, exchange: str, routing_key: str, body: bytes,
+                properties: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Publica un mensaje en un exchange.
+
+        Returns:
+            int: Número de colas a las que se enrutó el mensaje.
+        """
+        with self._lock:
+            return self._publish_locked(exchange, routing_key, body, properties or {})
+
+    def _publish_locked(self, exchange: str, routing_key: str, body: bytes,
+                        properties: Dict[str, Any]) -> int:
+        queues = self._route(exchange, routing_key)
+        for queue in queues:
+            q = self._queues[queue]
+            q.ready.append((routing_key, body, properties, False))
+            q.condition.notify_all()
+        return len(queues)
+
+    def _dead_letter(self, q: _Queue, routing_key: str, body: bytes, properties: Dict[str, Any]) -> None:
+        """Desvía un mensaje rechazado al exchange de dead letters de su cola, si lo tiene."""
+        exchange = q.arguments.get('x-dead-letter-exchange')
+        if exchange is None:
+            return
+        # Mismo formato que la cabecera x-death de RabbitMQ (una entrada por cola y motivo)
+        headers = dict(properties.get('headers') or {})
+        deaths = [dict(death) for death in headers.get('x-death') or []]
+        for death in deaths:
+            if death.get('queue') == q.name and death.get('reason') == 'rejected':
+                death['count'] = death.get('count', 1) + 1
+                break
+        else:
+            deaths.insert(0, {'queue': q.name, 'reason': 'rejected', 'count': 1,
+                              'exchange': '', 'routing-keys': [routing_key], 'time': time.time()})
+        headers['x-death'] = deaths
+        properties = dict(properties, headers=headers)
+        dead_letter_key = q.arguments.get('x-dead-letter-routing-key') or routing_key
+        self._publish_locked(exchange, dead_letter_key, body, properties)
+
+    # ===== Consumo =====
+
+    def register_consumer(self, queue: str, prefetch_count: int = 1) -> str:
+        """
+        Registra un consumidor en una cola.
+
+        Returns:
+            str: Consumer tag.
+        """
+        with self._lock:
+            if queue not in self._queues:
+                raise KeyError(f"La cola {queue} no existe")
+            tag = f"ctag-{uuid.uuid4().hex[:12]}"
+            self._consumers[tag] = _Consumer(tag, queue, max(1, prefetch_count))
+            self._queues[queue].consumers.append(tag)
+            return tag
+
+    def cancel_consumer(self, consumer_tag: str) -> None:
+        """Cancela un consumidor devolviendo a la cola sus mensajes sin confirmar."""
+        with self._lock:
+            consumer = self._consumers.pop(consumer_tag, None)
+            if not consumer:
+                return
+            q = self._queues.get(consumer.queue)
+            for delivery_tag, (routing_key, body, properties) in sorted(consumer.unacked.items(), reverse=True):
+                self._delivery_owner.pop(delivery_tag, None)
+                if q:
+                    q.ready.appendleft((routing_key, body, properties, True))
+            if q:
+                q.consumers.remove(consumer_tag)
+                q.condition.notify_all()
+
+    def get(self, consumer_tag: str, timeout: Optional[float] = None) -> Optional[Delivery]:
+        """
+        Obtiene la siguiente entrega para un consumidor, respetando su prefetch.
+
+        Args:
+            consumer_tag: Consumidor registrado.
+            timeout: Espera máxima en segundos (None espera indefinidamente).
+
+        Returns:
+            Delivery o None si venció el tiempo de espera o se canceló el consumidor.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                consumer = self._consumers.get(consumer_tag)
+                if consumer is None:
+                    return None
+                q = self._queues[consumer.queue]
+                if q.ready and len(consumer.unacked) < consumer.prefetch_count:
+                    routing_key, body, properties, redelivered = self._pop_ready(q)
+                    delivery_tag = next(self._delivery_tags)
+                    consumer.unacked[delivery_tag] = (routing_key, body, properties)
+                    self._delivery_owner[delivery_tag] = consumer_tag
+                    return delivery_tag, routing_key, body, properties, redelivered
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                q.condition.wait(remaining)
+
+    def _pop_ready(self, q: _Queue) -> Tuple[str, bytes, Dict[str, Any], bool]:
+        """Extrae el siguiente mensaje listo de una cola (FIFO, o por prioridad si la tiene)."""
+        return q.ready.popleft()
+
+    def _settle(self, delivery_tag: int) -> Optional[Tuple[_Consumer, Tuple[str, bytes, Dict[str, Any]]]]:
+        consumer_tag = self._delivery_owner.pop(delivery_tag, None)
+        consumer = self._consumers.get(consumer_tag) if consumer_tag else None
+        if consumer is None:
+            return None
+        return consumer, consumer.unacked.pop(delivery_tag)
+
+    def ack(self, delivery_tag: int) -> None:
+        """Confirma una entrega."""
+        with self._lock:
+            settled = self._settle(delivery_tag)
+            if settled is not None:
+                # El consumidor recupera capacidad de prefetch
+                self._queues[settled[0].queue].condition.notify_all()
+
+    def nack(self, delivery_tag: int, requeue: bool = True) -> None:
+        """
+        Rechaza una entrega.
+
+        Con ``requeue`` la devuelve a la cola; sin él, la desvía al exchange de
+        dead letters de la cola (``x-dead-letter-exchange``) o la descarta.
+        """
+        with self._lock:
+            settled = self._settle(delivery_tag)
+            if settled is None:
+                return
+            consumer, (routing_key, body, properties) = settled
+            q = self._queues[consumer.queue]
+            if requeue:
+                q.ready.appendleft((routing_key, body, properties, True))
+            else:
+                self._dead_letter(q, routing_key, body, properties)
+            q.condition.notify_all()
+
+
+class BrokerManager(BaseManager):
+    """Gestor de multiprocessing que comparte un InMemoryBroker entre procesos."""
+
+
+_local_broker: Optional[InMemoryBroker] = None
+_local_broker_lock = threading.Lock()
+
+
+def _get_local_broker() -> InMemoryBroker:
+    global _local_broker
+    with _local_broker_lock:
+        if _local_broker is None:
+            _local_broker = InMemoryBroker()
+        return _local_broker
+
+
+BrokerManager.register('get_broker', callable=_get_local_broker)
+
+
+def start_broker_server(address: Tuple[str, int] = ('127.0.0.1', 0),
+                        authkey: Optional[bytes] = None) -> BrokerManager:
+    """
+    Arranca un proceso servidor que aloja el broker para otros procesos.
+
+    Args:
+        address: Dirección en la que escucha (puerto 0: uno libre).
+        authkey: Clave que deben presentar los clientes; por defecto
+            ``config.INMEMORY_BROKER_AUTHKEY``.
+
+    Returns:
+        BrokerManager: Gestor arrancado; su atributo ``address`` es la dirección real.
+    """
+    if authkey is None:
+        authkey = config.INMEMORY_BROKER_AUTHKEY
+    manager = BrokerManager(address=address, authkey=authkey)
+    # Quien lo arranca lo cierra con shutdown(): tras Ctrl+C sigue atendiendo a los
+    # componentes mientras se detienen
+    manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+    logger.info(f"Broker en memoria compartido en {manager.address}")
+    return manager
+
+
+def get_broker() -> InMemoryBroker:
+    """
+    Devuelve el broker a usar por este proceso.
+
+    Si la variable de entorno ``INMEMORY_BROKER_ADDRESS`` (``host:puerto``) o
+    ``config.INMEMORY_BROKER_ADDRESS`` indican un servidor, se devuelve un proxy al
+    broker compartido; en caso contrario, el broker local del proceso.
+    """
+    address = os.environ.get("INMEMORY_BROKER_ADDRESS") or config.INMEMORY_BROKER_ADDRESS
+    if not address:
+        return _get_local_broker()
+
+    host, port = address.rsplit(':', 1)
+    manager = BrokerManager(address=(host, int(port)), authkey=config.INMEMORY_BROKER_AUTHKEY)
+    manager.connect()
+    return manager.get_broker()
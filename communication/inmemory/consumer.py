@@ -0,0 +1,209 @@
+"""
+Consumidor compatible con RabbitMQConsumer sobre el broker en memoria.
+
+Un hilo extrae las entregas del broker respetando el prefetch y, como en
+RabbitMQConsumer, las procesa en línea o en un pool de trabajadores.
+"""
+
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from common.message import Message
+from communication.delivery import RedeliveryCounter, ensure_picklable, process_delivery, should_requeue
+from communication.inmemory.broker import InMemoryBroker, get_broker
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryConsumer:
+    """Consumidor de mensajes usando el broker en memoria."""
+
+    def __init__(self, host: str = 'localhost', port: int = 5672,
+                 exchange: str = 'spy_alerts', exchange_type: str = 'topic',
+                 queue_name: str = '', queue: str = '', binding_keys: List[str] = None,
+                 prefetch_count: int = 1, worker_count: int = 0, worker_type: str = 'thread',
+                 queue_arguments: Optional[Dict[str, Any]] = None, max_redeliveries: int = 5,
+                 broker: Optional[InMemoryBroker] = None, poll_interval: float = 0.5, **kwargs):
+        # host, port y el resto de opciones de RabbitMQ se aceptan por compatibilidad
+        if worker_type not in ('thread', 'process'):
+            raise ValueError(f"Tipo de trabajador inválido: {worker_type}. Use 'thread' o 'process'.")
+        self.host = host
+        self.port = port
+        self.exchange = exchange
+        self.exchange_type = exchange_type
+        self.queue_name = queue_name
+        self.queue = queue
+        self.binding_keys = binding_keys or ['#']
+        self.queue_arguments = queue_arguments
+        self.max_redeliveries = max_redeliveries
+        self._redeliveries = RedeliveryCounter()
+        self.prefetch_count = max(1, prefetch_count)
+        self.worker_count = max(0, worker_count)
+        self.worker_type = worker_type
+        self.broker = broker
+        self.poll_interval = poll_interval
+
+        self.connection = None
+        self.channel = None
+        self._consumer_tag = None
+        self._is_consuming = False
+        self._consume_thread = None
+        self._callback_func = None
+        self._executor: Optional[Executor] = None
+
+    def connect(self) -> bool:
+        """
+        Obtiene el broker y declara exchange, cola y bindings.
+
+        Returns:
+            bool: True si la conexión fue exitosa, False en caso contrario.
+        """
+        try:
+            if self.broker is None:
+                self.broker = get_broker()
+            self.broker.declare_exchange(self.exchange, self.exchange_type)
+            self.queue_name = self.broker.declare_queue(
+                self.queue_name,
+                durable=bool(self.queue_name),
+                arguments=self.queue_arguments
+            )
+            for binding_key in self.binding_keys:
+                self.broker.bind_queue(self.queue_name, self.exchange, binding_key)
+            self.connection = self.channel = self.broker
+
+            logger.info(f"Conectado al broker en memoria, exchange: {self.exchange}, cola: {self.queue_name}")
+            logger.info(f"Escuchando mensajes con claves de enrutamiento: {', '.join(self.binding_keys)}")
+            return True
+        except (OSError, EOFError) as e:
+            logger.error(f"Error al conectar con el broker en memoria: {e}")
+            return False
+
+    def start_consuming(self, callback: Callable[[Message, str], None]) -> bool:
+        """
+        Inicia el consumo de mensajes de forma asíncrona.
+
+        Args:
+            callback: Función que será llamada cuando se reciba un mensaje.
+                     Debe aceptar dos parámetros: el mensaje y la clave de enrutamiento.
+                     Con trabajadores de tipo 'process' debe poder serializarse con pickle.
+
+        Returns:
+            bool: True si se inició correctamente el consumo, False en caso contrario.
+
+        Raises:
+            ValueError: Si los trabajadores son procesos y el callback no es serializable.
+        """
+        if self._is_consuming:
+            logger.warning("Ya se está consumiendo mensajes")
+            return False
+
+        if self.worker_count and self.worker_type == 'process':
+            ensure_picklable(callback)
+
+        if not self.channel and not self.connect():
+            return False
+
+        self._callback_func = callback
+        if self.worker_count:
+            if self.worker_type == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.worker_count)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.worker_count,
+                    thread_name_prefix=f"InMemory-Worker-{self.queue_name}"
+                )
+
+        self._consumer_tag = self.broker.register_consumer(self.queue_name, self.prefetch_count)
+        self._is_consuming = True
+        self._consume_thread = threading.Thread(
+            target=self._consume_messages,
+            daemon=True,
+            name=f"InMemory-Consumer-{self.queue_name}"
+        )
+        self._consume_thread.start()
+
+        logger.info(f"Consumidor iniciado para la cola {self.queue_name} "
+                    f"(prefetch={self.prefetch_count}, trabajadores={self.worker_count})")
+        return True
+
+    def _consume_messages(self) -> None:
+        """Extrae entregas del broker mientras el consumidor esté activo."""
+        while self._is_consuming:
+            try:
+                delivery = self.broker.get(self._consumer_tag, timeout=self.poll_interval)
+            except (OSError, EOFError) as e:
+                logger.error(f"Error durante el consumo de mensajes: {e}")
+                break
+            if delivery is None:
+                continue
+
+            delivery_tag, routing_key, body, properties, redelivered = delivery
+            content_encoding = properties.get('content_encoding')
+            if self._executor is not None:
+                future = self._executor.submit(process_delivery, self._callback_func, body,
+                                               routing_key, content_encoding)
+                future.add_done_callback(partial(self._on_delivery_done, delivery_tag, body))
+            else:
+                self._handle_delivery(delivery_tag, routing_key, body, content_encoding)
+
+    def _handle_delivery(self, delivery_tag: int, routing_key: str, body: bytes,
+                         content_encoding: Optional[str] = None) -> None:
+        try:
+            process_delivery(self._callback_func, body, routing_key, content_encoding)
+            self.broker.ack(delivery_tag)
+            self._redeliveries.forget(body)
+        except Exception as e:
+            requeue = should_requeue(self._redeliveries, self.max_redeliveries, body, e)
+            self.broker.nack(delivery_tag, requeue=requeue)
+
+    def _on_delivery_done(self, delivery_tag: int, body: bytes, future: Future) -> None:
+        error = future.exception()
+        if error is None:
+            self.broker.ack(delivery_tag)
+            self._redeliveries.forget(body)
+        else:
+            requeue = should_requeue(self._redeliveries, self.max_redeliveries, body, error)
+            self.broker.nack(delivery_tag, requeue=requeue)
+
+    def stop_consuming(self) -> bool:
+        """
+        Detiene el consumo de mensajes.
+
+        Returns:
+            bool: True si se detuvo correctamente, False en caso contrario.
+        """
+        if not self._is_consuming:
+            logger.warning("No se está consumiendo mensajes actualmente")
+            return False
+
+        self._is_consuming = False
+        if self._consume_thread and self._consume_thread.is_alive():
+            self._consume_thread.join(timeout=self.poll_interval + 5.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._consumer_tag:
+            self.broker.cancel_consumer(self._consumer_tag)
+            self._consumer_tag = None
+
+        logger.info("Consumo de mensajes detenido")
+        return True
+
+    def close(self) -> None:
+        """Detiene el consumo y libera el broker."""
+        if self._is_consuming:
+            self.stop_consuming()
+        self.connection = None
+        self.channel = None
+
+    def __enter__(self):
+        """Permite usar el consumidor con el contexto 'with'."""
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Cierra la conexión al salir del contexto 'with'."""
+        self.close()
@@ -0,0 +1,135 @@
+"""
+Publicador compatible con RabbitMQPublisher sobre el broker en memoria.
+
+Permite ejecutar la simulación sin RabbitMQ seleccionando
+``COMMUNICATION_MODE = "inmemory"`` en la configuración.
+"""
+
+import logging
+from collections import deque
+from typing import Optional
+
+from common.message import Message
+from communication.compression import encode_body, validate_encoding
+from communication.inmemory.broker import InMemoryBroker, get_broker
+from communication.rabbitmq.topology import message_priority
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPublisher:
+    """Publicador de mensajes usando el broker en memoria."""
+
+    def __init__(self, host: str = 'localhost', port: int = 5672,
+                 exchange: str = 'spy_alerts', exchange_type: str = 'topic',
+                 routing_key: str = '', broker: Optional[InMemoryBroker] = None,
+                 compression: Optional[str] = None, compression_threshold: int = 1024,
+                 compression_level: int = 6, **kwargs):
+        # host, port y el resto de opciones de RabbitMQ se aceptan por compatibilidad
+        validate_encoding(compression)
+        self.host = host
+        self.port = port
+        self.exchange = exchange
+        self.exchange_type = exchange_type
+        self.routing_key = routing_key
+        self.broker = broker
+        self.connection = None
+        self.channel = None
+        self.failed_messages = deque()  # Cola local para mensajes no publicados
+
+        self._properties = {
+            'delivery_mode': 2,
+            'content_type': 'application/json'
+        }
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+    def connect(self) -> bool:
+        """
+        Obtiene el broker y declara el exchange.
+
+        Returns:
+            bool: True si la conexión fue exitosa, False en caso contrario.
+        """
+        try:
+            if self.broker is None:
+                self.broker = get_broker()
+            self.broker.declare_exchange(self.exchange, self.exchange_type)
+            self.connection = self.channel = self.broker
+            logger.info(f"Conectado al broker en memoria, exchange: {self.exchange}")
+            return True
+        except (OSError, EOFError) as e:
+            logger.error(f"Error al conectar con el broker en memoria: {e}")
+            return False
+
+    def is_connected(self) -> bool:
+        """Indica si el publicador tiene un broker disponible."""
+        return self.channel is not None
+
+    def publish_message(self, message: Message, routing_key: str = '') -> bool:
+        """
+        Publica un mensaje en el exchange.
+
+        Args:
+            message: El mensaje a publicar.
+            routing_key: La clave de enrutamiento para el mensaje.
+
+        Returns:
+            bool: True si el mensaje fue publicado exitosamente, False en caso contrario.
+        """
+        if not routing_key and hasattr(message, 'message_type'):
+            routing_key = message.message_type
+
+        if not self.channel and not self.connect():
+            self.failed_messages.append((message, routing_key))
+            logger.error("Mensaje almacenado en la cola local para reintento")
+            return False
+
+        if self._publish_now(message, routing_key):
+            return True
+        self.failed_messages.append((message, routing_key))
+        logger.error("Mensaje almacenado en la cola local para reintento")
+        return False
+
+    def _publish_now(self, message: Message, routing_key: str) -> bool:
+        """Publica un mensaje sin almacenarlo si falla."""
+        try:
+            properties = self._properties
+            body, content_encoding = encode_body(
+                message.to_json().encode("utf-8"),
+                self.compression,
+                self.compression_threshold,
+                self.compression_level
+            )
+            priority = message_priority(message)
+            if priority or content_encoding:
+                properties = dict(properties, priority=priority, content_encoding=content_encoding)
+            self.broker.publish(self.exchange, routing_key, body, properties)
+            logger.debug(f"Mensaje publicado con routing_key '{routing_key}': {message}")
+            return True
+        except (OSError, EOFError, AttributeError) as e:
+            logger.error(f"Error al publicar mensaje: {e}")
+            return False
+
+    def resend_failed_messages(self) -> None:
+        """Reintenta publicar los mensajes almacenados en la cola local."""
+        for _ in range(len(self.failed_messages)):
+            message, routing_key = self.failed_messages.popleft()
+            if not self._publish_now(message, routing_key):
+                self.failed_messages.appendleft((message, routing_key))
+                break
+
+    def close(self) -> None:
+        """Libera la referencia al broker."""
+        self.connection = None
+        self.channel = None
+
+    def __enter__(self):
+        """Permite usar el publicador con el contexto 'with'."""
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Cierra la conexión al salir del contexto 'with'."""
+        self.close()
@@ -6,5 +6,17 @@ y productor/consumidor usando RabbitMQ para la comunicación asíncrona
 entre componentes del sistema.
 """
 
-from communication.rabbitmq.publisher import RabbitMQPublisher
-from communication.rabbitmq.consumer import RabbitMQConsumer
\ No newline at end of file
+import importlib
+
+# Las clases se importan al usarlas por primera vez: importar un submódulo del paquete
+# (p. ej. ``communication.rabbitmq.topology``) no carga el resto
+_LAZY = {
+    "RabbitMQPublisher": "communication.rabbitmq.publisher",
+    "RabbitMQConsumer": "communication.rabbitmq.consumer",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,323 @@
+"""
+Pool de conexiones compartidas con RabbitMQ para el sistema de agentes encubiertos.
+
+Este módulo permite que muchos publicadores y consumidores lógicos de un mismo proceso
+compartan un número reducido de conexiones TCP (y sus hilos de heartbeat). Cada
+conexión bloqueante de pika está protegida por un cerrojo reentrante y un único hilo
+de E/S atiende los eventos de todas ellas, despachando también los mensajes de los
+consumidores registrados. Si una conexión se pierde, el hilo de E/S avisa a los
+clientes que tenían canales sobre ella para que se reconecten.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pika
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """Conexión bloqueante compartida por varios canales lógicos."""
+
+    def __init__(self, parameters: pika.ConnectionParameters, index: int):
+        self.parameters = parameters
+        self.index = index
+        self.connection = None
+        self.lock = threading.RLock()
+        self.leases = 0
+        self.active_leases: List['ChannelLease'] = []
+        self._shared_channel = None
+
+    def ensure_open(self) -> pika.BlockingConnection:
+        """
+        Abre la conexión si todavía no existe o si se cerró.
+
+        Returns:
+            pika.BlockingConnection: La conexión abierta.
+        """
+        with self.lock:
+            if not self.connection or self.connection.is_closed:
+                self.connection = pika.BlockingConnection(self.parameters)
+                self._shared_channel = None
+                logger.info(f"Conexión compartida #{self.index} abierta con "
+                            f"{self.parameters.host}:{self.parameters.port}")
+            return self.connection
+
+    def open_channel(self):
+        """Abre un canal nuevo sobre la conexión."""
+        with self.lock:
+            return self.ensure_open().channel()
+
+    def shared_channel(self):
+        """Devuelve el canal de publicación compartido por los publicadores de la conexión."""
+        with self.lock:
+            if not self._shared_channel or self._shared_channel.is_closed:
+                self._shared_channel = self.open_channel()
+            return self._shared_channel
+
+    def process_events(self) -> bool:
+        """
+        Procesa heartbeats y entregas pendientes sin bloquear.
+
+        Returns:
+            bool: False si la conexión se ha perdido (el broker la cerró o falló la E/S).
+        """
+        with self.lock:
+            if not self.connection:
+                return True
+            if self.connection.is_open:
+                try:
+                    self.connection.process_data_events(time_limit=0)
+                except pika.exceptions.AMQPError as e:
+                    logger.error(f"Error en la conexión compartida #{self.index}: {e}")
+            return self.connection.is_open
+
+    def mark_lost(self) -> List['ChannelLease']:
+        """
+        Descarta una conexión perdida (se reabrirá en el siguiente préstamo).
+
+        Sus préstamos quedan invalidados: sus canales murieron con la conexión y ya no
+        se les avisa si se pierde la que se abra después.
+
+        Returns:
+            list: Préstamos activos sobre la conexión, a los que hay que avisar.
+        """
+        with self.lock:
+            self.connection = None
+            self._shared_channel = None
+            leases = self.active_leases
+            self.active_leases = []
+            for lease in leases:
+                lease.lost = True
+            return leases
+
+    def close(self) -> None:
+        """Cierra la conexión compartida."""
+        with self.lock:
+            if self.connection and self.connection.is_open:
+                try:
+                    self.connection.close()
+                except pika.exceptions.AMQPError as e:
+                    logger.error(f"Error al cerrar la conexión compartida #{self.index}: {e}")
+            self.connection = None
+            self._shared_channel = None
+
+
+class ChannelLease:
+    """
+    Canal prestado por el pool a un publicador o consumidor.
+
+    Todas las operaciones sobre el canal deben hacerse sosteniendo ``lock``, que es el
+    cerrojo de la conexión subyacente.
+    """
+
+    def __init__(self, pool: 'RabbitMQConnectionPool', pooled_connection: PooledConnection,
+                 channel, dedicated: bool):
+        self.pool = pool
+        self.pooled_connection = pooled_connection
+        self.channel = channel
+        self.dedicated = dedicated
+        self.released = False
+        self.lost = False  # La conexión subyacente se perdió: hay que pedir otro préstamo
+        # Función a la que avisa el pool si se pierde la conexión subyacente
+        self.on_connection_lost: Optional[Callable[[], None]] = None
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self.pooled_connection.lock
+
+    @property
+    def connection(self) -> pika.BlockingConnection:
+        return self.pooled_connection.connection
+
+    def add_callback_threadsafe(self, callback: Callable[[], None]) -> None:
+        """Programa una función para ejecutarse en el hilo de E/S del pool."""
+        self.connection.add_callback_threadsafe(callback)
+
+    def release(self) -> None:
+        """Devuelve el canal al pool (cerrándolo si era dedicado)."""
+        self.pool.release(self)
+
+
+class RabbitMQConnectionPool:
+    """
+    Pool de conexiones RabbitMQ compartido por los clientes de un proceso.
+
+    Las conexiones se abren bajo demanda: un préstamo reutiliza la conexión menos
+    cargada mientras no supere ``channels_per_connection`` canales y solo se abre una
+    nueva conexión si todas están llenas y no se ha alcanzado ``pool_size``.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 5672,
+                 username: str = 'guest', password: str = 'guest',
+                 virtual_host: str = '/', pool_size: int = 2,
+                 channels_per_connection: int = 64, poll_interval: float = 0.01,
+                 connection_attempts: int = 3, retry_delay: int = 5):
+        self.host = host
+        self.port = port
+        self.pool_size = max(1, pool_size)
+        self.channels_per_connection = max(1, channels_per_connection)
+        self.poll_interval = poll_interval
+        self.parameters = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            virtual_host=virtual_host,
+            credentials=pika.PlainCredentials(username, password),
+            connection_attempts=connection_attempts,
+            retry_delay=retry_delay
+        )
+
+        self._connections: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._io_thread = None
+
+    def lease_channel(self, dedicated: bool = False) -> ChannelLease:
+        """
+        Presta un canal del pool.
+
+        Args:
+            dedicated: Si es True se abre un canal exclusivo (necesario para consumir);
+                       si es False se usa el canal de publicación compartido.
+
+        Returns:
+            ChannelLease: El canal prestado.
+        """
+        with self._lock:
+            pooled = self._select_connection()
+            pooled.leases += 1
+
+        try:
+            with pooled.lock:
+                channel = pooled.open_channel() if dedicated else pooled.shared_channel()
+        except Exception:
+            with self._lock:
+                pooled.leases -= 1
+            raise
+
+        lease = ChannelLease(self, pooled, channel, dedicated)
+        with pooled.lock:
+            pooled.active_leases.append(lease)
+        self._ensure_io_thread()
+        return lease
+
+    def _select_connection(self) -> PooledConnection:
+        """Elige la conexión a usar para un nuevo préstamo (con ``_lock`` adquirido)."""
+        least_loaded = min(self._connections, key=lambda c: c.leases, default=None)
+        if least_loaded and least_loaded.leases < self.channels_per_connection:
+            return least_loaded
+        if len(self._connections) < self.pool_size:
+            pooled = PooledConnection(self.parameters, len(self._connections))
+            self._connections.append(pooled)
+            return pooled
+        return least_loaded
+
+    def release(self, lease: ChannelLease) -> None:
+        """Libera un canal prestado."""
+        if lease.released:
+            return
+        lease.released = True
+
+        if lease.dedicated:
+            with lease.lock:
+                try:
+                    if lease.channel and lease.channel.is_open:
+                        lease.channel.close()
+                except pika.exceptions.AMQPError as e:
+                    logger.error(f"Error al cerrar canal del pool: {e}")
+
+        with lease.lock:
+            if lease in lease.pooled_connection.active_leases:
+                lease.pooled_connection.active_leases.remove(lease)
+        with self._lock:
+            lease.pooled_connection.leases -= 1
+
+    def _ensure_io_thread(self) -> None:
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._io_thread = threading.Thread(
+                target=self._io_loop,
+                daemon=True,
+                name=f"RabbitMQ-Pool-{self.host}:{self.port}"
+            )
+            self._io_thread.start()
+
+    def _io_loop(self) -> None:
+        """Atiende heartbeats y entregas de todas las conexiones del pool."""
+        while self._running:
+            with self._lock:
+                connections = list(self._connections)
+            for pooled in connections:
+                try:
+                    if not pooled.process_events():
+                        self._handle_connection_lost(pooled)
+                except Exception as e:
+                    logger.error(f"Error en la conexión compartida #{pooled.index}: {e}")
+            time.sleep(self.poll_interval)
+
+    def _handle_connection_lost(self, pooled: PooledConnection) -> None:
+        """Descarta una conexión perdida y avisa a sus clientes para que se reconecten."""
+        leases = pooled.mark_lost()
+        logger.warning(f"Conexión compartida #{pooled.index} perdida; "
+                       f"avisando a {len(leases)} cliente(s)")
+        for lease in leases:
+            if lease.on_connection_lost:
+                lease.on_connection_lost()
+
+    def close(self) -> None:
+        """Detiene el hilo de E/S y cierra todas las conexiones."""
+        self._running = False
+        if self._io_thread and self._io_thread.is_alive() \
+                and self._io_thread is not threading.current_thread():
+            self._io_thread.join(timeout=5.0)
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for pooled in connections:
+            pooled.close()
+        logger.info("Pool de conexiones RabbitMQ cerrado")
+
+
+_pools: Dict[Tuple, RabbitMQConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(host: Optional[str] = None, port: Optional[int] = None,
+                        username: Optional[str] = None, password: Optional[str] = None,
+                        virtual_host: str = '/') -> RabbitMQConnectionPool:
+    """
+    Devuelve el pool de conexiones del proceso actual para un broker dado.
+
+    Los pools no se heredan entre procesos: tras un fork se crea uno nuevo.
+
+    Returns:
+        RabbitMQConnectionPool: Pool compartido por todos los clientes del proceso.
+    """
+    host = host or config.RABBITMQ_HOST
+    port = port or config.RABBITMQ_PORT
+    username = username or config.RABBITMQ_USER
+    password = password or config.RABBITMQ_PASSWORD
+    key = (os.getpid(), host, port, username, virtual_host)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = RabbitMQConnectionPool(
+                host=host,
+                port=port,
+                username=username,
+                password=password,
+                virtual_host=virtual_host,
+                pool_size=config.RABBITMQ_POOL_SIZE,
+                channels_per_connection=config.RABBITMQ_CHANNELS_PER_CONNECTION
+            )
+            _pools[key] = pool
+        return pool
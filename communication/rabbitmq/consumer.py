@@ -9,14 +9,21 @@ import json
 import logging
 import pickle
 import threading
+import contextlib
+import functools
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 import pika
 from typing import Dict, Any, Optional, Callable, List, Union
 import time
 
 from common.message import Message
+from communication.delivery import (PoisonMessageError, RedeliveryCounter, ensure_picklable, process_delivery,
+                                     should_requeue)
+from communication.rabbitmq.reconnect import ReconnectSupervisor, backoff_delay
 
 logger = logging.getLogger(__name__)
 
+
 class RabbitMQConsumer:
     """Consumidor de mensajes usando RabbitMQ."""
 
@@ -25,14 +32,25 @@ class RabbitMQConsumer:
                  queue_name: str = '', queue: str = '', binding_keys: List[str] = None,
                  username: str = 'guest', password: str = 'guest',
                  virtual_host: str = '/', connection_attempts: int = 3,
-                 retry_delay: int = 5, auto_reconnect: bool = True):
+                 retry_delay: int = 5, auto_reconnect: bool = True,
+                 connection_pool=None, prefetch_count: int = 1,
+                 worker_count: int = 0, worker_type: str = 'thread',
+                 queue_arguments: Optional[Dict[str, Any]] = None,
+                 reconnect_initial_delay: float = 0.5, reconnect_max_delay: float = 30.0,
+                 max_redeliveries: int = 5):
         self.host = host
         self.port = port
         self.exchange = exchange
         self.exchange_type = exchange_type
         self.queue_name = queue_name
         self.queue = queue
+        # Una cola anónima se vuelve a declarar como anónima al reconectar
+        self._anonymous_queue = not queue_name
         self.binding_keys = binding_keys or ['#']
+        self.queue_arguments = queue_arguments  # p. ej. {'x-max-priority': 4}
+        # Fallos tolerados por mensaje antes de rechazarlo sin requeue (0 = sin límite)
+        self.max_redeliveries = max_redeliveries
+        self._redeliveries = RedeliveryCounter()
         self.username = username
         self.password = password
         self.credentials = pika.PlainCredentials(username, password)
@@ -48,6 +66,30 @@ class RabbitMQConsumer:
         self._is_consuming = False
         self._consume_thread = None
         self._callback_func = None
+        self._stop_requested = threading.Event()
+
+        # Reconexión con espera exponencial y jitter (sin recursión)
+        self.reconnect_initial_delay = reconnect_initial_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self._supervisor = ReconnectSupervisor(
+            self._resubscribe,
+            name=f"Consumer-{queue_name or exchange}",
+            initial_delay=reconnect_initial_delay,
+            max_delay=reconnect_max_delay
+        )
+
+        # Pool de conexiones compartidas del proceso (opcional)
+        self.connection_pool = connection_pool
+        self._lease = None
+
+        # Concurrencia: número de entregas sin confirmar y pool de trabajadores
+        # (worker_count=0 ejecuta el callback en el hilo de E/S, como antes)
+        if worker_type not in ('thread', 'process'):
+            raise ValueError(f"Tipo de trabajador inválido: {worker_type}. Use 'thread' o 'process'.")
+        self.prefetch_count = max(1, prefetch_count)
+        self.worker_count = max(0, worker_count)
+        self.worker_type = worker_type
+        self._executor: Optional[Executor] = None
 
     def connect(self) -> bool:
         """
@@ -57,45 +99,28 @@ class RabbitMQConsumer:
             bool: True si la conexión fue exitosa, False en caso contrario.
         """
         try:
-            # Parámetros de conexión
-            parameters = pika.ConnectionParameters(
-                host=self.host,
-                port=self.port,
-                virtual_host=self.virtual_host,
-                credentials=self.credentials,
-                connection_attempts=self.connection_attempts,
-                retry_delay=self.retry_delay
-            )
-
-            # Establecer la conexión
-            self.connection = pika.BlockingConnection(parameters)
-            self.channel = self.connection.channel()
-
-            # Declarar el exchange
-            self.channel.exchange_declare(
-                exchange=self.exchange,
-                exchange_type=self.exchange_type,
-                durable=True  # Asegurar que el intercambio sea persistente
-            )
-
-            # Declarar la cola (si no se especifica nombre, se crea una cola anónima)
-            result = self.channel.queue_declare(
-                queue=self.queue_name,
-                exclusive=not bool(self.queue_name),  # Exclusiva si es una cola anónima
-                durable=bool(self.queue_name)  # Persistente solo si tiene nombre
-            )
+            if self.connection_pool is not None:
+                # Canal dedicado sobre una conexión compartida del pool
+                self._lease = self.connection_pool.lease_channel(dedicated=True)
+                self.connection = self._lease.connection
+                self.channel = self._lease.channel
+            else:
+                # Parámetros de conexión
+                parameters = pika.ConnectionParameters(
+                    host=self.host,
+                    port=self.port,
+                    virtual_host=self.virtual_host,
+                    credentials=self.credentials,
+                    connection_attempts=self.connection_attempts,
+                    retry_delay=self.retry_delay
+                )
 
-            # Si no se especificó un nombre de cola, usar el generado
-            if not self.queue_name:
-                self.queue_name = result.method.queue
+                # Establecer la conexión
+                self.connection = pika.BlockingConnection(parameters)
+                self.channel = self.connection.channel()
 
-            # Vincular la cola al exchange con las claves de enrutamiento
-            for binding_key in self.binding_keys:
-                self.channel.queue_bind(
-                    exchange=self.exchange,
-                    queue=self.queue_name,
-                    routing_key=binding_key
-                )
+            with self._channel_lock():
+                self._declare_topology()
 
             logger.info(f"Conectado a RabbitMQ en {self.host}:{self.port}, exchange: {self.exchange}, cola: {self.queue_name}")
             logger.info(f"Escuchando mensajes con claves de enrutamiento: {', '.join(self.binding_keys)}")
@@ -103,35 +128,112 @@ class RabbitMQConsumer:
 
         except pika.exceptions.AMQPError as e:
             logger.error(f"Error al conectar con RabbitMQ: {e}")
+            if self._lease:
+                self._lease.release()
+                self._lease = None
             return False
 
+    def _declare_topology(self) -> None:
+        """Declara el exchange y la cola, y crea los bindings."""
+        # Declarar el exchange
+        self.channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type=self.exchange_type,
+            durable=True  # Asegurar que el intercambio sea persistente
+        )
+
+        # Declarar la cola (si no se especifica nombre, se crea una cola anónima)
+        result = self.channel.queue_declare(
+            queue='' if self._anonymous_queue else self.queue_name,
+            exclusive=self._anonymous_queue,  # Exclusiva si es una cola anónima
+            durable=not self._anonymous_queue,  # Persistente solo si tiene nombre
+            arguments=self.queue_arguments
+        )
+
+        # Si no se especificó un nombre de cola, usar el generado
+        if self._anonymous_queue:
+            self.queue_name = result.method.queue
+
+        # Vincular la cola al exchange con las claves de enrutamiento
+        for binding_key in self.binding_keys:
+            self.channel.queue_bind(
+                exchange=self.exchange,
+                queue=self.queue_name,
+                routing_key=binding_key
+            )
+
+    def _channel_lock(self):
+        """Cerrojo a sostener al usar el canal (solo necesario con el pool compartido)."""
+        return self._lease.lock if self._lease else contextlib.nullcontext()
+
     def _message_handler(self, channel: pika.adapters.blocking_connection.BlockingChannel,
                          method: pika.spec.Basic.Deliver,
                          properties: pika.spec.BasicProperties,
                          body: bytes):
         """
         Maneja los mensajes recibidos desde RabbitMQ.
+
+        Sin trabajadores, el callback se ejecuta aquí mismo; con trabajadores, la
+        entrega se envía al pool y el ack/nack se devuelve al hilo de la conexión.
         """
-        try:
-            from common.message import create_message_from_json
+        if self._executor is not None and self._callback_func:
             try:
-                json_str = body.decode("utf-8")  # Intentar decodificar como UTF-8
-                message = create_message_from_json(json_str)
-            except UnicodeDecodeError:
-                logger.error("El mensaje no está en formato UTF-8. Verifica el formato del mensaje.")
-                channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+                future = self._executor.submit(process_delivery, self._callback_func, body,
+                                               method.routing_key, properties.content_encoding)
+            except RuntimeError:
+                # El pool se está cerrando: devolver el mensaje a la cola
+                channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
                 return
+            future.add_done_callback(functools.partial(self._on_delivery_done, channel, method.delivery_tag, body))
+            return
 
-            logger.debug(f"Mensaje recibido: {message}, Routing Key: {method.routing_key}")
-
+        try:
             if self._callback_func:
-                self._callback_func(message, method.routing_key)
-
+                process_delivery(self._callback_func, body, method.routing_key, properties.content_encoding)
             channel.basic_ack(delivery_tag=method.delivery_tag)
+            self._redeliveries.forget(body)
 
         except Exception as e:
-            logger.error(f"Error al procesar mensaje: {e}")
-            channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            requeue = should_requeue(self._redeliveries, self.max_redeliveries, body, e)
+            channel.basic_nack(delivery_tag=method.delivery_tag, requeue=requeue)
+
+    def _on_delivery_done(self, channel, delivery_tag: int, body: bytes, future: Future) -> None:
+        """
+        Programa el ack/nack de una entrega procesada por un trabajador.
+
+        pika no es seguro entre hilos, así que la confirmación se ejecuta en el
+        hilo de la conexión mediante add_callback_threadsafe.
+        """
+        error = future.exception()
+        if error is None:
+            settle = functools.partial(channel.basic_ack, delivery_tag=delivery_tag)
+            self._redeliveries.forget(body)
+        else:
+            requeue = should_requeue(self._redeliveries, self.max_redeliveries, body, error)
+            settle = functools.partial(channel.basic_nack, delivery_tag=delivery_tag, requeue=requeue)
+
+        try:
+            self.connection.add_callback_threadsafe(functools.partial(self._settle, channel, settle))
+        except (AttributeError, pika.exceptions.AMQPError) as e:
+            # La conexión ya no existe: el broker reentregará el mensaje
+            logger.warning(f"No se pudo confirmar la entrega {delivery_tag}: {e}")
+
+    @staticmethod
+    def _settle(channel, settle: Callable[[], None]) -> None:
+        """Ejecuta un ack/nack si el canal sigue abierto (hilo de la conexión)."""
+        if channel.is_open:
+            settle()
+
+    def _create_executor(self) -> Optional[Executor]:
+        """Crea el pool de trabajadores configurado (o None para modo en línea)."""
+        if not self.worker_count:
+            return None
+        if self.worker_type == 'process':
+            return ProcessPoolExecutor(max_workers=self.worker_count)
+        return ThreadPoolExecutor(
+            max_workers=self.worker_count,
+            thread_name_prefix=f"RabbitMQ-Worker-{self.queue_name}"
+        )
 
     def start_consuming(self, callback: Callable[[Message, str], None]) -> bool:
         """
@@ -140,14 +242,21 @@ class RabbitMQConsumer:
         Args:
             callback: Función que será llamada cuando se reciba un mensaje.
                      Debe aceptar dos parámetros: el mensaje y la clave de enrutamiento.
+                     Con trabajadores de tipo 'process' debe poder serializarse con pickle.
 
         Returns:
             bool: True si se inició correctamente el consumo, False en caso contrario.
+
+        Raises:
+            ValueError: Si los trabajadores son procesos y el callback no es serializable.
         """
         if self._is_consuming:
             logger.warning("Ya se está consumiendo mensajes")
             return False
 
+        if self.worker_count and self.worker_type == 'process':
+            ensure_picklable(callback)
+
         if not self.connection or not self.channel:
             if not self.connect():
                 return False
@@ -155,17 +264,18 @@ class RabbitMQConsumer:
         try:
             # Registrar la función de callback
             self._callback_func = callback
+            if self._executor is None:
+                self._executor = self._create_executor()
 
-            # Configurar el consumo de mensajes
-            # prefetch_count=1 asegura que solo se procese un mensaje a la vez
-            self.channel.basic_qos(prefetch_count=1)
-            self._consumer_tag = self.channel.basic_consume(
-                queue=self.queue_name,
-                on_message_callback=self._message_handler
-            )
+            self._subscribe()
+            self._stop_requested.clear()
+            self._is_consuming = True
+            if self._lease:
+                # El hilo de E/S del pool despacha las entregas
+                logger.info(f"Consumidor iniciado para la cola {self.queue_name} (pool compartido)")
+                return True
 
             # Iniciar el consumo en un hilo separado
-            self._is_consuming = True
             self._consume_thread = threading.Thread(
                 target=self._consume_messages,
                 daemon=True,
@@ -173,7 +283,8 @@ class RabbitMQConsumer:
             )
             self._consume_thread.start()
 
-            logger.info(f"Consumidor iniciado para la cola {self.queue_name}")
+            logger.info(f"Consumidor iniciado para la cola {self.queue_name} "
+                        f"(prefetch={self.prefetch_count}, trabajadores={self.worker_count})")
             return True
 
         except pika.exceptions.AMQPError as e:
@@ -181,24 +292,74 @@ class RabbitMQConsumer:
             self._is_consuming = False
             return False
 
+    def _subscribe(self) -> None:
+        """Configura el prefetch y registra el consumidor en el canal actual."""
+        # prefetch_count limita las entregas sin confirmar (y por tanto el trabajo en curso)
+        with self._channel_lock():
+            self.channel.basic_qos(prefetch_count=self.prefetch_count)
+            self._consumer_tag = self.channel.basic_consume(
+                queue=self.queue_name,
+                on_message_callback=self._message_handler
+            )
+        if self._lease:
+            self._lease.on_connection_lost = self._on_connection_lost
+
+    def _resubscribe(self) -> bool:
+        """
+        Reconecta y vuelve a registrar el consumidor con el mismo callback.
+
+        Returns:
+            bool: True si el consumo quedó restablecido.
+        """
+        if self._stop_requested.is_set():
+            return True
+        self._discard_connection()
+        if not self.connect():
+            return False
+        try:
+            self._subscribe()
+            logger.info(f"Suscripción a la cola {self.queue_name} restablecida")
+            return True
+        except pika.exceptions.AMQPError as e:
+            logger.error(f"Error al volver a suscribirse a la cola {self.queue_name}: {e}")
+            return False
+
+    def _on_connection_lost(self) -> None:
+        """Aviso del pool: la conexión compartida se perdió (hilo de E/S del pool)."""
+        if self._is_consuming and self.auto_reconnect and not self._stop_requested.is_set():
+            logger.warning(f"Conexión perdida en la cola {self.queue_name}; reconectando en segundo plano")
+            self._supervisor.request()
+
     def _consume_messages(self):
         """
         Método interno para consumir mensajes en un hilo separado.
+
+        Si la conexión se pierde, el mismo hilo reconecta con espera exponencial y
+        jitter y vuelve a suscribirse, en un bucle y sin recursión.
         """
-        try:
-            # Comienza a consumir mensajes (bloqueante)
-            self.channel.start_consuming()
-        except Exception as e:
-            logger.error(f"Error durante el consumo de mensajes: {e}")
-        finally:
-            self._is_consuming = False
+        attempt = 0
+        while not self._stop_requested.is_set():
+            try:
+                # Comienza a consumir mensajes (bloqueante)
+                self.channel.start_consuming()
+            except Exception as e:
+                logger.error(f"Error durante el consumo de mensajes: {e}")
+
+            if self._stop_requested.is_set() or not self.auto_reconnect:
+                break
+
+            # Consumo interrumpido: reconectar y volver a suscribirse
+            while not self._stop_requested.is_set():
+                delay = backoff_delay(attempt, self.reconnect_initial_delay, self.reconnect_max_delay)
+                attempt += 1
+                logger.info(f"Intentando reconectar automáticamente en {delay:.1f} s (intento {attempt})...")
+                if self._stop_requested.wait(delay):
+                    break
+                if self._resubscribe():
+                    attempt = 0
+                    break
 
-            # Intentar reconectar si está configurado
-            if self.auto_reconnect and not self.connection.is_closed:
-                logger.info("Intentando reconectar automáticamente...")
-                time.sleep(self.retry_delay)
-                if self._callback_func:
-                    self.start_consuming(self._callback_func)
+        self._is_consuming = False
 
     def stop_consuming(self) -> bool:
         """
@@ -211,19 +372,31 @@ class RabbitMQConsumer:
             logger.warning("No se está consumiendo mensajes actualmente")
             return False
 
+        self._stop_requested.set()
+        self._supervisor.stop()
         try:
-            if self.channel and self._consumer_tag:
-                self.channel.basic_cancel(self._consumer_tag)
-
-            if self.connection and self.channel:
-                self.channel.stop_consuming()
+            if self._lease:
+                if self.channel and self._consumer_tag:
+                    with self._channel_lock():
+                        self.channel.basic_cancel(self._consumer_tag)
+            elif self.connection and self.channel and self.connection.is_open:
+                # stop_consuming cancela el consumidor y debe ejecutarse en el hilo de la conexión
+                self.connection.add_callback_threadsafe(self.channel.stop_consuming)
 
             # Esperar a que termine el hilo de consumo
             if self._consume_thread and self._consume_thread.is_alive():
                 self._consume_thread.join(timeout=5.0)
 
+            # Terminar el trabajo en curso y enviar sus acks pendientes
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+                if not self._lease and self.connection and self.connection.is_open:
+                    self.connection.process_data_events(time_limit=0)
+
             self._is_consuming = False
             self._consumer_tag = None
+            self._supervisor.reset()
             logger.info("Consumo de mensajes detenido")
             return True
 
@@ -235,11 +408,24 @@ class RabbitMQConsumer:
         """Detiene el consumo y cierra la conexión con RabbitMQ."""
         if self._is_consuming:
             self.stop_consuming()
+        self._discard_connection()
+
+    def _discard_connection(self) -> None:
+        """Libera el canal del pool o cierra la conexión propia."""
+        if self._lease:
+            # La conexión pertenece al pool: solo se libera el canal dedicado
+            self._lease.on_connection_lost = None
+            self._lease.release()
+            self._lease = None
+            self.connection = None
+            self.channel = None
+            return
 
         if self.connection:
             try:
-                self.connection.close()
-                logger.info("Conexión con RabbitMQ cerrada")
+                if self.connection.is_open:
+                    self.connection.close()
+                    logger.info("Conexión con RabbitMQ cerrada")
             except pika.exceptions.AMQPError as e:
                 logger.error(f"Error al cerrar la conexión con RabbitMQ: {e}")
             finally:
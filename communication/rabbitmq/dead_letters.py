@@ -0,0 +1,232 @@
+"""
+Inspección y reenvío de los mensajes desviados a la cola de dead letters.
+
+Los consumidores rechazan sin requeue los mensajes irrecuperables y los que fallan
+``config.RABBITMQ_MAX_REDELIVERIES`` veces; las colas de la topología los desvían al
+exchange ``night_tasks.dlx`` y acaban en la cola ``dead_letters``. Esta herramienta
+permite revisarlos y, una vez corregida la causa, devolverlos a su ruta original:
+
+    python -m communication.rabbitmq.dead_letters inspect --limit 20
+    python -m communication.rabbitmq.dead_letters replay --limit 100
+    python -m communication.rabbitmq.dead_letters purge
+"""
+
+import argparse
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pika
+
+import config
+from common.constants import CommunicationMode
+from communication.compression import decode_body
+from communication.rabbitmq import topology
+
+logger = logging.getLogger(__name__)
+
+# Letra muerta: (delivery_tag, routing_key, body, headers, content_encoding)
+DeadLetter = Tuple[int, str, bytes, Dict[str, Any], Optional[str]]
+
+
+def original_routing_key(routing_key: str, headers: Optional[Dict[str, Any]]) -> str:
+    """
+    Clave de enrutamiento original de un mensaje según su cabecera ``x-death``.
+
+    Args:
+        routing_key: Clave con la que llegó a la cola de dead letters.
+        headers: Cabeceras del mensaje.
+
+    Returns:
+        str: Primera clave de la entrada más antigua de ``x-death``, o ``routing_key``.
+    """
+    deaths = (headers or {}).get('x-death') or []
+    if deaths:
+        keys = deaths[-1].get('routing-keys') or []
+        if keys:
+            key = keys[0]
+            return key.decode() if isinstance(key, bytes) else key
+    return routing_key
+
+
+def _death_summary(headers: Optional[Dict[str, Any]]) -> str:
+    deaths = (headers or {}).get('x-death') or []
+    if not deaths:
+        return "sin x-death"
+    return ", ".join(f"{death.get('queue')}:{death.get('reason')}x{death.get('count', 1)}"
+                     for death in deaths)
+
+
+class _RabbitMQDeadLetters:
+    """Acceso a la cola de dead letters de RabbitMQ con ``basic_get``."""
+
+    def __init__(self):
+        self.connection = pika.BlockingConnection(pika.ConnectionParameters(
+            host=config.RABBITMQ_HOST,
+            port=config.RABBITMQ_PORT,
+            credentials=pika.PlainCredentials(config.RABBITMQ_USER, config.RABBITMQ_PASSWORD)
+        ))
+        self.channel = self.connection.channel()
+        self._properties: Dict[int, pika.BasicProperties] = {}
+
+    def fetch(self, limit: int) -> Iterator[DeadLetter]:
+        for _ in range(limit):
+            method, properties, body = self.channel.basic_get(topology.DEAD_LETTER_QUEUE)
+            if method is None:
+                return
+            self._properties[method.delivery_tag] = properties
+            yield (method.delivery_tag, method.routing_key, body, properties.headers or {},
+                   properties.content_encoding)
+
+    def republish(self, delivery_tag: int, routing_key: str, body: bytes) -> None:
+        properties = self._properties.pop(delivery_tag)
+        headers = {k: v for k, v in (properties.headers or {}).items() if k != 'x-death'}
+        properties.headers = headers or None
+        self.channel.basic_publish(exchange=topology.EXCHANGE, routing_key=routing_key,
+                                   body=body, properties=properties)
+        self.channel.basic_ack(delivery_tag=delivery_tag)
+
+    def release(self, delivery_tags: List[int]) -> None:
+        for delivery_tag in delivery_tags:
+            self._properties.pop(delivery_tag, None)
+            self.channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+
+    def purge(self) -> int:
+        return self.channel.queue_purge(topology.DEAD_LETTER_QUEUE).method.message_count
+
+    def close(self) -> None:
+        if self.connection.is_open:
+            self.connection.close()
+
+
+class _InMemoryDeadLetters:
+    """Acceso a la cola de dead letters del broker en memoria."""
+
+    def __init__(self):
+        from communication.inmemory.broker import get_broker
+        self.broker = get_broker()
+        topology.declare_inmemory_topology(self.broker)
+        self._consumer_tag: Optional[str] = None
+        self._properties: Dict[int, Dict[str, Any]] = {}
+
+    def fetch(self, limit: int) -> Iterator[DeadLetter]:
+        self._consumer_tag = self.broker.register_consumer(topology.DEAD_LETTER_QUEUE, max(1, limit))
+        for _ in range(limit):
+            delivery = self.broker.get(self._consumer_tag, timeout=0)
+            if delivery is None:
+                return
+            delivery_tag, routing_key, body, properties, _ = delivery
+            self._properties[delivery_tag] = properties
+            yield (delivery_tag, routing_key, body, properties.get('headers') or {},
+                   properties.get('content_encoding'))
+
+    def republish(self, delivery_tag: int, routing_key: str, body: bytes) -> None:
+        properties = dict(self._properties.pop(delivery_tag))
+        headers = {k: v for k, v in (properties.get('headers') or {}).items() if k != 'x-death'}
+        properties['headers'] = headers or None
+        self.broker.publish(topology.EXCHANGE, routing_key, body, properties)
+        self.broker.ack(delivery_tag)
+
+    def release(self, delivery_tags: List[int]) -> None:
+        # Al cancelar el consumidor, sus entregas sin confirmar vuelven a la cola
+        self._properties.clear()
+
+    def purge(self) -> int:
+        return self.broker.purge_queue(topology.DEAD_LETTER_QUEUE)
+
+    def close(self) -> None:
+        if self._consumer_tag:
+            self.broker.cancel_consumer(self._consumer_tag)
+            self._consumer_tag = None
+
+
+def open_dead_letters(mode: Optional[str] = None):
+    """Abre la cola de dead letters del broker configurado."""
+    mode = mode or config.COMMUNICATION_MODE
+    if mode == CommunicationMode.INMEMORY:
+        return _InMemoryDeadLetters()
+    return _RabbitMQDeadLetters()
+
+
+def inspect(limit: int = 20, mode: Optional[str] = None, body_chars: int = 200) -> int:
+    """
+    Muestra las primeras letras muertas sin retirarlas de la cola.
+
+    Returns:
+        int: Número de mensajes mostrados.
+    """
+    source = open_dead_letters(mode)
+    tags = []
+    try:
+        for tag, routing_key, body, headers, content_encoding in source.fetch(limit):
+            tags.append(tag)
+            try:
+                preview = decode_body(body, content_encoding)[:body_chars].decode('utf-8', errors='replace')
+            except ValueError as e:
+                preview = f"<{e}>"
+            print(f"[{len(tags)}] {original_routing_key(routing_key, headers)} "
+                  f"({_death_summary(headers)}) {len(body)} bytes")
+            print(f"    {preview}")
+        source.release(tags)
+    finally:
+        source.close()
+    print(f"{len(tags)} mensaje(s) en {topology.DEAD_LETTER_QUEUE}")
+    return len(tags)
+
+
+def replay(limit: int = 100, mode: Optional[str] = None) -> int:
+    """
+    Reenvía letras muertas al exchange principal con su clave de enrutamiento original.
+
+    Returns:
+        int: Número de mensajes reenviados.
+    """
+    source = open_dead_letters(mode)
+    replayed = 0
+    try:
+        for tag, routing_key, body, headers, _ in source.fetch(limit):
+            source.republish(tag, original_routing_key(routing_key, headers), body)
+            replayed += 1
+    finally:
+        source.close()
+    logger.info(f"{replayed} mensaje(s) reenviados desde {topology.DEAD_LETTER_QUEUE}")
+    return replayed
+
+
+def purge(mode: Optional[str] = None) -> int:
+    """
+    Descarta todas las letras muertas.
+
+    Returns:
+        int: Número de mensajes descartados.
+    """
+    source = open_dead_letters(mode)
+    try:
+        count = source.purge()
+    finally:
+        source.close()
+    logger.info(f"{count} mensaje(s) descartados de {topology.DEAD_LETTER_QUEUE}")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspecciona y reenvía los mensajes de dead letters")
+    parser.add_argument("action", choices=("inspect", "replay", "purge"))
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Máximo de mensajes (por defecto 20 al inspeccionar y 100 al reenviar)")
+    parser.add_argument("--mode", choices=CommunicationMode.BROKER_MODES, default=config.COMMUNICATION_MODE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL), format=config.LOG_FORMAT)
+    try:
+        if args.action == "inspect":
+            inspect(args.limit or 20, args.mode)
+        elif args.action == "replay":
+            print(f"{replay(args.limit or 100, args.mode)} mensaje(s) reenviados")
+        else:
+            print(f"{purge(args.mode)} mensaje(s) descartados")
+    except pika.exceptions.AMQPError as e:
+        raise SystemExit(f"No se pudo acceder a {topology.DEAD_LETTER_QUEUE}: {e}")
+
+
+if __name__ == "__main__":
+    main()
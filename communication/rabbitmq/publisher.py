@@ -8,14 +8,115 @@ mensajes al servidor central a través del patrón publicador/suscriptor de Rabb
 import json
 import logging
 import pickle
+import threading
+import functools
+from collections import OrderedDict, deque
 import pika
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 import time
 
 from common.message import Message
+from communication.compression import encode_body, validate_encoding
+from communication.rabbitmq.reconnect import ReconnectSupervisor
+from communication.rabbitmq.topology import message_priority
+from communication.spool import MessageSpool, SpoolDrainer
 
 logger = logging.getLogger(__name__)
 
+
+class PublisherConfirmTracker:
+    """
+    Ventana de mensajes publicados pendientes de confirmación por parte del broker.
+
+    Cada publicación ocupa un hueco de la ventana hasta que RabbitMQ responde con
+    un ack o un nack (publisher confirms). Los delivery tags son consecutivos por
+    canal, por lo que un ack con ``multiple=True`` confirma todos los tags anteriores.
+    """
+
+    def __init__(self, max_in_flight: int = 256):
+        self.max_in_flight = max_in_flight
+        self._pending: "OrderedDict[int, Tuple[Message, str, int]]" = OrderedDict()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        """Número de huecos ocupados (publicaciones sin confirmar)."""
+        with self._condition:
+            return self._in_flight
+
+    def acquire_slot(self, timeout: Optional[float] = None) -> bool:
+        """
+        Reserva un hueco de la ventana, esperando si está llena.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos (None espera indefinidamente).
+
+        Returns:
+            bool: True si se reservó el hueco, False si venció el tiempo de espera.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < self.max_in_flight, timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release_slots(self, count: int = 1) -> None:
+        """Libera huecos de la ventana y despierta a los publicadores en espera."""
+        if count <= 0:
+            return
+        with self._condition:
+            self._in_flight = max(0, self._in_flight - count)
+            self._condition.notify_all()
+
+    def register(self, delivery_tag: int, message: Message, routing_key: str, attempts: int) -> None:
+        """Asocia un delivery tag con el mensaje publicado."""
+        with self._condition:
+            self._pending[delivery_tag] = (message, routing_key, attempts)
+
+    def pop(self, delivery_tag: int, multiple: bool = False) -> List[Tuple[Message, str, int]]:
+        """
+        Extrae las entradas confirmadas por un ack/nack sin liberar sus huecos.
+
+        Args:
+            delivery_tag: Tag indicado por el broker.
+            multiple: Si es True, incluye todos los tags menores o iguales.
+
+        Returns:
+            list: Entradas (mensaje, routing_key, intentos) afectadas.
+        """
+        with self._condition:
+            if not multiple:
+                entry = self._pending.pop(delivery_tag, None)
+                return [entry] if entry else []
+
+            entries = []
+            while self._pending:
+                tag = next(iter(self._pending))
+                if tag > delivery_tag:
+                    break
+                entries.append(self._pending.pop(tag))
+            return entries
+
+    def drain(self) -> List[Tuple[Message, str, int]]:
+        """Extrae todas las entradas pendientes (p. ej. al perder el canal) liberando sus huecos."""
+        with self._condition:
+            entries = list(self._pending.values())
+            self._pending.clear()
+            self._in_flight = 0
+            self._condition.notify_all()
+            return entries
+
+    def wait_until_empty(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que todas las publicaciones hayan sido confirmadas.
+
+        Returns:
+            bool: True si la ventana quedó vacía, False si venció el tiempo de espera.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._in_flight == 0, timeout)
+
 class RabbitMQPublisher:
     """Publicador de mensajes usando RabbitMQ."""
 
@@ -23,7 +124,17 @@ class RabbitMQPublisher:
                  exchange: str = 'spy_alerts', exchange_type: str = 'topic',
                  routing_key: str = '', username: str = 'guest', password: str = 'guest',
                  virtual_host: str = '/', connection_attempts: int = 3,
-                 retry_delay: int = 5):
+                 retry_delay: int = 5, publisher_confirms: bool = False,
+                 max_in_flight: int = 256, max_publish_retries: int = 3,
+                 confirm_timeout: float = 10.0, connection_pool=None,
+                 spool: Optional[MessageSpool] = None, spool_drain_rate: float = 200.0,
+                 reconnect_initial_delay: float = 0.5, reconnect_max_delay: float = 30.0,
+                 compression: Optional[str] = None, compression_threshold: int = 1024,
+                 compression_level: int = 6):
+        if publisher_confirms and connection_pool is not None:
+            raise ValueError("El modo publisher confirms requiere una conexión propia, no un pool compartido")
+        validate_encoding(compression)
+
         self.host = host
         self.port = port
         self.exchange = exchange
@@ -37,7 +148,59 @@ class RabbitMQPublisher:
         # Configuración adicional para conexión
         self.connection = None
         self.channel = None
-        self.failed_messages = []  # Cola local para mensajes no publicados
+        self.failed_messages = deque()  # Cola local para mensajes no publicados
+        self._lock = threading.RLock()  # Serializa el uso del canal entre hilos
+
+        # Propiedades por (prioridad, compresión); se renuevan cada segundo para que
+        # la marca de tiempo AMQP (en segundos) sea la de la publicación
+        self._properties: Dict[Tuple[int, Optional[str]], pika.BasicProperties] = {}
+
+        # Compresión de los cuerpos grandes (content_encoding indica el algoritmo)
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+
+        # Modo de confirmaciones asíncronas (publisher confirms)
+        self.publisher_confirms = publisher_confirms
+        self.max_publish_retries = max_publish_retries
+        self.confirm_timeout = confirm_timeout
+        self.confirm_tracker = PublisherConfirmTracker(max_in_flight) if publisher_confirms else None
+        self.confirmed_count = 0
+        self.nacked_count = 0
+        self._delivery_tag = 0
+        self._ready = threading.Event()
+        self._ioloop_thread = None
+
+        # Pool de conexiones compartidas del proceso (opcional)
+        self.connection_pool = connection_pool
+        self._lease = None
+
+        # Spool en disco para mensajes no publicados (opcional) y su hilo drenador
+        self.spool = spool
+        self.spool_drain_rate = spool_drain_rate
+        self._drainer = None
+
+        # Reconexión en segundo plano: publish_message nunca espera a que vuelva el broker.
+        # _closing se activa en close() y se consulta desde el bucle de E/S y el pool
+        self._closing = threading.Event()
+        self._supervisor = ReconnectSupervisor(
+            self._reconnect_once,
+            name=f"Publisher-{exchange}",
+            initial_delay=reconnect_initial_delay,
+            max_delay=reconnect_max_delay,
+            on_success=self.resend_failed_messages
+        )
+
+    def _connection_parameters(self) -> pika.ConnectionParameters:
+        """Construye los parámetros de conexión con RabbitMQ."""
+        return pika.ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            virtual_host=self.virtual_host,
+            #credentials=self.credentials,
+            connection_attempts=self.connection_attempts,
+            retry_delay=self.retry_delay
+        )
 
     def connect(self) -> bool:
         """
@@ -46,19 +209,39 @@ class RabbitMQPublisher:
         Returns:
             bool: True si la conexión fue exitosa, False en caso contrario.
         """
-        try:
-            # Parámetros de conexión
-            parameters = pika.ConnectionParameters(
-                host=self.host,
-                port=self.port,
-                virtual_host=self.virtual_host,
-                #credentials=self.credentials,
-                connection_attempts=self.connection_attempts,
-                retry_delay=self.retry_delay
+        self._closing.clear()
+        return self._connect()
+
+    def _connect(self) -> bool:
+        """Conecta según el modo configurado y arranca el drenador del spool."""
+        if self.publisher_confirms:
+            connected = self._connect_with_confirms()
+        elif self.connection_pool is not None:
+            connected = self._connect_with_pool()
+        else:
+            connected = self._connect_blocking()
+
+        if connected and self.spool is not None and self._drainer is None:
+            self._drainer = SpoolDrainer(
+                self.spool,
+                publish=self._publish_now,
+                is_connected=self.is_connected,
+                rate=self.spool_drain_rate
             )
+            self._drainer.start()
+        return connected
 
+    def is_connected(self) -> bool:
+        """Indica si hay una conexión y un canal utilizables."""
+        if self._lease is not None and self._lease.lost:
+            return False
+        return bool(self.connection and self.channel and self.channel.is_open)
+
+    def _connect_blocking(self) -> bool:
+        """Establece una conexión bloqueante propia."""
+        try:
             # Establecer la conexión
-            self.connection = pika.BlockingConnection(parameters)
+            self.connection = pika.BlockingConnection(self._connection_parameters())
             self.channel = self.connection.channel()
 
             # Declarar el exchange
@@ -75,73 +258,344 @@ class RabbitMQPublisher:
             logger.error(f"Error al conectar con RabbitMQ: {e}")
             return False
 
-    def _reconnect(self) -> bool:
+    def _connect_with_pool(self) -> bool:
         """
-        Intenta reconectar con RabbitMQ.
+        Obtiene el canal de publicación compartido del pool de conexiones.
 
         Returns:
-            bool: True si la reconexión fue exitosa, False en caso contrario.
-        """
-        logger.warning("Intentando reconectar con RabbitMQ...")
-        self.close()
-        for attempt in range(self.connection_attempts):
-            if self.connect():
-                logger.info("Reconexión exitosa con RabbitMQ")
-                return True
-            logger.warning(f"Reintento {attempt + 1}/{self.connection_attempts} fallido. Esperando...")
-            time.sleep(self.retry_delay)
-        logger.error("No se pudo reconectar con RabbitMQ después de varios intentos")
-        return False
+            bool: True si se obtuvo el canal y se declaró el exchange.
+        """
+        try:
+            self._lease = self.connection_pool.lease_channel(dedicated=False)
+            self._lease.on_connection_lost = self._reconnect
+            with self._lease.lock:
+                self._lease.channel.exchange_declare(
+                    exchange=self.exchange,
+                    exchange_type=self.exchange_type,
+                    durable=True
+                )
+            self.connection = self._lease.connection
+            self.channel = self._lease.channel
+
+            logger.info(f"Conectado a RabbitMQ en {self.host}:{self.port} mediante el pool compartido, "
+                        f"exchange: {self.exchange}")
+            return True
+
+        except pika.exceptions.AMQPError as e:
+            logger.error(f"Error al conectar con RabbitMQ: {e}")
+            if self._lease:
+                self._lease.release()
+                self._lease = None
+            return False
+
+    def _channel_lock(self):
+        """Cerrojo a sostener al usar el canal (el de la conexión compartida si se usa el pool)."""
+        return self._lease.lock if self._lease else self._lock
+
+    def _connect_with_confirms(self) -> bool:
+        """
+        Establece una conexión asíncrona (SelectConnection) con publisher confirms.
+
+        El bucle de E/S de pika se ejecuta en un hilo propio; las publicaciones se
+        encolan en él y las confirmaciones se procesan fuera del hilo llamante.
+
+        Returns:
+            bool: True si la conexión y el modo confirm quedaron listos.
+        """
+        self._ready.clear()
+        try:
+            self.connection = pika.SelectConnection(
+                self._connection_parameters(),
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed
+            )
+        except pika.exceptions.AMQPError as e:
+            logger.error(f"Error al conectar con RabbitMQ: {e}")
+            self.connection = None
+            return False
+
+        self._ioloop_thread = threading.Thread(
+            target=self.connection.ioloop.start,
+            daemon=True,
+            name=f"RabbitMQ-Publisher-{self.exchange}"
+        )
+        self._ioloop_thread.start()
+
+        timeout = self.connection_attempts * (self.retry_delay + 1)
+        if not self._ready.wait(timeout) or not self.channel:
+            logger.error("No se pudo activar el modo de confirmaciones en RabbitMQ")
+            self.close()
+            return False
+
+        logger.info(f"Conectado a RabbitMQ en {self.host}:{self.port}, exchange: {self.exchange} "
+                    f"(publisher confirms, ventana de {self.confirm_tracker.max_in_flight})")
+        return True
+
+    def _on_connection_open(self, connection) -> None:
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error) -> None:
+        logger.error(f"Error al conectar con RabbitMQ: {error}")
+        self.channel = None
+        self._ready.set()
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason) -> None:
+        # Una conexión ya descartada (cierre o reconexión) no debe reconectar
+        current = connection is self.connection
+        if current:
+            self.channel = None
+        self._ready.set()
+        # Los mensajes sin confirmar se guardan para reintentarlos más tarde
+        pending = self.confirm_tracker.drain()
+        for message, routing_key, _ in pending:
+            self._store_failed(message, routing_key)
+        if pending:
+            logger.warning(f"Conexión cerrada con {len(pending)} mensajes sin confirmar; "
+                           f"almacenados en la cola local")
+        connection.ioloop.stop()
+        if current and not self._closing.is_set():
+            logger.warning(f"Conexión con RabbitMQ perdida: {reason}")
+            self._reconnect()
+
+    def _on_channel_open(self, channel) -> None:
+        self.channel = channel
+        self._delivery_tag = 0
+        channel.exchange_declare(
+            exchange=self.exchange,
+            exchange_type=self.exchange_type,
+            durable=True,
+            callback=self._on_exchange_declared
+        )
+
+    def _on_exchange_declared(self, frame) -> None:
+        self.channel.confirm_delivery(
+            ack_nack_callback=self._on_delivery_confirmation,
+            callback=lambda _frame: self._ready.set()
+        )
+
+    def _on_delivery_confirmation(self, frame) -> None:
+        """
+        Procesa un ack/nack del broker (se ejecuta en el hilo del bucle de E/S).
+        """
+        method = frame.method
+        entries = self.confirm_tracker.pop(method.delivery_tag, method.multiple)
+
+        if isinstance(method, pika.spec.Basic.Ack):
+            self.confirmed_count += len(entries)
+            self.confirm_tracker.release_slots(len(entries))
+            return
+
+        self.nacked_count += len(entries)
+        for message, routing_key, attempts in entries:
+            if attempts < self.max_publish_retries:
+                # El hueco de la ventana se conserva para el reintento
+                logger.warning(f"Mensaje rechazado por el broker (nack), reintento {attempts + 1}/"
+                               f"{self.max_publish_retries}: {message.message_id}")
+                self._publish_confirmed(message, routing_key, attempts + 1)
+            else:
+                logger.error(f"Mensaje descartado tras {attempts} reintentos: {message.message_id}")
+                self._store_failed(message, routing_key)
+                self.confirm_tracker.release_slots(1)
+
+    def _publish_confirmed(self, message: Message, routing_key: str, attempts: int = 0) -> None:
+        """
+        Publica un mensaje en modo confirm (se ejecuta en el hilo del bucle de E/S).
+        """
+        if not self.channel or not self.channel.is_open:
+            self._store_failed(message, routing_key)
+            self.confirm_tracker.release_slots(1)
+            return
+
+        try:
+            body, properties = self._encode(message)
+            self.channel.basic_publish(
+                exchange=self.exchange,
+                routing_key=routing_key,
+                body=body,
+                properties=properties
+            )
+            self._delivery_tag += 1
+            self.confirm_tracker.register(self._delivery_tag, message, routing_key, attempts)
+        except pika.exceptions.AMQPError as e:
+            logger.error(f"Error al publicar mensaje: {e}")
+            self._store_failed(message, routing_key)
+            self.confirm_tracker.release_slots(1)
+
+    def _reconnect(self) -> None:
+        """
+        Programa la reconexión con RabbitMQ en segundo plano.
+
+        No bloquea: el supervisor reintenta con espera exponencial y jitter y, al
+        reconectar, reenvía los mensajes acumulados mientras tanto.
+        """
+        # Con el cerrojo, close() no puede colarse entre la comprobación y la petición
+        with self._lock:
+            if not self._closing.is_set():
+                self._supervisor.request()
+
+    def _reconnect_once(self) -> bool:
+        """
+        Intento de reconexión ejecutado por el supervisor.
+
+        Returns:
+            bool: True si el publicador vuelve a tener conexión.
+        """
+        if self.is_connected():
+            return True
+        self._discard_connection()
+        return self._connect()
 
     def publish_message(self, message: Message, routing_key: str = '') -> bool:
         """
         Publica un mensaje en el exchange.
 
+        Si hay un spool configurado y todavía tiene mensajes pendientes de reenvío,
+        el mensaje se añade al spool para conservar el orden de publicación.
+
         Args:
             message: El mensaje a publicar.
             routing_key: La clave de enrutamiento para el mensaje.
 
         Returns:
-            bool: True si el mensaje fue publicado exitosamente, False en caso contrario.
+            bool: True si el mensaje fue publicado (o guardado en el spool), False en caso contrario.
         """
-        if not self.connection or not self.channel:
-            logger.error("No hay conexión establecida con RabbitMQ. Intentando reconectar...")
-            if not self._reconnect():
-                self.failed_messages.append((message, routing_key))
-                logger.error("Mensaje almacenado en la cola local para reintento")
-                return False
+        # Si no hay routing_key específica, usar el tipo de mensaje como routing_key
+        if not routing_key and hasattr(message, 'message_type'):
+            routing_key = message.message_type
 
-        try:
-            # Si no hay routing_key específica, usar el tipo de mensaje como routing_key
-            if not routing_key and hasattr(message, 'message_type'):
-                routing_key = message.message_type
+        if self.spool is not None and self.spool.has_pending():
+            return self._store_failed(message, routing_key)
 
+        if not self.is_connected():
+            # Sin conexión: el mensaje se guarda y la reconexión sigue en segundo plano
+            logger.error("No hay conexión establecida con RabbitMQ. Reconectando en segundo plano...")
+            self._reconnect()
+            return self._store_failed(message, routing_key)
 
-            serialized_message = message.to_json().encode("utf-8")
+        if self.publisher_confirms:
+            return self._enqueue_confirmed(message, routing_key)
 
+        if self._publish_now(message, routing_key):
+            return True
+        return self._store_failed(message, routing_key)
 
+    def _properties_for(self, message: Message, content_encoding: Optional[str] = None) -> pika.BasicProperties:
+        """
+        Propiedades AMQP de un mensaje: las comunes, la marca de tiempo, la prioridad
+        derivada de su nivel de emergencia y la compresión del cuerpo (se cachean por
+        combinación mientras no cambia el segundo de la marca de tiempo).
+        """
+        priority = message_priority(message)
+        timestamp = int(time.time())
+        key = (priority, content_encoding)
+        properties = self._properties.get(key)
+        if properties is None or properties.timestamp != timestamp:
             properties = pika.BasicProperties(
                 delivery_mode=2,
                 content_type='application/json',
-                timestamp=int(time.time())
+                content_encoding=content_encoding,
+                priority=priority or None,
+                timestamp=timestamp
             )
+            self._properties[key] = properties
+        return properties
+
+    def _encode(self, message: Message) -> Tuple[bytes, pika.BasicProperties]:
+        """Serializa un mensaje (comprimiéndolo si procede) y obtiene sus propiedades."""
+        body, content_encoding = encode_body(
+            message.to_json().encode("utf-8"),
+            self.compression,
+            self.compression_threshold,
+            self.compression_level
+        )
+        return body, self._properties_for(message, content_encoding)
+
+    def _publish_now(self, message: Message, routing_key: str) -> bool:
+        """
+        Publica un mensaje inmediatamente sin almacenarlo si falla.
+
+        Returns:
+            bool: True si el mensaje fue publicado.
+        """
+        if self.publisher_confirms:
+            return self.is_connected() and self._enqueue_confirmed(message, routing_key, store_on_failure=False)
+
+        try:
+            body, properties = self._encode(message)
 
             # Publicar el mensaje
-            self.channel.basic_publish(
-                exchange=self.exchange,
-                routing_key=routing_key,
-                body=serialized_message,
-            )
+            with self._channel_lock():
+                self.channel.basic_publish(
+                    exchange=self.exchange,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=properties
+                )
 
             logger.debug(f"Mensaje publicado con routing_key '{routing_key}': {message}")
             return True
 
-        except (pika.exceptions.AMQPError, pickle.PickleError) as e:
+        except (pika.exceptions.AMQPError, pickle.PickleError, AttributeError) as e:
             logger.error(f"Error al publicar mensaje: {e}")
-            self.failed_messages.append((message, routing_key))
-            logger.error("Mensaje almacenado en la cola local para reintento")
+            if not self.is_connected():
+                self._reconnect()
             return False
 
+    def _store_failed(self, message: Message, routing_key: str) -> bool:
+        """
+        Guarda un mensaje no publicado en el spool o, si no hay spool, en la cola local.
+
+        Returns:
+            bool: True si el mensaje quedó guardado en el spool persistente.
+        """
+        if self.spool is not None and self.spool.append(message, routing_key):
+            logger.debug(f"Mensaje guardado en el spool para reenvío: {message.message_id}")
+            return True
+        self.failed_messages.append((message, routing_key))
+        logger.error("Mensaje almacenado en la cola local para reintento")
+        return False
+
+    def _enqueue_confirmed(self, message: Message, routing_key: str, store_on_failure: bool = True) -> bool:
+        """
+        Entrega un mensaje al bucle de E/S en modo confirm sin esperar al ack.
+
+        Solo bloquea si la ventana de mensajes sin confirmar está llena.
+
+        Returns:
+            bool: True si el mensaje quedó en vuelo (o guardado en el spool).
+        """
+        if not self.confirm_tracker.acquire_slot(timeout=self.confirm_timeout):
+            logger.error("Ventana de confirmaciones llena; no se pudo publicar el mensaje")
+            return self._store_failed(message, routing_key) if store_on_failure else False
+
+        try:
+            self.connection.ioloop.add_callback_threadsafe(
+                functools.partial(self._publish_confirmed, message, routing_key, 0)
+            )
+        except (pika.exceptions.AMQPError, RuntimeError, AttributeError) as e:
+            logger.error(f"Error al publicar mensaje: {e}")
+            self.confirm_tracker.release_slots(1)
+            return self._store_failed(message, routing_key) if store_on_failure else False
+
+        logger.debug(f"Mensaje en vuelo con routing_key '{routing_key}': {message}")
+        return True
+
+    def wait_for_confirms(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que el broker confirme todos los mensajes en vuelo.
+
+        Args:
+            timeout: Tiempo máximo de espera en segundos.
+
+        Returns:
+            bool: True si no quedan mensajes sin confirmar.
+        """
+        if not self.confirm_tracker:
+            return True
+        return self.confirm_tracker.wait_until_empty(timeout)
+
     def resend_failed_messages(self) -> None:
         """
         Reintenta publicar los mensajes almacenados en la cola local.
@@ -150,23 +604,80 @@ class RabbitMQPublisher:
             return
 
         logger.info(f"Reintentando publicar {len(self.failed_messages)} mensajes fallidos...")
-        for message, routing_key in list(self.failed_messages):
-            if self.publish_message(message, routing_key):
-                self.failed_messages.remove((message, routing_key))
-                logger.info(f"Mensaje reenviado exitosamente: {message}")
+        for _ in range(len(self.failed_messages)):
+            message, routing_key = self.failed_messages.popleft()
+            if not self._publish_now(message, routing_key):
+                # Sigue sin haber conexión: se conserva el orden y se abandona el reintento
+                self.failed_messages.appendleft((message, routing_key))
+                break
+            logger.info(f"Mensaje reenviado exitosamente: {message}")
 
     def close(self) -> None:
         """Cierra la conexión con RabbitMQ."""
+        with self._lock:
+            # Desde aquí ningún hilo programa reconexiones (hasta el próximo connect())
+            self._closing.set()
+        self._supervisor.stop()
+        if self._drainer is not None:
+            self._drainer.stop()
+            self._drainer = None
+        if self.spool is not None:
+            self.spool.sync()
+
+        self._discard_connection()
+        self._supervisor.reset()
+
+    def _discard_connection(self) -> None:
+        """Cierra o devuelve la conexión actual sin programar una reconexión."""
+        if self.publisher_confirms:
+            self._close_with_confirms()
+            return
+
+        if self._lease:
+            # La conexión pertenece al pool: solo se devuelve el canal
+            self._lease.on_connection_lost = None
+            self._lease.release()
+            self._lease = None
+            self.connection = None
+            self.channel = None
+            return
+
         if self.connection:
             try:
-                self.connection.close()
-                logger.info("Conexión con RabbitMQ cerrada")
+                if self.connection.is_open:
+                    self.connection.close()
+                    logger.info("Conexión con RabbitMQ cerrada")
             except pika.exceptions.AMQPError as e:
                 logger.error(f"Error al cerrar la conexión con RabbitMQ: {e}")
             finally:
                 self.connection = None
                 self.channel = None
 
+    def _close_with_confirms(self) -> None:
+        """Espera las confirmaciones pendientes y detiene el bucle de E/S."""
+        connection = self.connection
+        if connection:
+            if self.channel and not self.wait_for_confirms(self.confirm_timeout):
+                logger.warning(f"Cerrando con {self.confirm_tracker.in_flight} mensajes sin confirmar")
+            # Desligada antes de cerrarla: su callback de cierre ya no reconecta
+            self.connection = None
+            try:
+                if connection.is_open:
+                    connection.ioloop.add_callback_threadsafe(connection.close)
+                else:
+                    connection.ioloop.add_callback_threadsafe(connection.ioloop.stop)
+            except (pika.exceptions.AMQPError, RuntimeError) as e:
+                logger.error(f"Error al cerrar la conexión con RabbitMQ: {e}")
+
+        if self._ioloop_thread and self._ioloop_thread.is_alive() \
+                and self._ioloop_thread is not threading.current_thread():
+            self._ioloop_thread.join(timeout=5.0)
+
+        if connection:
+            logger.info("Conexión con RabbitMQ cerrada")
+        self.channel = None
+        self._ioloop_thread = None
+
     def __enter__(self):
         """Permite usar el publicador con el contexto 'with'."""
         self.connect()
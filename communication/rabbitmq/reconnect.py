@@ -0,0 +1,129 @@
+"""
+Reconexión en segundo plano con espera exponencial y jitter.
+
+Los clientes de RabbitMQ no esperan a que vuelva el broker en el hilo que publica o
+consume: delegan la reconexión en un supervisor que reintenta en su propio hilo,
+espaciando los intentos de forma exponencial y con una componente aleatoria (jitter)
+para que muchos clientes no reconecten todos a la vez tras una caída.
+"""
+
+import logging
+import random
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, initial_delay: float = 0.5, max_delay: float = 30.0,
+                  multiplier: float = 2.0, jitter: float = 0.5) -> float:
+    """
+    Calcula la espera antes de un reintento.
+
+    Args:
+        attempt: Número de intento (0 para el primero).
+        initial_delay: Espera base del primer intento, en segundos.
+        max_delay: Espera máxima, en segundos.
+        multiplier: Factor de crecimiento entre intentos.
+        jitter: Fracción de la espera que se sortea (0 sin jitter, 1 jitter completo).
+
+    Returns:
+        float: Segundos a esperar.
+    """
+    delay = min(max_delay, initial_delay * multiplier ** attempt)
+    return delay * (1.0 - jitter * random.random())
+
+
+class ReconnectSupervisor:
+    """
+    Reintenta una reconexión en un hilo propio hasta que tiene éxito.
+
+    ``request()`` no bloquea: arranca el hilo si no está activo o, si ya lo está,
+    anota la petición para volver a comprobar la conexión al terminar.
+    """
+
+    def __init__(self, reconnect: Callable[[], bool], name: str,
+                 initial_delay: float = 0.5, max_delay: float = 30.0,
+                 multiplier: float = 2.0, jitter: float = 0.5,
+                 on_success: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            reconnect: Función que intenta reconectar y devuelve True si lo consigue.
+            name: Nombre del hilo supervisor (para los logs).
+            initial_delay: Espera antes del primer intento.
+            max_delay: Espera máxima entre intentos.
+            multiplier: Factor de crecimiento de la espera.
+            jitter: Fracción aleatoria de la espera.
+            on_success: Función a ejecutar tras reconectar (p. ej. reenviar pendientes).
+        """
+        self.reconnect = reconnect
+        self.name = name
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.on_success = on_success
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._requested = False
+
+    @property
+    def active(self) -> bool:
+        """Indica si hay una reconexión en curso."""
+        with self._lock:
+            return self._thread is not None
+
+    def request(self) -> None:
+        """Solicita una reconexión en segundo plano (idempotente, no bloquea)."""
+        with self._lock:
+            self._requested = True
+            if self._thread is not None or self._stop_event.is_set():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"Reconnect-{self.name}")
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            with self._lock:
+                self._requested = False
+
+            attempt = 0
+            while not self._stop_event.is_set():
+                delay = backoff_delay(attempt, self.initial_delay, self.max_delay,
+                                      self.multiplier, self.jitter)
+                if self._stop_event.wait(delay):
+                    break
+                attempt += 1
+                try:
+                    connected = self.reconnect()
+                except Exception as e:
+                    logger.error(f"Error al reconectar {self.name}: {e}")
+                    connected = False
+                if connected:
+                    logger.info(f"{self.name}: reconexión exitosa tras {attempt} intento(s)")
+                    if self.on_success:
+                        try:
+                            self.on_success()
+                        except Exception as e:
+                            logger.error(f"Error tras reconectar {self.name}: {e}")
+                    break
+                logger.warning(f"{self.name}: intento de reconexión {attempt} fallido")
+
+            with self._lock:
+                if not self._requested or self._stop_event.is_set():
+                    self._thread = None
+                    return
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene los reintentos en curso."""
+        self._stop_event.set()
+        with self._lock:
+            thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def reset(self) -> None:
+        """Permite volver a usar el supervisor tras ``stop()``."""
+        self._stop_event.clear()
@@ -0,0 +1,241 @@
+"""
+Topología de enrutamiento del sistema sobre el broker.
+
+En lugar de una única cola compartida con la clave ``task.broadcast``, cada tipo de
+tráfico tiene su propia familia de claves en el exchange ``night_tasks``:
+
+- ``alert.<geohash>``: alertas de los espías, por celda geográfica.
+- ``task.agent.<agent_id>``: tareas dirigidas a un agente nocturno concreto (las
+  consume su cola ``tasks.agent.<id>`` o la cola ``tasks.host.<id>`` del host que lo aloja).
+- ``status.agent.<agent_id>``: estados (y finalizaciones) de los agentes nocturnos.
+
+Cada agente consume solo su cola de tareas y el servidor central consume alertas y
+estados en colas separadas, de modo que ningún consumidor recibe (ni decodifica)
+tráfico que no le corresponde. Las colas de alertas y de tareas son colas con
+prioridad (``x-max-priority``): los mensajes llevan como prioridad el peso de su nivel
+de emergencia, así que una alerta CRÍTICA adelanta en el broker a las BAJA acumuladas.
+Los mensajes rechazados definitivamente (irrecuperables o con demasiados fallos) se
+desvían al exchange de dead letters y quedan en la cola ``dead_letters`` para
+inspeccionarlos o reenviarlos (``python -m communication.rabbitmq.dead_letters``).
+Este módulo declara la topología completa una sola vez:
+
+    python -m communication.rabbitmq.topology --agents 10
+"""
+
+import argparse
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import config
+from common.constants import CommunicationMode
+from common.geo import encode_geohash
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE = 'night_tasks'
+EXCHANGE_TYPE = 'topic'
+
+SERVER_ALERTS_QUEUE = 'server_alerts_queue'
+SERVER_STATUS_QUEUE = 'server_status_queue'
+
+ALERT_BINDING_KEY = 'alert.*'
+STATUS_BINDING_KEY = 'status.#'
+
+DEAD_LETTER_EXCHANGE = 'night_tasks.dlx'
+DEAD_LETTER_QUEUE = 'dead_letters'
+
+
+# ===== Claves de enrutamiento =====
+
+def alert_routing_key(position: Tuple[float, float], precision: Optional[int] = None) -> str:
+    """Clave de una alerta emitida en ``position`` (``alert.<geohash>``)."""
+    return alert_cell_routing_key(encode_geohash(position, precision or config.ALERT_CELL_PRECISION))
+
+
+def alert_cell_routing_key(cell: str) -> str:
+    """Clave de una alerta de la celda ``cell`` (geohash ya calculado, p. ej. por lotes)."""
+    return f"alert.{cell}"
+
+
+def alert_binding_key(cell: str) -> str:
+    """Clave de binding para recibir las alertas de una celda concreta."""
+    return f"alert.{cell}"
+
+
+def task_routing_key(agent_id: str) -> str:
+    """Clave de las tareas dirigidas a un agente (``task.agent.<id>``)."""
+    return f"task.agent.{agent_id}"
+
+
+def status_routing_key(agent_id: str) -> str:
+    """Clave de los estados publicados por un agente (``status.agent.<id>``)."""
+    return f"status.agent.{agent_id}"
+
+
+def completion_routing_key(agent_id: str) -> str:
+    """Clave de las finalizaciones de tarea de un agente."""
+    return f"status.agent.{agent_id}.completed"
+
+
+def agent_task_queue(agent_id: str) -> str:
+    """Nombre de la cola de tareas propia de un agente."""
+    return f"tasks.agent.{agent_id}"
+
+
+def host_task_queue(host_id: str) -> str:
+    """
+    Cola de tareas de un NightAgentHost: una sola cola enlazada con la clave de
+    tareas de cada agente que aloja.
+    """
+    return f"tasks.host.{host_id}"
+
+
+def default_agent_ids(count: Optional[int] = None) -> List[str]:
+    """IDs de los agentes que lanza la simulación (``AGENT001``...)."""
+    count = config.NUM_NIGHT_AGENTS if count is None else count
+    return [f"AGENT{i + 1:03d}" for i in range(count)]
+
+
+# ===== Prioridad =====
+
+def message_priority(message) -> int:
+    """
+    Prioridad AMQP de un mensaje según su nivel de emergencia.
+
+    Returns:
+        int: Peso del nivel en ``config.EMERGENCY_LEVELS`` (0 si el mensaje no tiene
+        nivel o la prioridad está desactivada).
+    """
+    if not config.RABBITMQ_MAX_PRIORITY:
+        return 0
+    level = getattr(message, 'emergency_level', None)
+    return min(config.EMERGENCY_LEVELS.get(level, 0), config.RABBITMQ_MAX_PRIORITY)
+
+
+def priority_queue_arguments() -> Optional[Dict[str, Any]]:
+    """Argumentos de declaración de las colas con prioridad (None si está desactivada)."""
+    if not config.RABBITMQ_MAX_PRIORITY:
+        return None
+    return {'x-max-priority': config.RABBITMQ_MAX_PRIORITY}
+
+
+def queue_arguments(priority: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Argumentos de declaración de una cola de la topología.
+
+    Args:
+        priority: Si la cola es una cola con prioridad (alertas y tareas).
+
+    Returns:
+        dict o None: Prioridad máxima y exchange de dead letters según la configuración.
+    """
+    arguments = dict(priority_queue_arguments() or {}) if priority else {}
+    if config.RABBITMQ_DEAD_LETTER_ENABLED:
+        arguments['x-dead-letter-exchange'] = DEAD_LETTER_EXCHANGE
+    return arguments or None
+
+
+# ===== Declaración =====
+
+def topology_bindings(agent_ids: Iterable[str] = ()) -> List[Tuple[str, List[str], Optional[Dict[str, Any]]]]:
+    """
+    Colas de la topología, sus claves de binding y sus argumentos de declaración.
+
+    Returns:
+        list: Tuplas (nombre de la cola, claves de binding, argumentos).
+    """
+    priority = queue_arguments(priority=True)
+    bindings = [
+        (SERVER_ALERTS_QUEUE, [ALERT_BINDING_KEY], priority),
+        (SERVER_STATUS_QUEUE, [STATUS_BINDING_KEY], queue_arguments()),
+    ]
+    bindings.extend((agent_task_queue(agent_id), [task_routing_key(agent_id)], priority)
+                    for agent_id in agent_ids)
+    return bindings
+
+
+def declare_topology(channel, agent_ids: Iterable[str] = ()) -> None:
+    """
+    Declara exchange, colas y bindings en un canal de RabbitMQ (idempotente).
+
+    Args:
+        channel: Canal bloqueante de pika.
+        agent_ids: Agentes nocturnos cuyas colas de tareas se declaran.
+    """
+    channel.exchange_declare(exchange=EXCHANGE, exchange_type=EXCHANGE_TYPE, durable=True)
+    if config.RABBITMQ_DEAD_LETTER_ENABLED:
+        channel.exchange_declare(exchange=DEAD_LETTER_EXCHANGE, exchange_type='topic', durable=True)
+        channel.queue_declare(queue=DEAD_LETTER_QUEUE, durable=True)
+        channel.queue_bind(exchange=DEAD_LETTER_EXCHANGE, queue=DEAD_LETTER_QUEUE, routing_key='#')
+    for queue, binding_keys, arguments in topology_bindings(agent_ids):
+        channel.queue_declare(queue=queue, durable=True, arguments=arguments)
+        for binding_key in binding_keys:
+            channel.queue_bind(exchange=EXCHANGE, queue=queue, routing_key=binding_key)
+
+
+def declare_inmemory_topology(broker, agent_ids: Iterable[str] = ()) -> None:
+    """Declara la topología en el broker en memoria (idempotente)."""
+    broker.declare_exchange(EXCHANGE, EXCHANGE_TYPE)
+    if config.RABBITMQ_DEAD_LETTER_ENABLED:
+        broker.declare_exchange(DEAD_LETTER_EXCHANGE, 'topic')
+        broker.declare_queue(DEAD_LETTER_QUEUE, durable=True)
+        broker.bind_queue(DEAD_LETTER_QUEUE, DEAD_LETTER_EXCHANGE, '#')
+    for queue, binding_keys, arguments in topology_bindings(agent_ids):
+        broker.declare_queue(queue, durable=True, arguments=arguments)
+        for binding_key in binding_keys:
+            broker.bind_queue(queue, EXCHANGE, binding_key)
+
+
+def bootstrap(agent_ids: Iterable[str] = (), mode: Optional[str] = None) -> bool:
+    """
+    Declara la topología en el broker configurado.
+
+    Args:
+        agent_ids: Agentes nocturnos cuyas colas de tareas se declaran.
+        mode: Modo de comunicación; por defecto ``config.COMMUNICATION_MODE``.
+
+    Returns:
+        bool: True si la topología quedó declarada.
+    """
+    mode = mode or config.COMMUNICATION_MODE
+    agent_ids = list(agent_ids)
+    if mode == CommunicationMode.INMEMORY:
+        from communication.inmemory.broker import get_broker
+        declare_inmemory_topology(get_broker(), agent_ids)
+    elif mode == CommunicationMode.RABBITMQ:
+        # Las claves de enrutamiento se usan en todos los modos; pika solo aquí
+        import pika
+        try:
+            connection = pika.BlockingConnection(pika.ConnectionParameters(
+                host=config.RABBITMQ_HOST,
+                port=config.RABBITMQ_PORT,
+                credentials=pika.PlainCredentials(config.RABBITMQ_USER, config.RABBITMQ_PASSWORD)
+            ))
+        except pika.exceptions.AMQPError as e:
+            logger.error(f"No se pudo declarar la topología en RabbitMQ: {e}")
+            return False
+        try:
+            declare_topology(connection.channel(), agent_ids)
+        finally:
+            connection.close()
+    else:
+        return False
+
+    logger.info(f"Topología declarada ({mode}): exchange {EXCHANGE}, {len(agent_ids)} colas de agente")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Declara la topología de colas del sistema")
+    parser.add_argument("--agents", type=int, default=config.NUM_NIGHT_AGENTS,
+                        help="Número de agentes nocturnos (AGENT001...)")
+    parser.add_argument("--mode", choices=CommunicationMode.BROKER_MODES, default=config.COMMUNICATION_MODE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL), format=config.LOG_FORMAT)
+    if not bootstrap(default_agent_ids(args.agents), args.mode):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
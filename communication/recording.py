@@ -0,0 +1,181 @@
+"""
+Grabación del tráfico de mensajes para reproducirlo después.
+
+``TrafficRecorder`` añade cada mensaje, con su clave de enrutamiento y el instante en
+que pasó (segundos desde el inicio de la grabación, según el reloj del proceso), a un
+registro de solo anexado en uno de dos formatos, elegido por la extensión:
+
+- ``.jsonl``: una línea JSON por mensaje, ``{"t": ..., "routing_key": ..., "message": {...}}``;
+  legible y fácil de editar o filtrar.
+- cualquier otra (p. ej. ``.rec``): binario compacto; tras la cabecera ``MAGIC``, cada
+  registro es ``RECORD_HEADER`` (instante, longitud de la clave, longitud del mensaje)
+  seguido de la clave y el JSON del mensaje en UTF-8.
+
+La grabación se engancha en la capa de publicación y consumo sin tocar los clientes:
+``RecordingPublisher`` envuelve a cualquier publicador o cliente directo y
+``recording_callback`` a la función que recibe los mensajes de un consumidor.
+``read_recording`` lee ambos formatos; ``simulation.replay`` reproduce una grabación
+contra el servidor central.
+"""
+
+import json
+import logging
+import struct
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+from common.clock import get_clock
+from common.message import (AlertMessage, Message, StatusMessage, create_message_from_dict,
+                            create_message_from_json)
+from communication.rabbitmq.topology import alert_routing_key, status_routing_key
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NOCTREC1"
+# Cabecera de cada registro binario: instante (s), longitud de la clave y del mensaje
+RECORD_HEADER = struct.Struct(">dHI")
+JSONL_SUFFIX = ".jsonl"
+
+# Registro leído: (instante, mensaje, clave de enrutamiento)
+Record = Tuple[float, Message, str]
+
+
+class TrafficRecorder:
+    """Registro de mensajes con marca de tiempo, seguro entre hilos."""
+
+    def __init__(self, path: str, clock=None):
+        """
+        Args:
+            path: Fichero de la grabación (se sobrescribe); ``.jsonl`` para el formato
+                de texto, cualquier otra extensión para el binario.
+            clock: Reloj con el que se fechan los mensajes; por defecto, el del proceso.
+        """
+        self.path = path
+        self.clock = clock or get_clock()
+        self.binary = not path.endswith(JSONL_SUFFIX)
+        self._file = open(path, "wb")
+        if self.binary:
+            self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._start = self.clock.monotonic()
+        self.records = 0
+
+    def record(self, message: Message, routing_key: str = "") -> None:
+        """Añade un mensaje a la grabación."""
+        t = self.clock.monotonic() - self._start
+        payload = message.to_json().encode("utf-8")
+        key = routing_key.encode("utf-8")
+        if self.binary:
+            data = RECORD_HEADER.pack(t, len(key), len(payload)) + key + payload
+        else:
+            # El mensaje ya es JSON: se inserta tal cual en lugar de decodificarlo
+            data = b'{"t": %r, "routing_key": %s, "message": %s}\n' % (
+                t, json.dumps(routing_key).encode("utf-8"), payload)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(data)
+            self.records += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                logger.info(f"Grabados {self.records} mensajes en {self.path}")
+
+
+class RecordingPublisher:
+    """
+    Publicador que graba cada mensaje que publica con éxito y delega el resto de la
+    interfaz en el publicador envuelto.
+    """
+
+    def __init__(self, publisher, recorder: TrafficRecorder):
+        self.publisher = publisher
+        self.recorder = recorder
+
+    def publish_message(self, message: Message, routing_key: str = '', **kwargs) -> bool:
+        success = self.publisher.publish_message(message, routing_key=routing_key, **kwargs)
+        if success:
+            self.recorder.record(message, routing_key)
+        return success
+
+    def __getattr__(self, name):
+        return getattr(self.publisher, name)
+
+
+def recording_callback(callback: Callable[[Message, str], None],
+                       recorder: Optional[TrafficRecorder]) -> Callable[[Message, str], None]:
+    """
+    Envuelve la función de un consumidor para grabar cada mensaje antes de procesarlo.
+
+    Sin ``recorder`` devuelve ``callback`` sin cambios.
+    """
+    if recorder is None:
+        return callback
+
+    def record_and_handle(message: Message, routing_key: str) -> None:
+        recorder.record(message, routing_key)
+        callback(message, routing_key)
+    return record_and_handle
+
+
+def _default_routing_key(message: Message) -> str:
+    if isinstance(message, AlertMessage):
+        return alert_routing_key(message.position)
+    if isinstance(message, StatusMessage):
+        return status_routing_key(message.sender_id)
+    return ""
+
+
+def _read_binary(f) -> Iterator[Record]:
+    while True:
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        t, key_length, payload_length = RECORD_HEADER.unpack(header)
+        data = f.read(key_length + payload_length)
+        if len(data) < key_length + payload_length:
+            logger.warning(f"Registro incompleto al final de {f.name}; se ignora")
+            return
+        message = create_message_from_json(data[key_length:].decode("utf-8"))
+        yield t, message, data[:key_length].decode("utf-8")
+
+
+def _read_jsonl(f) -> Iterator[Record]:
+    for number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+            # Se aceptan también líneas con un mensaje suelto (sin instante ni clave)
+            message = create_message_from_dict(data["message"] if "message" in data else data)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Línea {number} de {f.name} inválida, se omite: {e}")
+            continue
+        yield data.get("t", 0.0), message, data.get("routing_key") or _default_routing_key(message)
+
+
+def read_recording(path: str) -> Iterator[Record]:
+    """
+    Lee una grabación en cualquiera de los dos formatos (se detecta por su cabecera).
+
+    Yields:
+        tuple: (instante en segundos desde el inicio, mensaje, clave de enrutamiento).
+    """
+    with open(path, "rb") as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    if binary:
+        with open(path, "rb") as f:
+            f.seek(len(MAGIC))
+            yield from _read_binary(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _read_jsonl(f)
@@ -0,0 +1,22 @@
+"""
+Submódulo de comunicación basado en memoria compartida.
+
+Este submódulo proporciona un servidor y un cliente con la misma interfaz que los
+de sockets, que intercambian los mensajes a través de buffers circulares en
+``multiprocessing.shared_memory`` cuando todos los procesos corren en la misma
+máquina.
+"""
+
+import importlib
+
+# Importación diferida: el servidor no carga el cliente ni el cliente el servidor
+_LAZY = {
+    "ShmServer": "communication.shm.shm_server",
+    "ShmClient": "communication.shm.shm_client",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
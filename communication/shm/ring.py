@@ -0,0 +1,300 @@
+"""
+Buffers circulares en memoria compartida para el transporte ``shm``.
+
+Cada cliente tiene un segmento de ``multiprocessing.shared_memory`` con dos anillos
+de un solo productor y un solo consumidor (cliente → servidor y servidor → cliente).
+Los mensajes se escriben con el mismo formato de trama que el modo sockets
+(cabecera de 4 bytes con el tamaño y JSON UTF-8), sin pasar por el núcleo ni por
+un broker: el productor copia la trama en el anillo y avanza ``head``; el consumidor
+la lee y avanza ``tail``. Como no hay notificaciones entre procesos, el lado que
+espera sondea con una espera creciente (``IdleBackoff``).
+
+Diseño de los segmentos:
+
+- Registro ``<nombre>`` (lo crea el servidor): cabecera con ``MAGIC``, número de
+  huecos y tamaño de anillo, seguida de un byte por hueco (1 = cliente conectado).
+- Cliente ``<nombre>_<hueco>`` (lo crea el cliente): cabecera con el pid y la marca
+  de cierre, seguida del anillo de subida y el de bajada.
+"""
+
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+from communication.sockets.framing import HEADER, HEADER_SIZE, FrameTooLargeError
+
+MAGIC = 0x4E4F4354  # "NOCT"
+REGISTRY = struct.Struct('<III')  # magic, huecos, tamaño de cada anillo
+REGISTRY_SLOTS_OFFSET = 64
+CLIENT = struct.Struct('<IB')  # pid, cerrado
+CLIENT_HEADER_SIZE = 64
+
+_COUNTER = struct.Struct('<Q')
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = 64  # En otra línea de caché que head para no compartirla
+RING_CONTROL_SIZE = 128
+
+# Barrera de memoria: adquirir y liberar un cerrojo ordena las escrituras de la
+# trama respecto al contador que la publica (y las lecturas, en el consumidor)
+_fence = threading.Lock()
+
+
+def registry_size(slots: int) -> int:
+    """Tamaño del segmento de registro para ``slots`` clientes."""
+    return REGISTRY_SLOTS_OFFSET + slots
+
+
+def client_segment_size(ring_size: int) -> int:
+    """Tamaño del segmento de un cliente con dos anillos de ``ring_size`` bytes."""
+    return CLIENT_HEADER_SIZE + 2 * (RING_CONTROL_SIZE + ring_size)
+
+
+def client_segment_name(name: str, slot: int) -> str:
+    return f"{name}_{slot}"
+
+
+# Serializa la creación y apertura de segmentos (ver attach_segment)
+_segments_lock = threading.Lock()
+
+
+def create_segment(name: str, size: int) -> shared_memory.SharedMemory:
+    """
+    Crea un segmento nuevo; el ``resource_tracker`` lo elimina si el proceso muere
+    sin cerrarlo.
+
+    Raises:
+        FileExistsError: Si ya existe un segmento con ese nombre.
+    """
+    with _segments_lock:
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+
+def unlink_segment(segment: shared_memory.SharedMemory) -> None:
+    """Elimina un segmento creado con ``create_segment``."""
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """
+    Abre un segmento existente sin registrarlo en el ``resource_tracker``.
+
+    Así el proceso que solo se conecta no lo elimina al terminar; la limpieza
+    corresponde a quien lo creó.
+
+    Raises:
+        FileNotFoundError: Si el segmento no existe.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    # Antes de 3.13 abrir un segmento también lo registra. Anular el registro
+    # después no sirve si el tracker es compartido con su creador (procesos de
+    # multiprocessing): se perdería también el registro de este. Se evita registrarlo.
+    from multiprocessing import resource_tracker
+    with _segments_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class IdleBackoff:
+    """
+    Espera creciente para los bucles que sondean un anillo vacío.
+
+    Primero solo cede el procesador ``spins`` veces (latencia de microsegundos si
+    el otro lado responde enseguida) y después duerme intervalos que se duplican
+    hasta ``max_interval``.
+    """
+
+    def __init__(self, max_interval: float = 0.001, min_interval: float = 0.00005, spins: int = 100):
+        self.max_interval = max_interval
+        self.min_interval = min_interval
+        self.spins = spins
+        self._idle = 0
+        self._interval = min_interval
+
+    def reset(self) -> None:
+        self._idle = 0
+        self._interval = self.min_interval
+
+    def wait(self) -> None:
+        self._idle += 1
+        if self._idle <= self.spins:
+            time.sleep(0)
+            return
+        time.sleep(self._interval)
+        self._interval = min(self._interval * 2, self.max_interval)
+
+
+class ShmRing:
+    """
+    Anillo de un solo productor y un solo consumidor sobre memoria compartida.
+
+    ``head`` y ``tail`` son contadores de bytes que solo crecen; la posición en el
+    anillo es el contador módulo la capacidad. Cada lado escribe únicamente su
+    contador y guarda una copia local, así que solo lee el del otro.
+    """
+
+    def __init__(self, buf: memoryview, offset: int, capacity: int):
+        self.capacity = capacity
+        self._buf = buf
+        self._head_offset = offset + _HEAD_OFFSET
+        self._tail_offset = offset + _TAIL_OFFSET
+        self._data = buf[offset + RING_CONTROL_SIZE:offset + RING_CONTROL_SIZE + capacity]
+        self._head = self._load(self._head_offset)
+        self._tail = self._load(self._tail_offset)
+
+    def reset(self) -> None:
+        """Deja el anillo vacío (solo al crear el segmento)."""
+        self._head = self._tail = 0
+        _COUNTER.pack_into(self._buf, self._head_offset, 0)
+        _COUNTER.pack_into(self._buf, self._tail_offset, 0)
+
+    def release(self) -> None:
+        """Libera las vistas sobre el segmento para poder cerrarlo."""
+        self._data.release()
+
+    def _load(self, offset: int) -> int:
+        # Releer hasta obtener dos valores iguales descarta lecturas partidas del
+        # contador mientras el otro proceso lo actualiza
+        value = _COUNTER.unpack_from(self._buf, offset)[0]
+        while True:
+            again = _COUNTER.unpack_from(self._buf, offset)[0]
+            if again == value:
+                return value
+            value = again
+
+    def _put(self, position: int, data) -> None:
+        start = position % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._data[start:start + first] = data[:first]
+        if first < len(data):
+            self._data[:len(data) - first] = data[first:]
+
+    def _get(self, position: int, size: int) -> bytes:
+        start = position % self.capacity
+        end = start + size
+        if end <= self.capacity:
+            return bytes(self._data[start:end])
+        return bytes(self._data[start:]) + bytes(self._data[:end - self.capacity])
+
+    # ===== Productor =====
+
+    def free_space(self) -> int:
+        return self.capacity - (self._head - self._load(self._tail_offset))
+
+    def write(self, payloads: List[bytes]) -> int:
+        """
+        Escribe tantas tramas como quepan y las publica de una vez.
+
+        Returns:
+            int: Número de tramas escritas (desde el principio de ``payloads``).
+
+        Raises:
+            FrameTooLargeError: Si una trama no cabe ni con el anillo vacío.
+        """
+        free = self.free_space()
+        head = self._head
+        written = 0
+        for payload in payloads:
+            size = HEADER_SIZE + len(payload)
+            if size > self.capacity:
+                raise FrameTooLargeError(f"Mensaje de {len(payload)} bytes no cabe en un anillo de {self.capacity}")
+            if size > free:
+                break
+            self._put(head, HEADER.pack(len(payload)))
+            self._put(head + HEADER_SIZE, payload)
+            head += size
+            free -= size
+            written += 1
+        if written:
+            with _fence:
+                pass
+            self._head = head
+            _COUNTER.pack_into(self._buf, self._head_offset, head)
+        return written
+
+    def is_drained(self) -> bool:
+        """Indica si el consumidor ya ha leído todo lo escrito."""
+        return self._load(self._tail_offset) == self._head
+
+    # ===== Consumidor =====
+
+    def read(self, max_frames: int = 256) -> List[bytes]:
+        """
+        Lee las tramas disponibles (hasta ``max_frames``) y libera su espacio.
+
+        Returns:
+            List[bytes]: Cuerpos de las tramas leídas, en orden.
+        """
+        head = self._load(self._head_offset)
+        tail = self._tail
+        if head == tail:
+            return []
+        with _fence:
+            pass
+        payloads = []
+        while tail < head and len(payloads) < max_frames:
+            (length,) = HEADER.unpack(self._get(tail, HEADER_SIZE))
+            payloads.append(self._get(tail + HEADER_SIZE, length))
+            tail += HEADER_SIZE + length
+        self._tail = tail
+        _COUNTER.pack_into(self._buf, self._tail_offset, tail)
+        return payloads
+
+
+class ClientSegment:
+    """Vista de un segmento de cliente: cabecera y los dos anillos."""
+
+    def __init__(self, segment: shared_memory.SharedMemory, ring_size: int):
+        self.segment = segment
+        buf = segment.buf
+        self.up = ShmRing(buf, CLIENT_HEADER_SIZE, ring_size)  # cliente → servidor
+        self.down = ShmRing(buf, CLIENT_HEADER_SIZE + RING_CONTROL_SIZE + ring_size, ring_size)
+
+    def initialize(self, pid: int) -> None:
+        self.up.reset()
+        self.down.reset()
+        CLIENT.pack_into(self.segment.buf, 0, pid, 0)
+
+    @property
+    def pid(self) -> int:
+        return CLIENT.unpack_from(self.segment.buf, 0)[0]
+
+    @property
+    def closed(self) -> bool:
+        return bool(CLIENT.unpack_from(self.segment.buf, 0)[1])
+
+    def mark_closed(self) -> None:
+        CLIENT.pack_into(self.segment.buf, 0, self.pid, 1)
+
+    def close(self, unlink: bool = False) -> None:
+        """Cierra el segmento y, si ``unlink`` (solo su creador), lo elimina."""
+        self.up.release()
+        self.down.release()
+        try:
+            self.segment.close()
+        except BufferError:
+            pass  # Queda alguna vista viva; el sistema lo libera al terminar el proceso
+        if unlink:
+            unlink_segment(self.segment)
+
+
+def read_registry(segment: shared_memory.SharedMemory) -> Optional[tuple]:
+    """
+    Returns:
+        tuple: (huecos, tamaño de anillo) o None si el servidor ya no está activo.
+    """
+    magic, slots, ring_size = REGISTRY.unpack_from(segment.buf, 0)
+    if magic != MAGIC:
+        return None
+    return slots, ring_size
@@ -0,0 +1,282 @@
+"""
+Cliente del transporte en memoria compartida (modo ``shm``).
+
+Ofrece la misma interfaz que SocketClient (``send_message``, ``publish_message``,
+``message_handler``, ``receive_message``...) para que espías y agentes lo usen
+igual. Al conectarse ocupa un hueco libre del registro del servidor creando su
+segmento con dos anillos; los envíos se copian en el anillo de subida y un hilo
+sondea el de bajada.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Optional
+
+from common.message import Message
+from communication.shm.ring import (
+    REGISTRY_SLOTS_OFFSET, ClientSegment, IdleBackoff, attach_segment, client_segment_name,
+    client_segment_size, create_segment, read_registry
+)
+from communication.sockets.framing import DEFAULT_MAX_MESSAGE_SIZE, FrameTooLargeError, decode_payload, encode_payload
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto comprueba el hilo lector que el servidor sigue activo (s)
+SERVER_CHECK_INTERVAL = 0.5
+
+
+class ShmClient:
+    """
+    Cliente de memoria compartida para la comunicación con el servidor central.
+
+    Si se indica ``message_handler``, los mensajes del servidor se pasan al
+    manejador con el JSON de cada uno; si no, se obtienen con ``receive_message``.
+    El anillo no pierde mensajes mientras ambos procesos vivan, así que no hay
+    confirmaciones: un envío se da por entregado al copiarlo en el anillo.
+    """
+
+    def __init__(self, name: str = "agente_nocturno", message_handler=None,
+                 max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE, send_timeout: float = 5.0,
+                 poll_interval: float = 0.001):
+        """
+        Args:
+            name: Nombre del registro del servidor.
+            message_handler: Función que recibe el JSON de cada mensaje del servidor.
+            max_message_size: Tamaño máximo permitido para los mensajes (en bytes).
+            send_timeout: Espera máxima a que haya hueco en el anillo de subida.
+            poll_interval: Espera máxima entre sondeos cuando no hay mensajes.
+        """
+        self.name = name
+        self.message_handler = message_handler
+        self.max_message_size = max_message_size
+        self.send_timeout = send_timeout
+        self.poll_interval = poll_interval
+        self.endpoint = f"shm:{name}"
+
+        self.slot: Optional[int] = None
+        self._registry: Optional[shared_memory.SharedMemory] = None
+        self._segment: Optional[ClientSegment] = None
+        self._send_lock = threading.Lock()  # Un solo productor por anillo de subida
+        self._inbox: "queue.Queue[Optional[Message]]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._reader_thread: Optional[threading.Thread] = None
+
+    # ===== Conexión =====
+
+    def connect(self) -> bool:
+        """
+        Ocupa un hueco en el registro del servidor y arranca el hilo lector.
+
+        Returns:
+            bool: True si la conexión fue exitosa, False en caso contrario.
+        """
+        try:
+            registry = attach_segment(self.name)
+        except FileNotFoundError:
+            logger.error(f"Error al conectar con el servidor: no hay servidor en {self.endpoint}")
+            return False
+        settings = read_registry(registry)
+        if settings is None:
+            registry.close()
+            logger.error(f"Error al conectar con el servidor: el servidor de {self.endpoint} se ha detenido")
+            return False
+        slots, ring_size = settings
+
+        # Crear el segmento es atómico: si ya existe, el hueco está ocupado
+        for slot in range(slots):
+            try:
+                segment = create_segment(client_segment_name(self.name, slot), client_segment_size(ring_size))
+            except FileExistsError:
+                continue
+            self._segment = ClientSegment(segment, ring_size)
+            self._segment.initialize(os.getpid())
+            self.slot = slot
+            break
+        else:
+            registry.close()
+            logger.error(f"Error al conectar con el servidor: no quedan huecos libres en {self.endpoint}")
+            return False
+
+        self._registry = registry
+        registry.buf[REGISTRY_SLOTS_OFFSET + self.slot] = 1  # Anunciarse al servidor
+        self._stop_event.clear()
+        self._reader_thread = threading.Thread(target=self._read_loop, daemon=True,
+                                               name=f"ShmClient-Reader-{self.name}-{self.slot}")
+        self._reader_thread.start()
+        logger.info(f"Conectado al servidor en {self.endpoint} (hueco {self.slot})")
+        return True
+
+    def is_connected(self) -> bool:
+        """Indica si hay una conexión activa con el servidor."""
+        return self._segment is not None and not self._stop_event.is_set()
+
+    def _server_alive(self) -> bool:
+        registry = self._registry
+        return registry is not None and read_registry(registry) is not None
+
+    # ===== Envío =====
+
+    def send_message(self, message) -> bool:
+        """
+        Copia un mensaje en el anillo de subida.
+
+        Si el anillo está lleno espera hasta ``send_timeout`` a que el servidor lo vacíe.
+
+        Returns:
+            bool: True si el mensaje se escribió en el anillo.
+        """
+        if not self.is_connected():
+            logger.error("No hay conexión establecida con el servidor")
+            return False
+        payload = encode_payload(message)
+        if len(payload) > self.max_message_size:
+            logger.error(f"Mensaje de {len(payload)} bytes excede el máximo ({self.max_message_size})")
+            return False
+
+        backoff = IdleBackoff(self.poll_interval)
+        deadline = time.monotonic() + self.send_timeout
+        with self._send_lock:
+            segment = self._segment
+            if segment is None:
+                logger.error("No hay conexión establecida con el servidor")
+                return False
+            while True:
+                try:
+                    if segment.up.write([payload]):
+                        break
+                except FrameTooLargeError as e:
+                    logger.error(f"Error al enviar mensaje: {e}")
+                    return False
+                if time.monotonic() >= deadline or not self._server_alive():
+                    logger.error("Error al enviar mensaje: el servidor no vacía el anillo")
+                    return False
+                backoff.wait()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Mensaje enviado: {message}")
+        return True
+
+    def send_message_async(self, message: Message) -> Future:
+        """
+        Equivalente a ``SocketClient.send_message_async``: el Future se resuelve con
+        None cuando el mensaje está en el anillo.
+        """
+        future: Future = Future()
+        if self.send_message(message):
+            future.set_result(None)
+        else:
+            future.set_exception(ConnectionError("No se pudo escribir el mensaje en el anillo"))
+        return future
+
+    def publish_message(self, message, routing_key: str = '') -> bool:
+        """
+        Interfaz compatible con los publicadores de los brokers.
+
+        El servidor enruta por el contenido del mensaje, así que ``routing_key`` se ignora.
+        """
+        return self.send_message(message)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que el servidor haya leído todo lo enviado.
+
+        Returns:
+            bool: True si el anillo de subida quedó vacío.
+        """
+        if self._segment is None:
+            return True
+        backoff = IdleBackoff(self.poll_interval)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._segment.up.is_drained():
+            if (deadline is not None and time.monotonic() >= deadline) or not self._server_alive():
+                return False
+            backoff.wait()
+        return True
+
+    # ===== Recepción =====
+
+    def _read_loop(self) -> None:
+        """Sondea el anillo de bajada y entrega los mensajes del servidor."""
+        backoff = IdleBackoff(self.poll_interval)
+        next_check = time.monotonic() + SERVER_CHECK_INTERVAL
+        while not self._stop_event.is_set():
+            payloads = self._segment.down.read()
+            for payload in payloads:
+                try:
+                    message = decode_payload(payload)
+                except (UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+                    logger.error(f"Error al recibir mensaje: {e}")
+                    continue
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Mensaje recibido: {message}")
+                if self.message_handler:
+                    try:
+                        self.message_handler(message.to_json())
+                    except Exception as e:
+                        logger.error(f"Error en el manejador de mensajes: {e}")
+                else:
+                    self._inbox.put(message)
+
+            if payloads:
+                backoff.reset()
+                continue
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + SERVER_CHECK_INTERVAL
+                if not self._server_alive():
+                    logger.warning(f"El servidor de {self.endpoint} se ha detenido")
+                    self._stop_event.set()
+                    self._inbox.put(None)
+                    return
+            backoff.wait()
+
+    def receive_message(self, timeout: Optional[float] = None):
+        """
+        Recibe un mensaje del servidor (si no hay ``message_handler``).
+
+        Returns:
+            Message: El mensaje recibido o None si venció la espera o se cerró el cliente.
+        """
+        try:
+            return self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    # ===== Cierre =====
+
+    def close(self, flush_timeout: float = 2.0) -> None:
+        """
+        Libera el hueco del registro y elimina el segmento del cliente.
+
+        Espera hasta ``flush_timeout`` segundos a que el servidor lea lo enviado.
+        """
+        if self._segment is None:
+            return
+        if flush_timeout:
+            self.flush(flush_timeout)
+        self._stop_event.set()
+        if self._reader_thread and self._reader_thread is not threading.current_thread():
+            self._reader_thread.join(timeout=2.0)
+        self._inbox.put(None)  # Desbloquea receive_message
+
+        segment, self._segment = self._segment, None
+        with self._send_lock:
+            segment.mark_closed()
+            if self._server_alive():
+                self._registry.buf[REGISTRY_SLOTS_OFFSET + self.slot] = 0
+            segment.close(unlink=True)
+        registry, self._registry = self._registry, None
+        registry.close()
+        logger.info("Conexión cerrada")
+
+    def __enter__(self):
+        """Permite usar el cliente con el contexto 'with'."""
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Cierra la conexión al salir del contexto 'with'."""
+        self.close()
@@ -0,0 +1,343 @@
+"""
+Servidor del transporte en memoria compartida (modo ``shm``).
+
+Ofrece la misma interfaz que SocketServer (``message_callback``, ``publish_message``,
+``send_to_client``, ``broadcast_message``...) para que el servidor central lo use
+igual, pero los mensajes no pasan por el núcleo: cada cliente crea un segmento con
+dos anillos y lo anuncia en el registro del servidor, y un único hilo recorre los
+anillos de subida de todos los clientes. Solo sirve cuando todos los procesos
+corren en la misma máquina (como con ``run_simulation.py``).
+"""
+
+import logging
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from common.message import Message
+from communication.shm.ring import (
+    MAGIC, REGISTRY, REGISTRY_SLOTS_OFFSET, ClientSegment, IdleBackoff, attach_segment,
+    client_segment_name, create_segment, registry_size, unlink_segment
+)
+from communication.sockets.framing import DEFAULT_MAX_MESSAGE_SIZE, FrameTooLargeError, decode_payload, encode_payload
+
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+# Cada cuánto se revisan los huecos del registro y si siguen vivos los clientes (s)
+SCAN_INTERVAL = 0.05
+LIVENESS_INTERVAL = 1.0
+
+
+class _ShmConnection:
+    """Cliente conectado: su segmento y el cerrojo de su anillo de bajada."""
+
+    __slots__ = ('slot', 'address', 'segment', 'lock', 'client_ids')
+
+    def __init__(self, slot: int, segment: ClientSegment):
+        self.slot = slot
+        self.address: Address = ("shm", slot)
+        self.segment = segment
+        self.lock = threading.Lock()  # Un solo productor por anillo de bajada
+        self.client_ids: Set[str] = set()  # sender_id recibidos (un host multiplexa varios)
+
+
+class ShmServer:
+    """Servidor de mensajes sobre anillos en memoria compartida."""
+
+    def __init__(self, name: str = "agente_nocturno",
+                 message_callback: Optional[Callable[[Message, Address], None]] = None,
+                 max_clients: int = 256, ring_size: int = 1048576,
+                 max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE, poll_interval: float = 0.001):
+        """
+        Args:
+            name: Nombre del segmento de registro; los clientes lo usan para conectarse.
+            message_callback: Función a llamar cuando se recibe un mensaje. Se ejecuta
+                en el hilo del servidor, así que debe ser rápida.
+            max_clients: Número máximo de clientes a la vez.
+            ring_size: Bytes de cada anillo (uno por sentido y cliente).
+            max_message_size: Tamaño máximo permitido para los mensajes (en bytes).
+            poll_interval: Espera máxima entre sondeos cuando no hay mensajes.
+        """
+        self.name = name
+        self.message_callback = message_callback
+        self.max_clients = max_clients
+        self.ring_size = max(ring_size, max_message_size + 4)
+        self.max_message_size = max_message_size
+        self.poll_interval = poll_interval
+        self.endpoint = f"shm:{name}"
+
+        self.running = False
+        self.loop_thread: Optional[threading.Thread] = None
+        self._registry: Optional[shared_memory.SharedMemory] = None
+        self._lock = threading.Lock()  # Protege las conexiones
+        self._connections: Dict[int, _ShmConnection] = {}
+        self._clients_by_id: Dict[str, _ShmConnection] = {}
+
+        # Métricas
+        self.connected_clients = 0
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.dropped_messages = 0
+
+    def start(self) -> bool:
+        """
+        Crea el registro e inicia el hilo que atiende a los clientes.
+
+        Returns:
+            bool: True si el servidor se inició correctamente, False en caso contrario.
+        """
+        try:
+            try:
+                # Registro de una ejecución anterior que no se cerró bien
+                stale = shared_memory.SharedMemory(name=self.name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self._registry = create_segment(self.name, registry_size(self.max_clients))
+            self._registry.buf[REGISTRY_SLOTS_OFFSET:REGISTRY_SLOTS_OFFSET + self.max_clients] = \
+                bytes(self.max_clients)
+            REGISTRY.pack_into(self._registry.buf, 0, MAGIC, self.max_clients, self.ring_size)
+        except OSError as e:
+            logger.error(f"Error al iniciar el servidor: {e}")
+            return False
+
+        self.running = True
+        self.loop_thread = threading.Thread(target=self._run, daemon=True, name=f"ShmServer-{self.name}")
+        self.loop_thread.start()
+        logger.info(f"Servidor iniciado en {self.endpoint}")
+        return True
+
+    # ===== Bucle de sondeo =====
+
+    def _run(self) -> None:
+        """Lee los anillos de subida de todos los clientes hasta que se detiene el servidor."""
+        backoff = IdleBackoff(self.poll_interval)
+        next_scan = next_liveness = 0.0
+        while self.running:
+            now = time.monotonic()
+            if now >= next_scan:
+                self._scan_registry()
+                next_scan = now + SCAN_INTERVAL
+            if now >= next_liveness:
+                self._check_liveness()
+                next_liveness = now + LIVENESS_INTERVAL
+
+            with self._lock:
+                connections = list(self._connections.values())
+            received = 0
+            for connection in connections:
+                received += self._read(connection)
+            if received:
+                backoff.reset()
+            else:
+                backoff.wait()
+
+        with self._lock:
+            connections = list(self._connections.values())
+        for connection in connections:
+            self._close_connection(connection)
+
+    def _scan_registry(self) -> None:
+        slots = self._registry.buf[REGISTRY_SLOTS_OFFSET:REGISTRY_SLOTS_OFFSET + self.max_clients]
+        try:
+            announced = [slot for slot, state in enumerate(slots) if state and slot not in self._connections]
+        finally:
+            slots.release()
+        for slot in announced:
+            try:
+                segment = ClientSegment(attach_segment(client_segment_name(self.name, slot)), self.ring_size)
+            except FileNotFoundError:
+                continue  # El cliente se fue antes de que lo viéramos
+            connection = _ShmConnection(slot, segment)
+            with self._lock:
+                self._connections[slot] = connection
+                self.connected_clients = len(self._connections)
+            logger.info(f"Cliente conectado en el hueco {slot} (pid {segment.pid}). "
+                        f"Total clientes conectados: {self.connected_clients}")
+
+    def _check_liveness(self) -> None:
+        """Descarta los clientes cuyo proceso terminó sin cerrar su segmento."""
+        if os.name != "posix":
+            return
+        with self._lock:
+            connections = list(self._connections.values())
+        for connection in connections:
+            try:
+                os.kill(connection.segment.pid, 0)
+            except ProcessLookupError:
+                logger.warning(f"El cliente del hueco {connection.slot} terminó sin desconectarse")
+                self._close_connection(connection, free_slot=True)
+            except PermissionError:
+                pass  # Existe, pero es de otro usuario
+
+    def _read(self, connection: _ShmConnection) -> int:
+        segment = connection.segment
+        # La marca de cierre se lee antes que el anillo: si ya estaba puesta, lo que
+        # el cliente escribió antes de cerrar está en esta lectura
+        closed = segment.closed
+        payloads = segment.up.read()
+        for payload in payloads:
+            self.bytes_received += len(payload)
+            try:
+                message = decode_payload(payload)
+            except (UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+                logger.error(f"Error al deserializar mensaje del hueco {connection.slot}: {e}")
+                continue
+
+            self.messages_received += 1
+            sender_id = getattr(message, 'sender_id', None)
+            if sender_id and sender_id not in connection.client_ids:
+                with self._lock:
+                    connection.client_ids.add(sender_id)
+                    self._clients_by_id[sender_id] = connection
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Mensaje recibido del hueco {connection.slot}: {message}")
+
+            if self.message_callback:
+                try:
+                    self.message_callback(message, connection.address)
+                except Exception as e:
+                    logger.error(f"Error en el callback de mensajes: {e}")
+
+        if not payloads and closed:
+            logger.info(f"Cliente del hueco {connection.slot} desconectado")
+            self._close_connection(connection)
+        return len(payloads)
+
+    def _close_connection(self, connection: _ShmConnection, free_slot: bool = False) -> None:
+        """
+        Args:
+            connection: Conexión a cerrar.
+            free_slot: Liberar el hueco en el registro (si el cliente no pudo hacerlo).
+                Un cliente que cierra bien lo libera él mismo, y otro podría haberlo
+                ocupado ya.
+        """
+        with self._lock:
+            if self._connections.get(connection.slot) is not connection:
+                return
+            del self._connections[connection.slot]
+            for client_id in connection.client_ids:
+                if self._clients_by_id.get(client_id) is connection:
+                    del self._clients_by_id[client_id]
+            self.connected_clients = len(self._connections)
+            if free_slot and self._registry is not None:
+                self._registry.buf[REGISTRY_SLOTS_OFFSET + connection.slot] = 0
+        with connection.lock:
+            # El segmento es del cliente: solo se cierra, lo elimina quien lo creó
+            connection.segment.close()
+
+    # ===== Envío (seguro entre hilos) =====
+
+    def _send(self, connections: List[_ShmConnection], message: Message) -> int:
+        payload = encode_payload(message)
+        if len(payload) > self.max_message_size:
+            raise FrameTooLargeError(f"Mensaje de {len(payload)} bytes excede el máximo ({self.max_message_size})")
+        sent = 0
+        for connection in connections:
+            with connection.lock:
+                if self._connections.get(connection.slot) is not connection:
+                    continue
+                if connection.segment.down.write([payload]):
+                    sent += 1
+                    continue
+            # Sin hueco en el anillo: el cliente no lee; se descarta el mensaje
+            logger.warning(f"Anillo del cliente del hueco {connection.slot} lleno, mensaje descartado")
+            self.dropped_messages += 1
+        self.messages_sent += sent
+        self.bytes_sent += sent * len(payload)
+        return sent
+
+    def broadcast_message(self, message: Message) -> int:
+        """
+        Envía un mensaje a todos los clientes conectados.
+
+        Returns:
+            int: Número de clientes a los que se entregó el mensaje.
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+        return self._send(connections, message)
+
+    def send_message_to(self, address: Address, message: Message) -> bool:
+        """Envía un mensaje al cliente de la dirección ``("shm", hueco)``."""
+        with self._lock:
+            connection = self._connections.get(address[1])
+        return connection is not None and self._send([connection], message) == 1
+
+    def send_to_client(self, client_id: str, message: Message) -> bool:
+        """
+        Envía un mensaje al cliente identificado por ``client_id`` (su ``sender_id``).
+
+        Returns:
+            bool: True si el mensaje se escribió en el anillo del cliente.
+        """
+        with self._lock:
+            connection = self._clients_by_id.get(client_id)
+        return connection is not None and self._send([connection], message) == 1
+
+    def publish_message(self, message: Message, routing_key: str = '') -> bool:
+        """
+        Interfaz compatible con los publicadores de los brokers.
+
+        Los mensajes con ``target_agent_id`` (tareas) se envían solo a ese agente;
+        el resto se difunde a todos los clientes. ``routing_key`` se ignora.
+        """
+        target = getattr(message, 'target_agent_id', None)
+        if target:
+            return self.send_to_client(target, message)
+        return self.broadcast_message(message) > 0
+
+    # ===== Consulta y parada =====
+
+    def get_connected_clients(self) -> List[Address]:
+        with self._lock:
+            return [connection.address for connection in self._connections.values()]
+
+    def get_client_ids(self) -> List[str]:
+        """IDs (sender_id) de los clientes que ya se han identificado."""
+        with self._lock:
+            return list(self._clients_by_id.keys())
+
+    def stop(self) -> None:
+        """Detiene el servidor, avisa a los clientes y elimina el registro."""
+        if not self.running:
+            return
+        self.running = False
+        if self.loop_thread and self.loop_thread is not threading.current_thread():
+            self.loop_thread.join(timeout=5.0)
+        if self._registry is not None:
+            REGISTRY.pack_into(self._registry.buf, 0, 0, 0, 0)  # Los clientes ven que se ha ido
+            registry, self._registry = self._registry, None
+            registry.close()
+            unlink_segment(registry)
+        logger.info("Servidor detenido")
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        Devuelve las métricas del servidor.
+
+        Returns:
+            dict: Diccionario con las métricas del servidor.
+        """
+        return {
+            "connected_clients": self.connected_clients,
+            "messages_received": self.messages_received,
+            "messages_sent": self.messages_sent,
+            "bytes_received": self.bytes_received,
+            "bytes_sent": self.bytes_sent,
+            "dropped_messages": self.dropped_messages
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
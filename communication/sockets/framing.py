@@ -0,0 +1,184 @@
+"""
+Formato de trama del modo sockets.
+
+Cada mensaje viaja como una cabecera de 4 bytes (tamaño del cuerpo, big-endian)
+seguida del mensaje serializado en JSON UTF-8, el mismo formato que usan los
+brokers. A diferencia de pickle, decodificar una trama de un cliente no ejecuta
+código arbitrario.
+
+La lectura usa un buffer reutilizable en el que se recibe con ``recv_into`` y del
+que se extraen las tramas como vistas (``memoryview``) sin copiarlas; la escritura
+envía cabecera y cuerpo con una sola llamada ``sendmsg`` sin concatenarlos.
+"""
+
+import socket
+import struct
+from typing import List, Optional, Tuple
+
+from common.message import Message, create_message_from_json
+
+HEADER = struct.Struct('>I')
+HEADER_SIZE = HEADER.size
+DEFAULT_MAX_MESSAGE_SIZE = 1048576
+HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')  # No disponible en Windows
+
+
+class FrameTooLargeError(ValueError):
+    """La cabecera anuncia un mensaje mayor que el máximo permitido."""
+
+
+def encode_payload(message: Message) -> bytes:
+    """Serializa un mensaje como cuerpo de trama (JSON UTF-8)."""
+    return message.to_json().encode("utf-8")
+
+
+def frame_parts(message: Message) -> Tuple[bytes, bytes]:
+    """Cabecera y cuerpo de la trama de un mensaje, por separado."""
+    payload = encode_payload(message)
+    return HEADER.pack(len(payload)), payload
+
+
+def encode_frame(message: Message) -> bytes:
+    """Serializa un mensaje como trama (cabecera + JSON) en un único bloque."""
+    header, payload = frame_parts(message)
+    return header + payload
+
+
+def decode_payload(payload) -> Message:
+    """
+    Reconstruye el mensaje contenido en el cuerpo de una trama.
+
+    Args:
+        payload: Cuerpo de la trama (bytes o memoryview).
+
+    Raises:
+        ValueError: Si el cuerpo no es un mensaje JSON válido.
+    """
+    return create_message_from_json(str(payload, "utf-8"))
+
+
+def send_frame(sock: socket.socket, header: bytes, payload: bytes) -> None:
+    """
+    Envía una trama completa por un socket bloqueante.
+
+    Cabecera y cuerpo se entregan juntos al núcleo con ``sendmsg`` (scatter-gather),
+    sin copiarlos a un buffer intermedio; si el envío es parcial se completa con
+    ``sendall`` sobre el resto.
+    """
+    if not HAS_SENDMSG:
+        sock.sendall(header + payload)
+        return
+    sent = sock.sendmsg([header, payload])
+    if sent < len(header):
+        sock.sendall(memoryview(header)[sent:])
+        sent = len(header)
+    if sent < len(header) + len(payload):
+        sock.sendall(memoryview(payload)[sent - len(header):])
+
+
+class FrameBuffer:
+    """
+    Buffer de recepción reutilizable que separa las tramas de un flujo de bytes.
+
+    Los datos se reciben directamente en el buffer (``recv_into``) y las tramas se
+    devuelven como vistas sobre él. Una vista solo es válida hasta la siguiente
+    recepción, que puede compactar o sustituir el buffer: hay que decodificarla
+    (o copiarla) antes.
+    """
+
+    def __init__(self, max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE, initial_size: int = 65536):
+        self.max_message_size = max_message_size
+        self._buffer = bytearray(max(initial_size, HEADER_SIZE))
+        self._view = memoryview(self._buffer)
+        self._start = 0  # Inicio de los datos pendientes de extraer
+        self._end = 0  # Fin de los datos recibidos
+
+    @property
+    def pending(self) -> int:
+        """Bytes recibidos que aún no forman una trama completa."""
+        return self._end - self._start
+
+    def _reserve(self) -> None:
+        """Garantiza hueco libre al final: compacta o amplía el buffer si hace falta."""
+        size = len(self._buffer)
+        if self._end < size:
+            return
+        pending = self._end - self._start
+        needed = HEADER_SIZE
+        if pending >= HEADER_SIZE:
+            (length,) = HEADER.unpack_from(self._buffer, self._start)
+            if length > self.max_message_size:
+                raise FrameTooLargeError(f"Mensaje de {length} bytes excede el máximo ({self.max_message_size})")
+            needed = HEADER_SIZE + length
+        if needed <= size and self._start:
+            # Compactar: mover lo pendiente al principio
+            self._view[:pending] = self._view[self._start:self._end]
+        else:
+            # La trama en curso no cabe: buffer nuevo (las vistas ya entregadas
+            # siguen apuntando al anterior)
+            new_buffer = bytearray(max(size * 2, needed))
+            new_buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = new_buffer
+            self._view = memoryview(new_buffer)
+        self._start, self._end = 0, pending
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """
+        Recibe del socket directamente en el hueco libre del buffer.
+
+        Returns:
+            int: Bytes recibidos (0 si el otro extremo cerró la conexión).
+
+        Raises:
+            BlockingIOError: Si el socket no bloqueante no tiene datos.
+            FrameTooLargeError: Si la trama pendiente supera ``max_message_size``.
+        """
+        if self._start == self._end:
+            self._start = self._end = 0
+        self._reserve()
+        received = sock.recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def feed(self, data: bytes) -> None:
+        """Añade bytes recibidos por otra vía (p. ej. en pruebas o benchmarks)."""
+        view = memoryview(data)
+        while view:
+            if self._start == self._end:
+                self._start = self._end = 0
+            self._reserve()
+            count = min(len(view), len(self._buffer) - self._end)
+            self._view[self._end:self._end + count] = view[:count]
+            self._end += count
+            view = view[count:]
+
+    def next_frame(self) -> Optional[memoryview]:
+        """
+        Extrae el cuerpo de la siguiente trama completa.
+
+        Returns:
+            memoryview o None si todavía no hay una trama completa.
+
+        Raises:
+            FrameTooLargeError: Si la cabecera supera ``max_message_size``.
+        """
+        if self._end - self._start < HEADER_SIZE:
+            return None
+        (length,) = HEADER.unpack_from(self._buffer, self._start)
+        if length > self.max_message_size:
+            raise FrameTooLargeError(f"Mensaje de {length} bytes excede el máximo ({self.max_message_size})")
+        begin = self._start + HEADER_SIZE
+        end = begin + length
+        if end > self._end:
+            return None
+        self._start = end
+        return self._view[begin:end]
+
+    def frames(self) -> List[memoryview]:
+        """Extrae todas las tramas completas disponibles."""
+        frames = []
+        frame = self.next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self.next_frame()
+        return frames
@@ -2,153 +2,419 @@
 Implementación del cliente de sockets para el sistema de agentes encubiertos.
 
 Este módulo proporciona la clase SocketClient que permite a los agentes
-establecer conexiones con el servidor central usando sockets TCP/IP.
+establecer conexiones con el servidor central usando sockets TCP/IP o sockets
+de dominio Unix (``unix_path``) cuando todo corre en la misma máquina.
+
+El cliente no espera a una respuesta por cada mensaje: los envíos se encolan y un
+hilo escritor los vuelca agrupando las tramas pendientes en una sola llamada
+``sendmsg``; un hilo lector recibe las confirmaciones (``AcknowledgementMessage``)
+y resuelve el ``Future`` de cada envío por su ``received_message_id``. Así se pueden
+tener muchos mensajes en vuelo sobre una única conexión. Si la conexión se pierde,
+se reconecta en segundo plano con espera exponencial y se reenvían los mensajes
+sin confirmar.
 """
 
 import socket
 import json
 import logging
-import pickle
+import queue
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
-#from common.message import Message
+from common.message import AcknowledgementMessage, Message
+from communication.rabbitmq.reconnect import ReconnectSupervisor
+from communication.sockets.framing import (
+    HAS_SENDMSG, FrameBuffer, FrameTooLargeError, decode_payload, frame_parts
+)
 
 logger = logging.getLogger(__name__)
 
+# Máximo de tramas que el escritor agrupa en una sola llamada a sendmsg
+MAX_WRITE_BATCH = 64
+
+
+class _Pending:
+    """Mensaje enviado pendiente de confirmación."""
+
+    __slots__ = ('frame', 'future')
+
+    def __init__(self, frame: Tuple[bytes, bytes], future: Future):
+        self.frame = frame
+        self.future = future
+
+
 class SocketClient:
-    """Cliente de sockets para la comunicación con el servidor central."""
+    """
+    Cliente de sockets para la comunicación con el servidor central.
+
+    Si se indica ``message_handler``, los mensajes del servidor (salvo las
+    confirmaciones) se pasan al manejador con el JSON de cada uno; si no, se
+    obtienen con ``receive_message``.
+    """
 
-    def __init__(self, host='localhost', port=5000, buffer_size=4096, message_handler=None, max_message_size: int = 1048576):
+    def __init__(self, host='localhost', port=5000, buffer_size=4096, message_handler=None,
+                 max_message_size: int = 1048576, expect_acks: bool = True,
+                 max_in_flight: int = 1024, ack_timeout: float = 30.0,
+                 reconnect_initial_delay: float = 0.5, reconnect_max_delay: float = 30.0,
+                 unix_path: Optional[str] = None):
+        """
+        Args:
+            host: Host del servidor.
+            port: Puerto del servidor.
+            buffer_size: Tamaño inicial del buffer de recepción.
+            message_handler: Función que recibe el JSON de cada mensaje del servidor.
+            max_message_size: Tamaño máximo permitido para los mensajes (en bytes).
+            expect_acks: Si el servidor confirma cada mensaje. Sin confirmaciones, el
+                Future de un envío se resuelve cuando la trama se escribe en el socket.
+            max_in_flight: Máximo de mensajes enviados sin confirmar; al llegar al
+                límite, ``send_message`` espera hueco.
+            ack_timeout: Espera máxima por hueco en la ventana de mensajes en vuelo.
+            reconnect_initial_delay: Espera antes del primer intento de reconexión.
+            reconnect_max_delay: Espera máxima entre intentos de reconexión.
+            unix_path: Ruta del socket de dominio Unix del servidor; si se indica,
+                se usa en lugar de ``host:port``.
+        """
         self.host = host
         self.port = port
         self.buffer_size = buffer_size
         self.message_handler = message_handler
         self.max_message_size = max_message_size
+        self.expect_acks = expect_acks
+        self.max_in_flight = max_in_flight
+        self.ack_timeout = ack_timeout
+        self.unix_path = unix_path
+        self.endpoint = f"unix:{unix_path}" if unix_path else f"{host}:{port}"
         self.client_socket = None
 
+        self._lock = threading.Condition()  # Protege socket, colas y pendientes
+        self._outbox: Deque[Tuple[Tuple[bytes, bytes], Optional[str]]] = deque()
+        self._pending: "OrderedDict[str, _Pending]" = OrderedDict()  # message_id -> pendiente
+        self._window = threading.BoundedSemaphore(max_in_flight)
+        self._inbox: "queue.Queue[Optional[Message]]" = queue.Queue()
+        self._closed = False
+        self._writer_thread = None
+        self._reader_thread = None
+
+        self.acked_count = 0
+        self.nacked_count = 0
+
+        self._supervisor = ReconnectSupervisor(
+            self._reconnect_once,
+            name=f"SocketClient-{self.endpoint}",
+            initial_delay=reconnect_initial_delay,
+            max_delay=reconnect_max_delay
+        )
+
+    # ===== Conexión =====
+
     def connect(self) -> bool:
         """
-        Establece una conexión con el servidor.
+        Establece una conexión con el servidor y arranca los hilos de E/S.
 
         Returns:
             bool: True si la conexión fue exitosa, False en caso contrario.
         """
         try:
-            self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.client_socket.connect((self.host, self.port))
-            logger.info(f"Conectado al servidor en {self.host}:{self.port}")
-            return True
-        except socket.error as e:
+            if self.unix_path:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.unix_path)
+                except OSError:
+                    sock.close()
+                    raise
+            else:
+                sock = socket.create_connection((self.host, self.port))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
             logger.error(f"Error al conectar con el servidor: {e}")
             return False
 
-    def _reconnect(self) -> bool:
+        with self._lock:
+            self._closed = False
+            self.client_socket = sock
+            # _pending contiene todo lo no confirmado (escrito o no) en orden de envío:
+            # se reconstruye la cola de salida a partir de él
+            resend = len(self._pending) - len(self._outbox)
+            self._outbox = deque((pending.frame, message_id) for message_id, pending in self._pending.items())
+            self._lock.notify_all()
+
+        self._writer_thread = threading.Thread(target=self._write_loop, args=(sock,), daemon=True,
+                                               name=f"SocketClient-Writer-{self.endpoint}")
+        self._reader_thread = threading.Thread(target=self._read_loop, args=(sock,), daemon=True,
+                                               name=f"SocketClient-Reader-{self.endpoint}")
+        self._writer_thread.start()
+        self._reader_thread.start()
+        logger.info(f"Conectado al servidor en {self.endpoint}")
+        if resend:
+            logger.info(f"Reenviando {resend} mensajes sin confirmar")
+        return True
+
+    def is_connected(self) -> bool:
+        """Indica si hay una conexión activa con el servidor."""
+        return self.client_socket is not None
+
+    def _reconnect(self) -> None:
+        """Programa la reconexión en segundo plano (no bloquea)."""
+        if not self._closed:
+            self._supervisor.request()
+
+    def _reconnect_once(self) -> bool:
+        if self._closed:
+            return True
+        return self.is_connected() or self.connect()
+
+    def _connection_lost(self, sock: socket.socket, reason: str) -> None:
+        """Descarta una conexión caída (una sola vez) y programa la reconexión."""
+        with self._lock:
+            if self.client_socket is not sock:
+                return
+            self.client_socket = None
+            self._lock.notify_all()
+        try:
+            sock.close()
+        except OSError:
+            pass
+        if not self._closed:
+            logger.warning(f"Conexión con el servidor perdida ({reason}). Reconectando en segundo plano...")
+            self._reconnect()
+
+    # ===== Envío =====
+
+    def send_message_async(self, message: Message) -> Future:
         """
-        Intenta reconectar con el servidor.
+        Encola un mensaje para su envío sin esperar respuesta.
 
         Returns:
-            bool: True si la reconexión fue exitosa, False en caso contrario.
+            Future: Se resuelve con la ``AcknowledgementMessage`` del servidor (o con
+            None si ``expect_acks`` es False) y falla si el cliente se cierra antes.
+
+        Raises:
+            TimeoutError: Si la ventana de mensajes en vuelo sigue llena tras ``ack_timeout``.
         """
-        logger.warning("Intentando reconectar con el servidor...")
-        self.close()
-        for attempt in range(3):  # Intentar reconectar 3 veces
-            if self.connect():
-                logger.info("Reconexión exitosa con el servidor")
-                return True
-            logger.warning(f"Reintento {attempt + 1}/3 fallido. Esperando...")
-            time.sleep(2)
-        logger.error("No se pudo reconectar con el servidor después de varios intentos")
-        return False
+        future: Future = Future()
+        if self._closed:
+            future.set_exception(ConnectionError("Cliente cerrado"))
+            return future
+        if not self._window.acquire(timeout=self.ack_timeout):
+            raise TimeoutError(f"{self.max_in_flight} mensajes sin confirmar tras {self.ack_timeout}s")
+
+        try:
+            frame = frame_parts(message)
+        except Exception:
+            self._window.release()
+            raise
+        with self._lock:
+            self._pending[message.message_id] = _Pending(frame, future)
+            self._outbox.append((frame, message.message_id))
+            self._lock.notify_all()
+            connected = self.client_socket is not None
+
+        if not connected:
+            self._reconnect()
+        return future
 
     def send_message(self, message) -> bool:
         """
-        Envía un mensaje al servidor.
+        Envía un mensaje al servidor sin esperar su confirmación.
 
         Args:
             message: El mensaje a enviar.
 
         Returns:
-            bool: True si el mensaje fue enviado exitosamente, False en caso contrario.
+            bool: True si el mensaje quedó encolado para su envío.
         """
-        if not self.client_socket:
-            logger.error("No hay conexión establecida con el servidor. Intentando reconectar...")
-            if not self._reconnect():
-                return False
-
         try:
-            # Serializar el mensaje usando pickle para mantener la estructura del objeto
-            serialized_message = pickle.dumps(message)
-
-            # Enviar el tamaño del mensaje primero
-            message_size = len(serialized_message)
-            self.client_socket.sendall(message_size.to_bytes(4, byteorder='big'))
-
-            # Luego enviar el mensaje completo
-            self.client_socket.sendall(serialized_message)
-
-            logger.debug(f"Mensaje enviado: {message}")
-            return True
-        except (socket.error, pickle.PickleError) as e:
+            self.send_message_async(message)
+        except (TimeoutError, AttributeError, TypeError) as e:
             logger.error(f"Error al enviar mensaje: {e}")
             return False
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Mensaje encolado: {message}")
+        return not self._closed
+
+    def publish_message(self, message, routing_key: str = '') -> bool:
+        """
+        Interfaz compatible con los publicadores de los brokers.
+
+        En modo sockets el servidor enruta por el contenido del mensaje, así que
+        ``routing_key`` se ignora.
+        """
+        return self.send_message(message)
 
-    def receive_message(self):
+    def flush(self, timeout: Optional[float] = None) -> bool:
         """
-        Recibe un mensaje del servidor.
+        Espera a que todos los mensajes enviados estén confirmados.
 
         Returns:
-            Message: El mensaje recibido o None si ocurrió un error.
+            bool: True si no queda ninguno pendiente.
         """
-        if not self.client_socket:
-            logger.error("No hay conexión establecida con el servidor. Intentando reconectar...")
-            if not self._reconnect():
-                return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
 
+    @property
+    def in_flight(self) -> int:
+        """Mensajes enviados pendientes de confirmación."""
+        return len(self._pending)
+
+    def _write_loop(self, sock: socket.socket) -> None:
+        """Vuelca la cola de salida agrupando las tramas pendientes en cada escritura."""
+        while True:
+            with self._lock:
+                while not self._outbox and self.client_socket is sock:
+                    self._lock.wait()
+                if self.client_socket is not sock:
+                    return
+                batch = [self._outbox.popleft() for _ in range(min(len(self._outbox), MAX_WRITE_BATCH))]
+
+            buffers: List[bytes] = []
+            for (header, payload), _ in batch:
+                buffers.append(header)
+                buffers.append(payload)
+            try:
+                self._send_buffers(sock, buffers)
+            except OSError as e:
+                # Lo no confirmado sigue en _pending y se reenvía al reconectar
+                self._connection_lost(sock, str(e))
+                return
+
+            if not self.expect_acks:
+                # Sin confirmaciones, un mensaje se da por entregado al escribirlo
+                with self._lock:
+                    written = [self._pending.pop(message_id, None) for _, message_id in batch]
+                    self._lock.notify_all()
+                for pending in written:
+                    if pending is not None:
+                        self._window.release()
+                        pending.future.set_result(None)
+
+    @staticmethod
+    def _send_buffers(sock: socket.socket, buffers: List[bytes]) -> None:
+        if not HAS_SENDMSG:
+            sock.sendall(b''.join(buffers))
+            return
+        views = [memoryview(buffer) for buffer in buffers]
+        while views:
+            sent = sock.sendmsg(views)
+            while views and sent >= len(views[0]):
+                sent -= len(views[0])
+                views.pop(0)
+            if sent:
+                views[0] = views[0][sent:]
+
+    # ===== Recepción =====
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        """Recibe mensajes del servidor y resuelve las confirmaciones pendientes."""
+        frames = FrameBuffer(self.max_message_size, self.buffer_size)
+        while True:
+            try:
+                if not frames.recv_into(sock):
+                    self._connection_lost(sock, "cerrada por el servidor")
+                    return
+                payloads = frames.frames()
+            except FrameTooLargeError as e:
+                logger.error(f"Mensaje recibido excede el tamaño máximo permitido: {e}")
+                self._connection_lost(sock, str(e))
+                return
+            except OSError as e:
+                self._connection_lost(sock, str(e))
+                return
+
+            for payload in payloads:
+                try:
+                    message = decode_payload(payload)
+                except (ValueError, TypeError, KeyError) as e:
+                    logger.error(f"Error al recibir mensaje: {e}")
+                    continue
+                if isinstance(message, AcknowledgementMessage):
+                    self._on_ack(message)
+                    continue
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Mensaje recibido: {message}")
+                if self.message_handler:
+                    try:
+                        self.message_handler(message.to_json())
+                    except Exception as e:
+                        logger.error(f"Error en el manejador de mensajes: {e}")
+                else:
+                    self._inbox.put(message)
+
+    def _on_ack(self, ack: AcknowledgementMessage) -> None:
+        with self._lock:
+            pending = self._pending.pop(ack.received_message_id, None)
+            if pending is None:
+                return  # Confirmación duplicada tras un reenvío
+            if ack.success:
+                self.acked_count += 1
+            else:
+                self.nacked_count += 1
+                logger.warning(f"El servidor rechazó el mensaje {ack.received_message_id}: {ack.details}")
+            self._lock.notify_all()
+        self._window.release()
+        pending.future.set_result(ack)
+
+    def receive_message(self, timeout: Optional[float] = None):
+        """
+        Recibe un mensaje del servidor (si no hay ``message_handler``).
+
+        Returns:
+            Message: El mensaje recibido o None si venció la espera o se cerró el cliente.
+        """
+        if not self.is_connected() and not self._closed:
+            logger.error("No hay conexión establecida con el servidor. Reconectando en segundo plano...")
+            self._reconnect()
         try:
-            # Recibir primero el tamaño del mensaje
-            size_bytes = self.client_socket.recv(4)
-            if not size_bytes:
-                logger.warning("Conexión cerrada por el servidor")
-                return None
-
-            message_size = int.from_bytes(size_bytes, byteorder='big')
-
-            # Validar el tamaño del mensaje
-            if message_size > self.max_message_size:
-                logger.error(f"Mensaje recibido excede el tamaño máximo permitido ({message_size} bytes)")
-                return None
-
-            # Recibir el mensaje completo
-            chunks = []
-            bytes_received = 0
-            while bytes_received < message_size:
-                chunk = self.client_socket.recv(min(self.buffer_size, message_size - bytes_received))
-                if not chunk:
-                    logger.warning("Conexión cerrada por el servidor durante la recepción")
-                    return None
-                chunks.append(chunk)
-                bytes_received += len(chunk)
-
-            serialized_message = b''.join(chunks)
-            message = pickle.loads(serialized_message)
-
-            logger.debug(f"Mensaje recibido: {message}")
-            return message
-        except (socket.error, pickle.PickleError, ValueError) as e:
-            logger.error(f"Error al recibir mensaje: {e}")
+            return self._inbox.get(timeout=timeout)
+        except queue.Empty:
             return None
 
-    def close(self) -> None:
-        """Cierra la conexión con el servidor."""
-        if self.client_socket:
+    # ===== Cierre =====
+
+    def close(self, flush_timeout: float = 2.0) -> None:
+        """
+        Cierra la conexión con el servidor.
+
+        Espera hasta ``flush_timeout`` segundos a que se confirmen los mensajes
+        pendientes; los que sigan sin confirmar fallan con ``ConnectionError``.
+        """
+        if self.client_socket and flush_timeout:
+            self.flush(flush_timeout)
+
+        self._closed = True
+        self._supervisor.stop()
+        with self._lock:
+            sock, self.client_socket = self.client_socket, None
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._outbox.clear()
+            self._lock.notify_all()
+        for item in pending:
+            self._window.release()
+            if not item.future.done():
+                item.future.set_exception(ConnectionError("Cliente cerrado con el mensaje sin confirmar"))
+        self._inbox.put(None)  # Desbloquea receive_message
+
+        if sock:
+            try:
+                # Desbloquea al hilo lector si está esperando en recv
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
             try:
-                self.client_socket.close()
+                sock.close()
                 logger.info("Conexión cerrada")
-            except socket.error as e:
+            except OSError as e:
                 logger.error(f"Error al cerrar la conexión: {e}")
-            finally:
-                self.client_socket = None
+        self._supervisor.reset()
 
     def __enter__(self):
         """Permite usar el cliente con el contexto 'with'."""
@@ -157,4 +423,4 @@ class SocketClient:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Cierra la conexión al salir del contexto 'with'."""
-        self.close()
\ No newline at end of file
+        self.close()
@@ -1,298 +1,509 @@
-# """
-# Implementación del servidor de sockets para el sistema de agentes encubiertos.
-#
-# Este módulo proporciona la clase SocketServer que permite al servidor central
-# recibir conexiones y mensajes de los agentes mediante sockets TCP/IP.
-# """
-#
-# import socket
-# import threading
-# import logging
-# import pickle
-# from typing import Callable, Optional, Dict, List, Tuple
-# import time
-#
-# #from common.message import Message
-#
-# logger = logging.getLogger(__name__)
-#
-# class ClientHandler(threading.Thread):
-#     """Manejador de conexiones de clientes individuales."""
-#
-#     def __init__(self, client_socket: socket.socket, address: Tuple[str, int],
-#                  message_callback: Callable[[Message, Tuple[str, int]], None],
-#                  buffer_size: int = 4096, max_message_size: int = 1048576):
-#         """
-#         Inicializa un nuevo manejador de cliente.
-#
-#         Args:
-#             client_socket: El socket del cliente.
-#             address: La dirección del cliente (ip, puerto).
-#             message_callback: Función a llamar cuando se recibe un mensaje.
-#             buffer_size: Tamaño del buffer para recibir datos.
-#             max_message_size: Tamaño máximo permitido para los mensajes (en bytes).
-#         """
-#         super().__init__()
-#         self.daemon = True
-#         self.client_socket = client_socket
-#         self.address = address
-#         self.message_callback = message_callback
-#         self.buffer_size = buffer_size
-#         self.max_message_size = max_message_size
-#         self.running = True
-#
-#     def run(self) -> None:
-#         """Procesa los mensajes entrantes del cliente."""
-#         logger.info(f"Cliente conectado desde {self.address[0]}:{self.address[1]}")
-#
-#         try:
-#             while self.running:
-#                 # Recibir primero el tamaño del mensaje
-#                 size_bytes = self.client_socket.recv(4)
-#                 if not size_bytes:
-#                     logger.info(f"Cliente {self.address[0]}:{self.address[1]} desconectado")
-#                     break
-#
-#                 message_size = int.from_bytes(size_bytes, byteorder='big')
-#
-#                 # Verificar si el tamaño del mensaje excede el límite
-#                 if message_size > self.max_message_size:
-#                     logger.error(f"Mensaje de {self.address[0]}:{self.address[1]} excede el tamaño máximo permitido ({message_size} bytes)")
-#                     self.close()
-#                     return
-#
-#                 # Recibir el mensaje completo
-#                 chunks = []
-#                 bytes_received = 0
-#                 while bytes_received < message_size:
-#                     chunk = self.client_socket.recv(min(self.buffer_size, message_size - bytes_received))
-#                     if not chunk:
-#                         logger.warning(f"Cliente {self.address[0]}:{self.address[1]} desconectado durante la recepción")
-#                         return
-#                     chunks.append(chunk)
-#                     bytes_received += len(chunk)
-#
-#                 serialized_message = b''.join(chunks)
-#
-#                 try:
-#                     # Deserializar el mensaje usando pickle
-#                     message = pickle.loads(serialized_message)
-#                     logger.debug(f"Mensaje recibido de {self.address[0]}:{self.address[1]}: {message}")
-#
-#                     # Llamar al callback con el mensaje recibido
-#                     if self.message_callback:
-#                         self.message_callback(message, self.address)
-#
-#                 except pickle.PickleError as e:
-#                     logger.error(f"Error al deserializar mensaje de {self.address[0]}:{self.address[1]}: {e}")
-#
-#         except socket.error as e:
-#             logger.error(f"Error en la conexión con {self.address[0]}:{self.address[1]}: {e}")
-#
-#         finally:
-#             self.close()
-#
-#     def send_message(self, message: Message) -> bool:
-#         """
-#         Envía un mensaje al cliente.
-#
-#         Args:
-#             message: El mensaje a enviar.
-#
-#         Returns:
-#             bool: True si el mensaje fue enviado exitosamente, False en caso contrario.
-#         """
-#         if not self.running or not self.client_socket:
-#             return False
-#
-#         try:
-#             # Serializar el mensaje usando pickle
-#             serialized_message = pickle.dumps(message)
-#
-#             # Enviar el tamaño del mensaje primero
-#             message_size = len(serialized_message)
-#             self.client_socket.sendall(message_size.to_bytes(4, byteorder='big'))
-#
-#             # Luego enviar el mensaje completo
-#             self.client_socket.sendall(serialized_message)
-#
-#             logger.debug(f"Mensaje enviado a {self.address[0]}:{self.address[1]}: {message}")
-#             return True
-#
-#         except (socket.error, pickle.PickleError) as e:
-#             logger.error(f"Error al enviar mensaje a {self.address[0]}:{self.address[1]}: {e}")
-#             return False
-#
-#     def close(self) -> None:
-#         """Cierra la conexión con el cliente."""
-#         self.running = False
-#         if self.client_socket:
-#             try:
-#                 self.client_socket.close()
-#                 logger.info(f"Conexión cerrada con {self.address[0]}:{self.address[1]}")
-#             except socket.error as e:
-#                 logger.error(f"Error al cerrar la conexión con {self.address[0]}:{self.address[1]}: {e}")
-#
-#
-# class SocketServer:
-#     """Servidor de sockets para la comunicación con los agentes."""
-#
-#     def __init__(self, host: str = '0.0.0.0', port: int = 5000,
-#                  message_callback: Optional[Callable[[Message, Tuple[str, int]], None]] = None,
-#                  max_connections: int = 10, buffer_size: int = 4096, max_message_size: int = 1048576):
-#         """
-#         Inicializa un nuevo servidor de sockets.
-#
-#         Args:
-#             host: La dirección IP en la que escuchar (0.0.0.0 para todas las interfaces).
-#             port: El puerto en el que escuchar.
-#             message_callback: Función a llamar cuando se recibe un mensaje.
-#             max_connections: Número máximo de conexiones en espera.
-#             buffer_size: Tamaño del buffer para recibir datos.
-#             max_message_size: Tamaño máximo permitido para los mensajes (en bytes).
-#         """
-#         self.host = host
-#         self.port = port
-#         self.message_callback = message_callback
-#         self.max_connections = max_connections
-#         self.buffer_size = buffer_size
-#         self.max_message_size = max_message_size
-#         self.server_socket = None
-#         self.clients: Dict[Tuple[str, int], ClientHandler] = {}
-#         self.running = False
-#         self.accept_thread = None
-#
-#         # Métricas
-#         self.connected_clients = 0
-#
-#     def start(self) -> bool:
-#         """
-#         Inicia el servidor y comienza a aceptar conexiones.
-#
-#         Returns:
-#             bool: True si el servidor se inició correctamente, False en caso contrario.
-#         """
-#         try:
-#             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-#             # Permitir la reutilización del puerto
-#             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-#             self.server_socket.bind((self.host, self.port))
-#             self.server_socket.listen(self.max_connections)
-#
-#             self.running = True
-#             logger.info(f"Servidor iniciado en {self.host}:{self.port}")
-#
-#             # Iniciar el hilo para aceptar conexiones
-#             self.accept_thread = threading.Thread(target=self._accept_connections)
-#             self.accept_thread.daemon = True
-#             self.accept_thread.start()
-#
-#             return True
-#
-#         except socket.error as e:
-#             logger.error(f"Error al iniciar el servidor: {e}")
-#             return False
-#
-#     def _accept_connections(self) -> None:
-#         """Acepta conexiones entrantes y crea manejadores para cada cliente."""
-#         while self.running:
-#             try:
-#                 client_socket, address = self.server_socket.accept()
-#
-#                 # Crear un manejador para el cliente
-#                 handler = ClientHandler(
-#                     client_socket,
-#                     address,
-#                     self.message_callback,
-#                     self.buffer_size,
-#                     self.max_message_size
-#                 )
-#
-#                 # Registrar el cliente
-#                 self.clients[address] = handler
-#                 self.connected_clients += 1
-#                 logger.info(f"Cliente conectado desde {address[0]}:{address[1]}. Total clientes conectados: {self.connected_clients}")
-#
-#                 # Iniciar el hilo del manejador
-#                 handler.start()
-#
-#             except socket.error as e:
-#                 if self.running:  # Solo registrar errores si aún estamos en ejecución
-#                     logger.error(f"Error al aceptar conexión: {e}")
-#                     time.sleep(0.1)  # Evitar consumo excesivo de CPU en caso de error
-#
-#     def broadcast_message(self, message: Message) -> None:
-#         """
-#         Envía un mensaje a todos los clientes conectados.
-#
-#         Args:
-#             message: El mensaje a enviar.
-#         """
-#         for address, handler in list(self.clients.items()):
-#             if not handler.send_message(message):
-#                 # Si falla el envío, eliminar el cliente
-#                 logger.warning(f"No se pudo enviar mensaje a {address[0]}:{address[1]}, eliminando cliente")
-#                 self.clients.pop(address, None)
-#
-#     def send_message_to(self, address: Tuple[str, int], message: Message) -> bool:
-#         """
-#         Envía un mensaje a un cliente específico.
-#
-#         Args:
-#             address: La dirección del cliente (ip, puerto).
-#             message: El mensaje a enviar.
-#
-#         Returns:
-#             bool: True si el mensaje fue enviado exitosamente, False en caso contrario.
-#         """
-#         if address in self.clients:
-#             return self.clients[address].send_message(message)
-#         return False
-#
-#     def get_connected_clients(self) -> List[Tuple[str, int]]:
-#         """
-#         Obtiene la lista de clientes conectados.
-#
-#         Returns:
-#             List[Tuple[str, int]]: Lista de direcciones de clientes conectados.
-#         """
-#         return list(self.clients.keys())
-#
-#     def stop(self) -> None:
-#         """Detiene el servidor y cierra todas las conexiones."""
-#         self.running = False
-#
-#         # Cerrar todas las conexiones con clientes
-#         for address, handler in list(self.clients.items()):
-#             handler.close()
-#             self.connected_clients -= 1
-#
-#         self.clients.clear()
-#
-#         # Cerrar el socket del servidor
-#         if self.server_socket:
-#             try:
-#                 self.server_socket.close()
-#                 logger.info("Servidor detenido")
-#             except socket.error as e:
-#                 logger.error(f"Error al cerrar el socket del servidor: {e}")
-#
-#     def get_metrics(self) -> Dict[str, int]:
-#         """
-#         Devuelve las métricas del servidor.
-#
-#         Returns:
-#             dict: Diccionario con las métricas del servidor.
-#         """
-#         return {
-#             "connected_clients": self.connected_clients
-#         }
-#
-#     def __enter__(self):
-#         """Permite usar el servidor con el contexto 'with'."""
-#         self.start()
-#         return self
-#
-#     def __exit__(self, exc_type, exc_val, exc_tb):
-#         """Detiene el servidor al salir del contexto 'with'."""
-#         self.stop()
\ No newline at end of file
+"""
+Implementación del servidor de sockets para el sistema de agentes encubiertos.
+
+Este módulo proporciona la clase SocketServer que permite al servidor central
+recibir conexiones y mensajes de los agentes mediante sockets TCP/IP o, si
+todo corre en la misma máquina, sockets de dominio Unix (``unix_path``).
+
+Un único hilo con un bucle de eventos (``selectors``) atiende todas las conexiones
+con lecturas y escrituras no bloqueantes, en lugar de un hilo por cliente. Cada
+conexión tiene su propia cola de escritura: los envíos desde otros hilos solo
+encolan la trama y despiertan al bucle, que la escribe cuando el socket lo admite.
+Un cliente que no lee y acumula más de ``max_write_buffer`` bytes pendientes se
+desconecta para no penalizar al resto.
+"""
+
+import itertools
+import logging
+import os
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from common.message import AcknowledgementMessage, Message
+from communication.sockets.framing import (
+    DEFAULT_MAX_MESSAGE_SIZE, HAS_SENDMSG, FrameBuffer, FrameTooLargeError, decode_payload, frame_parts
+)
+
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+# Máximo de tramas pendientes que se entregan al núcleo en una sola llamada a sendmsg
+MAX_WRITE_BATCH = 64
+
+
+class _Connection:
+    """Estado de una conexión de cliente dentro del bucle de eventos."""
+
+    __slots__ = ('sock', 'address', 'decoder', 'outbox', 'pending_bytes', 'client_ids', 'writing', 'closing')
+
+    def __init__(self, sock: socket.socket, address: Address, max_message_size: int, buffer_size: int):
+        self.sock = sock
+        self.address = address
+        self.decoder = FrameBuffer(max_message_size, buffer_size)
+        self.outbox: Deque[memoryview] = deque()
+        self.pending_bytes = 0
+        self.client_ids: Set[str] = set()  # sender_id recibidos (un host multiplexa varios)
+        self.writing = False  # Registrada en el selector también para escritura
+        self.closing = False
+
+
+class SocketServer:
+    """Servidor de sockets para la comunicación con los agentes."""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 5000,
+                 message_callback: Optional[Callable[[Message, Address], None]] = None,
+                 max_connections: int = 1024, buffer_size: int = 4096,
+                 max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
+                 max_write_buffer: int = 4 * 1048576, ack_messages: bool = True,
+                 unix_path: Optional[str] = None):
+        """
+        Inicializa un nuevo servidor de sockets.
+
+        Args:
+            host: La dirección IP en la que escuchar (0.0.0.0 para todas las interfaces).
+            port: El puerto en el que escuchar (0 elige uno libre).
+            message_callback: Función a llamar cuando se recibe un mensaje. Se ejecuta
+                en el hilo del bucle de eventos, así que debe ser rápida.
+            max_connections: Número máximo de conexiones en espera (backlog de listen).
+            buffer_size: Tamaño inicial del buffer de recepción de cada conexión
+                (crece bajo demanda hasta ``max_message_size``).
+            max_message_size: Tamaño máximo permitido para los mensajes (en bytes).
+            max_write_buffer: Bytes pendientes de envío a partir de los que se
+                desconecta a un cliente lento.
+            ack_messages: Si se responde a cada mensaje recibido con una
+                ``AcknowledgementMessage`` (la espera SocketClient para resolver sus envíos).
+            unix_path: Ruta de un socket de dominio Unix en el que escuchar en lugar
+                de ``host:port``.
+        """
+        self.host = host
+        self.port = port
+        self.message_callback = message_callback
+        self.max_connections = max_connections
+        self.buffer_size = buffer_size
+        self.max_message_size = max_message_size
+        self.max_write_buffer = max_write_buffer
+        self.ack_messages = ack_messages
+        self.unix_path = unix_path
+        self._unix_ids = itertools.count(1)  # Los clientes Unix no tienen dirección propia
+
+        self.server_socket: Optional[socket.socket] = None
+        self.running = False
+        self.loop_thread: Optional[threading.Thread] = None
+
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wakeup_reader: Optional[socket.socket] = None
+        self._wakeup_writer: Optional[socket.socket] = None
+        self._lock = threading.Lock()  # Protege conexiones, colas de escritura y _dirty
+        self._connections: Dict[Address, _Connection] = {}
+        self._clients_by_id: Dict[str, _Connection] = {}
+        self._dirty: Set[_Connection] = set()  # Conexiones con escrituras nuevas
+
+        # Métricas
+        self.connected_clients = 0
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.dropped_clients = 0
+
+    def start(self) -> bool:
+        """
+        Inicia el servidor y su bucle de eventos.
+
+        Returns:
+            bool: True si el servidor se inició correctamente, False en caso contrario.
+        """
+        try:
+            if self.unix_path:
+                self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                if os.path.exists(self.unix_path):
+                    os.unlink(self.unix_path)  # Socket de una ejecución anterior
+                self.server_socket.bind(self.unix_path)
+            else:
+                self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                # Permitir la reutilización del puerto
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.server_socket.bind((self.host, self.port))
+                self.port = self.server_socket.getsockname()[1]
+            self.server_socket.listen(self.max_connections)
+            self.server_socket.setblocking(False)
+
+            self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+            self._wakeup_reader.setblocking(False)
+            self._wakeup_writer.setblocking(False)
+
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self.server_socket, selectors.EVENT_READ)
+            self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        except OSError as e:
+            logger.error(f"Error al iniciar el servidor: {e}")
+            self._close_sockets()
+            return False
+
+        self.running = True
+        self.loop_thread = threading.Thread(target=self._run, daemon=True, name=f"SocketServer-{self.port}")
+        self.loop_thread.start()
+        logger.info(f"Servidor iniciado en {self.endpoint}")
+        return True
+
+    @property
+    def endpoint(self) -> str:
+        """Dirección en la que escucha el servidor, para los logs."""
+        return f"unix:{self.unix_path}" if self.unix_path else f"{self.host}:{self.port}"
+
+    # ===== Bucle de eventos =====
+
+    def _run(self) -> None:
+        """Atiende aceptaciones, lecturas y escrituras hasta que se detiene el servidor."""
+        while self.running:
+            try:
+                events = self._selector.select(timeout=1.0)
+            except OSError as e:
+                if self.running:
+                    logger.error(f"Error en el bucle de eventos: {e}")
+                break
+            for key, mask in events:
+                if key.fileobj is self.server_socket:
+                    self._accept()
+                elif key.fileobj is self._wakeup_reader:
+                    self._drain_wakeup()
+                    self._flush_dirty()
+                else:
+                    connection = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(connection)
+                    if mask & selectors.EVENT_WRITE and not connection.closing:
+                        self._flush(connection)
+            if self._dirty:
+                # Confirmaciones y respuestas encoladas desde el propio bucle: se
+                # escriben juntas, una escritura por conexión
+                self._flush_dirty()
+
+        with self._lock:
+            connections = list(self._connections.values())
+        for connection in connections:
+            self._close_connection(connection)
+        self._close_sockets()
+
+    def _accept(self) -> None:
+        # Aceptar todas las conexiones en espera de una vez
+        while True:
+            try:
+                client_socket, address = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.error(f"Error al aceptar conexión: {e}")
+                return
+
+            client_socket.setblocking(False)
+            if self.unix_path:
+                address = ("unix", next(self._unix_ids))
+            else:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = _Connection(client_socket, address, self.max_message_size, self.buffer_size)
+            with self._lock:
+                self._connections[address] = connection
+                self.connected_clients = len(self._connections)
+            self._selector.register(client_socket, selectors.EVENT_READ, connection)
+            logger.info(f"Cliente conectado desde {address[0]}:{address[1]}. "
+                        f"Total clientes conectados: {self.connected_clients}")
+
+    def _read(self, connection: _Connection) -> None:
+        address = connection.address
+        try:
+            # Se recibe directamente en el buffer de la conexión, sin copias intermedias
+            received = connection.decoder.recv_into(connection.sock)
+        except (BlockingIOError, InterruptedError):
+            return
+        except FrameTooLargeError as e:
+            logger.error(f"Mensaje de {address[0]}:{address[1]} rechazado: {e}")
+            self._close_connection(connection)
+            return
+        except OSError as e:
+            logger.error(f"Error en la conexión con {address[0]}:{address[1]}: {e}")
+            self._close_connection(connection)
+            return
+
+        if not received:
+            logger.info(f"Cliente {address[0]}:{address[1]} desconectado")
+            self._close_connection(connection)
+            return
+
+        self.bytes_received += received
+        try:
+            payloads = connection.decoder.frames()
+        except FrameTooLargeError as e:
+            logger.error(f"Mensaje de {address[0]}:{address[1]} rechazado: {e}")
+            self._close_connection(connection)
+            return
+
+        for payload in payloads:
+            try:
+                message = decode_payload(payload)
+            except (UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+                logger.error(f"Error al deserializar mensaje de {address[0]}:{address[1]}: {e}")
+                continue
+
+            self.messages_received += 1
+            sender_id = getattr(message, 'sender_id', None)
+            if sender_id and sender_id not in connection.client_ids:
+                with self._lock:
+                    connection.client_ids.add(sender_id)
+                    self._clients_by_id[sender_id] = connection
+            logger.debug(f"Mensaje recibido de {address[0]}:{address[1]}: {message}")
+
+            success, details = True, ""
+            if self.message_callback:
+                try:
+                    self.message_callback(message, address)
+                except Exception as e:
+                    logger.error(f"Error en el callback de mensajes: {e}")
+                    success, details = False, str(e)
+
+            if self.ack_messages and not isinstance(message, AcknowledgementMessage):
+                ack = AcknowledgementMessage(received_message_id=message.message_id,
+                                             success=success, details=details)
+                self._enqueue([connection], frame_parts(ack))
+
+    def _flush(self, connection: _Connection) -> None:
+        """Escribe todo lo que admita el socket de la cola de la conexión."""
+        with self._lock:
+            outbox = connection.outbox
+            try:
+                while outbox:
+                    if len(outbox) == 1 or not HAS_SENDMSG:
+                        sent = connection.sock.send(outbox[0])
+                    else:
+                        # Varias tramas en una sola llamada al sistema
+                        sent = connection.sock.sendmsg([outbox[i] for i in range(min(len(outbox), MAX_WRITE_BATCH))])
+                    self.bytes_sent += sent
+                    connection.pending_bytes -= sent
+                    while sent and outbox:
+                        head = outbox[0]
+                        if sent >= len(head):
+                            sent -= len(head)
+                            outbox.popleft()
+                        else:
+                            outbox[0] = head[sent:]
+                            sent = 0
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError as e:
+                logger.warning(f"Error al enviar a {connection.address[0]}:{connection.address[1]}: {e}")
+                connection.closing = True
+            want_write = bool(outbox) and not connection.closing
+
+        if connection.closing:
+            self._close_connection(connection)
+        elif want_write != connection.writing:
+            connection.writing = want_write
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if want_write else 0)
+            self._selector.modify(connection.sock, events, connection)
+
+    def _flush_dirty(self) -> None:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        for connection in dirty:
+            if connection.closing:
+                self._close_connection(connection)
+            elif not connection.writing:
+                # Si ya espera EVENT_WRITE, el selector avisará cuando haya hueco
+                self._flush(connection)
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while self._wakeup_reader.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _wakeup(self) -> None:
+        try:
+            self._wakeup_writer.send(b'\0')
+        except (BlockingIOError, InterruptedError):
+            pass  # Ya hay un aviso pendiente
+        except (OSError, AttributeError):
+            pass  # Servidor detenido
+
+    def _close_connection(self, connection: _Connection) -> None:
+        with self._lock:
+            if self._connections.get(connection.address) is not connection:
+                return
+            del self._connections[connection.address]
+            for client_id in connection.client_ids:
+                if self._clients_by_id.get(client_id) is connection:
+                    del self._clients_by_id[client_id]
+            connection.outbox.clear()
+            connection.closing = True
+            self.connected_clients = len(self._connections)
+        try:
+            self._selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            connection.sock.close()
+            logger.info(f"Conexión cerrada con {connection.address[0]}:{connection.address[1]}")
+        except OSError as e:
+            logger.error(f"Error al cerrar la conexión con {connection.address[0]}:{connection.address[1]}: {e}")
+
+    def _close_sockets(self) -> None:
+        for sock in (self.server_socket, self._wakeup_reader, self._wakeup_writer):
+            if sock:
+                try:
+                    sock.close()
+                except OSError as e:
+                    logger.error(f"Error al cerrar el socket del servidor: {e}")
+        if self._selector:
+            self._selector.close()
+        self.server_socket = self._wakeup_reader = self._wakeup_writer = self._selector = None
+        if self.unix_path and os.path.exists(self.unix_path):
+            try:
+                os.unlink(self.unix_path)
+            except OSError as e:
+                logger.error(f"Error al eliminar el socket {self.unix_path}: {e}")
+
+    # ===== Envío (seguro entre hilos) =====
+
+    def _enqueue(self, connections: List[_Connection], frame: Tuple[bytes, bytes]) -> int:
+        """Encola una trama (cabecera y cuerpo) en varias conexiones y despierta al bucle."""
+        header, payload = memoryview(frame[0]), memoryview(frame[1])
+        size = len(header) + len(payload)
+        queued = 0
+        with self._lock:
+            for connection in connections:
+                if connection.closing:
+                    continue
+                if connection.pending_bytes + size > self.max_write_buffer:
+                    logger.warning(f"Cliente {connection.address[0]}:{connection.address[1]} no lee sus "
+                                   f"mensajes ({connection.pending_bytes} bytes pendientes), se desconecta")
+                    connection.closing = True
+                    self.dropped_clients += 1
+                else:
+                    # Cabecera y cuerpo por separado: sendmsg los junta al escribir
+                    connection.outbox.append(header)
+                    connection.outbox.append(payload)
+                    connection.pending_bytes += size
+                    queued += 1
+                self._dirty.add(connection)
+            self.messages_sent += queued
+        if connections and threading.current_thread() is not self.loop_thread:
+            self._wakeup()
+        return queued
+
+    def broadcast_message(self, message: Message) -> int:
+        """
+        Envía un mensaje a todos los clientes conectados.
+
+        El mensaje se serializa una sola vez y la misma trama se comparte entre las
+        colas de escritura de todas las conexiones.
+
+        Args:
+            message: El mensaje a enviar.
+
+        Returns:
+            int: Número de clientes a los que se encoló el mensaje.
+        """
+        frame = frame_parts(message)
+        with self._lock:
+            connections = list(self._connections.values())
+        return self._enqueue(connections, frame)
+
+    def send_message_to(self, address: Address, message: Message) -> bool:
+        """
+        Envía un mensaje a un cliente específico.
+
+        Args:
+            address: La dirección del cliente (ip, puerto).
+            message: El mensaje a enviar.
+
+        Returns:
+            bool: True si el mensaje quedó encolado para su envío.
+        """
+        with self._lock:
+            connection = self._connections.get(address)
+        return connection is not None and self._enqueue([connection], frame_parts(message)) == 1
+
+    def send_to_client(self, client_id: str, message: Message) -> bool:
+        """
+        Envía un mensaje al cliente identificado por ``client_id``.
+
+        Los clientes se identifican por el ``sender_id`` de los mensajes que envían.
+
+        Returns:
+            bool: True si el mensaje quedó encolado para su envío.
+        """
+        with self._lock:
+            connection = self._clients_by_id.get(client_id)
+        return connection is not None and self._enqueue([connection], frame_parts(message)) == 1
+
+    def publish_message(self, message: Message, routing_key: str = '') -> bool:
+        """
+        Interfaz compatible con los publicadores de los brokers.
+
+        Los mensajes con ``target_agent_id`` (tareas) se envían solo a ese agente;
+        el resto se difunde a todos los clientes. ``routing_key`` se ignora.
+
+        Returns:
+            bool: True si el mensaje quedó encolado para al menos un cliente.
+        """
+        target = getattr(message, 'target_agent_id', None)
+        if target:
+            return self.send_to_client(target, message)
+        return self.broadcast_message(message) > 0
+
+    # ===== Consulta y parada =====
+
+    def get_connected_clients(self) -> List[Address]:
+        """
+        Obtiene la lista de clientes conectados.
+
+        Returns:
+            List[Tuple[str, int]]: Lista de direcciones de clientes conectados.
+        """
+        with self._lock:
+            return list(self._connections.keys())
+
+    def get_client_ids(self) -> List[str]:
+        """IDs (sender_id) de los clientes que ya se han identificado."""
+        with self._lock:
+            return list(self._clients_by_id.keys())
+
+    def stop(self) -> None:
+        """Detiene el servidor y cierra todas las conexiones."""
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup()
+        if self.loop_thread and self.loop_thread is not threading.current_thread():
+            self.loop_thread.join(timeout=5.0)
+        logger.info("Servidor detenido")
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        Devuelve las métricas del servidor.
+
+        Returns:
+            dict: Diccionario con las métricas del servidor.
+        """
+        return {
+            "connected_clients": self.connected_clients,
+            "messages_received": self.messages_received,
+            "messages_sent": self.messages_sent,
+            "bytes_received": self.bytes_received,
+            "bytes_sent": self.bytes_sent,
+            "dropped_clients": self.dropped_clients
+        }
+
+    def __enter__(self):
+        """Permite usar el servidor con el contexto 'with'."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Detiene el servidor al salir del contexto 'with'."""
+        self.stop()
@@ -0,0 +1,338 @@
+"""
+Cola de salida persistente (spool) para mensajes que no se pudieron publicar.
+
+Los publicadores escriben aquí los mensajes cuando el broker no está disponible. El
+spool es un registro de solo anexado dividido en segmentos; cada registro lleva su
+longitud y un CRC32 para detectar escrituras incompletas tras una caída. Un cursor
+persistido de forma atómica indica hasta dónde se ha reenviado, y un hilo drenador
+reenvía los mensajes en orden y a ritmo controlado cuando vuelve la conexión.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+from common.message import Message, create_message_from_json
+
+logger = logging.getLogger(__name__)
+
+# Cabecera de cada registro: longitud del payload y CRC32 (big endian)
+RECORD_HEADER = struct.Struct(">II")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".spool"
+CURSOR_FILE = "cursor.json"
+
+# Posición dentro del spool: (número de segmento, offset en bytes)
+SpoolPosition = Tuple[int, int]
+
+
+class MessageSpool:
+    """Spool de mensajes en disco, segmentado, acotado y seguro ante caídas."""
+
+    def __init__(self, directory: str, segment_size: int = 4 * 1024 * 1024,
+                 max_bytes: int = 256 * 1024 * 1024, fsync_every: int = 100,
+                 fsync_interval: float = 1.0):
+        """
+        Abre (o crea) un spool en el directorio indicado.
+
+        Args:
+            directory: Directorio donde se guardan los segmentos y el cursor.
+            segment_size: Tamaño a partir del cual se abre un segmento nuevo.
+            max_bytes: Tamaño total máximo; al superarlo se descartan los segmentos más antiguos.
+            fsync_every: Número de registros entre llamadas a fsync.
+            fsync_interval: Segundos máximos entre llamadas a fsync.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.RLock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._write_file = None
+        self._write_position: SpoolPosition = (1, 0)  # Final del último registro escrito
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments = self._list_segments()
+        self._cursor = self._load_cursor()
+        self._read_position = self._cursor
+
+        if self._segments:
+            self._recover_tail(self._segments[-1])
+        else:
+            self._segments.append(self._cursor[0])
+        self._open_write_segment(self._segments[-1])
+
+    # ===== Ficheros =====
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                segments.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(segments)
+
+    def _load_cursor(self) -> SpoolPosition:
+        path = os.path.join(self.directory, CURSOR_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                cursor = (int(data["segment"]), int(data["offset"]))
+                if not self._segments or cursor[0] >= self._segments[0]:
+                    return cursor
+            except (ValueError, KeyError, OSError) as e:
+                logger.error(f"Cursor del spool corrupto en {path}: {e}")
+        return (self._segments[0], 0) if self._segments else (1, 0)
+
+    def _save_cursor(self) -> None:
+        """Escribe el cursor de forma atómica (fichero temporal + rename)."""
+        path = os.path.join(self.directory, CURSOR_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segment": self._cursor[0], "offset": self._cursor[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _recover_tail(self, segment: int) -> None:
+        """Trunca un registro incompleto al final del último segmento (caída durante la escritura)."""
+        path = self._segment_path(segment)
+        valid_end = 0
+        with open(path, "rb") as f:
+            while True:
+                record = self._read_record(f)
+                if record is None:
+                    break
+                valid_end = f.tell()
+        if valid_end < os.path.getsize(path):
+            logger.warning(f"Truncando registro incompleto en {path} (offset {valid_end})")
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _open_write_segment(self, segment: int) -> None:
+        if self._write_file:
+            self._write_file.close()
+        path = self._segment_path(segment)
+        self._write_file = open(path, "ab")
+        self._write_position = (segment, os.path.getsize(path))
+
+    @staticmethod
+    def _read_record(f) -> Optional[bytes]:
+        """Lee un registro completo y válido o devuelve None."""
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        length, crc = RECORD_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    # ===== Escritura =====
+
+    def append(self, message: Message, routing_key: str) -> bool:
+        """
+        Añade un mensaje al final del spool.
+
+        Returns:
+            bool: True si el mensaje se escribió en disco.
+        """
+        payload = json.dumps({"routing_key": routing_key, "message": message.to_json()}).encode("utf-8")
+        try:
+            with self._lock:
+                if self._write_position[1] >= self.segment_size:
+                    self._roll_segment()
+                self._write_file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+                self._write_file.write(payload)
+                segment, offset = self._write_position
+                self._write_position = (segment, offset + RECORD_HEADER.size + len(payload))
+                self._unsynced += 1
+                if self._unsynced >= self.fsync_every or \
+                        time.monotonic() - self._last_sync >= self.fsync_interval:
+                    self.sync()
+            return True
+        except OSError as e:
+            logger.error(f"Error al escribir en el spool {self.directory}: {e}")
+            return False
+
+    def _roll_segment(self) -> None:
+        """Cierra el segmento actual, abre uno nuevo y aplica el límite de tamaño."""
+        self.sync()
+        segment = self._segments[-1] + 1
+        self._segments.append(segment)
+        self._open_write_segment(segment)
+        self._enforce_max_bytes()
+
+    def _enforce_max_bytes(self) -> None:
+        total = sum(os.path.getsize(self._segment_path(s)) for s in self._segments)
+        while total > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments.pop(0)
+            path = self._segment_path(oldest)
+            total -= os.path.getsize(path)
+            os.remove(path)
+            logger.warning(f"Spool lleno: descartado el segmento {oldest} de {self.directory}")
+            if self._cursor[0] <= oldest:
+                self._cursor = (self._segments[0], 0)
+                self._save_cursor()
+            if self._read_position[0] <= oldest:
+                self._read_position = self._cursor
+
+    def sync(self) -> None:
+        """Vuelca a disco (fsync) los registros escritos."""
+        with self._lock:
+            if self._write_file and self._unsynced:
+                self._write_file.flush()
+                os.fsync(self._write_file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    # ===== Lectura =====
+
+    def has_pending(self) -> bool:
+        """Indica si hay mensajes sin reenviar (sin E/S: se consulta en cada publicación)."""
+        # Ambas posiciones se sustituyen como tuplas completas: basta con compararlas
+        return self._cursor < self._write_position
+
+    def read_batch(self, max_records: int = 100) -> List[Tuple[SpoolPosition, Message, str]]:
+        """
+        Lee los siguientes mensajes pendientes a partir de la posición de lectura.
+
+        Returns:
+            list: Tuplas (posición tras el registro, mensaje, routing_key).
+        """
+        batch = []
+        with self._lock:
+            self._write_file.flush()
+            start = self._read_position
+            segment, offset = start
+            while len(batch) < max_records:
+                path = self._segment_path(segment)
+                if not os.path.exists(path):
+                    break
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    while len(batch) < max_records:
+                        payload = self._read_record(f)
+                        if payload is None:
+                            break
+                        offset = f.tell()
+                        try:
+                            record = json.loads(payload)
+                            message = create_message_from_json(record["message"])
+                        except (ValueError, KeyError, TypeError) as e:
+                            logger.error(f"Registro inválido en el spool, se omite: {e}")
+                            continue
+                        batch.append(((segment, offset), message, record["routing_key"]))
+                if len(batch) >= max_records or segment == self._segments[-1]:
+                    break
+                # Segmento agotado: continuar con el siguiente
+                segment, offset = self._segments[self._segments.index(segment) + 1], 0
+            self._read_position = (segment, offset)
+            if not batch and start == self._cursor and self._read_position != start:
+                # Solo había registros inválidos o el final de un segmento: no queda nada pendiente
+                self.commit(self._read_position)
+        return batch
+
+    def commit(self, position: SpoolPosition) -> None:
+        """
+        Marca como reenviados todos los mensajes hasta ``position`` y borra los
+        segmentos completamente consumidos.
+        """
+        with self._lock:
+            self._cursor = position
+            self._save_cursor()
+            while len(self._segments) > 1 and self._segments[0] < position[0]:
+                os.remove(self._segment_path(self._segments.pop(0)))
+
+    def rewind(self) -> None:
+        """Vuelve a leer desde el último cursor confirmado (tras un reenvío fallido)."""
+        with self._lock:
+            self._read_position = self._cursor
+
+    def close(self) -> None:
+        """Vuelca y cierra el segmento en escritura."""
+        with self._lock:
+            if self._write_file:
+                self.sync()
+                self._write_file.close()
+                self._write_file = None
+
+
+class SpoolDrainer(threading.Thread):
+    """
+    Hilo que reenvía en orden los mensajes del spool cuando hay conexión.
+
+    El ritmo de reenvío se limita a ``rate`` mensajes por segundo para no saturar
+    al broker justo después de recuperar la conexión.
+    """
+
+    def __init__(self, spool: MessageSpool, publish: Callable[[Message, str], bool],
+                 is_connected: Callable[[], bool], rate: float = 200.0,
+                 batch_size: int = 50, poll_interval: float = 1.0):
+        super().__init__(daemon=True, name=f"SpoolDrainer-{os.path.basename(spool.directory)}")
+        self.spool = spool
+        self.publish = publish
+        self.is_connected = is_connected
+        self.rate = rate
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        while not self._stop_event.is_set():
+            try:
+                if not self.is_connected() or not self.spool.has_pending():
+                    self._stop_event.wait(self.poll_interval)
+                    continue
+
+                batch = self.spool.read_batch(self.batch_size)
+                if not batch:
+                    # Nada legible todavía (p. ej. registros inválidos ya descartados)
+                    self._stop_event.wait(self.poll_interval)
+                    continue
+                next_send = time.monotonic()
+                sent = 0
+                last_position = None
+                for position, message, routing_key in batch:
+                    if self._stop_event.is_set() or not self.publish(message, routing_key):
+                        break
+                    last_position = position
+                    sent += 1
+                    next_send += interval
+                    delay = next_send - time.monotonic()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+
+                # El cursor se confirma una vez por lote (entrega al-menos-una-vez)
+                if last_position is not None:
+                    self.spool.commit(last_position)
+
+                if sent < len(batch):
+                    # Reenvío interrumpido: volver a leer desde el último mensaje confirmado
+                    self.spool.rewind()
+                    self._stop_event.wait(self.poll_interval)
+                elif sent:
+                    logger.info(f"Reenviados {sent} mensajes desde el spool {self.spool.directory}")
+
+            except Exception as e:
+                logger.error(f"Error al drenar el spool {self.spool.directory}: {e}")
+                self.spool.rewind()
+                self._stop_event.wait(self.poll_interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el drenado."""
+        self._stop_event.set()
+        if self.is_alive() and self is not threading.current_thread():
+            self.join(timeout)
@@ -4,20 +4,39 @@ Este archivo centraliza todas las constantes y configuraciones necesarias.
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # ===== RUTAS =====
 BASE_DIR = Path(__file__).resolve().parent
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
+SPOOL_DIR = os.path.join(BASE_DIR, "spool")
 
 # ===== SISTEMA =====
-# Modo de comunicación: "sockets" o "rabbitmq"
+# Modo de comunicación: "sockets", "rabbitmq", "inmemory" (broker en memoria) o, si todo
+# corre en la misma máquina, "unix" (sockets de dominio Unix) o "shm" (memoria compartida)
 COMMUNICATION_MODE = "rabbitmq"
 
 # ===== SERVIDORES =====
 # Configuración para servidor socket
 SOCKET_HOST = "localhost"
 SOCKET_PORT = 5555
+SOCKET_MAX_MESSAGE_SIZE = 1048576
+# Bytes pendientes de envío a partir de los que se desconecta a un cliente que no lee
+SOCKET_MAX_WRITE_BUFFER = 4 * 1048576
+# Confirmar cada mensaje recibido; el cliente mantiene hasta SOCKET_MAX_IN_FLIGHT sin confirmar
+SOCKET_ACKS = True
+SOCKET_MAX_IN_FLIGHT = 1024
+# Ruta del socket de dominio Unix (modo "unix")
+SOCKET_UNIX_PATH = os.path.join(tempfile.gettempdir(), "agente_nocturno.sock")
+
+# Configuración para el transporte en memoria compartida (modo "shm")
+SHM_NAME = "agente_nocturno"
+SHM_MAX_CLIENTS = 256
+# Bytes de cada anillo (uno por sentido y cliente); al menos SOCKET_MAX_MESSAGE_SIZE
+SHM_RING_SIZE = 1048576
+# Espera máxima entre sondeos de un anillo vacío (s): más baja, menos latencia y más CPU
+SHM_POLL_INTERVAL = 0.001
 
 # Configuración para RabbitMQ
 RABBITMQ_HOST = "localhost"
@@ -27,11 +46,62 @@ RABBITMQ_PASSWORD = "guest"
 RABBITMQ_EXCHANGE = "agents_exchange"
 RABBITMQ_QUEUE_ALERTS = "alerts_queue"
 RABBITMQ_QUEUE_TASKS = "tasks_queue"
+# Prioridad máxima de las colas de alertas y tareas (x-max-priority); 0 desactiva la prioridad.
+# La prioridad de cada mensaje es el peso de su nivel en EMERGENCY_LEVELS
+RABBITMQ_MAX_PRIORITY = 4
+# Dead letters: tras este número de fallos un mensaje se desvía a la cola de dead letters
+RABBITMQ_DEAD_LETTER_ENABLED = True
+RABBITMQ_MAX_REDELIVERIES = 5
+# Consumo de alertas del servidor: mensajes sin confirmar por consumidor y trabajadores
+# que procesan las entregas a la vez (0 = en el hilo de E/S). "process" solo sirve para
+# callbacks serializables con pickle (se comprueba al empezar a consumir) y sin estado
+# compartido; el del servidor necesita "thread"
+RABBITMQ_PREFETCH_COUNT = 1
+RABBITMQ_CONSUMER_WORKERS = 0
+RABBITMQ_CONSUMER_WORKER_TYPE = "thread"
+# Publisher confirms: confirmaciones asíncronas con una ventana de mensajes en vuelo
+RABBITMQ_PUBLISHER_CONFIRMS = False
+RABBITMQ_MAX_IN_FLIGHT = 256
+# Compresión de los cuerpos que superan el umbral (bytes): None, "zlib" o "lzma".
+# Los consumidores descomprimen según content_encoding, sea cual sea esta opción
+RABBITMQ_COMPRESSION = None
+RABBITMQ_COMPRESSION_THRESHOLD = 1024
+RABBITMQ_COMPRESSION_LEVEL = 6
+# Pool de conexiones compartidas por proceso (multiplexa publicadores/consumidores)
+RABBITMQ_USE_CONNECTION_POOL = True
+RABBITMQ_POOL_SIZE = 2
+RABBITMQ_CHANNELS_PER_CONNECTION = 64
+# Spool en disco para mensajes no publicados (uno por publicador, en SPOOL_DIR)
+SPOOL_ENABLED = True
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+SPOOL_DRAIN_RATE = 200  # Mensajes por segundo al reenviar tras recuperar la conexión
+
+# Configuración para el broker en memoria (modo "inmemory")
+# None usa un broker local al proceso; "host:puerto" se conecta a un broker compartido
+INMEMORY_BROKER_ADDRESS = None
+INMEMORY_BROKER_AUTHKEY = b"agente-nocturno"
 
 # ===== AGENTES =====
 # Número de agentes a simular
 NUM_SPIES = 20
 NUM_NIGHT_AGENTS = 10
+# Procesos SpyHost entre los que se reparten los espías (0: un proceso por espía)
+SPY_HOSTS = min(4, os.cpu_count() or 1)
+# Registrar cada alerta de los espías de un SpyHost (con miles de espías, muy costoso)
+SPY_HOST_LOG_ALERTS = False
+# Generar las alertas con el modelo de población vectorizado (SpyPopulationHost) en
+# lugar de un objeto Spy por espía
+SPY_POPULATION = False
+SPY_POPULATION_TICK = 1.0  # Segundos entre ticks de la población
+# Desviación del paseo aleatorio (grados por raíz de segundo); 0.00016 equivale al paso
+# de ±0.001° por alerta de Spy.move_randomly
+SPY_WALK_SIGMA = 0.00016
+# Zonas con una tasa de alertas distinta: ((lat_min, lon_min, lat_max, lon_max), factor)
+# Ejemplo: [((40.74, -74.01, 40.76, -73.99), 3.0)] triplica las alertas en esa zona
+SPY_ZONE_RATES = []
+# Procesos NightAgentHost entre los que se reparten los agentes nocturnos
+# (0: un proceso NightAgent por agente)
+NIGHT_AGENT_HOSTS = min(2, os.cpu_count() or 1)
 
 # Tiempos (segundos)
 MIN_ALERT_INTERVAL = 5
@@ -40,12 +110,21 @@ MIN_TASK_DURATION = 10
 MAX_TASK_DURATION = 30
 SERVER_PROCESSING_TIME = 2
 
+# Desplazamiento de los agentes nocturnos hasta la tarea
+AGENT_SPEED_KMH = 40.0  # Velocidad media
+# Factor del tiempo de viaje: 1.0 es tiempo real a AGENT_SPEED_KMH; 0.01 lo comprime
+# como el resto de tiempos de la demo (unos segundos por trayecto)
+AGENT_TRAVEL_TIME_SCALE = 0.01
+AGENT_POSITION_UPDATE_INTERVAL = 1.0  # Segundos entre informes de posición en camino (0: sin informes)
+
 # ===== GEOGRÁFICOS =====
 # Límites del mapa virtual (coordenadas geográficas)
 MAP_MIN_LAT = 40.70
 MAP_MAX_LAT = 40.80
 MAP_MIN_LON = -74.05
 MAP_MAX_LON = -73.95
+# Precisión del geohash usado como celda en las claves de alerta (5 ≈ 4.9 km x 4.9 km)
+ALERT_CELL_PRECISION = 5
 
 # ===== EMERGENCIAS =====
 # Niveles de emergencia y sus pesos para asignación
@@ -65,6 +144,50 @@ EMERGENCY_TYPES = [
     "AMENAZA_BOMBA"
 ]
 
+# ===== SIMULACIÓN EN TIEMPO VIRTUAL =====
+# python run_simulation.py --fast: servidor, agentes y espías en un solo proceso sobre
+# un reloj virtual, sin esperas reales
+VIRTUAL_DURATION = 3600  # Segundos de operación a simular
+VIRTUAL_SEED = None  # Semilla del generador aleatorio (None: no reproducible)
+VIRTUAL_LATENCY = 0.0  # Latencia simulada de cada mensaje (s)
+
+# ===== ARRANQUE =====
+# run_simulation.py arranca los procesos desde un forkserver que ya tiene importados
+# estos módulos (los hijos no vuelven a importarlos) y espera a que cada componente
+# avise de que está conectado en lugar de dormir un tiempo fijo. Los módulos del
+# transporte de COMMUNICATION_MODE (pika en modo rabbitmq...) y, con SPY_POPULATION,
+# la población vectorizada se precargan además de estos.
+# "fork" arranca más deprisa (1000 componentes: 4.8 s frente a 11.4 s con forkserver),
+# pero cada hijo hereda una copia del proceso principal con sus hilos (registro,
+# supervisión) y sus conexiones abiertas (broker en memoria, sockets); por eso
+# forkserver es el método por defecto
+START_METHOD = "forkserver"  # "forkserver", "spawn" o "fork"; si no está disponible, el del sistema
+# Lo que importan los procesos hijo: servidor, hosts de agentes y de espías (numpy lo
+# usa el movimiento de la flota de cada host de agentes)
+FORKSERVER_PRELOAD = [
+    "config", "numpy", "common.message", "common.geo", "communication.factory",
+    "agents.spy_host", "agents.night_agent_host", "server.central_server",
+]
+STARTUP_TIMEOUT = 30.0  # Segundos máximos de espera a que un grupo de componentes esté listo
+
+# ===== SUPERVISIÓN =====
+# run_simulation.py vigila a sus procesos hijo: cada uno late en memoria compartida
+# (con su CPU y su memoria), los que mueren o dejan de latir se reinician con espera
+# exponencial y, al terminar, se detienen por grupos (espías, agentes, servidor)
+HEARTBEAT_INTERVAL = 1.0  # Segundos entre latidos de cada proceso hijo
+HEARTBEAT_TIMEOUT = 15.0  # Sin latir este tiempo, el proceso se da por colgado y se reinicia
+RESTART_BACKOFF_INITIAL = 1.0  # Espera antes del primer reinicio de un componente
+RESTART_BACKOFF_MAX = 60.0  # Espera máxima entre reinicios seguidos
+MAX_RESTARTS = 10  # Reinicios seguidos de un componente antes de abandonarlo (0: sin límite)
+RESTART_STABLE_AFTER = 60.0  # Segundos funcionando tras los que se olvidan sus reinicios
+RESOURCE_REPORT_INTERVAL = 60.0  # Segundos entre informes de CPU y memoria por proceso
+SHUTDOWN_GRACE_PERIOD = 10.0  # Segundos que tiene cada grupo para cerrar antes de matarlo
+
+# ===== GRABACIÓN DE TRÁFICO =====
+# El servidor central graba las alertas y estados que recibe para reproducirlos con
+# python -m simulation.replay (misma carga en cada ejecución)
+RECORD_TRAFFIC = None  # Fichero de la grabación (".jsonl" texto, otra extensión binario); None no graba
+
 # ===== VISUALIZACIÓN =====
 # Configuración visual
 VISUALIZATION_ENABLED = False
@@ -3,6 +3,7 @@ Script principal para iniciar la simulación completa del sistema.
 Ejecuta todos los componentes en sus respectivos procesos.
 """
 
+import argparse
 import os
 import time
 import logging
@@ -12,8 +13,13 @@ from pathlib import Path
 import config
 from server.central_server import CentralServer
 from agents.spy import Spy
+from agents.spy_host import launch_spy_host, partition_spies
 from agents.night_agent import NightAgent
+from agents.night_agent_host import launch_night_agent_host, partition_agents
 from common.geo import generate_random_position
+from common.constants import CommunicationMode
+from simulation.launcher import ComponentLauncher
+from simulation.supervisor import ProcessSupervisor
 
 # Configurar logging
 if not os.path.exists(config.LOGS_DIR):
@@ -41,73 +47,124 @@ def start_visualization():
             return None
     return None
 
-def launch_server():
-    server = CentralServer()
+def launch_server(on_ready=None, beat=None):
+    server = CentralServer(config.RABBITMQ_HOST, config.RABBITMQ_PORT, record_path=config.RECORD_TRAFFIC)
     server.start()
+    if server.running and on_ready:
+        on_ready()
+    try:
+        while server.running:
+            if beat:
+                beat()
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.running:
+            server.stop()
 
-def launch_night_agent(agent_id, position):
+def launch_night_agent(agent_id, position, on_ready=None, beat=None):
     agent = NightAgent(agent_id, position)
-    agent.run()
+    agent.run(on_ready, beat)
 
-def launch_spy(spy_id, position):
+def launch_spy(spy_id, position, on_ready=None, beat=None):
     spy = Spy(spy_id, position)
-    spy.run()
+    spy.run(on_ready, beat)
+
+def run_fast(duration, seed):
+    """Simula ``duration`` segundos en tiempo virtual, en este proceso y sin esperas."""
+    from simulation.virtual import run_virtual_simulation
+
+    logger.info(f"Simulando {duration:.0f}s en tiempo virtual (semilla {seed})")
+    metrics = run_virtual_simulation(
+        duration,
+        spy_hosts=max(1, config.SPY_HOSTS),
+        agent_hosts=max(1, config.NIGHT_AGENT_HOSTS),
+        seed=seed,
+        latency=config.VIRTUAL_LATENCY,
+        spy_population=config.SPY_POPULATION,
+        record_path=config.RECORD_TRAFFIC
+    )
+    for name, value in metrics.items():
+        logger.info(f"  {name}: {value:.2f}" if isinstance(value, float) else f"  {name}: {value}")
 
 def main():
     """Función principal que inicia todos los componentes del sistema"""
+    parser = argparse.ArgumentParser(description="Simulación del sistema de agentes encubiertos")
+    parser.add_argument("--fast", action="store_true",
+                        help="Simular en tiempo virtual, lo más rápido posible")
+    parser.add_argument("--duration", type=float, default=config.VIRTUAL_DURATION,
+                        help="Segundos de operación a simular con --fast")
+    parser.add_argument("--seed", type=int, default=config.VIRTUAL_SEED,
+                        help="Semilla para una simulación reproducible con --fast")
+    args = parser.parse_args()
+    if args.fast:
+        run_fast(args.duration, args.seed)
+        return
+
     logger.info("Iniciando simulación del sistema de agentes encubiertos")
 
-    # Lista para almacenar todos los procesos
+    # En modo "inmemory" el broker se aloja en un proceso gestor compartido por todos
+    broker_manager = None
+    if config.COMMUNICATION_MODE == CommunicationMode.INMEMORY and not config.INMEMORY_BROKER_ADDRESS:
+        from communication.inmemory.broker import start_broker_server
+        broker_manager = start_broker_server()
+        host, port = broker_manager.address
+        os.environ["INMEMORY_BROKER_ADDRESS"] = f"{host}:{port}"
+
+    # El forkserver se arranca con el primer proceso, ya con la dirección del broker
+    launcher = ComponentLauncher()
+    started = time.monotonic()
     processes = []
 
-    # Iniciar servidor central
-    logger.info("Iniciando servidor central...")
+    # Iniciar servidor central y esperar a que esté conectado
+    logger.info(f"Iniciando servidor central (arranque {launcher.start_method})...")
     try:
-        server_process = mp.Process(target=launch_server)
-        server_process.start()
-        if not server_process.is_alive():
-            raise RuntimeError("El proceso del servidor central no se inició correctamente")
-        processes.append(server_process)
+        launcher.start("server", launch_server)
     except Exception as e:
         logger.error(f"Error al iniciar el servidor central: {e}")
         return
+    if not launcher.wait_ready(["server"]):
+        logger.critical("El servidor central no se inició correctamente")
+        launcher.terminate()
+        if broker_manager:
+            broker_manager.shutdown()
+        return
 
-    # Dar tiempo al servidor para iniciar
-    time.sleep(2)
-
-    # Iniciar agentes nocturnos
-    logger.info(f"Iniciando {config.NUM_NIGHT_AGENTS} agentes nocturnos...")
-    for i in range(config.NUM_NIGHT_AGENTS):
-        try:
-            position = generate_random_position()
+    # Agentes nocturnos (repartidos entre NIGHT_AGENT_HOSTS procesos o uno por proceso)
+    # y espías (repartidos entre SPY_HOSTS procesos SpyHost o, con SPY_POPULATION,
+    # SpyPopulationHost, o uno por proceso), todos arrancados a la vez
+    components = []
+    spy_components = []
+    if config.NIGHT_AGENT_HOSTS > 0:
+        for i, agents in enumerate(partition_agents(config.NUM_NIGHT_AGENTS, config.NIGHT_AGENT_HOSTS)):
+            components.append((f"AGENTS{i+1:02d}", launch_night_agent_host, (f"AGENTS{i+1:02d}", agents)))
+    else:
+        for i in range(config.NUM_NIGHT_AGENTS):
             agent_id = f"AGENT{i+1:03d}"
-            agent_process = mp.Process(
-                target=launch_night_agent,
-                args=(agent_id, position)
-            )
-            agent_process.start()
-            if not agent_process.is_alive():
-                raise RuntimeError(f"El proceso del agente nocturno {agent_id} no se inició correctamente")
-            processes.append(agent_process)
-        except Exception as e:
-            logger.error(f"Error al iniciar el agente nocturno {i+1}: {e}")
-
-    # Iniciar espías
-    logger.info(f"Iniciando {config.NUM_SPIES} espías...")
-    for i in range(config.NUM_SPIES):
-        try:
-            position = generate_random_position()
+            components.append((agent_id, launch_night_agent, (agent_id, generate_random_position())))
+
+    if config.SPY_POPULATION or config.SPY_HOSTS > 0:
+        launch_host = launch_spy_host
+        if config.SPY_POPULATION:
+            # La población vectorizada (y numpy) solo se importa si se usa
+            from agents.spy_population import launch_spy_population_host as launch_host
+        for i, spies in enumerate(partition_spies(config.NUM_SPIES, max(1, config.SPY_HOSTS))):
+            spy_components.append((f"HOST{i+1:02d}", launch_host, (f"HOST{i+1:02d}", spies)))
+    else:
+        for i in range(config.NUM_SPIES):
             spy_id = f"SPY{i+1:03d}"
-            spy_process = mp.Process(
-                target=launch_spy,
-                args=(spy_id, position)
-            )
-            spy_process.start()
-            if not spy_process.is_alive():
-                raise RuntimeError(f"El proceso del espía {spy_id} no se inició correctamente")
-            processes.append(spy_process)
-        except Exception as e:
-            logger.error(f"Error al iniciar el espía {i+1}: {e}")
+            spy_components.append((spy_id, launch_spy, (spy_id, generate_random_position())))
+    agent_names = [name for name, _, _ in components]
+    spy_names = [name for name, _, _ in spy_components]
+    components += spy_components
+
+    logger.info(f"Iniciando {config.NUM_NIGHT_AGENTS} agentes nocturnos y {config.NUM_SPIES} espías "
+                f"en {len(components)} procesos...")
+    launcher.start_many(components)
+    launcher.wait_ready()
+    logger.info(f"{len(launcher.startup_times)}/{len(launcher.processes)} componentes listos "
+                f"en {time.monotonic() - started:.2f}s")
 
     # Iniciar visualización si está habilitada
     vis_process = start_visualization()
@@ -121,16 +178,21 @@ def main():
         except Exception as e:
             logger.error(f"Error al iniciar el módulo de visualización: {e}")
 
-    # Esperar a que el usuario termine la simulación
+    # Supervisar los procesos (reinicios e informes de consumo) hasta que el usuario termine
+    supervisor = ProcessSupervisor(launcher)
     try:
         logger.info("Simulación en ejecución. Presione Ctrl+C para terminar.")
-        for p in processes:
-            p.join()
+        supervisor.run()
     except KeyboardInterrupt:
         logger.info("Terminando simulación...")
+    finally:
+        # Primero dejan de llegar alertas, después terminan los agentes y el servidor el último
+        supervisor.shutdown([spy_names, agent_names, ["server"]])
         for p in processes:
             if p.is_alive():
                 p.terminate()
+        if broker_manager:
+            broker_manager.shutdown()
         logger.info("Simulación terminada correctamente")
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Este módulo implementa el servidor central que recibe alertas de los agentes en
 y las distribuye a los agentes nocturnos más adecuados según su ubicación geográfica.
 """
 
+import itertools
 import logging
 import random
 import threading
@@ -17,18 +18,21 @@ import queue
 import heapq
 
 import config
-from agents.night_agent import NightAgent
-from common.message import Message, TaskMessage
-from common.geo import calculate_distance
-from common.constants import EmergencyLevel, EmergencyType, AgentStatus
-from communication.rabbitmq.consumer import RabbitMQConsumer
-from communication.rabbitmq.publisher import RabbitMQPublisher
+from common.clock import get_clock
+from common.message import Message, AlertMessage, StatusMessage, TaskMessage
+from common.geo import calculate_distance, get_nearest_agent
+from common.constants import EmergencyLevel, EmergencyType, AgentStatus, CommunicationMode
+from communication.compression import compression_options
+from communication.factory import create_direct_server, get_consumer_class, get_publisher_class
+from communication.rabbitmq import topology
+from communication.recording import TrafficRecorder, recording_callback
 
 logger = logging.getLogger(__name__)
 
 # Constantes mejoradas para el sistema
 MAX_REASSIGNMENT_ATTEMPTS = 3  # Máximo número de intentos de reasignación de una alerta
 MAX_ASSIGNMENT_DISTANCE = 50.0  # Distancia máxima (en km) para asignar un agente
+ALERT_RETRY_DELAY = 5.0  # Segundos hasta reintentar una alerta sin agentes disponibles
 AGENT_TIMEOUT = 60  # Tiempo en segundos para marcar un agente como inactivo
 ALERT_PRIORITY_WEIGHTS = {
     EmergencyLevel.LOW: 1,
@@ -46,20 +50,29 @@ class CentralServer:
     las asigna a los agentes nocturnos disponibles más cercanos.
     """
 
-    def __init__(self, rabbitmq_host: str = 'localhost', rabbitmq_port: int = 5672):
+    def __init__(self, rabbitmq_host: str = 'localhost', rabbitmq_port: int = 5672, clock=None,
+                 record_path: Optional[str] = None):
         """
         Inicializa el servidor central.
 
         Args:
             rabbitmq_host: Host del servidor RabbitMQ.
             rabbitmq_port: Puerto del servidor RabbitMQ.
+            clock: Reloj con el que fechar y planificar; por defecto, el del proceso
+                (``common.clock``).
+            record_path: Fichero en el que grabar las alertas y estados recibidos
+                (``communication.recording``); None no graba.
         """
         self.rabbitmq_host = rabbitmq_host
         self.rabbitmq_port = rabbitmq_port
+        self.clock = clock or get_clock()
 
         # Cola prioritaria para alertas (usando heapq)
-        self.alert_queue = []  # Prioridad, tiempo, mensaje, routing_key
+        self.alert_queue = []  # Prioridad, tiempo, secuencia, mensaje, routing_key
+        self._alert_sequence = itertools.count()  # Desempate estable entre alertas
         self.alert_queue_lock = threading.RLock()
+        # Alertas sin agente disponible, pendientes de reintento: (hora, secuencia, mensaje, routing_key)
+        self.retry_queue = []
 
         # Estructura para mantener el registro de agentes nocturnos
         self.night_agents = {}  # Dict[str, Dict] - ID del agente -> detalles
@@ -78,6 +91,15 @@ class CentralServer:
         self.task_publisher = None
         self.admin_publisher = None
 
+        # Conexión directa de los agentes (modos "sockets", "unix" y "shm")
+        self.socket_server = None
+
+        # Grabación del tráfico recibido: los consumidores y el servidor directo
+        # entregan a estos manejadores, que graban cada mensaje antes de procesarlo
+        self.recorder = TrafficRecorder(record_path, clock=self.clock) if record_path else None
+        self._on_alert = recording_callback(self._handle_alert, self.recorder)
+        self._on_agent_status = recording_callback(self._handle_agent_status, self.recorder)
+
         # Control de estado del servidor
         self.running = False
         self.worker_threads = []
@@ -99,11 +121,18 @@ class CentralServer:
         # Cargar estado anterior si existe
         self._load_state()
 
-        # Iniciar conexiones RabbitMQ
-        #self._setup_rabbitmq()
+        # Iniciar conexiones con el broker
+        if config.COMMUNICATION_MODE in CommunicationMode.BROKER_MODES:
+            self._setup_rabbitmq()
+            if not self.running:
+                return
+        elif config.COMMUNICATION_MODE in CommunicationMode.DIRECT_MODES:
+            self._setup_sockets()
+            if not self.running:
+                return
 
         # Iniciar hilos de trabajo
-        #self._start_worker_threads()
+        self._start_worker_threads()
 
         logger.info("Servidor central en funcionamiento")
 
@@ -131,385 +160,414 @@ class CentralServer:
             self.alert_consumer.close()
         if self.agent_status_consumer:
             self.agent_status_consumer.close()
-        if self.task_publisher:
+        if self.task_publisher and self.task_publisher is not self.socket_server:
             self.task_publisher.close()
         if self.admin_publisher:
             self.admin_publisher.close()
+        if self.socket_server:
+            self.socket_server.stop()
+        if self.recorder:
+            self.recorder.close()
 
         logger.info("Servidor central detenido")
 
-    # def _setup_rabbitmq(self):
-    #     """
-    #     Configura las conexiones con RabbitMQ para consumir alertas y publicar tareas.
-    #     Implementa reconexión automática en caso de fallo.
-    #     """
-    #     max_retries = 5
-    #     retry_count = 0
-    #
-    #     while retry_count < max_retries:
-    #         try:
-    #             # Consumidor de alertas (publicadas por espías)
-    #             self.alert_consumer = RabbitMQConsumer(
-    #                 host=self.rabbitmq_host,
-    #                 port=self.rabbitmq_port,
-    #                 exchange='night_tasks',
-    #                 exchange_type='topic',
-    #                 queue_name='server_alerts_queue',
-    #                 binding_keys=['alert.*']
-    #             )
-    #
-    #             # Consumidor de estados de agentes nocturnos
-    #             self.agent_status_consumer = RabbitMQConsumer(
-    #                 host=self.rabbitmq_host,
-    #                 port=self.rabbitmq_port,
-    #                 exchange='night_tasks',
-    #                 exchange_type='topic',
-    #                 queue_name='server_status_queue',
-    #                 binding_keys=['status.*']
-    #             )
-    #
-    #             # Publicador de tareas para agentes nocturnos
-    #             self.task_publisher = RabbitMQPublisher(
-    #                 host=self.rabbitmq_host,
-    #                 port=self.rabbitmq_port,
-    #                 exchange='night_tasks',
-    #                 exchange_type='topic'
-    #             )
-    #
-    #             # Publicador de notificaciones administrativas
-    #             self.admin_publisher = RabbitMQPublisher(
-    #                 host=self.rabbitmq_host,
-    #                 port=self.rabbitmq_port,
-    #                 exchange='night_tasks',
-    #                 exchange_type='topic'
-    #             )
-    #
-    #             # Conectar todos
-    #             self.alert_consumer.connect()
-    #             self.agent_status_consumer.connect()
-    #             self.task_publisher.connect()
-    #             self.admin_publisher.connect()
-    #
-    #             # Iniciar consumo
-    #             self.alert_consumer.start_consuming(self._handle_alert)
-    #             self.agent_status_consumer.start_consuming(self._handle_agent_status)
-    #
-    #             logger.info("Conexión con RabbitMQ establecida correctamente")
-    #             break
-    #
-    #         except Exception as e:
-    #             retry_count += 1
-    #             backoff_time = min(30, 2 ** retry_count)
-    #             logger.error(f"Error al configurar RabbitMQ ({retry_count}/{max_retries}): {e}. "
-    #                          f"Reintentando en {backoff_time} segundos...")
-    #             time.sleep(backoff_time)
-    #
-    #     if retry_count >= max_retries:
-    #         logger.critical("No se pudo establecer conexión con RabbitMQ después de múltiples intentos.")
-    #         self.running = False
+    def _setup_rabbitmq(self):
+        """
+        Declara la topología de colas y configura los consumidores de alertas y de
+        estados y el publicador de tareas. Reintenta con espera exponencial en caso de fallo.
+        """
+        publisher_class = get_publisher_class()
+        consumer_class = get_consumer_class()
+        max_retries = 5
+        retry_count = 0
+
+        while retry_count < max_retries:
+            try:
+                # Los NightAgentHost declaran su propia cola de tareas; las colas por
+                # agente solo se usan con un proceso por agente
+                agent_ids = topology.default_agent_ids() if config.NIGHT_AGENT_HOSTS <= 0 else ()
+                if not topology.bootstrap(agent_ids):
+                    raise ConnectionError("No se pudo declarar la topología")
+
+                pool = None
+                if config.COMMUNICATION_MODE == CommunicationMode.RABBITMQ and config.RABBITMQ_USE_CONNECTION_POOL:
+                    from communication.rabbitmq.connection_pool import get_connection_pool
+                    pool = get_connection_pool()
+
+                # Consumidor de alertas (publicadas por espías en alert.<geohash>)
+                self.alert_consumer = consumer_class(
+                    host=self.rabbitmq_host,
+                    port=self.rabbitmq_port,
+                    exchange=topology.EXCHANGE,
+                    exchange_type=topology.EXCHANGE_TYPE,
+                    queue_name=topology.SERVER_ALERTS_QUEUE,
+                    binding_keys=[topology.ALERT_BINDING_KEY],
+                    queue_arguments=topology.queue_arguments(priority=True),
+                    max_redeliveries=config.RABBITMQ_MAX_REDELIVERIES,
+                    prefetch_count=config.RABBITMQ_PREFETCH_COUNT,
+                    worker_count=config.RABBITMQ_CONSUMER_WORKERS,
+                    worker_type=config.RABBITMQ_CONSUMER_WORKER_TYPE,
+                    connection_pool=pool
+                )
+
+                # Consumidor de estados de agentes nocturnos (status.agent.<id>)
+                self.agent_status_consumer = consumer_class(
+                    host=self.rabbitmq_host,
+                    port=self.rabbitmq_port,
+                    exchange=topology.EXCHANGE,
+                    exchange_type=topology.EXCHANGE_TYPE,
+                    queue_name=topology.SERVER_STATUS_QUEUE,
+                    binding_keys=[topology.STATUS_BINDING_KEY],
+                    queue_arguments=topology.queue_arguments(),
+                    max_redeliveries=config.RABBITMQ_MAX_REDELIVERIES,
+                    connection_pool=pool
+                )
+
+                # Publicador de tareas para agentes nocturnos (task.agent.<id>)
+                self.task_publisher = publisher_class(
+                    host=self.rabbitmq_host,
+                    port=self.rabbitmq_port,
+                    exchange=topology.EXCHANGE,
+                    exchange_type=topology.EXCHANGE_TYPE,
+                    connection_pool=pool,
+                    **compression_options()
+                )
+
+                # Conectar todos
+                if not (self.alert_consumer.connect() and self.agent_status_consumer.connect()
+                        and self.task_publisher.connect()):
+                    raise ConnectionError("No se pudo conectar con el broker")
+
+                # Iniciar consumo
+                self.alert_consumer.start_consuming(self._on_alert)
+                self.agent_status_consumer.start_consuming(self._on_agent_status)
+
+                logger.info("Conexión con el broker establecida correctamente")
+                return
+
+            except Exception as e:
+                retry_count += 1
+                backoff_time = min(30, 2 ** retry_count)
+                logger.error(f"Error al configurar el broker ({retry_count}/{max_retries}): {e}. "
+                             f"Reintentando en {backoff_time} segundos...")
+                self.clock.sleep(backoff_time)
+
+        logger.critical("No se pudo establecer conexión con el broker después de múltiples intentos.")
+        self.running = False
+
+    def _setup_sockets(self):
+        """
+        Arranca el servidor de conexión directa (sockets TCP, de dominio Unix o
+        memoria compartida): recibe alertas y estados de los agentes y hace de
+        publicador de tareas (cada tarea se envía solo a su agente).
+        """
+        self.socket_server = create_direct_server(self._handle_socket_message)
+        if not self.socket_server.start():
+            logger.critical(f"No se pudo iniciar el servidor en {self.socket_server.endpoint}")
+            self.running = False
+            return
+        self.task_publisher = self.socket_server
+
+    def _handle_socket_message(self, message: Message, address: Tuple[str, int]):
+        """
+        Despacha un mensaje recibido por sockets al mismo manejador que en los brokers.
+
+        Args:
+            message: El mensaje recibido.
+            address: La dirección del cliente que lo envió.
+        """
+        if isinstance(message, AlertMessage):
+            self._on_alert(message, topology.alert_routing_key(message.position))
+        elif isinstance(message, StatusMessage):
+            self._on_agent_status(message, topology.status_routing_key(message.sender_id))
+        else:
+            logger.warning(f"Mensaje {message.message_type} no esperado desde {address[0]}:{address[1]}")
+
+    def _start_worker_threads(self):
+        """
+        Inicia los hilos de trabajo para procesar alertas y persistir el estado.
+        """
+        # Hilo para procesar la cola de alertas
+        alert_processor = threading.Thread(
+            target=self._process_alerts,
+            daemon=True,
+            name="AlertProcessor"
+        )
+        self.worker_threads.append(alert_processor)
+        alert_processor.start()
+
+        # Hilo para persistencia de datos periódica
+        state_persistence = threading.Thread(
+            target=self._periodic_state_save,
+            daemon=True,
+            name="StatePersistence"
+        )
+        self.worker_threads.append(state_persistence)
+        state_persistence.start()
+
+    def _handle_alert(self, message: AlertMessage, routing_key: str):
+        """
+        Maneja las alertas recibidas de los agentes encubiertos.
+
+        Args:
+            message: El mensaje de alerta.
+            routing_key: La clave de enrutamiento del mensaje (alert.<geohash>).
+        """
+        try:
+            logger.info(f"Alerta recibida - ID: {message.message_id}, Tipo: {message.emergency_type}, "
+                        f"Nivel: {message.emergency_level}, Celda: {routing_key}")
+
+            # Prioridad numérica: en el heap se guarda negada (mayor peso = antes)
+            priority_value = ALERT_PRIORITY_WEIGHTS.get(message.emergency_level, 1)
+
+            # Si es una reasignación, aumentar la prioridad para evitar postergación indefinida
+            priority_value += self.assignment_attempts.get(message.message_id, 0)
+
+            with self.alert_queue_lock:
+                heapq.heappush(
+                    self.alert_queue,
+                    (-priority_value, self.clock.time(), next(self._alert_sequence), message, routing_key)
+                )
+
+            # Inicializar o incrementar contador de intentos
+            if message.message_id not in self.assignment_attempts:
+                self.assignment_attempts[message.message_id] = 0
+            else:
+                self.assignment_attempts[message.message_id] += 1
+
+        except Exception as e:
+            logger.error(f"Error al manejar alerta: {e}")
+
+    def _handle_agent_status(self, message: StatusMessage, routing_key: str):
+        """
+        Maneja las actualizaciones de estado de los agentes nocturnos.
+
+        Args:
+            message: El mensaje de estado del agente.
+            routing_key: La clave de enrutamiento del mensaje (status.agent.<id>[.completed]).
+        """
+        try:
+            agent_id = message.sender_id
+            status = message.status
+            location = message.position
+
+            with self.night_agents_lock:
+                if agent_id not in self.night_agents:
+                    # Nuevo agente
+                    self.night_agents[agent_id] = {
+                        'status': status,
+                        'location': location,
+                        'last_update': self.clock.time(),
+                        'current_task': None if status == AgentStatus.AVAILABLE else message.current_task_id,
+                        'completed_tasks': 0,
+                        'successful_tasks': 0,
+                        'workload': 0.5  # Factor de carga de trabajo (0-1)
+                    }
+                    logger.info(f"Nuevo agente nocturno registrado - ID: {agent_id}, "
+                                f"Ubicación: {location}, Estado: {status}")
+                else:
+                    # Actualizar agente existente
+                    old_status = self.night_agents[agent_id]['status']
+                    self.night_agents[agent_id].update({
+                        'status': status,
+                        'location': location,
+                        'last_update': self.clock.time(),
+                        'current_task': None if status == AgentStatus.AVAILABLE else message.current_task_id
+                    })
+                    if old_status != status:
+                        logger.info(f"Agente nocturno {agent_id} cambió estado: {old_status} -> {status}")
+
+                # Un estado DISPONIBLE con tarea indica la finalización de esa tarea
+                task_id = message.current_task_id
+                if status == AgentStatus.AVAILABLE and task_id:
+                    with self.active_alerts_lock:
+                        if task_id in self.active_alerts:
+                            logger.info(f"Tarea completada - ID: {task_id} por agente {agent_id}")
+                            self.active_alerts.pop(task_id)
+
+                            # Actualizar estadísticas del agente
+                            self.night_agents[agent_id]['completed_tasks'] += 1
+                            self.night_agents[agent_id]['successful_tasks'] += 1
+                            self._update_agent_workload(agent_id)
+
+                            # Eliminar intentos de asignación para esta alerta
+                            self.assignment_attempts.pop(task_id, None)
+
+        except Exception as e:
+            logger.error(f"Error al manejar actualización de estado de agente: {e}")
+
+    def _update_agent_workload(self, agent_id: str):
+        """
+        Actualiza el factor de carga de trabajo para un agente.
+
+        Args:
+            agent_id: ID del agente nocturno.
+        """
+        if agent_id not in self.night_agents:
+            return
+
+        # Implementación simple - basada en la razón de tareas exitosas
+        agent = self.night_agents[agent_id]
+        if agent['completed_tasks'] > 0:
+            success_rate = agent['successful_tasks'] / agent['completed_tasks']
+            # Ajustar workload - agentes con mayor tasa de éxito reciben más trabajo
+            agent['workload'] = min(1.0, max(0.1, success_rate))
+        else:
+            # Para nuevos agentes, usar valor neutro
+            agent['workload'] = 0.5
+
+    def _process_alerts(self):
+        """
+        Procesa las alertas en la cola prioritaria y asigna agentes nocturnos.
+        Este método se ejecuta en un hilo separado.
+        """
+        while self.running:
+            try:
+                self._release_due_retries()
+                if not self.process_next_alert():
+                    self.clock.sleep(0.5)  # Esperar si no hay alertas
+            except Exception as e:
+                logger.error(f"Error en el procesamiento de alertas: {e}")
+                self.clock.sleep(1)  # Breve pausa para evitar ciclos de error constantes
+
+    def process_next_alert(self) -> bool:
+        """
+        Atiende la alerta de mayor prioridad: le asigna un agente o programa su reintento.
+
+        Returns:
+            bool: False si la cola de alertas estaba vacía.
+        """
+        # Obtener la alerta con mayor prioridad
+        with self.alert_queue_lock:
+            item = heapq.heappop(self.alert_queue) if self.alert_queue else None
+        if item is None:
+            return False
+        _, timestamp, _, alert, routing_key = item
+
+        # Registrar o actualizar la alerta
+        with self.active_alerts_lock:
+            alert_info = self.active_alerts.get(alert.message_id)
+            if alert_info is None:
+                self.active_alerts[alert.message_id] = {
+                    'alert': alert,
+                    'received_time': timestamp,
+                    'assigned_agent': None,
+                    'status': 'pending',
+                    'attempts': self.assignment_attempts.get(alert.message_id, 0)
+                }
+            elif alert_info['status'] == 'assigned':
+                # Ya asignada, ignorar
+                return True
+            else:
+                alert_info['attempts'] += 1
+                alert_info['status'] = 'pending'
+
+        # Encontrar el agente nocturno más adecuado
+        if self._assign_agent_to_alert(alert):
+            return True
+
+        logger.warning(f"No hay agentes nocturnos disponibles para la alerta {alert.message_id}")
+        if self.assignment_attempts.get(alert.message_id, 0) < MAX_REASSIGNMENT_ATTEMPTS:
+            # Reintentar más tarde sin bloquear el procesamiento del resto de alertas
+            with self.alert_queue_lock:
+                heapq.heappush(self.retry_queue, (self.clock.monotonic() + ALERT_RETRY_DELAY,
+                                                  next(self._alert_sequence), alert, routing_key))
+        else:
+            logger.error(f"Alerta {alert.message_id} no puede ser asignada después de "
+                         f"{self.assignment_attempts[alert.message_id]} intentos")
+            with self.active_alerts_lock:
+                self.active_alerts.pop(alert.message_id, None)
+            self.assignment_attempts.pop(alert.message_id, None)
+        return True
+
+    def _release_due_retries(self, now: Optional[float] = None) -> None:
+        """Devuelve a la cola de alertas los reintentos cuya hora ya ha llegado."""
+        now = self.clock.monotonic() if now is None else now
+        due = []
+        with self.alert_queue_lock:
+            while self.retry_queue and self.retry_queue[0][0] <= now:
+                due.append(heapq.heappop(self.retry_queue))
+        for _, _, alert, routing_key in due:
+            self._handle_alert(alert, routing_key)
+
+    def next_due(self) -> Optional[float]:
+        """
+        Hora (del reloj monótono) en la que el servidor tendrá trabajo: ahora si hay
+        alertas en cola, la del primer reintento si no, o None si no hay nada pendiente.
+        """
+        with self.alert_queue_lock:
+            if self.alert_queue:
+                return self.clock.monotonic()
+            return self.retry_queue[0][0] if self.retry_queue else None
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """
+        Libera los reintentos vencidos y atiende todas las alertas en cola, sin
+        esperar (lo usa el motor de eventos discretos en lugar del hilo de alertas).
+
+        Returns:
+            int: Número de alertas atendidas.
+        """
+        self._release_due_retries(now)
+        processed = 0
+        while self.process_next_alert():
+            processed += 1
+        return processed
+
+    def _assign_agent_to_alert(self, alert: AlertMessage) -> bool:
+        """
+        Asigna a una alerta el agente nocturno disponible más cercano y le envía la
+        tarea por su clave propia (task.agent.<id>).
+
+        Args:
+            alert: La alerta a asignar.
+
+        Returns:
+            bool: True si se asignó un agente, False si no hay agentes disponibles.
+        """
+        with self.night_agents_lock:
+            available_agents = {
+                agent_id: tuple(info['location']) for agent_id, info in self.night_agents.items()
+                if info['status'] == AgentStatus.AVAILABLE
+            }
+
+        selected_agent, distance = get_nearest_agent(alert.position, available_agents)
+        if selected_agent is None or distance > MAX_ASSIGNMENT_DISTANCE:
+            return False
+
+        task_message = TaskMessage(
+            alert_id=alert.message_id,
+            position=alert.position,
+            emergency_level=alert.emergency_level,
+            emergency_type=alert.emergency_type,
+            description=alert.description,
+            target_agent_id=selected_agent,
+            estimated_duration=random.randint(config.MIN_TASK_DURATION, config.MAX_TASK_DURATION),
+            sender_id="central_server"
+        )
+
+        success = self.task_publisher.publish_message(
+            task_message,
+            routing_key=topology.task_routing_key(selected_agent)
+        )
+
+        if not success:
+            logger.error(f"Error al enviar tarea al agente {selected_agent}")
+            return False
+
+        logger.info(f"Alerta {alert.message_id} asignada al agente {selected_agent} ({distance:.2f} km)")
+
+        with self.night_agents_lock:
+            self.night_agents[selected_agent]['status'] = AgentStatus.BUSY
+            self.night_agents[selected_agent]['current_task'] = alert.message_id
+
+        with self.active_alerts_lock:
+            self.active_alerts[alert.message_id]['assigned_agent'] = selected_agent
+            self.active_alerts[alert.message_id]['status'] = 'assigned'
+            self.active_alerts[alert.message_id]['assigned_time'] = self.clock.time()
+
+        return True
 
-    # def _start_worker_threads(self):
-    #     """
-    #     Inicia los hilos de trabajo para procesar alertas y monitorear agentes.
-    #     """
-    #     # Hilo para procesar la cola de alertas
-    #     alert_processor = threading.Thread(
-    #         target=self._process_alerts,
-    #         daemon=True,
-    #         name="AlertProcessor"
-    #     )
-    #     self.worker_threads.append(alert_processor)
-    #     alert_processor.start()
-    #
-    #     # Hilo para monitorear agentes nocturnos y verificar su disponibilidad
-    #     agent_monitor = threading.Thread(
-    #         target=self._monitor_agents,
-    #         daemon=True,
-    #         name="AgentMonitor"
-    #     )
-    #     self.worker_threads.append(agent_monitor)
-    #     agent_monitor.start()
-    #
-    #     # Hilo para persistencia de datos periódica
-    #     state_persistence = threading.Thread(
-    #         target=self._periodic_state_save,
-    #         daemon=True,
-    #         name="StatePersistence"
-    #     )
-    #     self.worker_threads.append(state_persistence)
-    #     state_persistence.start()
-    #
-    # def _handle_alert(self, message: Message, routing_key: str):
-    #     """
-    #     Maneja las alertas recibidas de los agentes encubiertos.
-    #
-    #     Args:
-    #         message: El mensaje de alerta.
-    #         routing_key: La clave de enrutamiento del mensaje.
-    #     """
-    #     try:
-    #         logger.info(f"Alerta recibida - ID: {message.message_id}, Tipo: {message.alert_type}, "
-    #                     f"Prioridad: {message.priority}, Ubicación: ({message.latitude}, {message.longitude})")
-    #
-    #         # Calcular prioridad numérica para la cola prioritaria
-    #         priority_value = ALERT_PRIORITY_WEIGHTS.get(message.priority, 1)
-    #
-    #         # Si es una reasignación, reducir la prioridad para evitar hambruna
-    #         if message.message_id in self.assignment_attempts:
-    #             # Aumentar prioridad por cada intento anterior para evitar postergación indefinida
-    #             priority_value = max(1, priority_value - self.assignment_attempts[message.message_id])
-    #
-    #         # Agregar a la cola prioritaria (menor número = mayor prioridad)
-    #         with self.alert_queue_lock:
-    #             heapq.heappush(
-    #                 self.alert_queue,
-    #                 (priority_value, time.time(), message, routing_key)
-    #             )
-    #
-    #         # Inicializar o incrementar contador de intentos
-    #         if message.message_id not in self.assignment_attempts:
-    #             self.assignment_attempts[message.message_id] = 0
-    #         else:
-    #             self.assignment_attempts[message.message_id] += 1
-    #
-    #     except Exception as e:
-    #         logger.error(f"Error al manejar alerta: {e}")
-    #
-    # def _handle_agent_status(self, message: Message, routing_key: str):
-    #     """
-    #     Maneja las actualizaciones de estado de los agentes nocturnos.
-    #
-    #     Args:
-    #         message: El mensaje de estado del agente.
-    #         routing_key: La clave de enrutamiento del mensaje.
-    #     """
-    #     try:
-    #         agent_id = message.agent_id
-    #         status = message.status
-    #         location = message.position
-    #
-    #         with self.night_agents_lock:
-    #             if agent_id not in self.night_agents:
-    #                 # Nuevo agente
-    #                 self.night_agents[agent_id] = {
-    #                     'status': status,
-    #                     'location': location,
-    #                     'last_update': time.time(),
-    #                     'current_task': None if status == AgentStatus.AVAILABLE else message.task_id,
-    #                     'completed_tasks': 0,
-    #                     'successful_tasks': 0,
-    #                     'workload': 0.0  # Factor de carga de trabajo (0-1)
-    #                 }
-    #                 logger.info(f"Nuevo agente nocturno registrado - ID: {agent_id}, "
-    #                             f"Ubicación: {location}, Estado: {status}")
-    #             else:
-    #                 # Actualizar agente existente
-    #                 old_status = self.night_agents[agent_id]['status']
-    #                 self.night_agents[agent_id].update({
-    #                     'status': status,
-    #                     'location': location,
-    #                     'last_update': time.time(),
-    #                     'current_task': None if status == AgentStatus.AVAILABLE else message.task_id
-    #                 })
-    #
-    #                 if old_status != status:
-    #                     logger.info(f"Agente nocturno {agent_id} cambió estado: {old_status} -> {status}")
-    #
-    #                     # Si un agente ha completado una tarea, actualizar la alerta correspondiente
-    #                     if status == AgentStatus.AVAILABLE and old_status == AgentStatus.BUSY:
-    #                         task_id = message.task_id
-    #                         with self.active_alerts_lock:
-    #                             if task_id in self.active_alerts:
-    #                                 logger.info(f"Tarea completada - ID: {task_id} por agente {agent_id}")
-    #                                 self.active_alerts.pop(task_id)
-    #
-    #                                 # Actualizar estadísticas del agente
-    #                                 self.night_agents[agent_id]['completed_tasks'] += 1
-    #                                 if message.success:  # Si el agente informa éxito
-    #                                     self.night_agents[agent_id]['successful_tasks'] += 1
-    #
-    #                                 # Actualizar factor de carga de trabajo
-    #                                 self._update_agent_workload(agent_id)
-    #
-    #                                 # Eliminar intentos de asignación para esta alerta
-    #                                 if task_id in self.assignment_attempts:
-    #                                     del self.assignment_attempts[task_id]
-    #
-    #     except Exception as e:
-    #         logger.error(f"Error al manejar actualización de estado de agente: {e}")
-    #
-    # def _update_agent_workload(self, agent_id: str):
-    #     """
-    #     Actualiza el factor de carga de trabajo para un agente.
-    #
-    #     Args:
-    #         agent_id: ID del agente nocturno.
-    #     """
-    #     if agent_id not in self.night_agents:
-    #         return
-    #
-    #     # Implementación simple - basada en la razón de tareas exitosas
-    #     agent = self.night_agents[agent_id]
-    #     if agent['completed_tasks'] > 0:
-    #         success_rate = agent['successful_tasks'] / agent['completed_tasks']
-    #         # Ajustar workload - agentes con mayor tasa de éxito reciben más trabajo
-    #         agent['workload'] = min(1.0, max(0.1, success_rate))
-    #     else:
-    #         # Para nuevos agentes, usar valor neutro
-    #         agent['workload'] = 0.5
-    #
-    # def _process_alerts(self):
-    #     """
-    #     Procesa las alertas en la cola prioritaria y asigna agentes nocturnos.
-    #     Este método se ejecuta en un hilo separado.
-    #     """
-    #     while self.running:
-    #         try:
-    #             # Obtener alerta de la cola prioritaria
-    #             with self.alert_queue_lock:
-    #                 if not self.alert_queue:
-    #                     time.sleep(0.5)  # Esperar si no hay alertas
-    #                     continue
-    #
-    #                 # Obtener la alerta con mayor prioridad (menor valor numérico)
-    #                 priority, timestamp, alert, routing_key = heapq.heappop(self.alert_queue)
-    #
-    #             # Verificar si la alerta ya está en proceso o es demasiado antigua
-    #             with self.active_alerts_lock:
-    #                 if alert.message_id in self.active_alerts:
-    #                     if self.active_alerts[alert.message_id]['status'] == 'assigned':
-    #                         # Ya asignada, ignorar
-    #                         continue
-    #
-    #                 # Comprobar si la alerta es demasiado antigua (más de 30 minutos)
-    #                 alert_age = time.time() - timestamp
-    #                 if alert_age > 1800:  # 30 minutos
-    #                     logger.warning(f"Alerta {alert.message_id} expirada después de {alert_age:.1f} segundos")
-    #
-    #                     # Notificar al administrador sobre la alerta sin atender
-    #                     admin_message = Message(
-    #                         message_id=f"admin_{alert.message_id}",
-    #                         message_type='admin.alert_expired',
-    #                         details=f"La alerta {alert.message_id} ha expirado sin ser atendida",
-    #                         alert_type=alert.alert_type,
-    #                         priority=alert.priority,
-    #                         latitude=alert.latitude,
-    #                         longitude=alert.longitude,
-    #                         created_at=time.time()
-    #                     )
-    #                     self.admin_publisher.publish_message(
-    #                         admin_message,
-    #                         routing_key='admin.alert_expired'
-    #                     )
-    #
-    #                     # Si hay muchos intentos de asignación, desechar la alerta
-    #                     if self.assignment_attempts.get(alert.message_id, 0) >= MAX_REASSIGNMENT_ATTEMPTS:
-    #                         logger.error(f"Alerta {alert.message_id} descartada después de "
-    #                                      f"{self.assignment_attempts[alert.message_id]} intentos fallidos")
-    #                         if alert.message_id in self.assignment_attempts:
-    #                             del self.assignment_attempts[alert.message_id]
-    #                         continue
-    #
-    #             # Registrar o actualizar la alerta
-    #             with self.active_alerts_lock:
-    #                 if alert.message_id not in self.active_alerts:
-    #                     self.active_alerts[alert.message_id] = {
-    #                         'alert': alert,
-    #                         'received_time': timestamp,
-    #                         'assigned_agent': None,
-    #                         'status': 'pending',
-    #                         'attempts': self.assignment_attempts.get(alert.message_id, 0)
-    #                     }
-    #                 else:
-    #                     self.active_alerts[alert.message_id]['attempts'] += 1
-    #                     self.active_alerts[alert.message_id]['status'] = 'pending'
-    #
-    #             # Encontrar el agente nocturno más adecuado
-    #             assigned = self._assign_agent_to_alert(alert)
-    #
-    #             if not assigned:
-    #                 logger.warning(f"No hay agentes nocturnos disponibles para la alerta {alert.message_id}")
-    #
-    #                 # Verificar si hemos alcanzado el límite de intentos
-    #                 if self.assignment_attempts.get(alert.message_id, 0) < MAX_REASSIGNMENT_ATTEMPTS:
-    #                     # Volver a poner en la cola con delay y mayor prioridad
-    #                     time.sleep(5)  # Esperar 5 segundos antes de reintentar
-    #                     self._handle_alert(alert, routing_key)
-    #                 else:
-    #                     logger.error(f"Alerta {alert.message_id} no puede ser asignada después de "
-    #                                  f"{self.assignment_attempts[alert.message_id]} intentos")
-    #
-    #                     # Notificar al administrador
-    #                     admin_message = Message(
-    #                         message_id=f"admin_{alert.message_id}",
-    #                         message_type='admin.alert_unassignable',
-    #                         details=f"La alerta {alert.message_id} no puede ser asignada después de "
-    #                                 f"{self.assignment_attempts[alert.message_id]} intentos",
-    #                         alert_type=alert.alert_type,
-    #                         priority=alert.priority,
-    #                         created_at=time.time()
-    #                     )
-    #                     self.admin_publisher.publish_message(
-    #                         admin_message,
-    #                         routing_key='admin.alert_unassignable'
-    #                     )
-    #
-    #         except Exception as e:
-    #             logger.error(f"Error en el procesamiento de alertas: {e}")
-    #             time.sleep(1)  # Breve pausa para evitar ciclos de error constantes
-    #
-    # def _assign_agent_to_alert(self, alert: Message) -> bool:
-    #     """
-    #     Asigna aleatoriamente un agente nocturno disponible a una alerta.
-    #
-    #     Args:
-    #         alert: La alerta a asignar.
-    #
-    #     Returns:
-    #         bool: True si se asignó un agente, False si no hay agentes disponibles.
-    #     """
-    #     with self.night_agents_lock:
-    #         available_agents = [
-    #             agent_id for agent_id, info in self.night_agents.items()
-    #             if info['status'] == AgentStatus.AVAILABLE
-    #         ]
-    #
-    #     if not available_agents:
-    #         return False
-    #
-    #     # Seleccionar uno al azar
-    #     selected_agent = random.choice(available_agents)
-    #
-    #     task_message = TaskMessage(
-    #         alert_id=alert.message_id,
-    #         position=(alert.latitude, alert.longitude),
-    #         emergency_level=alert.priority,
-    #         emergency_type=alert.alert_type,
-    #         description=alert.details,
-    #         target_agent_id=selected_agent,
-    #         estimated_duration=random.randint(10, 30),  # o según config
-    #         sender_id="central_server"
-    #     )
-    #
-    #     success = self.task_publisher.publish_message(task_message, routing_key="task.broadcast")
-    #
-    #     if not success:
-    #         logger.error(f"Error al enviar tarea al agente {selected_agent}")
-    #         return False
-    #
-    #     logger.info(f"Alerta {alert.message_id} asignada aleatoriamente al agente {selected_agent}")
-    #
-    #     with self.night_agents_lock:
-    #         self.night_agents[selected_agent]['status'] = AgentStatus.BUSY
-    #         self.night_agents[selected_agent]['current_task'] = alert.message_id
-    #
-    #     with self.active_alerts_lock:
-    #         self.active_alerts[alert.message_id]['assigned_agent'] = selected_agent
-    #         self.active_alerts[alert.message_id]['status'] = 'assigned'
-    #         self.active_alerts[alert.message_id]['assigned_time'] = time.time()
-    #
-    #     return True
-    #
     # def _monitor_agents(self):
     #     """
     #     Monitorea el estado de los agentes nocturnos y maneja agentes inactivos.
@@ -609,71 +667,71 @@ class CentralServer:
     #     except Exception as e:
     #         logger.error(f"Error al notificar al administrador sobre el agente inactivo {agent_id}: {e}")
     #
-    # def _periodic_state_save(self):
-    #     """
-    #     Guarda periódicamente el estado del servidor.
-    #     Este método se ejecuta en un hilo separado.
-    #     """
-    #     while self.running:
-    #         try:
-    #             current_time = time.time()
-    #
-    #             # Guardar estado cada STATE_SAVE_INTERVAL segundos
-    #             if current_time - self.last_state_save > STATE_SAVE_INTERVAL:
-    #                 self._save_state()
-    #                 self.last_state_save = current_time
-    #
-    #             time.sleep(60)  # Comprobar cada minuto
-    #
-    #         except Exception as e:
-    #             logger.error(f"Error al guardar estado periódicamente: {e}")
-    #             time.sleep(10)
-    #
-    # def _save_state(self):
-    #     """
-    #     Guarda el estado actual del servidor en un archivo JSON.
-    #     """
-    #     try:
-    #         state = {
-    #             'timestamp': time.time(),
-    #             'night_agents': {},
-    #             'active_alerts': {},
-    #             'assignment_attempts': self.assignment_attempts
-    #         }
-    #
-    #         # Guardar información de agentes
-    #         with self.night_agents_lock:
-    #             for agent_id, agent_info in self.night_agents.items():
-    #                 # Crear copia de la información del agente sin objetos no serializables
-    #                 agent_data = {
-    #                     'status': agent_info['status'].value if hasattr(agent_info['status'], 'value') else agent_info['status'],
-    #                     'location': agent_info['location'],
-    #                     'last_update': agent_info['last_update'],
-    #                     'current_task': agent_info['current_task'],
-    #                     'completed_tasks': agent_info.get('completed_tasks', 0),
-    #                     'successful_tasks': agent_info.get('successful_tasks', 0),
-    #                     'workload': agent_info.get('workload', 0.5)
-    #                 }
-    #                 state['night_agents'][agent_id] = agent_data
-    #
-    #         # Guardar información de alertas activas
-    #         with self.active_alerts_lock:
-    #             for alert_id, alert_info in self.active_alerts.items():
-    #                 state['active_alerts'][alert_id] = {
-    #                     'status': alert_info['status'],
-    #                     'assigned_agent': alert_info['assigned_agent'],
-    #                     'received_time': alert_info['received_time'],
-    #                     'attempts': alert_info.get('attempts', 0)
-    #                 }
-    #
-    #         # Escribir en archivo JSON
-    #         with open(STATE_PERSISTENCE_FILE, "w", encoding="utf-8") as f:
-    #             json.dump(state, f, indent=2)
-    #             logger.info("Estado del servidor guardado correctamente en disco.")
-    #
-    #     except Exception as e:
-    #         logger.error(f"Error al guardar estado del servidor: {e}")
-    #
+    def _periodic_state_save(self):
+        """
+        Guarda periódicamente el estado del servidor.
+        Este método se ejecuta en un hilo separado.
+        """
+        while self.running:
+            try:
+                current_time = self.clock.time()
+
+                # Guardar estado cada STATE_SAVE_INTERVAL segundos
+                if current_time - self.last_state_save > STATE_SAVE_INTERVAL:
+                    self._save_state()
+                    self.last_state_save = current_time
+
+                self.clock.sleep(60)  # Comprobar cada minuto
+
+            except Exception as e:
+                logger.error(f"Error al guardar estado periódicamente: {e}")
+                self.clock.sleep(10)
+
+    def _save_state(self):
+        """
+        Guarda el estado actual del servidor en un archivo JSON.
+        """
+        try:
+            state = {
+                'timestamp': self.clock.time(),
+                'night_agents': {},
+                'active_alerts': {},
+                'assignment_attempts': self.assignment_attempts
+            }
+
+            # Guardar información de agentes
+            with self.night_agents_lock:
+                for agent_id, agent_info in self.night_agents.items():
+                    # Crear copia de la información del agente sin objetos no serializables
+                    agent_data = {
+                        'status': agent_info['status'].value if hasattr(agent_info['status'], 'value') else agent_info['status'],
+                        'location': agent_info['location'],
+                        'last_update': agent_info['last_update'],
+                        'current_task': agent_info['current_task'],
+                        'completed_tasks': agent_info.get('completed_tasks', 0),
+                        'successful_tasks': agent_info.get('successful_tasks', 0),
+                        'workload': agent_info.get('workload', 0.5)
+                    }
+                    state['night_agents'][agent_id] = agent_data
+
+            # Guardar información de alertas activas
+            with self.active_alerts_lock:
+                for alert_id, alert_info in self.active_alerts.items():
+                    state['active_alerts'][alert_id] = {
+                        'status': alert_info['status'],
+                        'assigned_agent': alert_info['assigned_agent'],
+                        'received_time': alert_info['received_time'],
+                        'attempts': alert_info.get('attempts', 0)
+                    }
+
+            # Escribir en archivo JSON
+            with open(STATE_PERSISTENCE_FILE, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+                logger.info("Estado del servidor guardado correctamente en disco.")
+
+        except Exception as e:
+            logger.error(f"Error al guardar estado del servidor: {e}")
+
     def _load_state(self):
         """
         Carga el estado previo del servidor desde archivo JSON (si existe).
@@ -0,0 +1,20 @@
+"""
+Simulación de eventos discretos en tiempo virtual.
+"""
+
+import importlib
+
+# Importación diferida: los procesos que arranca ``simulation.launcher`` no cargan la
+# simulación virtual (numpy, servidor y hosts de agentes) al importar el paquete
+_LAZY = {
+    "SimulationEngine": "simulation.engine",
+    "LoopbackPublisher": "simulation.virtual",
+    "VirtualSimulation": "simulation.virtual",
+    "run_virtual_simulation": "simulation.virtual",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
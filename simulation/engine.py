@@ -0,0 +1,114 @@
+"""
+Motor de simulación de eventos discretos con reloj virtual.
+
+El motor no tiene hilos ni esperas: repite "buscar la fuente de eventos con la hora
+más temprana, adelantar el reloj virtual hasta ella y dejar que atienda lo que haya
+vencido". Las fuentes son los mismos componentes que en ejecución real planifican
+con un montículo de temporizadores (``SpyHost``, ``NightAgentHost``) y el servidor
+central (``CentralServer.run_pending``); basta con que compartan el ``VirtualClock``
+del motor. Como el tiempo salta de evento en evento, una hora de operación se simula
+en lo que cuesta procesar sus mensajes, y con la misma semilla el resultado es idéntico.
+
+Una fuente de eventos es cualquier objeto con:
+
+- ``next_due() -> Optional[float]``: hora (del reloj monótono) de su próximo trabajo.
+- ``run_pending(now) -> int``: atiende lo vencido en ``now``.
+"""
+
+import heapq
+import itertools
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common.clock import VirtualClock
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationEngine:
+    """Bucle de eventos discretos sobre un reloj virtual."""
+
+    def __init__(self, clock: Optional[VirtualClock] = None):
+        """
+        Args:
+            clock: Reloj virtual que adelanta el motor; por defecto, uno nuevo.
+        """
+        self.clock = clock or VirtualClock()
+        self.sources: List[Any] = []
+        # Eventos sueltos: (hora, secuencia, función, argumentos)
+        self._events: List[Tuple[float, int, Callable, tuple]] = []
+        self._sequence = itertools.count()
+        self.steps = 0
+        self.handled = 0
+
+    def add_source(self, source) -> None:
+        """Registra una fuente de eventos (``next_due`` / ``run_pending``)."""
+        self.sources.append(source)
+
+    def schedule(self, delay: float, callback: Callable, *args) -> None:
+        """Programa ``callback(*args)`` dentro de ``delay`` segundos de tiempo simulado."""
+        heapq.heappush(self._events, (self.clock.monotonic() + max(0.0, delay),
+                                      next(self._sequence), callback, args))
+
+    # ===== Fuente de eventos propia =====
+
+    def next_due(self) -> Optional[float]:
+        return self._events[0][0] if self._events else None
+
+    def run_pending(self, now: float) -> int:
+        fired = 0
+        while self._events and self._events[0][0] <= now:
+            _, _, callback, args = heapq.heappop(self._events)
+            callback(*args)
+            fired += 1
+        return fired
+
+    # ===== Bucle =====
+
+    def _earliest(self) -> Tuple[Optional[float], Any]:
+        # Entre fuentes con la misma hora gana la registrada antes (orden reproducible)
+        earliest, chosen = self.next_due(), self
+        for source in self.sources:
+            due = source.next_due()
+            if due is not None and (earliest is None or due < earliest):
+                earliest, chosen = due, source
+        return earliest, chosen
+
+    def step(self, until: Optional[float] = None) -> bool:
+        """
+        Adelanta el reloj hasta el próximo evento y lo atiende.
+
+        Args:
+            until: Hora simulada que no se debe sobrepasar.
+
+        Returns:
+            bool: False si no queda ningún evento (antes de ``until``).
+        """
+        due, source = self._earliest()
+        if due is None or (until is not None and due > until):
+            return False
+        self.clock.advance_to(due)
+        self.handled += source.run_pending(self.clock.monotonic())
+        self.steps += 1
+        return True
+
+    def run(self, until: Optional[float] = None, max_steps: Optional[int] = None) -> Dict[str, float]:
+        """
+        Ejecuta eventos hasta agotarlos, llegar a ``until`` o hacer ``max_steps`` pasos.
+
+        Args:
+            until: Hora simulada (segundos desde el inicio) en la que parar.
+            max_steps: Límite de pasos, como salvaguarda.
+
+        Returns:
+            dict: Pasos dados, eventos atendidos y hora simulada final.
+        """
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            if not self.step(until):
+                break
+            steps += 1
+        if until is not None:
+            self.clock.advance_to(until)
+        logger.debug(f"Simulación detenida en t={self.clock.monotonic():.1f}s tras {steps} pasos")
+        return {"steps": self.steps, "handled": self.handled, "simulated_time": self.clock.monotonic()}
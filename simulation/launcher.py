@@ -0,0 +1,292 @@
+"""
+Arranque rápido de los procesos de la simulación.
+
+``ComponentLauncher`` crea los procesos hijo con un contexto de ``multiprocessing``
+configurable (``config.START_METHOD``). Con ``"forkserver"``, un proceso servidor
+importa una sola vez los módulos de ``config.FORKSERVER_PRELOAD`` (numpy, los hosts
+de agentes y espías, el servidor) y los del transporte del modo configurado (pika solo en modo RabbitMQ),
+y cada hijo se bifurca de él ya con todo cargado, en
+milisegundos, sin heredar los hilos ni las conexiones del proceso principal.
+
+En lugar de esperar un tiempo fijo, cada componente avisa por una cola compartida
+cuando está conectado (su ``run(on_ready)`` llama a ``on_ready``) y el lanzador
+espera a que avisen todos los de un grupo (``wait_ready``): el servidor primero y
+después todos los agentes y espías, arrancados a la vez.
+
+Una vez listo, cada hijo escribe en un bloque de memoria compartida, cada
+``config.HEARTBEAT_INTERVAL`` segundos, su tiempo de CPU y su memoria residente
+(``status``), que vigila ``simulation.supervisor``. El latido solo se renueva si el
+bucle principal del componente ha avanzado: cada vuelta llama a ``beat``, de modo
+que un componente bloqueado o atascado deja de latir aunque el proceso siga vivo. Los hijos ignoran
+Ctrl+C: el proceso principal decide el orden en que se detienen y les envía SIGTERM,
+que cada componente recibe como ``KeyboardInterrupt`` para cerrar limpiamente.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # No disponible en Windows
+    resource = None
+
+import config
+from communication.factory import transport_modules
+
+logger = logging.getLogger(__name__)
+
+# Componente a lanzar: (nombre, función de entrada, argumentos)
+Component = Tuple[str, Callable, Sequence]
+
+# Posiciones del bloque de estado compartido de cada componente
+HEARTBEAT, CPU_TIME, RSS_MB = range(3)
+
+
+def get_start_context(method: Optional[str] = None, preload: Optional[Iterable[str]] = None):
+    """
+    Contexto de ``multiprocessing`` para los procesos de la simulación.
+
+    Args:
+        method: Método de arranque; por defecto ``config.START_METHOD``. Si la
+            plataforma no lo admite se usa el suyo por defecto.
+        preload: Módulos que importa el forkserver antes de bifurcar los hijos; por
+            defecto ``config.FORKSERVER_PRELOAD`` más los del transporte configurado
+            (y la población vectorizada de espías si ``config.SPY_POPULATION``).
+    """
+    method = method or config.START_METHOD
+    if method not in mp.get_all_start_methods():
+        logger.warning(f"Método de arranque {method} no disponible; se usa {mp.get_start_method()}")
+        return mp.get_context()
+    context = mp.get_context(method)
+    if method == "forkserver":
+        # "__main__" evita que cada hijo vuelva a ejecutar el script principal
+        if preload is None:
+            preload = [*config.FORKSERVER_PRELOAD, *transport_modules()]
+            if config.SPY_POPULATION:
+                preload.append("agents.spy_population")
+        context.set_forkserver_preload(["__main__", *preload])
+    return context
+
+
+def _rss_mb() -> float:
+    """Memoria residente actual del proceso (pico en plataformas sin /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _heartbeat_loop(status, interval: float, progress: List[int]) -> None:
+    last = None
+    while True:
+        status[CPU_TIME] = time.process_time()
+        status[RSS_MB] = _rss_mb()
+        # Sin vueltas del bucle del componente desde el latido anterior no se late
+        if progress[0] != last:
+            last = progress[0]
+            status[HEARTBEAT] = time.monotonic()
+        time.sleep(interval)
+
+
+def _interrupt(signum, frame):
+    # Solo la primera señal interrumpe; las siguientes no cortan el cierre en curso
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def run_component(ready_queue, status, name: str, target: Callable, args: Sequence,
+                  heartbeat_interval: float) -> None:
+    """
+    Punto de entrada de cada proceso hijo: ejecuta ``target``, avisa cuando está listo
+    y desde entonces late en ``status`` mientras ``target`` llame a ``beat``.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _interrupt)
+    progress = [0]  # Vueltas del bucle principal del componente
+
+    def beat():
+        progress[0] += 1
+
+    def on_ready():
+        ready_queue.put((name, time.monotonic()))
+        threading.Thread(target=_heartbeat_loop, args=(status, heartbeat_interval, progress),
+                         name="heartbeat", daemon=True).start()
+    try:
+        target(*args, on_ready=on_ready, beat=beat)
+    except KeyboardInterrupt:
+        pass
+
+
+class ComponentLauncher:
+    """Lanza componentes en procesos hijo y espera a que cada uno esté listo."""
+
+    def __init__(self, method: Optional[str] = None, preload: Optional[Iterable[str]] = None):
+        """
+        Args:
+            method: Método de arranque (ver ``get_start_context``).
+            preload: Módulos a precargar en el forkserver.
+        """
+        self.context = get_start_context(method, preload)
+        self.ready_queue = self.context.Queue()
+        self.components: Dict[str, Tuple[Callable, Sequence]] = {}
+        self.processes: Dict[str, mp.Process] = {}
+        self.status: Dict[str, Any] = {}  # Bloque compartido (HEARTBEAT, CPU_TIME, RSS_MB)
+        self.started_at: Dict[str, float] = {}
+        self.startup_times: Dict[str, float] = {}  # Segundos desde start() hasta el aviso
+        self.failed: List[str] = []
+
+    @property
+    def start_method(self) -> str:
+        return self.context.get_start_method()
+
+    def start(self, name: str, target: Callable, *args) -> mp.Process:
+        """
+        Arranca un componente sin esperar a que esté listo.
+
+        Args:
+            name: Nombre único del componente (también el del proceso).
+            target: Función de entrada; debe aceptar ``on_ready`` y ``beat`` como
+                argumentos con nombre y llamar a ``beat`` en cada vuelta de su bucle
+                (al menos cada ``config.HEARTBEAT_INTERVAL`` segundos).
+            *args: Argumentos de ``target``.
+        """
+        status = self.status.get(name)
+        if status is None:
+            status = self.status[name] = self.context.Array('d', 3, lock=False)
+        status[:] = [0.0, 0.0, 0.0]
+        process = self.context.Process(
+            target=run_component, name=name,
+            args=(self.ready_queue, status, name, target, args, config.HEARTBEAT_INTERVAL)
+        )
+        self.components[name] = (target, args)
+        self.started_at[name] = time.monotonic()
+        self.startup_times.pop(name, None)
+        process.start()
+        self.processes[name] = process
+        return process
+
+    def restart(self, name: str) -> mp.Process:
+        """Vuelve a arrancar un componente con la misma función y argumentos."""
+        target, args = self.components[name]
+        if name in self.failed:
+            self.failed.remove(name)
+        return self.start(name, target, *args)
+
+    def start_many(self, components: Iterable[Component]) -> List[str]:
+        """
+        Arranca varios componentes seguidos; se inicializan en paralelo.
+
+        Returns:
+            list: Nombres de los componentes arrancados.
+        """
+        names = []
+        for name, target, args in components:
+            try:
+                self.start(name, target, *args)
+                names.append(name)
+            except Exception as e:
+                logger.error(f"Error al iniciar el proceso {name}: {e}")
+                self.failed.append(name)
+        return names
+
+    def wait_ready(self, names: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Barrera de arranque: espera a que avisen los componentes indicados.
+
+        Un componente cuyo proceso termina sin avisar cuenta como fallido.
+
+        Args:
+            names: Componentes a esperar; por defecto, todos los arrancados.
+            timeout: Segundos máximos de espera; por defecto ``config.STARTUP_TIMEOUT``.
+
+        Returns:
+            bool: True si todos están listos (False si alguno ha fallado).
+        """
+        names = set(self.processes if names is None else names)
+        pending = names - set(self.startup_times) - set(self.failed)
+        deadline = time.monotonic() + (config.STARTUP_TIMEOUT if timeout is None else timeout)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                name, ready_at = self.ready_queue.get(timeout=min(remaining, 0.2))
+                self._record_ready(name, ready_at)
+            except queue.Empty:
+                # Sin avisos: comprobar si algún proceso pendiente ha muerto
+                for name in list(pending):
+                    if self.processes[name].exitcode is not None:
+                        pending.discard(name)
+                        self.failed.append(name)
+                        logger.error(f"El proceso {name} terminó sin estar listo "
+                                     f"(código {self.processes[name].exitcode})")
+                continue
+            if name in self.startup_times:
+                pending.discard(name)
+        if pending:
+            logger.error(f"{len(pending)} componentes no estaban listos tras la espera: "
+                         f"{', '.join(sorted(pending)[:10])}")
+        return not pending and not names.intersection(self.failed)
+
+    def _record_ready(self, name: str, ready_at: float) -> None:
+        # Un aviso anterior al último arranque es de un proceso ya reiniciado
+        if ready_at >= self.started_at[name]:
+            self.startup_times[name] = ready_at - self.started_at[name]
+
+    def poll_ready(self) -> List[str]:
+        """
+        Recoge sin esperar los avisos pendientes (p. ej. de componentes reiniciados).
+
+        Returns:
+            list: Componentes que han avisado.
+        """
+        names = []
+        while True:
+            try:
+                name, ready_at = self.ready_queue.get_nowait()
+            except queue.Empty:
+                return names
+            self._record_ready(name, ready_at)
+            names.append(name)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for process in self.processes.values():
+            process.join(timeout)
+
+    def stop(self, names: Optional[Iterable[str]] = None, timeout: float = 5.0) -> List[str]:
+        """
+        Detiene componentes: SIGTERM (cierre limpio) y, si no terminan a tiempo, SIGKILL.
+
+        Args:
+            names: Componentes a detener; por defecto, todos.
+            timeout: Segundos que tienen, en conjunto, para terminar.
+
+        Returns:
+            list: Componentes que hubo que matar.
+        """
+        processes = [self.processes[name] for name in (self.processes if names is None else names)]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        killed = [process.name for process in processes if process.is_alive()]
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+                process.join()
+        return killed
+
+    def terminate(self) -> None:
+        self.stop(timeout=5.0)
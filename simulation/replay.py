@@ -0,0 +1,152 @@
+"""
+Reproducción de una grabación de tráfico contra el servidor central.
+
+Entrega las alertas y estados de una grabación (``communication.recording``) a un
+``CentralServer`` en proceso, sin broker ni agentes: las tareas que asigna se cuentan
+con un ``LoopbackPublisher``. El servidor funciona sobre un reloj virtual que se
+adelanta hasta el instante grabado de cada mensaje, de modo que sus decisiones
+(reintentos, tiempos) son las mismas a cualquier velocidad y dos reproducciones de la
+misma grabación con la misma semilla procesan exactamente la misma carga. La
+velocidad solo marca el ritmo real de entrega:
+
+- ``speed=1``: al ritmo en que se grabó;
+- ``speed=N``: N veces más rápido;
+- ``speed=0``: lo más rápido posible (mide el coste de proceso del servidor).
+
+    python -m simulation.replay grabacion.rec --speed 0 --seed 42
+"""
+
+import argparse
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from common.clock import VirtualClock, set_clock
+from common.message import AlertMessage, Message, StatusMessage
+from communication.recording import read_recording
+from server.central_server import CentralServer
+from simulation.virtual import LoopbackPublisher
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficReplayer:
+    """Reproduce una grabación contra un servidor central sobre un reloj virtual."""
+
+    def __init__(self, path: str, speed: float = 1.0, seed: Optional[int] = None):
+        """
+        Args:
+            path: Grabación a reproducir (JSONL o binaria).
+            speed: Factor de velocidad respecto al ritmo grabado; 0 para la máxima.
+            seed: Semilla del generador aleatorio del servidor (duración estimada de
+                las tareas); con la misma semilla la reproducción es idéntica.
+        """
+        if seed is not None:
+            random.seed(seed)
+        self.path = path
+        self.speed = speed
+        self.clock = VirtualClock()
+        self.server = CentralServer(clock=self.clock)
+        self.server.task_publisher = LoopbackPublisher(lambda message: True)
+
+    def dispatch(self, message: Message, routing_key: str) -> bool:
+        """
+        Entrega un mensaje al manejador del servidor que le corresponde.
+
+        Returns:
+            bool: False si el servidor no consume ese tipo de mensaje (p. ej. tareas).
+        """
+        if isinstance(message, AlertMessage):
+            self.server._handle_alert(message, routing_key)
+        elif isinstance(message, StatusMessage):
+            self.server._handle_agent_status(message, routing_key)
+        else:
+            return False
+        return True
+
+    def run(self) -> Dict[str, float]:
+        """
+        Reproduce la grabación completa.
+
+        Returns:
+            dict: Mensajes entregados, tareas asignadas, tiempo grabado y real, tasa y
+            tiempos de servicio por mensaje (entrega más proceso de las alertas en cola).
+        """
+        counts = {"alerts": 0, "statuses": 0, "skipped": 0}
+        service_times = []
+        recorded_time = 0.0
+        max_lag = 0.0
+        perf_counter = time.perf_counter
+
+        # Los mensajes que cree el servidor se fechan con el reloj virtual
+        previous_clock = set_clock(self.clock)
+        started = perf_counter()
+        try:
+            for t, message, routing_key in read_recording(self.path):
+                recorded_time = t
+                if self.speed > 0:
+                    delay = started + t / self.speed - perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        max_lag = max(max_lag, -delay)
+                began = perf_counter()
+                self.clock.advance_to(t)
+                if not self.dispatch(message, routing_key):
+                    counts["skipped"] += 1
+                    continue
+                counts["alerts" if isinstance(message, AlertMessage) else "statuses"] += 1
+                self.server.run_pending()
+                service_times.append(perf_counter() - began)
+        finally:
+            set_clock(previous_clock)
+        elapsed = perf_counter() - started
+
+        delivered = len(service_times)
+        service = np.array(service_times) if service_times else np.zeros(1)
+        with self.server.active_alerts_lock:
+            assigned = sum(1 for info in self.server.active_alerts.values() if info['status'] == 'assigned')
+        metrics = {
+            **counts,
+            "tasks_published": self.server.task_publisher.messages_sent,
+            "alerts_assigned": assigned,
+            # Las alertas en espera de reintento siguen registradas como pendientes
+            "alerts_pending": len(self.server.active_alerts) - assigned,
+            "recorded_time": recorded_time,
+            "wall_time": elapsed,
+            "rate": delivered / elapsed if elapsed else 0.0,
+            "service_p50": float(np.percentile(service, 50)),
+            "service_p99": float(np.percentile(service, 99)),
+            "service_max": float(service.max()),
+            "max_lag": max_lag,
+        }
+        logger.info(f"Reproducidos {delivered} mensajes de {self.path} en {elapsed:.2f}s "
+                    f"({metrics['rate']:.0f} mensajes/s): {metrics['tasks_published']} tareas")
+        return metrics
+
+
+def replay_recording(path: str, speed: float = 1.0, seed: Optional[int] = None) -> Dict[str, float]:
+    """Reproduce la grabación ``path`` y devuelve sus métricas (ver ``TrafficReplayer.run``)."""
+    return TrafficReplayer(path, speed, seed).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce una grabación de tráfico contra el servidor central")
+    parser.add_argument("path", help="Grabación (.jsonl o binaria)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Factor de velocidad respecto al ritmo grabado (0: lo más rápido posible)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    # Los avisos y errores por alerta (sin agentes disponibles...) distorsionarían la medida
+    logging.disable(logging.ERROR)
+
+    metrics = replay_recording(args.path, args.speed, args.seed)
+    for name, value in metrics.items():
+        print(f"{name:>16}: {value:.6f}" if isinstance(value, float) else f"{name:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
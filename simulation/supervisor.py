@@ -0,0 +1,195 @@
+"""
+Supervisión de los procesos de la simulación.
+
+``ProcessSupervisor`` vigila los componentes arrancados con un ``ComponentLauncher``
+leyendo el bloque de estado que cada hijo actualiza en memoria compartida (latido,
+CPU y memoria residente):
+
+- Un componente que termina (con o sin error: ninguno acaba por sí solo mientras la
+  simulación sigue), que no avisa de que está listo en ``config.STARTUP_TIMEOUT`` o
+  que deja de latir durante ``config.HEARTBEAT_TIMEOUT`` se da por caído; si sigue
+  vivo (colgado) se mata, y se vuelve a arrancar tras una espera exponencial con
+  jitter (``backoff_delay``). Tras ``config.MAX_RESTARTS`` reinicios seguidos se
+  abandona; los reinicios se olvidan cuando lleva ``config.RESTART_STABLE_AFTER``
+  segundos funcionando.
+- Cada ``config.RESOURCE_REPORT_INTERVAL`` segundos informa de la CPU (porcentaje
+  desde el informe anterior) y la memoria de cada proceso.
+- ``shutdown`` detiene los componentes por grupos, en orden (primero los que
+  producen trabajo, el servidor al final), dando a cada grupo
+  ``config.SHUTDOWN_GRACE_PERIOD`` segundos para cerrar limpiamente.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import config
+from communication.rabbitmq.reconnect import backoff_delay
+from simulation.launcher import CPU_TIME, HEARTBEAT, RSS_MB, ComponentLauncher
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessSupervisor:
+    """Reinicia los componentes caídos e informa del consumo de cada proceso."""
+
+    def __init__(self, launcher: ComponentLauncher, check_interval: float = 0.5):
+        """
+        Args:
+            launcher: Lanzador con los componentes a vigilar.
+            check_interval: Segundos entre comprobaciones.
+        """
+        self.launcher = launcher
+        self.check_interval = check_interval
+        self.stop_event = threading.Event()
+        self.restarts: Dict[str, int] = {}  # Reinicios seguidos de cada componente
+        self.total_restarts = 0
+        self.pending: Dict[str, float] = {}  # Componente caído -> hora de su reinicio
+        self.abandoned: List[str] = []
+        self._usage: Dict[str, tuple] = {}  # Último (hora, CPU) leído de cada componente
+        self._next_report = time.monotonic() + config.RESOURCE_REPORT_INTERVAL
+
+    def _failure(self, name: str, now: float) -> Optional[str]:
+        """Motivo por el que un componente se da por caído, o None si está sano."""
+        process = self.launcher.processes[name]
+        if process.exitcode is not None:
+            return f"terminó con código {process.exitcode}"
+        heartbeat = self.launcher.status[name][HEARTBEAT]
+        if not heartbeat:
+            if now - self.launcher.started_at[name] > config.STARTUP_TIMEOUT:
+                return f"no estaba listo tras {config.STARTUP_TIMEOUT:.0f}s"
+        elif now - heartbeat > config.HEARTBEAT_TIMEOUT:
+            return f"sin latido desde hace {now - heartbeat:.1f}s"
+        return None
+
+    def check(self, now: Optional[float] = None) -> List[str]:
+        """
+        Una pasada de supervisión: detecta caídas y hace los reinicios que tocan.
+
+        Returns:
+            list: Componentes reiniciados en esta pasada.
+        """
+        now = time.monotonic() if now is None else now
+        self.launcher.poll_ready()
+        for name in self.launcher.processes:
+            if name in self.pending or name in self.abandoned:
+                continue
+            reason = self._failure(name, now)
+            if reason is None:
+                if self.restarts.get(name) and now - self.launcher.started_at[name] > config.RESTART_STABLE_AFTER:
+                    self.restarts[name] = 0
+                continue
+            process = self.launcher.processes[name]
+            if process.is_alive():
+                process.kill()
+                process.join()
+            attempt = self.restarts.get(name, 0)
+            if config.MAX_RESTARTS and attempt >= config.MAX_RESTARTS:
+                self.abandoned.append(name)
+                logger.critical(f"El proceso {name} {reason}; se abandona tras {attempt} reinicios seguidos")
+                continue
+            delay = backoff_delay(attempt, config.RESTART_BACKOFF_INITIAL, config.RESTART_BACKOFF_MAX)
+            self.pending[name] = now + delay
+            logger.error(f"El proceso {name} {reason}; se reinicia en {delay:.1f}s (reinicio {attempt + 1})")
+
+        restarted = []
+        for name, due in list(self.pending.items()):
+            if due > now:
+                continue
+            del self.pending[name]
+            try:
+                self.launcher.restart(name)
+            except Exception as e:
+                logger.error(f"Error al reiniciar el proceso {name}: {e}")
+                self.pending[name] = now + config.RESTART_BACKOFF_MAX
+                continue
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+            self.total_restarts += 1
+            self._usage.pop(name, None)
+            restarted.append(name)
+        return restarted
+
+    def usage(self, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Consumo de cada proceso vivo y listo.
+
+        Returns:
+            dict: Por componente, ``cpu_percent`` (desde la lectura anterior),
+            ``cpu_time`` (s) y ``rss_mb``.
+        """
+        now = time.monotonic() if now is None else now
+        usage = {}
+        for name, status in self.launcher.status.items():
+            if not status[HEARTBEAT] or not self.launcher.processes[name].is_alive():
+                continue
+            cpu_time = status[CPU_TIME]
+            last = self._usage.get(name, (self.launcher.started_at[name], 0.0))
+            elapsed = now - last[0]
+            usage[name] = {
+                "cpu_percent": 100.0 * (cpu_time - last[1]) / elapsed if elapsed > 0 else 0.0,
+                "cpu_time": cpu_time,
+                "rss_mb": status[RSS_MB],
+            }
+            self._usage[name] = (now, cpu_time)
+        return usage
+
+    def report(self, now: Optional[float] = None, top: int = 5) -> Dict[str, Dict[str, float]]:
+        """Registra el consumo total y el de los procesos que más CPU usan."""
+        usage = self.usage(now)
+        if not usage:
+            return usage
+        busiest = sorted(usage.items(), key=lambda item: item[1]["cpu_percent"], reverse=True)[:top]
+        logger.info(
+            f"Recursos: {len(usage)} procesos, CPU {sum(u['cpu_percent'] for u in usage.values()):.0f}%, "
+            f"RSS {sum(u['rss_mb'] for u in usage.values()):.0f} MB, {self.total_restarts} reinicios; "
+            f"más CPU: " + ", ".join(f"{name} {u['cpu_percent']:.0f}% {u['rss_mb']:.0f} MB"
+                                      for name, u in busiest)
+        )
+        for name, u in sorted(usage.items()):
+            logger.debug(f"  {name}: CPU {u['cpu_percent']:.1f}% ({u['cpu_time']:.1f}s), RSS {u['rss_mb']:.1f} MB")
+        return usage
+
+    def run(self) -> None:
+        """
+        Supervisa hasta que se llame a ``stop`` (o se interrumpa con Ctrl+C) o se hayan
+        abandonado todos los componentes.
+        """
+        while not self.stop_event.wait(self.check_interval):
+            now = time.monotonic()
+            self.check(now)
+            if len(self.abandoned) == len(self.launcher.processes):
+                logger.critical("Todos los procesos se han abandonado; fin de la supervisión")
+                return
+            if now >= self._next_report:
+                self.report(now)
+                self._next_report = now + config.RESOURCE_REPORT_INTERVAL
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def shutdown(self, groups: Iterable[Iterable[str]], grace: Optional[float] = None) -> None:
+        """
+        Detiene todos los componentes, grupo a grupo y en el orden indicado.
+
+        Args:
+            groups: Grupos de componentes; los que no estén en ninguno se detienen al final.
+            grace: Segundos que tiene cada grupo para cerrar; por defecto
+                ``config.SHUTDOWN_GRACE_PERIOD``.
+        """
+        self.stop()
+        self.pending.clear()
+        grace = config.SHUTDOWN_GRACE_PERIOD if grace is None else grace
+        groups = [list(group) for group in groups]
+        grouped = {name for group in groups for name in group}
+        groups.append([name for name in self.launcher.processes if name not in grouped])
+        for group in groups:
+            group = [name for name in group if name in self.launcher.processes]
+            if not group:
+                continue
+            started = time.monotonic()
+            killed = self.launcher.stop(group, timeout=grace)
+            if killed:
+                logger.warning(f"{len(killed)} procesos no terminaron en {grace:.0f}s y se mataron: "
+                               f"{', '.join(killed[:10])}")
+            logger.info(f"Detenidos {len(group)} procesos en {time.monotonic() - started:.2f}s")
@@ -0,0 +1,177 @@
+"""
+Simulación completa en tiempo virtual, lo más rápido posible.
+
+Monta en un solo proceso el servidor central, los ``NightAgentHost`` y los ``SpyHost``
+sobre un ``SimulationEngine`` y los comunica con publicadores en proceso
+(``LoopbackPublisher``) en lugar de un broker o sockets: cada mensaje se entrega
+llamando directamente al destinatario, opcionalmente con una latencia simulada.
+
+    python run_simulation.py --fast --duration 3600 --seed 42
+"""
+
+import logging
+import random
+import time
+from typing import Callable, Dict, Optional
+
+import config
+from agents.night_agent_host import NightAgentHost, partition_agents
+from agents.spy_host import SpyHost, partition_spies
+from agents.spy_population import SpyPopulationHost
+from common.clock import VirtualClock, set_clock
+from common.message import Message
+from server.central_server import CentralServer
+from simulation.engine import SimulationEngine
+
+logger = logging.getLogger(__name__)
+
+LOOPBACK_ADDRESS = ("loopback", 0)
+
+
+class LoopbackPublisher:
+    """
+    Publicador en proceso con la interfaz de los clientes reales.
+
+    Entrega cada mensaje a ``deliver(message)``; con latencia, lo programa en el motor.
+    """
+
+    def __init__(self, deliver: Callable[[Message], bool], engine: Optional[SimulationEngine] = None,
+                 latency: float = 0.0):
+        self.deliver = deliver
+        self.engine = engine
+        self.latency = latency
+        self.messages_sent = 0
+
+    def connect(self) -> bool:
+        return True
+
+    def publish_message(self, message: Message, routing_key: str = '') -> bool:
+        self.messages_sent += 1
+        if self.latency > 0 and self.engine is not None:
+            self.engine.schedule(self.latency, self.deliver, message)
+            return True
+        return self.deliver(message) is not False
+
+    def send_message(self, message: Message) -> bool:
+        return self.publish_message(message)
+
+    def close(self) -> None:
+        pass
+
+
+class VirtualSimulation:
+    """Servidor, agentes y espías conectados en proceso sobre un reloj virtual."""
+
+    def __init__(self, num_spies: int = None, num_agents: int = None, spy_hosts: int = 1,
+                 agent_hosts: int = 1, seed: Optional[int] = None, latency: float = 0.0,
+                 spy_population: bool = False, record_path: Optional[str] = None):
+        """
+        Args:
+            num_spies: Espías a simular (por defecto ``config.NUM_SPIES``).
+            num_agents: Agentes nocturnos (por defecto ``config.NUM_NIGHT_AGENTS``).
+            spy_hosts: SpyHost entre los que se reparten los espías.
+            agent_hosts: NightAgentHost entre los que se reparten los agentes.
+            seed: Semilla del generador aleatorio; con la misma semilla la simulación
+                es idéntica.
+            latency: Latencia simulada de cada mensaje (s).
+            spy_population: Generar las alertas con el modelo de población vectorizado
+                (``SpyPopulationHost``) en lugar de objetos ``Spy``.
+            record_path: Fichero en el que grabar el tráfico que recibe el servidor
+                (reproducible después con ``simulation.replay``).
+        """
+        if seed is not None:
+            random.seed(seed)
+        self.clock = VirtualClock()
+        self.engine = SimulationEngine(self.clock)
+
+        self.server = CentralServer(clock=self.clock, record_path=record_path)
+        self.agent_hosts = [
+            NightAgentHost(f"VAGENTS{i + 1:02d}", agents, clock=self.clock)
+            for i, agents in enumerate(partition_agents(
+                config.NUM_NIGHT_AGENTS if num_agents is None else num_agents, agent_hosts))
+        ]
+        spy_groups = partition_spies(config.NUM_SPIES if num_spies is None else num_spies, spy_hosts)
+        if spy_population:
+            self.spy_hosts = [
+                SpyPopulationHost(f"VPOP{i + 1:02d}", spies, clock=self.clock,
+                                  seed=None if seed is None else seed + i)
+                for i, spies in enumerate(spy_groups)
+            ]
+        else:
+            self.spy_hosts = [SpyHost(f"VHOST{i + 1:02d}", spies, clock=self.clock)
+                              for i, spies in enumerate(spy_groups)]
+
+        # Hacia el servidor: alertas y estados por el mismo camino que en los modos directos
+        to_server = LoopbackPublisher(self._deliver_to_server, self.engine, latency)
+        self._host_of_agent: Dict[str, NightAgentHost] = {}
+        for host in self.agent_hosts:
+            host.publisher = host.comm_client = to_server
+            self._host_of_agent.update((agent_id, host) for agent_id in host.agents)
+        for host in self.spy_hosts:
+            host.comm_client = to_server
+            for spy in getattr(host, 'spies', ()):
+                spy.comm_client = to_server
+        # Hacia los agentes: cada tarea al host de su target_agent_id
+        self.server.task_publisher = LoopbackPublisher(self._deliver_to_agent, self.engine, latency)
+
+        self.engine.add_source(self.server)
+        for source in (*self.agent_hosts, *self.spy_hosts):
+            self.engine.add_source(source)
+
+    def _deliver_to_server(self, message: Message) -> bool:
+        self.server._handle_socket_message(message, LOOPBACK_ADDRESS)
+        return True
+
+    def _deliver_to_agent(self, message: Message) -> bool:
+        host = self._host_of_agent.get(getattr(message, 'target_agent_id', None))
+        return host is not None and host.submit(message)
+
+    def run(self, duration: float) -> Dict[str, float]:
+        """
+        Simula ``duration`` segundos de operación.
+
+        Returns:
+            dict: Métricas de la simulación (tiempo simulado y real, alertas, tareas...).
+        """
+        started = time.perf_counter()
+        # Los mensajes se fechan con el reloj del proceso
+        previous_clock = set_clock(self.clock)
+        try:
+            for host in self.agent_hosts:
+                host.announce()
+            for host in self.spy_hosts:
+                host.schedule_all()
+            result = self.engine.run(until=duration)
+        finally:
+            set_clock(previous_clock)
+            if self.server.recorder:
+                self.server.recorder.flush()
+        elapsed = time.perf_counter() - started
+
+        with self.server.active_alerts_lock:
+            pending = sum(1 for info in self.server.active_alerts.values() if info['status'] == 'pending')
+            assigned = len(self.server.active_alerts) - pending
+        arrivals = sum(host.arrivals for host in self.agent_hosts)
+        metrics = {
+            "simulated_time": result["simulated_time"],
+            "wall_time": elapsed,
+            "speedup": result["simulated_time"] / elapsed if elapsed else float('inf'),
+            "steps": result["steps"],
+            "alerts_sent": sum(host.alerts_sent for host in self.spy_hosts),
+            "tasks_completed": sum(host.tasks_completed for host in self.agent_hosts),
+            "tasks_rejected": sum(host.tasks_rejected for host in self.agent_hosts),
+            "mean_response_time": (sum(host.mean_response_time * host.arrivals
+                                       for host in self.agent_hosts) / arrivals if arrivals else 0.0),
+            "max_response_time": max((host.max_response_time for host in self.agent_hosts), default=0.0),
+            "alerts_in_progress": assigned,
+            "alerts_pending": pending + len(self.server.alert_queue),
+        }
+        logger.info(f"Simulados {metrics['simulated_time']:.0f}s en {elapsed:.2f}s "
+                    f"(x{metrics['speedup']:.0f}): {metrics['alerts_sent']} alertas, "
+                    f"{metrics['tasks_completed']} tareas completadas")
+        return metrics
+
+
+def run_virtual_simulation(duration: float, **options) -> Dict[str, float]:
+    """Crea una ``VirtualSimulation`` con ``options`` y simula ``duration`` segundos."""
+    return VirtualSimulation(**options).run(duration)
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from communication.compression import ENCODINGS, compress, decode_body, encode_body, validate_encoding
+
+BODY = b'{"message_type": "ALERT", "sender_id": "SPY001", "position": [40.75, -74.0]}' * 40
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_round_trip(encoding):
+    encoded, content_encoding = encode_body(BODY, encoding, threshold=1024)
+    assert content_encoding == encoding
+    assert len(encoded) < len(BODY)
+    assert decode_body(encoded, content_encoding) == BODY
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_small_bodies_go_out_uncompressed(encoding):
+    small = BODY[:100]
+    assert encode_body(small, encoding, threshold=1024) == (small, None)
+    assert encode_body(BODY[:1023], encoding, threshold=1024) == (BODY[:1023], None)
+    assert decode_body(small, None) == small
+
+
+def test_disabled_or_incompressible_bodies_go_out_as_is():
+    assert encode_body(BODY, None) == (BODY, None)
+    noise = os.urandom(4096)
+    assert encode_body(noise, "zlib", threshold=1024) == (noise, None)
+
+
+def test_unknown_encoding_raises():
+    with pytest.raises(ValueError):
+        validate_encoding("gzip")
+    with pytest.raises(ValueError):
+        encode_body(BODY, "gzip")
+    with pytest.raises(ValueError):
+        compress(BODY, "gzip")
+    with pytest.raises(ValueError, match="gzip"):
+        decode_body(BODY, "gzip")
+    validate_encoding(None)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_corrupt_body_raises_value_error(encoding):
+    encoded, _ = encode_body(BODY, encoding)
+    with pytest.raises(ValueError, match="corrupto"):
+        decode_body(encoded[:-10] + b"x" * 10, encoding)
@@ -0,0 +1,182 @@
+import pytest
+
+from common.message import StatusMessage
+from communication.rabbitmq import connection_pool
+from communication.rabbitmq.connection_pool import RabbitMQConnectionPool
+from communication.rabbitmq.publisher import RabbitMQPublisher
+
+
+class FakeChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.closed = False
+        self.published = []
+
+    @property
+    def is_open(self):
+        return not self.closed and self.connection.is_open
+
+    @property
+    def is_closed(self):
+        return not self.is_open
+
+    def close(self):
+        self.closed = True
+
+    def exchange_declare(self, **kwargs):
+        pass
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.published.append(routing_key)
+
+
+class FakeBlockingConnection:
+    opened = []
+
+    def __init__(self, parameters):
+        self.is_open = True
+        self.channels = []
+        FakeBlockingConnection.opened.append(self)
+
+    @property
+    def is_closed(self):
+        return not self.is_open
+
+    def channel(self):
+        channel = FakeChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    def process_data_events(self, time_limit=None):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.requests = 0
+
+    def request(self):
+        self.requests += 1
+
+    def stop(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeBlockingConnection.opened = []
+    monkeypatch.setattr(connection_pool.pika, "BlockingConnection", FakeBlockingConnection)
+    pool = RabbitMQConnectionPool(pool_size=2, channels_per_connection=2)
+    # Sin hilo de E/S: las pérdidas de conexión se provocan a mano
+    monkeypatch.setattr(pool, "_ensure_io_thread", lambda: None)
+    yield pool
+    pool.close()
+
+
+def drop(pool, index):
+    """Cierra la conexión del broker y deja que el pool lo detecte."""
+    pooled = pool._connections[index]
+    pooled.connection.is_open = False
+    assert not pooled.process_events()
+    pool._handle_connection_lost(pooled)
+
+
+def test_shared_leases_reuse_the_publishing_channel(pool):
+    first = pool.lease_channel()
+    second = pool.lease_channel()
+    assert first.channel is second.channel
+    assert first.pooled_connection is second.pooled_connection
+    assert first.pooled_connection.leases == 2
+
+    first.release()
+    first.release()  # Idempotente
+    assert second.pooled_connection.leases == 1
+    assert second.channel.is_open  # El canal compartido no se cierra al devolverlo
+
+
+def test_dedicated_lease_opens_and_closes_its_own_channel(pool):
+    shared = pool.lease_channel()
+    dedicated = pool.lease_channel(dedicated=True)
+    assert dedicated.channel is not shared.channel
+    assert dedicated.pooled_connection is shared.pooled_connection
+
+    dedicated.release()
+    assert dedicated.channel.closed
+    assert dedicated not in dedicated.pooled_connection.active_leases
+    assert dedicated.pooled_connection.leases == 1
+
+
+def test_connections_open_on_demand_up_to_pool_size(pool):
+    leases = [pool.lease_channel(dedicated=True) for _ in range(4)]
+    assert len(FakeBlockingConnection.opened) == 2
+    assert [lease.pooled_connection.leases for lease in leases[:2]] == [2, 2]
+    assert {lease.pooled_connection.index for lease in leases} == {0, 1}
+
+    # Con el pool agotado se sobrecarga la conexión menos cargada en lugar de abrir otra
+    extra = pool.lease_channel(dedicated=True)
+    assert len(FakeBlockingConnection.opened) == 2
+    assert extra.pooled_connection.leases == 3
+
+    leases[0].release()
+    leases[1].release()
+    assert pool.lease_channel().pooled_connection is leases[0].pooled_connection
+
+
+def test_lost_connection_invalidates_its_leases(pool):
+    leases = [pool.lease_channel(dedicated=True) for _ in range(3)]
+    assert [lease.pooled_connection.index for lease in leases] == [0, 0, 1]
+    lost = []
+    for n, lease in enumerate(leases):
+        lease.on_connection_lost = lambda n=n: lost.append(n)
+
+    drop(pool, 0)
+    assert lost == [0, 1]
+    assert [lease.lost for lease in leases] == [True, True, False]
+    assert pool._connections[0].connection is None
+    assert pool._connections[0].active_leases == []
+
+    # Los préstamos perdidos se devuelven y el siguiente reabre la conexión
+    leases[0].release()
+    leases[1].release()
+    assert pool._connections[0].leases == 0
+    fresh = pool.lease_channel(dedicated=True)
+    assert fresh.pooled_connection.index == 0
+    assert fresh.connection is FakeBlockingConnection.opened[-1] and fresh.connection.is_open
+    fresh.on_connection_lost = lambda: lost.append("fresh")
+
+    # Una segunda caída solo avisa a los préstamos de la conexión reabierta
+    lost.clear()
+    drop(pool, 0)
+    assert lost == ["fresh"]
+
+
+def test_pooled_publisher_reconnects_on_a_new_lease(pool):
+    publisher = RabbitMQPublisher(connection_pool=pool)
+    publisher._supervisor = FakeSupervisor()
+    assert publisher.connect()
+    message = StatusMessage(message_type="STATUS", sender_id="AGENT001")
+    assert publisher.publish_message(message, "status.AGENT001")
+    old_lease = publisher._lease
+    assert old_lease.channel.published == ["status.AGENT001"]
+
+    drop(pool, old_lease.pooled_connection.index)
+    assert publisher._supervisor.requests == 1
+    assert not publisher.is_connected()
+    assert not publisher.publish_message(message, "status.AGENT001")
+    assert len(publisher.failed_messages) == 1
+
+    assert publisher._reconnect_once()
+    assert old_lease.released
+    assert publisher._lease is not old_lease and publisher.is_connected()
+    publisher.resend_failed_messages()
+    assert publisher._lease.channel.published == ["status.AGENT001"]
+    assert sum(pooled.leases for pooled in pool._connections) == 1
+
+    publisher.close()
+    assert sum(pooled.leases for pooled in pool._connections) == 0
@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+from pika import BasicProperties, spec
+
+from common.constants import EmergencyLevel
+from common.message import AlertMessage
+from communication.inmemory.broker import InMemoryBroker
+from communication.inmemory.consumer import InMemoryConsumer
+from communication.rabbitmq.consumer import RabbitMQConsumer
+
+POSITION = (40.75, -74.0)
+BODY = AlertMessage(message_type="ALERT", sender_id="SPY001", position=POSITION,
+                    emergency_level=EmergencyLevel.HIGH).to_json().encode("utf-8")
+
+
+def fail_on_retry_keys(message, routing_key):
+    """Callback serializable: falla con las claves ``*.retry``."""
+    if routing_key.endswith(".retry"):
+        raise RuntimeError("fallo del procesamiento")
+
+
+class StubChannel:
+    is_open = True
+
+    def __init__(self):
+        self.settled = []  # (operación, delivery_tag, requeue, hilo)
+
+    def basic_ack(self, delivery_tag):
+        self.settled.append(("ack", delivery_tag, None, threading.get_ident()))
+
+    def basic_nack(self, delivery_tag, requeue=True):
+        self.settled.append(("nack", delivery_tag, requeue, threading.get_ident()))
+
+
+class StubConnection:
+    """Conexión cuyo "hilo de E/S" es el del test: ejecuta los callbacks al llamar a run()."""
+
+    is_open = True
+
+    def __init__(self):
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def add_callback_threadsafe(self, callback):
+        with self.lock:
+            self.callbacks.append(callback)
+
+    def run(self):
+        with self.lock:
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def consumer_with_workers(worker_type, callback):
+    consumer = RabbitMQConsumer(worker_count=2, worker_type=worker_type, max_redeliveries=2)
+    consumer.connection = StubConnection()
+    consumer._callback_func = callback
+    consumer._executor = consumer._create_executor()
+    return consumer
+
+
+def deliver(consumer, channel, delivery_tag, routing_key, body=BODY):
+    method = spec.Basic.Deliver(delivery_tag=delivery_tag, routing_key=routing_key)
+    consumer._message_handler(channel, method, BasicProperties(), body)
+
+
+def drain(consumer):
+    consumer._executor.shutdown(wait=True)
+    consumer._executor = None
+
+
+@pytest.mark.parametrize("worker_type", ["thread", "process"])
+def test_ack_and_nack_are_marshalled_to_the_connection_thread(worker_type):
+    consumer = consumer_with_workers(worker_type, fail_on_retry_keys)
+    channel = StubChannel()
+    deliver(consumer, channel, 1, "alert.ok")
+    deliver(consumer, channel, 2, "alert.retry")
+    deliver(consumer, channel, 3, "alert.retry", body=b"\xff no es json")
+    drain(consumer)
+
+    # Los trabajadores no tocan el canal: solo programan el ack/nack
+    assert channel.settled == []
+    assert len(consumer.connection.callbacks) == 3
+    consumer.connection.run()
+
+    main = threading.get_ident()
+    assert sorted(channel.settled) == [("ack", 1, None, main), ("nack", 2, True, main), ("nack", 3, False, main)]
+
+
+def test_settle_is_skipped_if_the_channel_closed_meanwhile():
+    consumer = consumer_with_workers("thread", fail_on_retry_keys)
+    channel = StubChannel()
+    deliver(consumer, channel, 1, "alert.ok")
+    drain(consumer)
+    channel.is_open = False
+    consumer.connection.run()
+    assert channel.settled == []
+
+
+def test_failed_delivery_is_dead_lettered_after_max_redeliveries():
+    consumer = consumer_with_workers("thread", fail_on_retry_keys)
+    channel = StubChannel()
+    for tag in (1, 2):
+        deliver(consumer, channel, tag, "alert.retry")
+    drain(consumer)
+    consumer.connection.run()
+    assert [(op, requeue) for op, _, requeue, _ in sorted(channel.settled)] == [("nack", True), ("nack", False)]
+
+
+def test_lost_connection_leaves_the_delivery_to_the_broker():
+    consumer = consumer_with_workers("thread", fail_on_retry_keys)
+    consumer.connection = None
+    channel = StubChannel()
+    deliver(consumer, channel, 1, "alert.ok")
+    drain(consumer)
+    assert channel.settled == []
+
+
+def test_process_workers_reject_unpicklable_callbacks():
+    consumer = RabbitMQConsumer(worker_count=2, worker_type="process")
+    with pytest.raises(ValueError, match="pickle"):
+        consumer.start_consuming(lambda message, routing_key: None)
+    # Falla antes de intentar conectar
+    assert consumer.connection is None
+
+    inmemory = InMemoryConsumer(worker_count=2, worker_type="process", broker=InMemoryBroker())
+    with pytest.raises(ValueError, match="pickle"):
+        inmemory.start_consuming(lambda message, routing_key: None)
+
+
+def test_invalid_worker_type():
+    with pytest.raises(ValueError):
+        RabbitMQConsumer(worker_type="fiber")
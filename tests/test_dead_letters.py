@@ -0,0 +1,155 @@
+import time
+
+import pytest
+
+from common.constants import EmergencyLevel
+from common.message import AlertMessage
+from communication.delivery import PoisonMessageError, RedeliveryCounter, should_requeue
+from communication.inmemory import broker as broker_module
+from communication.inmemory.consumer import InMemoryConsumer
+from communication.inmemory.publisher import InMemoryPublisher
+from communication.rabbitmq import dead_letters, topology
+
+POSITION = (40.75, -74.0)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    # dead_letters abre el broker local del proceso con get_broker()
+    monkeypatch.delenv("INMEMORY_BROKER_ADDRESS", raising=False)
+    broker = broker_module.InMemoryBroker()
+    monkeypatch.setattr(broker_module, "_local_broker", broker)
+    topology.declare_inmemory_topology(broker)
+    return broker
+
+
+@pytest.fixture
+def publisher(broker):
+    publisher = InMemoryPublisher(exchange=topology.EXCHANGE, broker=broker)
+    assert publisher.connect()
+    return publisher
+
+
+def alert(n=0):
+    return AlertMessage(message_type="ALERT", sender_id=f"SPY{n:03d}", position=POSITION,
+                        emergency_level=EmergencyLevel.HIGH)
+
+
+def fail(message, routing_key):
+    raise RuntimeError("fallo del procesamiento")
+
+
+def consume(broker, callback, max_redeliveries=3):
+    consumer = InMemoryConsumer(
+        exchange=topology.EXCHANGE, queue_name=topology.SERVER_ALERTS_QUEUE,
+        binding_keys=[topology.ALERT_BINDING_KEY], queue_arguments=topology.queue_arguments(priority=True),
+        max_redeliveries=max_redeliveries, broker=broker, poll_interval=0.05
+    )
+    assert consumer.start_consuming(callback)
+    return consumer
+
+
+def test_counter_is_bounded_and_forgets():
+    counter = RedeliveryCounter(max_entries=2)
+    assert [counter.failed(b"a"), counter.failed(b"a"), counter.failed(b"b")] == [1, 2, 1]
+    counter.failed(b"c")
+    assert len(counter) == 2
+    assert counter.failed(b"a") == 1  # El más antiguo se descartó
+    counter.forget(b"c")
+    assert len(counter) == 1
+
+
+def test_should_requeue_until_max_redeliveries():
+    counter = RedeliveryCounter()
+    error = RuntimeError("fallo")
+    assert [should_requeue(counter, 3, b"m", error) for _ in range(4)] == [True, True, False, True]
+    # Sin límite se reencola siempre
+    assert all(should_requeue(counter, 0, b"n", error) for _ in range(10))
+    assert not should_requeue(counter, 3, b"p", PoisonMessageError("ilegible"))
+
+
+def test_failing_message_is_dead_lettered_after_max_redeliveries(broker, publisher):
+    calls = []
+
+    def on_alert(message, routing_key):
+        calls.append(routing_key)
+        fail(message, routing_key)
+
+    routing_key = topology.alert_routing_key(POSITION)
+    consumer = consume(broker, on_alert, max_redeliveries=3)
+    try:
+        assert publisher.publish_message(alert(), routing_key)
+        assert wait_for(lambda: broker.queue_size(topology.DEAD_LETTER_QUEUE) == 1)
+        time.sleep(0.1)
+    finally:
+        consumer.stop_consuming()
+
+    assert calls == [routing_key] * 3
+    assert broker.queue_size(topology.SERVER_ALERTS_QUEUE) == 0
+    assert len(consumer._redeliveries) == 0
+
+
+def test_poison_message_goes_straight_to_dead_letters(broker):
+    calls = []
+    consumer = consume(broker, lambda message, routing_key: calls.append(message))
+    try:
+        broker.publish(topology.EXCHANGE, topology.alert_routing_key(POSITION), b"\xff no es json")
+        assert wait_for(lambda: broker.queue_size(topology.DEAD_LETTER_QUEUE) == 1)
+    finally:
+        consumer.stop_consuming()
+    assert calls == []
+    assert len(consumer._redeliveries) == 0
+
+
+def test_original_routing_key_uses_oldest_death():
+    headers = {"x-death": [{"queue": "b", "routing-keys": [b"alert.new"]},
+                           {"queue": "a", "routing-keys": ["alert.old"]}]}
+    assert dead_letters.original_routing_key("dead", headers) == "alert.old"
+    assert dead_letters.original_routing_key("dead", {}) == "dead"
+    assert dead_letters.original_routing_key("dead", None) == "dead"
+
+
+def test_replay_republishes_with_original_routing_key(broker, publisher):
+    routing_key = topology.alert_routing_key(POSITION)
+    failing = consume(broker, fail, max_redeliveries=1)
+    try:
+        for n in range(2):
+            assert publisher.publish_message(alert(n), routing_key)
+        assert wait_for(lambda: broker.queue_size(topology.DEAD_LETTER_QUEUE) == 2)
+    finally:
+        failing.stop_consuming()
+    # Desviada con otra clave: el reenvío usa la de x-death
+    broker.publish(topology.DEAD_LETTER_EXCHANGE, "dead.other", alert(2).to_json().encode(),
+                   {"headers": {"x-death": [{"queue": topology.SERVER_ALERTS_QUEUE, "reason": "expired",
+                                             "routing-keys": [routing_key]}]}})
+
+    assert dead_letters.inspect(limit=10, mode="inmemory") == 3
+    assert broker.queue_size(topology.DEAD_LETTER_QUEUE) == 3  # inspect no retira nada
+
+    assert dead_letters.replay(limit=10, mode="inmemory") == 3
+    assert broker.queue_size(topology.DEAD_LETTER_QUEUE) == 0
+    assert broker.queue_size(topology.SERVER_ALERTS_QUEUE) == 3
+
+    tag = broker.register_consumer(topology.SERVER_ALERTS_QUEUE, prefetch_count=3)
+    replayed = [broker.get(tag, timeout=0) for _ in range(3)]
+    assert [delivery[1] for delivery in replayed] == [routing_key] * 3
+    # El reenvío quita x-death: un nuevo rechazo empieza de cero
+    assert all(not (delivery[3].get("headers") or {}).get("x-death") for delivery in replayed)
+
+
+def test_purge_empties_dead_letters(broker):
+    for n in range(3):
+        broker.publish(topology.DEAD_LETTER_EXCHANGE, f"alert.c{n}", b"{}")
+    assert broker.queue_size(topology.DEAD_LETTER_QUEUE) == 3
+    assert dead_letters.purge(mode="inmemory") == 3
+    assert broker.queue_size(topology.DEAD_LETTER_QUEUE) == 0
+    assert dead_letters.replay(mode="inmemory") == 0
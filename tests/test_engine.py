@@ -0,0 +1,77 @@
+from common.clock import VirtualClock
+from simulation.engine import SimulationEngine
+
+
+class Source:
+    """Fuente de eventos con horas fijas que anota cuándo se atiende."""
+
+    def __init__(self, name, times, log):
+        self.name = name
+        self.times = sorted(times)
+        self.log = log
+
+    def next_due(self):
+        return self.times[0] if self.times else None
+
+    def run_pending(self, now):
+        fired = 0
+        while self.times and self.times[0] <= now:
+            self.times.pop(0)
+            self.log.append((now, self.name))
+            fired += 1
+        return fired
+
+
+def test_clock_only_moves_forward():
+    clock = VirtualClock(epoch=1000.0)
+    clock.sleep(5)
+    clock.advance_to(3)
+    clock.advance(-1)
+    assert clock.monotonic() == 5
+    assert clock.time() == 1005.0
+
+
+def test_sources_run_in_time_order():
+    log = []
+    engine = SimulationEngine()
+    engine.add_source(Source("a", [1.0, 5.0], log))
+    engine.add_source(Source("b", [2.0, 3.0], log))
+    result = engine.run()
+    assert log == [(1.0, "a"), (2.0, "b"), (3.0, "b"), (5.0, "a")]
+    assert result == {"steps": 4, "handled": 4, "simulated_time": 5.0}
+
+
+def test_ties_go_to_the_source_registered_first():
+    log = []
+    engine = SimulationEngine()
+    engine.add_source(Source("a", [1.0], log))
+    engine.add_source(Source("b", [1.0], log))
+    engine.run()
+    assert log == [(1.0, "a"), (1.0, "b")]
+
+
+def test_scheduled_callbacks_use_simulated_time():
+    engine = SimulationEngine()
+    fired = []
+
+    def tick(n):
+        fired.append((engine.clock.monotonic(), n))
+        if n < 3:
+            engine.schedule(10, tick, n + 1)
+
+    engine.schedule(10, tick, 1)
+    engine.run()
+    assert fired == [(10.0, 1), (20.0, 2), (30.0, 3)]
+
+
+def test_run_stops_at_until_and_max_steps():
+    log = []
+    engine = SimulationEngine()
+    engine.add_source(Source("a", [1.0, 2.0, 3.0, 50.0], log))
+    engine.run(until=10)
+    assert [name for _, name in log] == ["a", "a", "a"]
+    assert engine.clock.monotonic() == 10
+    engine.run(max_steps=0)
+    assert len(log) == 3
+    engine.run()
+    assert log[-1] == (50.0, "a")
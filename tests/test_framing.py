@@ -0,0 +1,89 @@
+import socket
+
+import pytest
+
+from common.message import AlertMessage
+from communication.sockets.framing import (
+    HEADER, FrameBuffer, FrameTooLargeError, decode_payload, encode_frame, frame_parts, send_frame
+)
+
+
+@pytest.fixture
+def sockets():
+    left, right = socket.socketpair()
+    yield left, right
+    left.close()
+    right.close()
+
+
+def receive(buffer, sock, data, sender):
+    sender.sendall(data)
+    received = 0
+    while received < len(data):
+        received += buffer.recv_into(sock)
+
+
+def test_header_split_across_receives(sockets):
+    sender, receiver = sockets
+    frame = encode_frame(AlertMessage(sender_id="SPY001", description="partida"))
+    buffer = FrameBuffer()
+
+    receive(buffer, receiver, frame[:2], sender)
+    assert buffer.next_frame() is None
+    receive(buffer, receiver, frame[2:7], sender)
+    assert buffer.next_frame() is None
+    assert buffer.pending == 7
+    receive(buffer, receiver, frame[7:], sender)
+
+    message = decode_payload(buffer.next_frame())
+    assert (message.sender_id, message.description) == ("SPY001", "partida")
+    assert buffer.pending == 0
+
+
+def test_several_frames_in_one_receive(sockets):
+    sender, receiver = sockets
+    messages = [AlertMessage(sender_id=f"SPY{n:03d}") for n in range(5)]
+    data = b"".join(encode_frame(message) for message in messages)
+    buffer = FrameBuffer()
+
+    receive(buffer, receiver, data[:-3], sender)
+    assert [decode_payload(f).sender_id for f in buffer.frames()] == [f"SPY{n:03d}" for n in range(4)]
+    receive(buffer, receiver, data[-3:], sender)
+    assert [decode_payload(f).sender_id for f in buffer.frames()] == ["SPY004"]
+
+
+def test_frame_larger_than_initial_buffer():
+    message = AlertMessage(sender_id="SPY001", description="x" * 300)
+    buffer = FrameBuffer(initial_size=16)
+    frame = encode_frame(message)
+    for i in range(0, len(frame), 10):
+        buffer.feed(frame[i:i + 10])
+    assert decode_payload(buffer.next_frame()).description == "x" * 300
+
+
+def test_send_frame_round_trip(sockets):
+    sender, receiver = sockets
+    send_frame(sender, *frame_parts(AlertMessage(sender_id="SPY002")))
+    buffer = FrameBuffer()
+    frame = None
+    while frame is None:
+        assert buffer.recv_into(receiver)
+        frame = buffer.next_frame()
+    assert decode_payload(frame).sender_id == "SPY002"
+
+
+def test_oversize_frame_is_rejected():
+    buffer = FrameBuffer(max_message_size=100)
+    buffer.feed(HEADER.pack(101) + b"{}")
+    with pytest.raises(FrameTooLargeError):
+        buffer.next_frame()
+
+
+def test_oversize_frame_is_rejected_before_growing(sockets):
+    sender, receiver = sockets
+    buffer = FrameBuffer(max_message_size=100, initial_size=16)
+    receive(buffer, receiver, HEADER.pack(1000) + b"a" * 12, sender)
+    # El buffer está lleno y la cabecera pide más que el máximo: no se amplía
+    sender.sendall(b"a")
+    with pytest.raises(FrameTooLargeError):
+        buffer.recv_into(receiver)
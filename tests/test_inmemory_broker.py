@@ -0,0 +1,211 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from communication.inmemory.broker import InMemoryBroker, start_broker_server, topic_matches
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def broker():
+    broker = InMemoryBroker()
+    broker.declare_exchange("ex", "topic")
+    return broker
+
+
+def queue(broker, name, *binding_keys, **arguments):
+    broker.declare_queue(name, arguments=arguments or None)
+    for binding_key in binding_keys:
+        broker.bind_queue(name, "ex", binding_key)
+    return name
+
+
+@pytest.mark.parametrize("binding_key, routing_key, expected", [
+    ("alert.*", "alert.c1", True),
+    ("alert.*", "alert.c1.x", False),
+    ("alert.*", "alert", False),
+    ("alert.#", "alert", True),
+    ("alert.#", "alert.c1.x", True),
+    ("#", "", True),
+    ("#.x", "alert.c1.x", True),
+    ("*.c1.#", "alert.c1", True),
+    ("*.c1.#", "alert.c2", False),
+    ("alert.c1", "alert.c1", True),
+    ("alert.c1", "alert.c2", False),
+])
+def test_topic_matches(binding_key, routing_key, expected):
+    assert topic_matches(binding_key, routing_key) is expected
+
+
+def test_publish_routes_by_binding_and_exchange_type(broker):
+    queue(broker, "alerts", "alert.*")
+    queue(broker, "all", "#")
+    broker.declare_exchange("direct", "direct")
+    broker.declare_queue("exact")
+    broker.bind_queue("exact", "direct", "alert.c1")
+
+    assert broker.publish("ex", "alert.c1", b"a") == 2
+    assert broker.publish("ex", "position.c1", b"b") == 1
+    assert broker.publish("direct", "alert.c1", b"c") == 1
+    assert broker.publish("direct", "alert.c2", b"d") == 0
+    assert broker.publish("", "exact", b"e") == 1  # Exchange por defecto
+    assert broker.publish("missing", "alert.c1", b"f") == 0
+    assert [broker.queue_size(name) for name in ("alerts", "all", "exact")] == [1, 2, 2]
+
+
+def test_priority_queue_delivers_highest_first_and_fifo_within_level(broker):
+    queue(broker, "q", "#", **{"x-max-priority": 5})
+    for body, priority in ((b"low1", 1), (b"none", None), (b"high", 9), (b"low2", 1), (b"mid", 3)):
+        broker.publish("ex", "k", body, {"priority": priority})
+    tag = broker.register_consumer("q", prefetch_count=10)
+
+    bodies = [broker.get(tag, timeout=0)[2] for _ in range(5)]
+    # Las prioridades por encima del máximo se recortan a él
+    assert bodies == [b"high", b"mid", b"low1", b"low2", b"none"]
+
+
+def test_prefetch_limits_unacked_deliveries(broker):
+    queue(broker, "q", "#")
+    for n in range(3):
+        broker.publish("ex", "k", bytes([n]))
+    tag = broker.register_consumer("q", prefetch_count=2)
+
+    first = broker.get(tag, timeout=0)
+    assert broker.get(tag, timeout=0) is not None
+    assert broker.get(tag, timeout=0.05) is None
+    broker.ack(first[0])
+    assert broker.get(tag, timeout=0)[2] == bytes([2])
+
+
+def test_nack_with_requeue_redelivers_first(broker):
+    queue(broker, "q", "#")
+    broker.publish("ex", "k", b"a")
+    broker.publish("ex", "k", b"b")
+    tag = broker.register_consumer("q", prefetch_count=1)
+
+    delivery_tag, _, body, _, redelivered = broker.get(tag, timeout=0)
+    assert (body, redelivered) == (b"a", False)
+    broker.nack(delivery_tag, requeue=True)
+    _, _, body, _, redelivered = broker.get(tag, timeout=0)
+    assert (body, redelivered) == (b"a", True)
+
+
+def test_cancel_returns_unacked_in_order(broker):
+    queue(broker, "q", "#")
+    for body in (b"a", b"b", b"c"):
+        broker.publish("ex", "k", body)
+    tag = broker.register_consumer("q", prefetch_count=2)
+    broker.get(tag, timeout=0)
+    broker.get(tag, timeout=0)
+
+    broker.cancel_consumer(tag)
+    assert broker.get(tag, timeout=0) is None
+    assert broker.queue_size("q") == 3
+    other = broker.register_consumer("q", prefetch_count=3)
+    deliveries = [broker.get(other, timeout=0) for _ in range(3)]
+    assert [(d[2], d[4]) for d in deliveries] == [(b"a", True), (b"b", True), (b"c", False)]
+
+
+def test_ack_after_cancel_is_ignored(broker):
+    queue(broker, "q", "#")
+    broker.publish("ex", "k", b"a")
+    tag = broker.register_consumer("q")
+    delivery_tag = broker.get(tag, timeout=0)[0]
+    broker.cancel_consumer(tag)
+
+    broker.ack(delivery_tag)
+    assert broker.queue_size("q") == 1
+
+
+def test_nack_without_requeue_dead_letters_with_x_death(broker):
+    broker.declare_exchange("dlx", "fanout")
+    broker.declare_queue("dead")
+    broker.bind_queue("dead", "dlx", "")
+    queue(broker, "q", "alert.*", **{"x-dead-letter-exchange": "dlx"})
+    broker.publish("ex", "alert.c1", b"a", {"headers": {"origin": "test"}})
+    tag = broker.register_consumer("q")
+    dead = broker.register_consumer("dead")
+
+    broker.nack(broker.get(tag, timeout=0)[0], requeue=False)
+    dead_tag, routing_key, body, properties, _ = broker.get(dead, timeout=0)
+    broker.ack(dead_tag)
+    assert (routing_key, body) == ("alert.c1", b"a")
+    assert properties["headers"]["origin"] == "test"
+    death, = properties["headers"]["x-death"]
+    assert death["queue"] == "q"
+    assert death["reason"] == "rejected"
+    assert death["count"] == 1
+    assert death["routing-keys"] == ["alert.c1"]
+
+    # Devuelto a la cola original y rechazado otra vez: se incrementa la misma entrada
+    broker.publish("", "q", body, properties)
+    broker.nack(broker.get(tag, timeout=0)[0], requeue=False)
+    death, = broker.get(dead, timeout=0)[3]["headers"]["x-death"]
+    assert death["count"] == 2
+
+
+def test_nack_without_dead_letter_exchange_drops(broker):
+    queue(broker, "q", "#")
+    broker.publish("ex", "k", b"a")
+    tag = broker.register_consumer("q")
+    broker.nack(broker.get(tag, timeout=0)[0], requeue=False)
+    assert broker.queue_size("q") == 0
+    assert broker.get(tag, timeout=0) is None
+
+
+def test_dead_letter_routing_key_override(broker):
+    broker.declare_exchange("dlx", "direct")
+    broker.declare_queue("dead")
+    broker.bind_queue("dead", "dlx", "dead")
+    queue(broker, "q", "#", **{"x-dead-letter-exchange": "dlx", "x-dead-letter-routing-key": "dead"})
+    broker.publish("ex", "alert.c1", b"a")
+    tag = broker.register_consumer("q")
+    broker.nack(broker.get(tag, timeout=0)[0], requeue=False)
+    assert broker.queue_size("dead") == 1
+
+
+def test_purge_only_drops_ready_messages(broker):
+    queue(broker, "q", "#")
+    for body in (b"a", b"b", b"c"):
+        broker.publish("ex", "k", body)
+    tag = broker.register_consumer("q")
+    delivery_tag = broker.get(tag, timeout=0)[0]
+
+    assert broker.purge_queue("q") == 2
+    assert broker.purge_queue("missing") == 0
+    broker.nack(delivery_tag, requeue=True)
+    assert broker.queue_size("q") == 1
+
+
+def test_register_consumer_on_missing_queue(broker):
+    with pytest.raises(KeyError):
+        broker.register_consumer("missing")
+
+
+def test_broker_manager_round_trip_across_processes():
+    manager = start_broker_server()
+    try:
+        broker = manager.get_broker()
+        broker.declare_exchange("ex", "topic")
+        broker.declare_queue("q")
+        broker.bind_queue("q", "ex", "alert.*")
+        tag = broker.register_consumer("q")
+
+        host, port = manager.address
+        code = ("from communication.inmemory.broker import get_broker\n"
+                "print(get_broker().publish('ex', 'alert.c1', b'hola', {'priority': 3}))\n")
+        env = dict(os.environ, INMEMORY_BROKER_ADDRESS=f"{host}:{port}")
+        child = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                               capture_output=True, text=True, timeout=30)
+        assert child.returncode == 0, child.stderr
+        assert child.stdout.strip() == "1"
+
+        delivery_tag, routing_key, body, properties, redelivered = broker.get(tag, timeout=5)
+        assert (routing_key, body, properties, redelivered) == ("alert.c1", b"hola", {"priority": 3}, False)
+        broker.ack(delivery_tag)
+        assert broker.queue_size("q") == 0
+    finally:
+        manager.shutdown()
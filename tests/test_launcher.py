@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+import config
+from simulation.launcher import CPU_TIME, HEARTBEAT, ComponentLauncher
+from simulation.supervisor import ProcessSupervisor
+
+
+def ready_component(on_ready, beat):
+    on_ready()
+    while True:
+        beat()
+        time.sleep(0.01)
+
+
+def failing_component(on_ready, beat):
+    raise SystemExit(3)
+
+
+def silent_component(on_ready, beat):
+    while True:
+        time.sleep(0.01)
+
+
+def stubborn_component(on_ready, beat):
+    on_ready()
+    while True:
+        try:
+            beat()
+            time.sleep(0.01)
+        except KeyboardInterrupt:
+            pass  # Ignora la parada ordenada
+
+
+def hung_component(on_ready, beat):
+    on_ready()
+    beat()
+    threading.Event().wait()  # Bloqueado: el proceso sigue vivo pero no avanza
+
+
+@pytest.fixture
+def launcher(monkeypatch):
+    monkeypatch.setattr(config, "HEARTBEAT_INTERVAL", 0.05)
+    launcher = ComponentLauncher(method="fork")
+    yield launcher
+    launcher.stop(timeout=1.0)
+
+
+def test_wait_ready_returns_once_all_components_report(launcher):
+    launcher.start_many([(f"HOST{i}", ready_component, ()) for i in range(3)])
+    assert launcher.wait_ready(timeout=10)
+    assert sorted(launcher.startup_times) == ["HOST0", "HOST1", "HOST2"]
+
+    deadline = time.monotonic() + 5
+    while not launcher.status["HOST0"][HEARTBEAT] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert launcher.status["HOST0"][HEARTBEAT] > 0
+    assert launcher.status["HOST0"][CPU_TIME] >= 0
+
+
+def test_component_that_exits_before_ready_fails(launcher):
+    launcher.start("server", failing_component)
+    assert not launcher.wait_ready(timeout=10)
+    assert launcher.failed == ["server"]
+    assert launcher.processes["server"].exitcode == 3
+
+
+def test_wait_ready_times_out(launcher):
+    launcher.start("server", silent_component)
+    started = time.monotonic()
+    assert not launcher.wait_ready(timeout=0.3)
+    assert time.monotonic() - started < 2
+    assert "server" not in launcher.startup_times
+
+
+def test_stop_terminates_cleanly_and_kills_stragglers(launcher):
+    launcher.start("HOST01", ready_component)
+    launcher.start("HOST02", stubborn_component)
+    assert launcher.wait_ready(timeout=10)
+
+    assert launcher.stop(["HOST01"], timeout=5) == []
+    assert launcher.processes["HOST01"].exitcode == 0
+    assert launcher.stop(["HOST02"], timeout=0.3) == ["HOST02"]
+    assert not launcher.processes["HOST02"].is_alive()
+
+
+def test_restart_ignores_stale_ready_notice(launcher):
+    launcher.start("HOST01", ready_component)
+    assert launcher.wait_ready(timeout=10)
+    launcher.stop(["HOST01"])
+    launcher.restart("HOST01")
+    assert launcher.wait_ready(["HOST01"], timeout=10)
+    assert launcher.processes["HOST01"].is_alive()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_heartbeat_stops_when_the_main_loop_does_not_advance(launcher):
+    launcher.start("HOST01", ready_component)
+    launcher.start("HOST02", hung_component)
+    assert launcher.wait_ready(timeout=10)
+    assert wait_for(lambda: launcher.status["HOST02"][HEARTBEAT] > 0)
+    time.sleep(0.2)  # Latidos del aviso y de la única vuelta
+
+    first = {name: launcher.status[name][HEARTBEAT] for name in ("HOST01", "HOST02")}
+    cpu_time = launcher.status["HOST02"][CPU_TIME]
+    time.sleep(0.3)
+    assert launcher.status["HOST01"][HEARTBEAT] > first["HOST01"]
+    assert launcher.status["HOST02"][HEARTBEAT] == first["HOST02"]
+    assert launcher.processes["HOST02"].is_alive()
+    # El hilo de latido sigue informando del consumo
+    assert launcher.status["HOST02"][CPU_TIME] >= cpu_time
+
+
+def test_supervisor_restarts_hung_component(launcher, monkeypatch):
+    monkeypatch.setattr(config, "HEARTBEAT_TIMEOUT", 0.5)
+    monkeypatch.setattr(config, "RESTART_BACKOFF_INITIAL", 0.05)
+    monkeypatch.setattr(config, "RESTART_BACKOFF_MAX", 0.05)
+    monkeypatch.setattr(config, "MAX_RESTARTS", 3)
+    launcher.start("HOST01", ready_component)
+    launcher.start("HOST02", hung_component)
+    assert launcher.wait_ready(timeout=10)
+    hung = launcher.processes["HOST02"]
+
+    supervisor = ProcessSupervisor(launcher)
+    restarted = []
+    assert wait_for(lambda: restarted.extend(supervisor.check()) or restarted, timeout=10)
+
+    assert restarted == ["HOST02"]
+    assert hung.exitcode is not None  # El proceso colgado se mató
+    assert launcher.processes["HOST02"] is not hung
+    assert launcher.wait_ready(["HOST02"], timeout=10)
+    assert supervisor.restarts == {"HOST02": 1}
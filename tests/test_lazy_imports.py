@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROGRAM = """
+import importlib, json, sys
+import config
+config.COMMUNICATION_MODE = {mode!r}
+importlib.import_module({entry!r})
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def loaded_modules(entry, mode):
+    output = subprocess.run([sys.executable, "-c", PROGRAM.format(entry=entry, mode=mode)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return set(json.loads(output))
+
+
+@pytest.mark.parametrize("entry", ["simulation.launcher", "simulation.supervisor", "agents.spy"])
+def test_entry_points_skip_heavy_modules(entry):
+    modules = loaded_modules(entry, "sockets")
+    assert not modules & {"numpy", "pika", "flask", "folium", "server.central_server", "simulation.virtual"}
+
+
+def test_transport_is_loaded_only_for_its_mode():
+    assert "pika" not in loaded_modules("communication.factory", "inmemory")
+    assert "communication.inmemory.broker" not in loaded_modules("communication.factory", "sockets")
+
+
+def test_simulation_package_exports_resolve_on_use():
+    modules = loaded_modules("simulation", "sockets")
+    assert "simulation.virtual" not in modules
+    from simulation import VirtualSimulation
+    assert VirtualSimulation.__module__ == "simulation.virtual"
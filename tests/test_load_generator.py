@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.load_generator import ReplayedAlerts, SyntheticAlerts, parse_weights, run_step
+from common.clock import VirtualClock
+from common.constants import EmergencyLevel
+from common.message import AlertMessage
+from common.utils import EMERGENCY_LEVEL_CHOICES, EMERGENCY_TYPE_CHOICES
+from communication.rabbitmq.topology import alert_routing_key
+from communication.recording import TrafficRecorder
+
+POSITION = (40.75, -74.0)
+
+
+class StallingClient:
+    """Cliente que se atasca ``stall`` segundos en el primer envío."""
+
+    def __init__(self, stall=0.0):
+        self.stall = stall
+        self.sent = []  # (instante de envío, mensaje, clave)
+
+    def publish_message(self, message, routing_key=""):
+        if not self.sent and self.stall:
+            time.sleep(self.stall)
+        self.sent.append((time.perf_counter(), message, routing_key))
+        return True
+
+
+def uniform_source():
+    weights = parse_weights(None, EMERGENCY_LEVEL_CHOICES)
+    return SyntheticAlerts(weights, parse_weights(None, EMERGENCY_TYPE_CHOICES), seed=1)
+
+
+# ===== Pesos =====
+
+def test_parse_weights():
+    assert np.allclose(parse_weights(None, ["a", "b"]), [0.5, 0.5])
+    assert np.allclose(parse_weights([], ["a", "b"]), [0.5, 0.5])
+    # Los nombres omitidos pesan 0; el nombre puede contener ":"
+    assert np.allclose(parse_weights(["a:3", "c:1"], ["a", "b", "c"]), [0.75, 0, 0.25])
+    assert np.allclose(parse_weights(["x:y:1"], ["x:y", "z"]), [1, 0])
+
+
+@pytest.mark.parametrize("entries", [["d:1"], ["a:0", "b:0"], ["a"]])
+def test_parse_weights_rejects_invalid_entries(entries):
+    with pytest.raises(ValueError):
+        parse_weights(entries, ["a", "b"])
+
+
+# ===== Fuentes de alertas =====
+
+def test_synthetic_alerts_follow_the_weights_and_route_by_cell():
+    levels = parse_weights([f"{EmergencyLevel.CRITICAL}:1"], EMERGENCY_LEVEL_CHOICES)
+    source = SyntheticAlerts(levels, parse_weights(None, EMERGENCY_TYPE_CHOICES),
+                             hotspots=[(*POSITION, 0.5, 1.0)], uniform_weight=0.0, seed=2)
+    chunk = source.chunk(200)
+    assert {message.emergency_level for message, _ in chunk} == {EmergencyLevel.CRITICAL}
+    assert all(routing_key == alert_routing_key(message.position) for message, routing_key in chunk)
+
+
+def test_replayed_alerts_get_new_ids(tmp_path):
+    path = str(tmp_path / "alertas.rec")
+    original = AlertMessage(sender_id="SPY001", position=POSITION, timestamp=123.0)
+    recorder = TrafficRecorder(path, clock=VirtualClock())
+    recorder.record(original, alert_routing_key(POSITION))
+    recorder.close()
+
+    copies = ReplayedAlerts(path).chunk(3)
+    assert len({message.message_id for message, _ in copies} | {original.message_id}) == 4
+    assert all(routing_key == alert_routing_key(POSITION) for _, routing_key in copies)
+    # La marca de tiempo la pone run_step al enviar
+    assert all(message.timestamp == 123.0 for message, _ in copies)
+
+
+# ===== Planificación de bucle abierto =====
+
+def test_messages_go_out_on_schedule_stamped_at_send_time():
+    client = StallingClient()
+    before, started = time.time(), time.perf_counter()
+    result = run_step(client, uniform_source(), rate=500, duration=0.1)
+    assert (result["sent"], result["errors"]) == (50, 0)
+
+    # Cada mensaje sale no antes de su hora prevista, i / tasa desde el inicio
+    assert all(sent_at >= started + i / 500 for i, (sent_at, _, _) in enumerate(client.sent))
+    timestamps = [message.timestamp for _, message, _ in client.sent]
+    assert before <= timestamps[0] and timestamps == sorted(timestamps)
+
+
+def test_latency_is_measured_from_the_intended_send_time():
+    # Un atasco de 50 ms al principio retrasa todos los envíos previstos dentro de él
+    stall = 0.05
+    client = StallingClient(stall)
+    result = run_step(client, uniform_source(), rate=1000, duration=0.04)
+
+    # En bucle cerrado solo el primer envío mediría el atasco; aquí lo acumulan todos:
+    # el mensaje i, previsto a i ms, sale tras el atasco y su latencia es ~stall - i ms
+    assert result["max"] >= stall
+    assert result["p50"] >= stall - 0.04 / 2 - 0.005
+    assert result["achieved"] < 1000
@@ -0,0 +1,53 @@
+import pytest
+
+from agents.movement import FleetMovement, interpolate_position, travel_time
+from common.geo import calculate_distance
+
+ORIGIN = (40.70, -74.00)
+DESTINATION = (40.80, -73.90)
+
+
+def test_travel_time_is_distance_over_speed():
+    distance = calculate_distance(ORIGIN, DESTINATION)
+    assert travel_time(ORIGIN, DESTINATION, speed_kmh=60, time_scale=1.0) == pytest.approx(distance * 60)
+    assert travel_time(ORIGIN, DESTINATION, speed_kmh=30, time_scale=1.0) == pytest.approx(distance * 120)
+
+
+def test_travel_time_scale():
+    full = travel_time(ORIGIN, DESTINATION, speed_kmh=40, time_scale=1.0)
+    assert travel_time(ORIGIN, DESTINATION, speed_kmh=40, time_scale=0.1) == pytest.approx(full * 0.1)
+    assert travel_time(ORIGIN, DESTINATION, speed_kmh=40, time_scale=0) == 0
+
+
+def test_travel_time_to_same_place_is_zero():
+    assert travel_time(ORIGIN, ORIGIN, speed_kmh=40, time_scale=1.0) == 0
+
+
+@pytest.mark.parametrize("fraction, expected", [
+    (0.0, ORIGIN),
+    (0.5, (40.75, -73.95)),
+    (1.0, DESTINATION),
+    (-1.0, ORIGIN),
+    (2.0, DESTINATION),
+])
+def test_interpolate_position(fraction, expected):
+    assert interpolate_position(ORIGIN, DESTINATION, fraction) == pytest.approx(expected)
+
+
+def test_fleet_positions_match_interpolation():
+    fleet = FleetMovement(speed_kmh=40, time_scale=1.0, capacity=1)
+    duration = fleet.depart("AGENT001", ORIGIN, DESTINATION, now=100.0)
+    fleet.depart("AGENT002", DESTINATION, DESTINATION, now=100.0)
+    fleet.depart("AGENT003", DESTINATION, ORIGIN, now=100.0)
+    fleet.arrive("AGENT001")
+    fleet.depart("AGENT001", ORIGIN, DESTINATION, now=100.0)
+
+    ids, positions = fleet.positions(100.0 + duration / 4)
+    assert sorted(ids) == ["AGENT001", "AGENT002", "AGENT003"]
+    expected = {
+        "AGENT001": interpolate_position(ORIGIN, DESTINATION, 0.25),
+        "AGENT002": DESTINATION,
+        "AGENT003": interpolate_position(DESTINATION, ORIGIN, 0.25),
+    }
+    for agent_id, position in zip(ids, positions):
+        assert tuple(position) == pytest.approx(expected[agent_id])
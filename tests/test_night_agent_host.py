@@ -0,0 +1,124 @@
+import pytest
+
+import config
+from agents.movement import travel_time
+from agents.night_agent_host import NightAgentHost, partition_agents
+from common.clock import VirtualClock
+from common.constants import AgentPhase, AgentStatus
+from common.message import TaskMessage
+
+HOME = (40.70, -74.00)
+INCIDENT = (40.75, -73.95)
+
+
+class RecordingPublisher:
+    def __init__(self):
+        self.sent = []
+
+    def publish_message(self, message, routing_key=''):
+        self.sent.append((routing_key, message.status, message.current_task_id))
+        return True
+
+
+@pytest.fixture
+def host(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LOGS_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "MIN_TASK_DURATION", 10)
+    monkeypatch.setattr(config, "MAX_TASK_DURATION", 10)
+    monkeypatch.setattr(config, "AGENT_TRAVEL_TIME_SCALE", 1.0)
+    monkeypatch.setattr(config, "AGENT_POSITION_UPDATE_INTERVAL", 0)
+    host = NightAgentHost(request.node.name, [("AGENT001", HOME), ("AGENT002", HOME)], clock=VirtualClock())
+    host.publisher = RecordingPublisher()
+    return host
+
+
+def task(alert_id, agent_id="AGENT001", level="MEDIA"):
+    return TaskMessage(alert_id=alert_id, position=INCIDENT, emergency_level=level, target_agent_id=agent_id)
+
+
+def run_until(host, instant):
+    host.clock.advance_to(instant)
+    return host.run_pending()
+
+
+def test_task_goes_through_every_phase(host):
+    agent = host.agents["AGENT001"]
+    travel = travel_time(HOME, INCIDENT, time_scale=1.0)
+    assert host.submit(task("A1"))
+
+    assert run_until(host, 0) == 1
+    assert agent.phase == AgentPhase.TRAVELLING
+    assert host.publisher.sent == [("status.agent.AGENT001", AgentStatus.BUSY, "A1")]
+
+    run_until(host, travel - 0.001)
+    assert agent.phase == AgentPhase.TRAVELLING
+    run_until(host, travel)
+    assert agent.phase == AgentPhase.WORKING
+    assert agent.position == INCIDENT
+    assert host.arrivals == 1
+
+    run_until(host, travel + 10)
+    assert agent.phase == AgentPhase.IDLE and agent.task is None
+    assert host.publisher.sent[1:] == [
+        ("status.agent.AGENT001.completed", AgentStatus.AVAILABLE, "A1"),
+        ("status.agent.AGENT001", AgentStatus.AVAILABLE, None),
+    ]
+    assert host.tasks_completed == 1
+    assert host.next_due() is None
+
+
+def test_critical_tasks_take_longer(host):
+    travel = travel_time(HOME, INCIDENT, time_scale=1.0)
+    host.submit(task("A1", level="CRÍTICA"))
+    run_until(host, 0)
+    run_until(host, travel)
+    run_until(host, travel + 10)
+    assert host.agents["AGENT001"].phase == AgentPhase.WORKING
+    run_until(host, travel + 15)
+    assert host.agents["AGENT001"].phase == AgentPhase.IDLE
+
+
+def test_busy_and_unknown_agents_reject_tasks(host):
+    host.submit(task("A1"))
+    host.submit(task("A2"))
+    host.submit(task("A3", agent_id="AGENT999"))
+    host.submit(task("A4", agent_id="AGENT002"))
+    run_until(host, 0)
+
+    assert host.tasks_started == 2
+    assert host.tasks_rejected == 2
+    assert host.agents["AGENT001"].task.alert_id == "A1"
+    assert host.agents["AGENT002"].task.alert_id == "A4"
+
+
+def test_position_ticks_while_travelling(host, monkeypatch):
+    monkeypatch.setattr(config, "AGENT_POSITION_UPDATE_INTERVAL", 1.0)
+    travel = travel_time(HOME, INCIDENT, time_scale=1.0)
+    host.submit(task("A1"))
+    run_until(host, 0)
+    run_until(host, 1.0)
+
+    position = host.agents["AGENT001"].position
+    assert HOME[0] < position[0] < INCIDENT[0]
+    assert len(host.publisher.sent) == 2
+
+    while host.next_due() is not None:
+        run_until(host, host.next_due())
+    # Un informe de posición por segundo de viaje, y ninguno una vez ha llegado
+    updates = [sent for sent in host.publisher.sent if sent[1] == AgentStatus.BUSY]
+    assert len(updates) == 1 + int(travel)
+    assert host.agents["AGENT001"].phase == AgentPhase.IDLE
+
+
+def test_submit_ignores_non_tasks(host):
+    assert not host.submit("{no es json")
+    assert host.submit(task("A1").to_json())
+    assert host.next_due() == host.clock.monotonic()
+
+
+@pytest.mark.parametrize("agents, hosts, sizes", [(10, 3, [4, 3, 3]), (2, 5, [1, 1]), (0, 4, [0]), (5, 0, [5])])
+def test_partition_agents(agents, hosts, sizes):
+    partition = partition_agents(agents, hosts)
+    assert [len(group) for group in partition] == sizes
+    ids = sorted(agent_id for group in partition for agent_id, _ in group)
+    assert ids == [f"AGENT{i + 1:03d}" for i in range(agents)]
@@ -0,0 +1,60 @@
+import threading
+
+from common.constants import EmergencyLevel
+from common.message import AlertMessage
+from communication.inmemory.broker import InMemoryBroker
+from communication.inmemory.consumer import InMemoryConsumer
+from communication.inmemory.publisher import InMemoryPublisher
+from communication.rabbitmq import topology
+
+POSITION = (40.75, -74.0)
+
+
+def alert(level, n):
+    return AlertMessage(message_type="ALERT", sender_id=f"SPY{n:03d}", position=POSITION,
+                        emergency_level=level)
+
+
+def test_message_priority_follows_emergency_level():
+    assert topology.message_priority(alert(EmergencyLevel.CRITICAL, 0)) > \
+        topology.message_priority(alert(EmergencyLevel.LOW, 0))
+
+
+def test_critical_alerts_overtake_low_backlog():
+    broker = InMemoryBroker()
+    consumer = InMemoryConsumer(
+        exchange=topology.EXCHANGE, queue_name=topology.SERVER_ALERTS_QUEUE,
+        binding_keys=[topology.ALERT_BINDING_KEY], queue_arguments=topology.queue_arguments(priority=True),
+        broker=broker, poll_interval=0.05
+    )
+    publisher = InMemoryPublisher(exchange=topology.EXCHANGE, broker=broker)
+    assert consumer.connect() and publisher.connect()
+    routing_key = topology.alert_routing_key(POSITION)
+
+    delivered = []
+    first_delivery = threading.Event()
+    release = threading.Event()
+    done = threading.Event()
+
+    def on_alert(message, _routing_key):
+        delivered.append(message.emergency_level)
+        if len(delivered) == 1:
+            # El consumidor está ocupado con la primera alerta BAJA mientras llegan las CRÍTICA
+            first_delivery.set()
+            release.wait(5)
+        if len(delivered) == 30:
+            done.set()
+
+    for n in range(25):
+        assert publisher.publish_message(alert(EmergencyLevel.LOW, n), routing_key)
+    assert consumer.start_consuming(on_alert)
+    try:
+        assert first_delivery.wait(5)
+        for n in range(5):
+            assert publisher.publish_message(alert(EmergencyLevel.CRITICAL, n), routing_key)
+        release.set()
+        assert done.wait(5)
+    finally:
+        consumer.stop_consuming()
+
+    assert delivered == [EmergencyLevel.LOW] + [EmergencyLevel.CRITICAL] * 5 + [EmergencyLevel.LOW] * 24
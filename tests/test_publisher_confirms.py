@@ -0,0 +1,214 @@
+import threading
+import time
+
+import pytest
+from pika import frame, spec
+
+from common.message import StatusMessage
+from communication.rabbitmq.publisher import PublisherConfirmTracker, RabbitMQPublisher
+from communication.spool import MessageSpool
+
+
+def status(n):
+    return StatusMessage(message_type="STATUS", sender_id=f"AGENT{n:03d}", position=(40.75, -74.0))
+
+
+def ack(delivery_tag, multiple=False):
+    return frame.Method(1, spec.Basic.Ack(delivery_tag=delivery_tag, multiple=multiple))
+
+
+def nack(delivery_tag, multiple=False):
+    return frame.Method(1, spec.Basic.Nack(delivery_tag=delivery_tag, multiple=multiple))
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.published = []
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.published.append((routing_key, body))
+
+
+class FakeIOLoop:
+    def __init__(self):
+        self.stopped = False
+        self.callbacks = []
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeConnection:
+    is_open = True
+
+    def __init__(self):
+        self.ioloop = FakeIOLoop()
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.requests = 0
+
+    def request(self):
+        self.requests += 1
+
+    def stop(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+# ===== Ventana de confirmaciones =====
+
+def test_window_blocks_at_its_limit_until_a_slot_is_released():
+    tracker = PublisherConfirmTracker(max_in_flight=2)
+    assert tracker.acquire_slot(timeout=0) and tracker.acquire_slot(timeout=0)
+    assert not tracker.acquire_slot(timeout=0.05)
+
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: tracker.acquire_slot(timeout=5) and acquired.set())
+    waiter.start()
+    time.sleep(0.05)
+    assert not acquired.is_set()
+    tracker.release_slots(1)
+    waiter.join(5)
+    assert acquired.is_set()
+    assert tracker.in_flight == 2
+
+
+def test_multiple_ack_pops_every_tag_up_to_the_given_one():
+    tracker = PublisherConfirmTracker()
+    for tag in (1, 2, 3, 5):
+        tracker.register(tag, status(tag), f"k{tag}", 0)
+
+    assert [entry[1] for entry in tracker.pop(3, multiple=True)] == ["k1", "k2", "k3"]
+    assert tracker.pop(3) == []
+    assert tracker.pop(4) == []
+    assert [entry[1] for entry in tracker.pop(5)] == ["k5"]
+
+
+def test_pop_does_not_release_slots_and_drain_does():
+    tracker = PublisherConfirmTracker(max_in_flight=4)
+    for tag in (1, 2, 3):
+        tracker.acquire_slot()
+        tracker.register(tag, status(tag), "k", 0)
+    tracker.pop(1)
+    assert tracker.in_flight == 3
+
+    assert len(tracker.drain()) == 2
+    assert tracker.in_flight == 0
+    assert tracker.wait_until_empty(timeout=0)
+
+
+# ===== Manejador de ack/nack del publicador =====
+
+@pytest.fixture
+def publisher(tmp_path):
+    publisher = RabbitMQPublisher(publisher_confirms=True, max_in_flight=4, max_publish_retries=2,
+                                  spool=MessageSpool(str(tmp_path)))
+    publisher._supervisor = FakeSupervisor()
+    publisher.channel = FakeChannel()
+    return publisher
+
+
+def publish(publisher, n):
+    """Lo que hace el bucle de E/S con cada mensaje encolado por publish_message."""
+    assert publisher.confirm_tracker.acquire_slot(timeout=0)
+    publisher._publish_confirmed(status(n), f"status.{n}")
+
+
+def test_acks_release_the_window(publisher):
+    for n in range(3):
+        publish(publisher, n)
+    assert publisher.confirm_tracker.in_flight == 3
+
+    publisher._on_delivery_confirmation(ack(2, multiple=True))
+    assert publisher.confirmed_count == 2
+    assert publisher.confirm_tracker.in_flight == 1
+    publisher._on_delivery_confirmation(ack(3))
+    assert publisher.wait_for_confirms(timeout=0)
+    assert publisher.confirmed_count == 3
+
+
+def test_nack_retries_up_to_max_then_spools(publisher):
+    publish(publisher, 7)
+    channel = publisher.channel
+
+    # Cada nack reenvía con un delivery tag nuevo, conservando el hueco
+    publisher._on_delivery_confirmation(nack(1))
+    publisher._on_delivery_confirmation(nack(2))
+    assert len(channel.published) == 3
+    assert publisher.confirm_tracker.in_flight == 1
+    assert not publisher.spool.has_pending()
+
+    publisher._on_delivery_confirmation(nack(3))
+    assert len(channel.published) == 3
+    assert publisher.nacked_count == 3
+    assert publisher.confirm_tracker.in_flight == 0
+    (_, message, routing_key), = publisher.spool.read_batch(10)
+    assert (message.sender_id, routing_key) == ("AGENT007", "status.7")
+
+
+def test_multiple_nack_retries_each_message(publisher):
+    for n in range(2):
+        publish(publisher, n)
+    publisher._on_delivery_confirmation(nack(2, multiple=True))
+    assert [key for key, _ in publisher.channel.published] == ["status.0", "status.1"] * 2
+    assert publisher.confirm_tracker.in_flight == 2
+
+
+def test_connection_loss_spools_unconfirmed_and_reconnects(publisher):
+    connection = publisher.connection = FakeConnection()
+    for n in range(3):
+        publish(publisher, n)
+    publisher._on_delivery_confirmation(ack(1))
+
+    publisher._on_connection_closed(connection, "perdida")
+    assert publisher.confirm_tracker.in_flight == 0
+    assert publisher.channel is None
+    assert connection.ioloop.stopped
+    assert len(publisher.spool.read_batch(10)) == 2
+    assert publisher._supervisor.requests == 1
+
+
+def test_close_releases_the_window_without_reconnecting(publisher):
+    connection = publisher.connection = FakeConnection()
+    publisher.confirm_timeout = 0.05
+    for n in range(2):
+        publish(publisher, n)
+
+    publisher.close()
+    assert publisher.connection is None
+    assert connection.ioloop.callbacks == [connection.close]
+    # El cierre de la conexión llega después, desde el bucle de E/S
+    publisher._on_connection_closed(connection, "cerrada")
+    assert publisher.confirm_tracker.in_flight == 0
+    assert len(publisher.spool.read_batch(10)) == 2
+    assert publisher._supervisor.requests == 0
+
+    # Ni una pérdida de conexión tardía ni un fallo de publicación reconectan tras close()
+    publisher._reconnect()
+    assert publisher._supervisor.requests == 0
+
+
+def test_connection_discarded_by_a_reconnect_does_not_reconnect_again(publisher):
+    old = publisher.connection = FakeConnection()
+    publisher.confirm_timeout = 0.05
+    publisher._discard_connection()
+    new = publisher.connection = FakeConnection()
+    channel = publisher.channel = FakeChannel()
+
+    publisher._on_connection_closed(old, "cerrada")
+    assert publisher._supervisor.requests == 0
+    assert publisher.channel is channel  # El canal de la conexión nueva sigue en uso
+    publisher._on_connection_closed(new, "perdida")
+    assert publisher._supervisor.requests == 1
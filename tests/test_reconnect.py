@@ -0,0 +1,26 @@
+import pytest
+
+from communication.rabbitmq.reconnect import backoff_delay
+
+
+def test_backoff_grows_exponentially_without_jitter():
+    delays = [backoff_delay(attempt, initial_delay=0.5, max_delay=100, jitter=0) for attempt in range(5)]
+    assert delays == [0.5, 1.0, 2.0, 4.0, 8.0]
+
+
+def test_backoff_is_capped():
+    assert backoff_delay(50, initial_delay=0.5, max_delay=30, jitter=0) == 30
+    assert backoff_delay(3, initial_delay=1, max_delay=5, multiplier=3, jitter=0) == 5
+
+
+@pytest.mark.parametrize("attempt", [0, 3, 20])
+def test_jitter_stays_within_bounds(attempt):
+    base = backoff_delay(attempt, initial_delay=1, max_delay=30, jitter=0)
+    delays = [backoff_delay(attempt, initial_delay=1, max_delay=30, jitter=0.5) for _ in range(200)]
+    assert all(base * 0.5 <= delay <= base for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_full_jitter_can_reach_zero_but_not_exceed_base():
+    delays = [backoff_delay(2, initial_delay=1, jitter=1.0) for _ in range(200)]
+    assert all(0 <= delay <= 4 for delay in delays)
@@ -0,0 +1,91 @@
+import pytest
+
+from communication.shm.ring import RING_CONTROL_SIZE, ShmRing
+from communication.sockets.framing import HEADER_SIZE, FrameTooLargeError
+
+CAPACITY = 64
+
+
+def make_rings(capacity=CAPACITY):
+    """Productor y consumidor sobre el mismo buffer, como en dos procesos."""
+    buf = memoryview(bytearray(RING_CONTROL_SIZE + capacity))
+    producer = ShmRing(buf, 0, capacity)
+    producer.reset()
+    return producer, ShmRing(buf, 0, capacity)
+
+
+def payload(size, fill=b"a"):
+    return fill * (size - HEADER_SIZE)
+
+
+def test_empty_ring_reads_nothing():
+    producer, consumer = make_rings()
+    assert consumer.read() == []
+    assert producer.free_space() == CAPACITY
+    assert producer.is_drained()
+
+
+def test_frame_filling_remaining_space_fits():
+    producer, consumer = make_rings()
+    assert producer.write([payload(40)]) == 1
+    assert producer.free_space() == 24
+    # Una trama del tamaño exacto del hueco cabe y deja el anillo lleno
+    assert producer.write([payload(24, b"b")]) == 1
+    assert producer.free_space() == 0
+    assert producer.write([b""]) == 0
+
+    assert consumer.read() == [payload(40), payload(24, b"b")]
+    assert producer.free_space() == CAPACITY
+    assert producer.is_drained()
+
+
+def test_frame_one_byte_over_remaining_space_waits():
+    producer, consumer = make_rings()
+    assert producer.write([payload(40)]) == 1
+    assert producer.write([payload(25)]) == 0
+    assert consumer.read() == [payload(40)]
+    assert producer.write([payload(25)]) == 1
+
+
+def test_write_stops_at_first_frame_that_does_not_fit():
+    producer, consumer = make_rings()
+    assert producer.write([payload(30), payload(30), payload(10)]) == 2
+    assert consumer.read() == [payload(30), payload(30)]
+
+
+@pytest.mark.parametrize("offset", [CAPACITY - 2, CAPACITY - HEADER_SIZE, CAPACITY - 5])
+def test_wrap_around(offset):
+    producer, consumer = make_rings()
+    # Avanzar head y tail hasta ``offset`` para que la siguiente trama dé la vuelta
+    assert producer.write([payload(offset)]) == 1
+    assert consumer.read() == [payload(offset)]
+
+    data = bytes(range(CAPACITY - HEADER_SIZE))
+    assert producer.write([data]) == 1
+    assert producer.free_space() == 0
+    assert consumer.read() == [data]
+    assert producer.is_drained()
+
+
+def test_many_laps_keep_order():
+    producer, consumer = make_rings()
+    received = []
+    for n in range(200):
+        data = bytes([n % 256]) * (n % 23)
+        while not producer.write([data]):
+            received.extend(consumer.read())
+    received.extend(consumer.read())
+    assert received == [bytes([n % 256]) * (n % 23) for n in range(200)]
+
+
+def test_read_respects_max_frames():
+    producer, consumer = make_rings()
+    assert producer.write([b"1", b"2", b"3"]) == 3
+    assert consumer.read(max_frames=2) == [b"1", b"2"]
+    assert consumer.read() == [b"3"]
+
+
+def test_frame_larger_than_ring_is_rejected():
+    producer, _ = make_rings()
+    with pytest.raises(FrameTooLargeError):
+        producer.write([payload(CAPACITY + 1)])
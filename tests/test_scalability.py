@@ -0,0 +1,29 @@
+from benchmarks.scalability import compare
+
+CASE = {"spies": 100, "agents": 10, "rate": 0.1, "spy_model": "objetos"}
+
+
+def run(**metrics):
+    return {"cases": [dict(CASE, **metrics)]}
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline = run(alerts_per_second=1000.0, dispatch_p99=0.10, peak_rss_mb=100.0)
+    results = run(alerts_per_second=800.0, dispatch_p99=0.15, peak_rss_mb=90.0)
+    regressions = compare(results, baseline, threshold=0.1)
+    assert len(regressions) == 2
+    assert any("alerts_per_second" in line for line in regressions)
+    assert any("dispatch_p99" in line for line in regressions)
+
+
+def test_compare_ignores_small_changes_and_improvements():
+    baseline = run(alerts_per_second=1000.0, dispatch_p99=0.10)
+    results = run(alerts_per_second=1200.0, dispatch_p99=0.105)
+    assert compare(results, baseline, threshold=0.1) == []
+
+
+def test_compare_skips_new_cases_and_missing_metrics():
+    baseline = run(alerts_per_second=1000.0, cpu_server=0.0)
+    new_case = dict(CASE, spies=1000, alerts_per_second=1.0)
+    results = {"cases": [new_case, dict(CASE, cpu_server=5.0)]}
+    assert compare(results, baseline, threshold=0.1) == []
@@ -0,0 +1,92 @@
+import queue
+import time
+
+import pytest
+
+from common.message import AlertMessage, TaskMessage, create_message_from_json
+from communication.sockets.socket_client import SocketClient
+from communication.sockets.socket_server import SocketServer
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def server():
+    received = []
+    server = SocketServer(host="127.0.0.1", port=0, max_message_size=4096,
+                          message_callback=lambda message, address: received.append(message))
+    server.received = received
+    assert server.start()
+    yield server
+    server.stop()
+
+
+def connect(server, **kwargs):
+    client = SocketClient(host="127.0.0.1", port=server.port, **kwargs)
+    assert client.connect()
+    return client
+
+
+def test_pipelined_sends_are_acked_in_order(server):
+    client = connect(server)
+    try:
+        futures = [client.send_message_async(AlertMessage(sender_id="SPY001", description=str(n)))
+                   for n in range(300)]
+        assert client.flush(timeout=10)
+        assert all(future.result(0).success for future in futures)
+        assert [m.description for m in server.received] == [str(n) for n in range(300)]
+        assert client.acked_count == 300 and client.in_flight == 0
+    finally:
+        client.close()
+
+
+def test_many_clients_share_the_event_loop(server):
+    clients = [connect(server) for _ in range(20)]
+    try:
+        for i, client in enumerate(clients):
+            for n in range(10):
+                client.send_message(AlertMessage(sender_id=f"SPY{i:03d}", description=str(n)))
+        assert all(client.flush(timeout=10) for client in clients)
+        assert len(server.received) == 200
+        for i in range(20):
+            own = [m.description for m in server.received if m.sender_id == f"SPY{i:03d}"]
+            assert own == [str(n) for n in range(10)]
+    finally:
+        for client in clients:
+            client.close()
+
+
+def test_server_reaches_client_by_sender_id(server):
+    inbox = queue.Queue()
+    client = connect(server, message_handler=inbox.put)
+    try:
+        client.send_message(AlertMessage(sender_id="AGENT001"))
+        assert client.flush(timeout=5)
+        assert server.send_to_client("AGENT001", TaskMessage(alert_id="A1", target_agent_id="AGENT001"))
+        task = create_message_from_json(inbox.get(timeout=5))
+        assert task.alert_id == "A1"
+        assert not server.send_to_client("AGENT999", TaskMessage())
+    finally:
+        client.close()
+
+
+def test_oversize_message_drops_only_that_client(server):
+    good = connect(server)
+    bad = connect(server)
+    try:
+        assert wait_for(lambda: len(server.get_connected_clients()) == 2)
+        bad.send_message(AlertMessage(sender_id="SPY666", description="x" * 10000))
+        assert wait_for(lambda: len(server.get_connected_clients()) == 1)
+        good.send_message(AlertMessage(sender_id="SPY001"))
+        assert good.flush(timeout=5)
+        assert [m.sender_id for m in server.received] == ["SPY001"]
+    finally:
+        good.close()
+        bad.close(flush_timeout=0)
@@ -0,0 +1,175 @@
+import os
+import threading
+
+from common.message import AlertMessage
+from communication.spool import SEGMENT_PREFIX, MessageSpool, SpoolDrainer
+
+
+def alert(n):
+    return AlertMessage(message_type="ALERT", sender_id=f"SPY{n:03d}", description=str(n))
+
+
+def fill(spool, count, start=0):
+    for n in range(start, start + count):
+        assert spool.append(alert(n), f"alert.{n}")
+
+
+def read_all(spool):
+    records = []
+    while True:
+        batch = spool.read_batch(7)
+        if not batch:
+            return records
+        records.extend(batch)
+
+
+def descriptions(records):
+    return [message.description for _, message, _ in records]
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith(SEGMENT_PREFIX))
+
+
+def test_reopened_spool_reads_in_order(tmp_path):
+    spool = MessageSpool(str(tmp_path), segment_size=512)
+    fill(spool, 20)
+    spool.close()
+
+    records = read_all(MessageSpool(str(tmp_path), segment_size=512))
+    assert descriptions(records) == [str(n) for n in range(20)]
+    assert [routing_key for _, _, routing_key in records] == [f"alert.{n}" for n in range(20)]
+    assert len(segment_files(tmp_path)) > 1
+
+
+def test_torn_last_record_is_skipped(tmp_path):
+    spool = MessageSpool(str(tmp_path))
+    fill(spool, 3)
+    spool.close()
+    path = os.path.join(tmp_path, segment_files(tmp_path)[-1])
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 5)
+
+    spool = MessageSpool(str(tmp_path))
+    assert descriptions(read_all(spool)) == ["0", "1"]
+    # El registro incompleto se trunca y lo que se escriba después es legible
+    fill(spool, 1, start=3)
+    assert descriptions(read_all(spool)) == ["3"]
+
+
+def test_corrupt_last_record_is_skipped(tmp_path):
+    spool = MessageSpool(str(tmp_path))
+    fill(spool, 3)
+    spool.close()
+    path = os.path.join(tmp_path, segment_files(tmp_path)[-1])
+    with open(path, "r+b") as f:
+        f.seek(-2, os.SEEK_END)
+        f.write(b"XX")
+
+    assert descriptions(read_all(MessageSpool(str(tmp_path)))) == ["0", "1"]
+
+
+def test_commit_survives_reopen(tmp_path):
+    spool = MessageSpool(str(tmp_path), segment_size=512)
+    fill(spool, 20)
+    batch = spool.read_batch(12)
+    spool.commit(batch[-1][0])
+    spool.close()
+
+    spool = MessageSpool(str(tmp_path), segment_size=512)
+    assert spool.has_pending()
+    assert descriptions(read_all(spool)) == [str(n) for n in range(12, 20)]
+
+
+def test_rewind_rereads_uncommitted(tmp_path):
+    spool = MessageSpool(str(tmp_path))
+    fill(spool, 5)
+    spool.commit(spool.read_batch(2)[-1][0])
+    spool.read_batch(2)
+    spool.rewind()
+    assert descriptions(read_all(spool)) == ["2", "3", "4"]
+
+
+def test_has_pending_follows_appends_and_commits(tmp_path):
+    spool = MessageSpool(str(tmp_path), segment_size=256)
+    assert not spool.has_pending()
+    fill(spool, 10)
+    assert spool.has_pending()
+    spool.commit(read_all(spool)[-1][0])
+    assert not spool.has_pending()
+    fill(spool, 1, start=10)
+    assert spool.has_pending()
+
+
+def test_max_bytes_evicts_oldest_segments(tmp_path):
+    spool = MessageSpool(str(tmp_path), segment_size=1024, max_bytes=4096)
+    fill(spool, 200)
+    spool.sync()
+
+    total = sum(os.path.getsize(os.path.join(tmp_path, name)) for name in segment_files(tmp_path))
+    assert total <= 4096 + 1024
+    remaining = [int(d) for d in descriptions(read_all(spool))]
+    assert remaining == list(range(remaining[0], 200))
+    assert remaining[0] > 0
+
+
+def test_drainer_resends_in_order_and_commits(tmp_path):
+    spool = MessageSpool(str(tmp_path))
+    fill(spool, 10)
+    sent = []
+    done = threading.Event()
+
+    def publish(message, routing_key):
+        sent.append(message.description)
+        if len(sent) == 10:
+            done.set()
+        return True
+
+    drainer = SpoolDrainer(spool, publish, lambda: True, rate=0, batch_size=3, poll_interval=0.01)
+    drainer.start()
+    try:
+        assert done.wait(5)
+    finally:
+        drainer.stop()
+    assert sent == [str(n) for n in range(10)]
+    assert not spool.has_pending()
+
+
+def test_drainer_retries_after_failed_publish(tmp_path):
+    spool = MessageSpool(str(tmp_path))
+    fill(spool, 4)
+    sent = []
+    failures = iter([False])
+    done = threading.Event()
+
+    def publish(message, routing_key):
+        if message.description == "2" and next(failures, True) is False:
+            return False
+        sent.append(message.description)
+        if len(sent) == 4:
+            done.set()
+        return True
+
+    drainer = SpoolDrainer(spool, publish, lambda: True, rate=0, batch_size=10, poll_interval=0.01)
+    drainer.start()
+    try:
+        assert done.wait(5)
+    finally:
+        drainer.stop()
+    assert sent == ["0", "1", "2", "3"]
+    assert not spool.has_pending()
+
+
+def test_empty_segment_after_crash_is_not_pending(tmp_path):
+    spool = MessageSpool(str(tmp_path))
+    fill(spool, 2)
+    spool.commit(read_all(spool)[-1][0])
+    spool.close()
+    # Caída justo después de abrir un segmento nuevo
+    open(os.path.join(tmp_path, f"{SEGMENT_PREFIX}00000002.spool"), "wb").close()
+
+    spool = MessageSpool(str(tmp_path))
+    assert spool.has_pending()
+    assert spool.read_batch() == []
+    assert not spool.has_pending()
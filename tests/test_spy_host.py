@@ -0,0 +1,13 @@
+import pytest
+
+from agents.spy_host import partition_spies
+from common.geo import validate_coordinates
+
+
+@pytest.mark.parametrize("spies, hosts, sizes", [(10, 3, [4, 3, 3]), (3, 8, [1, 1, 1]), (0, 2, [0]), (4, 0, [4])])
+def test_partition_spies(spies, hosts, sizes):
+    partition = partition_spies(spies, hosts)
+    assert [len(group) for group in partition] == sizes
+    ids = sorted(spy_id for group in partition for spy_id, _ in group)
+    assert ids == [f"SPY{i + 1:03d}" for i in range(spies)]
+    assert all(validate_coordinates(position) for group in partition for _, position in group)
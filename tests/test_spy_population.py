@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import config
+from agents.spy_population import SpyPopulation, encode_geohashes
+from common.geo import encode_geohash, validate_coordinates
+from communication.rabbitmq.topology import alert_routing_key
+
+IDS = [f"SPY{i + 1:03d}" for i in range(1000)]
+
+
+def test_vectorized_geohash_matches_scalar():
+    rng = np.random.default_rng(1)
+    positions = rng.uniform([-90, -180], [90, 180], size=(200, 2))
+    for precision in (1, 5, 8):
+        assert encode_geohashes(positions, precision) == [encode_geohash(tuple(p), precision) for p in positions]
+    assert encode_geohashes(np.empty((0, 2)), 5) == []
+
+
+def test_alert_counts_follow_the_rate():
+    population = SpyPopulation(IDS, alert_rate=0.5, zones=[], walk_sigma=0, seed=7)
+    total = sum(len(population.draw_alerts(1.0)) for _ in range(20))
+    # 1000 espías x 0.5 alertas/s x 20 s; Poisson: desviación típica 100
+    assert 9500 < total < 10500
+
+
+def test_zone_factor_applies_inside_the_zone():
+    positions = [(40.75, -74.0)] * 500 + [(40.60, -73.80)] * 500
+    zone = ((40.70, -74.05, 40.80, -73.95), 4.0)
+    population = SpyPopulation(IDS, positions, alert_rate=0.1, zones=[zone], walk_sigma=0, seed=3)
+    assert population.rates()[0] == pytest.approx(0.4)
+    assert population.rates()[-1] == pytest.approx(0.1)
+
+    batch = population.draw_alerts(10.0)
+    inside = int(np.sum(batch.spy_indices < 500))
+    assert inside > 3 * (len(batch) - inside)
+
+
+def test_same_seed_same_alerts():
+    batches = [SpyPopulation(IDS, seed=42).step(1.0) for _ in range(2)]
+    assert np.array_equal(batches[0].spy_indices, batches[1].spy_indices)
+    assert np.array_equal(batches[0].positions, batches[1].positions)
+
+
+def test_walk_stays_on_the_map():
+    population = SpyPopulation(IDS[:50], walk_sigma=1.0, seed=5)
+    for _ in range(10):
+        population.move(1.0)
+    assert all(validate_coordinates(tuple(p)) for p in population.positions)
+
+
+def test_batch_messages_and_routing_keys():
+    population = SpyPopulation(IDS[:100], alert_rate=1.0, zones=[], walk_sigma=0, seed=9)
+    batch = population.draw_alerts(1.0)
+    messages = batch.to_messages(population.spy_ids)
+    assert len(messages) == len(batch)
+    assert [alert_routing_key(m.position) for m in messages] == batch.routing_keys()
+    assert all(m.emergency_level in config.EMERGENCY_LEVELS for m in messages)
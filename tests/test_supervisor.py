@@ -0,0 +1,130 @@
+import pytest
+
+import config
+from simulation.launcher import CPU_TIME, HEARTBEAT, RSS_MB
+from simulation.supervisor import ProcessSupervisor
+
+
+class FakeProcess:
+    def __init__(self):
+        self.exitcode = None
+        self.killed = False
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def kill(self):
+        self.killed = True
+        self.exitcode = -9
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeLauncher:
+    """Lanzador con procesos simulados: solo lo que lee y llama el supervisor."""
+
+    def __init__(self, names, now=1.0):
+        self.processes = {name: FakeProcess() for name in names}
+        self.status = {name: [now, 0.0, 0.0] for name in names}
+        self.started_at = {name: now for name in names}
+        self.restarted = []
+        self.now = now
+
+    def poll_ready(self):
+        pass
+
+    def restart(self, name):
+        self.restarted.append(name)
+        self.processes[name] = FakeProcess()
+        self.status[name] = [self.now, 0.0, 0.0]
+        self.started_at[name] = self.now
+
+
+@pytest.fixture(autouse=True)
+def supervision_config(monkeypatch):
+    monkeypatch.setattr(config, "HEARTBEAT_TIMEOUT", 15.0)
+    monkeypatch.setattr(config, "STARTUP_TIMEOUT", 30.0)
+    monkeypatch.setattr(config, "RESTART_BACKOFF_INITIAL", 1.0)
+    monkeypatch.setattr(config, "RESTART_BACKOFF_MAX", 60.0)
+    monkeypatch.setattr(config, "MAX_RESTARTS", 2)
+    monkeypatch.setattr(config, "RESTART_STABLE_AFTER", 60.0)
+
+
+def test_healthy_components_are_left_alone():
+    launcher = FakeLauncher(["server", "HOST01"])
+    supervisor = ProcessSupervisor(launcher)
+    assert supervisor.check(now=10.0) == []
+    assert not supervisor.pending
+
+
+def test_exited_component_restarts_after_backoff():
+    launcher = FakeLauncher(["server", "HOST01"])
+    supervisor = ProcessSupervisor(launcher)
+    launcher.processes["HOST01"].exitcode = 1
+
+    assert supervisor.check(now=10.0) == []
+    assert 10.0 < supervisor.pending["HOST01"] <= 11.0
+    launcher.now = 11.0
+    assert supervisor.check(now=11.0) == ["HOST01"]
+    assert supervisor.restarts["HOST01"] == 1
+    assert supervisor.total_restarts == 1
+
+
+def test_hung_component_is_killed():
+    launcher = FakeLauncher(["HOST01"])
+    supervisor = ProcessSupervisor(launcher)
+    process = launcher.processes["HOST01"]
+    assert supervisor.check(now=16.0) == []
+    supervisor.check(now=16.1)
+    assert process.killed
+    assert "HOST01" in supervisor.pending
+
+
+def test_component_never_ready_is_restarted():
+    launcher = FakeLauncher(["HOST01"])
+    launcher.status["HOST01"][HEARTBEAT] = 0.0
+    supervisor = ProcessSupervisor(launcher)
+    supervisor.check(now=30.0)
+    assert not supervisor.pending
+    supervisor.check(now=32.0)
+    assert "HOST01" in supervisor.pending
+
+
+def test_component_is_abandoned_after_max_restarts():
+    launcher = FakeLauncher(["HOST01"])
+    supervisor = ProcessSupervisor(launcher)
+    now = 1.0
+    for _ in range(config.MAX_RESTARTS):
+        launcher.processes["HOST01"].exitcode = 1
+        supervisor.check(now=now)
+        now += config.RESTART_BACKOFF_MAX
+        launcher.now = now
+        assert supervisor.check(now=now) == ["HOST01"]
+    launcher.processes["HOST01"].exitcode = 1
+    supervisor.check(now=now + 1)
+    assert supervisor.abandoned == ["HOST01"]
+
+
+def test_restart_count_resets_once_stable():
+    launcher = FakeLauncher(["HOST01"])
+    supervisor = ProcessSupervisor(launcher)
+    launcher.processes["HOST01"].exitcode = 1
+    supervisor.check(now=1.0)
+    launcher.now = 3.0
+    supervisor.check(now=3.0)
+    assert supervisor.restarts["HOST01"] == 1
+    launcher.status["HOST01"][HEARTBEAT] = 70.0
+    supervisor.check(now=70.0)
+    assert supervisor.restarts["HOST01"] == 0
+
+
+def test_usage_reports_cpu_percent_since_last_reading():
+    launcher = FakeLauncher(["HOST01"])
+    supervisor = ProcessSupervisor(launcher)
+    launcher.status["HOST01"][CPU_TIME] = 5.0
+    launcher.status["HOST01"][RSS_MB] = 42.0
+    usage = supervisor.usage(now=11.0)["HOST01"]
+    assert usage == {"cpu_percent": pytest.approx(50.0), "cpu_time": 5.0, "rss_mb": 42.0}
+    launcher.status["HOST01"][CPU_TIME] = 6.0
+    assert supervisor.usage(now=21.0)["HOST01"]["cpu_percent"] == pytest.approx(10.0)
@@ -0,0 +1,70 @@
+import pytest
+
+import config
+from common.constants import EmergencyLevel
+from common.geo import encode_geohash
+from common.message import AlertMessage, StatusMessage
+from communication.inmemory.broker import topic_matches
+from communication.rabbitmq import topology
+
+POSITION = (40.75, -74.0)
+
+
+def test_routing_keys():
+    assert topology.alert_routing_key(POSITION) == f"alert.{encode_geohash(POSITION, config.ALERT_CELL_PRECISION)}"
+    assert topology.alert_routing_key(POSITION, precision=3) == f"alert.{encode_geohash(POSITION, 3)}"
+    assert topology.task_routing_key("AGENT001") == "task.agent.AGENT001"
+    assert topology.status_routing_key("AGENT001") == "status.agent.AGENT001"
+    assert topology.completion_routing_key("AGENT001") == "status.agent.AGENT001.completed"
+    assert topology.agent_task_queue("AGENT001") == "tasks.agent.AGENT001"
+    assert topology.host_task_queue("AGENTS01") == "tasks.host.AGENTS01"
+    assert topology.alert_binding_key("dr5ru") == "alert.dr5ru"
+    assert topology.alert_cell_routing_key(encode_geohash(POSITION, 3)) == topology.alert_routing_key(POSITION, 3)
+
+
+def test_bindings_select_their_traffic():
+    alert_key = topology.alert_routing_key(POSITION)
+    status_keys = [topology.status_routing_key("AGENT001"), topology.completion_routing_key("AGENT001")]
+    task_key = topology.task_routing_key("AGENT001")
+
+    assert topic_matches(topology.ALERT_BINDING_KEY, alert_key)
+    assert topic_matches(topology.alert_binding_key(alert_key.split(".", 1)[1]), alert_key)
+    assert not topic_matches(topology.alert_binding_key("zzzzz"), alert_key)
+    assert all(topic_matches(topology.STATUS_BINDING_KEY, key) for key in status_keys)
+    assert not any(topic_matches(topology.ALERT_BINDING_KEY, key) for key in status_keys + [task_key])
+    assert not topic_matches(topology.STATUS_BINDING_KEY, task_key)
+    assert not topic_matches(topology.task_routing_key("AGENT002"), task_key)
+
+
+def test_message_priority_is_level_weight():
+    for level, weight in config.EMERGENCY_LEVELS.items():
+        assert topology.message_priority(AlertMessage(emergency_level=level)) == weight
+    assert topology.message_priority(StatusMessage()) == 0
+
+
+def test_message_priority_is_capped_and_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(config, "RABBITMQ_MAX_PRIORITY", 2)
+    assert topology.message_priority(AlertMessage(emergency_level=EmergencyLevel.CRITICAL)) == 2
+    monkeypatch.setattr(config, "RABBITMQ_MAX_PRIORITY", 0)
+    assert topology.message_priority(AlertMessage(emergency_level=EmergencyLevel.CRITICAL)) == 0
+
+
+@pytest.mark.parametrize("max_priority, dead_letters, priority, expected", [
+    (4, True, True, {"x-max-priority": 4, "x-dead-letter-exchange": topology.DEAD_LETTER_EXCHANGE}),
+    (4, True, False, {"x-dead-letter-exchange": topology.DEAD_LETTER_EXCHANGE}),
+    (4, False, True, {"x-max-priority": 4}),
+    (4, False, False, None),
+    (0, False, True, None),
+])
+def test_queue_arguments(monkeypatch, max_priority, dead_letters, priority, expected):
+    monkeypatch.setattr(config, "RABBITMQ_MAX_PRIORITY", max_priority)
+    monkeypatch.setattr(config, "RABBITMQ_DEAD_LETTER_ENABLED", dead_letters)
+    assert topology.queue_arguments(priority=priority) == expected
+
+
+def test_topology_bindings_per_agent():
+    queues = {queue: keys for queue, keys, _ in topology.topology_bindings(["AGENT001", "AGENT002"])}
+    assert queues[topology.SERVER_ALERTS_QUEUE] == [topology.ALERT_BINDING_KEY]
+    assert queues[topology.SERVER_STATUS_QUEUE] == [topology.STATUS_BINDING_KEY]
+    assert queues["tasks.agent.AGENT002"] == ["task.agent.AGENT002"]
+    assert len(queues) == 4
@@ -2,6 +2,10 @@
 Módulo para la visualización en tiempo real de la simulación de agentes encubiertos.
 Crea un mapa interactivo con Folium que muestra la posición de espías, agentes nocturnos
 y alertas generadas en tiempo real en múltiples zonas de operaciones.
+
+Folium y Flask se importan al generar el mapa y al crear la aplicación, y el log se
+configura al arrancar (``main``), de modo que importar el módulo no abre ficheros ni
+carga dependencias pesadas.
 """
 
 import os
@@ -11,24 +15,9 @@ import json
 import threading
 import webbrowser
 import logging
-import folium
-from folium.plugins import MarkerCluster, HeatMap, Fullscreen, MiniMap
-from flask import Flask, render_template, jsonify, send_from_directory
 from pathlib import Path
 
-# Configurar logging
 logger = logging.getLogger("visualization")
-logger.setLevel(logging.INFO)  # Puedes cambiarlo a DEBUG para más información
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler = logging.FileHandler("visualization.log")
-file_handler.setFormatter(formatter)
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
-# Crear una aplicación Flask para servir el mapa
-app = Flask(__name__)
 
 # Diccionarios para almacenar el estado actual de los agentes y alertas
 agents_data = {}
@@ -91,8 +80,24 @@ EMERGENCY_ICONS = {
 EMERGENCY_LEVELS = ["BAJA", "MEDIA", "ALTA", "CRÍTICA"]
 EMERGENCY_TYPES = ["ROBO", "INCENDIO", "ACCIDENTE", "DISTURBIOS", "SOSPECHOSO"]
 
+def setup_logging():
+    """Configura el log de la visualización (fichero y consola), una sola vez"""
+    if logger.handlers:
+        return
+    logger.setLevel(logging.INFO)  # Puedes cambiarlo a DEBUG para más información
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler("visualization.log")
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+
 def generate_base_map():
     """Genera el mapa base con Folium"""
+    import folium
+    from folium.plugins import MarkerCluster, Fullscreen, MiniMap
+
     # Usar la zona principal para centrar el mapa
     primary = OPERATION_ZONES[PRIMARY_ZONE]
     center_lat = (primary['min_lat'] + primary['max_lat']) / 2
@@ -403,6 +408,9 @@ def generate_random_alerts():
 
 def update_map():
     """Actualiza el mapa con los datos más recientes"""
+    import folium
+    from folium.plugins import HeatMap
+
     logger.info("Iniciando actualización del mapa")
     update_count = 0
 
@@ -570,29 +578,29 @@ def update_map():
             logger.exception(f"Error al actualizar mapa: {e}")
             time.sleep(5)
 
-# Rutas de la aplicación Flask
-@app.route('/')
+# Rutas de la aplicación Flask (se registran en create_app)
 def index():
     """Página principal con el mapa"""
+    from flask import render_template
     return render_template('index.html')
 
-@app.route('/data')
 def get_data():
     """API para obtener datos actualizados para el mapa"""
+    from flask import jsonify
     return jsonify({
         'agents': {k: v for k, v in agents_data.items() if k in list(agents_data.keys())[:200]},  # Limitar cantidad de datos
         'alerts': alerts_data[-100:],  # Solo las últimas 100 alertas
         'connections': connections_data[-50:]  # Solo las últimas 50 conexiones
     })
 
-@app.route('/static/<path:path>')
 def send_static(path):
     """Servir archivos estáticos"""
+    from flask import send_from_directory
     return send_from_directory('static', path)
 
-@app.route('/stats')
 def stats():
     """Proporcionar estadísticas sobre la simulación"""
+    from flask import jsonify
     stats = {
         'num_agents': sum(1 for a in agents_data.values() if a['type'] == 'night_agent'),
         'num_spies': sum(1 for a in agents_data.values() if a['type'] == 'spy'),
@@ -613,6 +621,16 @@ def stats():
     }
     return jsonify(stats)
 
+def create_app():
+    """Crea la aplicación Flask que sirve el mapa y registra sus rutas"""
+    from flask import Flask
+    app = Flask(__name__)
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/data', view_func=get_data)
+    app.add_url_rule('/static/<path:path>', view_func=send_static)
+    app.add_url_rule('/stats', view_func=stats)
+    return app
+
 def create_custom_html():
     """Crear HTML personalizado con JavaScript para actualización dinámica"""
     html_content = """
@@ -731,7 +749,7 @@ def start_server():
 
     # Iniciar el servidor en un hilo separado
     # Usar '0.0.0.0' para que sea accesible desde la red local
-    threading.Thread(target=app.run, kwargs={
+    threading.Thread(target=create_app().run, kwargs={
         'host': '0.0.0.0',
         'port': 5000,
         'debug': False,
@@ -740,6 +758,7 @@ def start_server():
 
 def main():
     """Función principal que inicia toda la aplicación"""
+    setup_logging()
     try:
         logger.info("Iniciando sistema de visualización...")
         threading.Thread(target=simulate_agents, daemon=True).start()